@@ -4,13 +4,14 @@ Quick script to add in-store tags to products from physical stores.
 Uses the simplified scraper config that loads from root .env
 """
 
-from sqlalchemy import create_engine, text
+from sqlalchemy import text
 from app.scraper.store_scrapers.config import config
+from app.db.engines import get_engine
 
 def add_instore_tags():
     print("Adding in-store tags to products from physical stores...")
     
-    engine = create_engine(config.DATABASE_URL, echo=False)
+    engine = get_engine("scripts")
     
     with engine.connect() as conn:
         # Get or create the 'in-store' tag
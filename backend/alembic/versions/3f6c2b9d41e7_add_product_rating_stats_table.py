@@ -0,0 +1,69 @@
+"""add_product_rating_stats_table
+
+Revision ID: 3f6c2b9d41e7
+Revises: 98a7926537a8
+Create Date: 2026-10-17 14:02:11.503871
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f6c2b9d41e7'
+down_revision: Union[str, Sequence[str], None] = '98a7926537a8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'product_rating_stats',
+        sa.Column('product_id', sa.Integer(), nullable=False),
+        sa.Column('review_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('average_product_rating', sa.Float(), nullable=True),
+        sa.Column('average_info_rating', sa.Float(), nullable=True),
+        sa.Column('rating_1_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('rating_2_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('rating_3_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('rating_4_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('rating_5_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.PrimaryKeyConstraint('product_id'),
+        sa.ForeignKeyConstraint(['product_id'], ['products.id'], ondelete='CASCADE'),
+    )
+    # Backs sort_by=rating
+    op.create_index(
+        'ix_product_rating_stats_average_product_rating',
+        'product_rating_stats',
+        [sa.text('average_product_rating DESC NULLS LAST'), sa.text('product_id DESC')],
+    )
+
+    # Backfill from existing reviews (same aggregate as services.rating_stats)
+    op.execute("""
+        INSERT INTO product_rating_stats (
+            product_id, review_count, average_product_rating, average_info_rating,
+            rating_1_count, rating_2_count, rating_3_count, rating_4_count, rating_5_count
+        )
+        SELECT
+            product_id,
+            count(id),
+            avg(product_rating),
+            avg(info_rating),
+            count(*) FILTER (WHERE product_rating = 1),
+            count(*) FILTER (WHERE product_rating = 2),
+            count(*) FILTER (WHERE product_rating = 3),
+            count(*) FILTER (WHERE product_rating = 4),
+            count(*) FILTER (WHERE product_rating = 5)
+        FROM product_reviews
+        GROUP BY product_id
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_product_rating_stats_average_product_rating', table_name='product_rating_stats')
+    op.drop_table('product_rating_stats')
@@ -0,0 +1,34 @@
+"""add_stores_lat_lon_index
+
+Revision ID: 5b0e9d3a7c21
+Revises: c81e5a0f27d4
+Create Date: 2026-10-17 18:20:37.640915
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5b0e9d3a7c21'
+down_revision: Union[str, Sequence[str], None] = 'c81e5a0f27d4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Bounding-box prefilter of sort_by=distance (lat BETWEEN .. AND lon BETWEEN ..)
+    op.create_index(
+        'ix_stores_lat_lon',
+        'stores',
+        ['lat', 'lon'],
+        postgresql_where=sa.text('lat IS NOT NULL AND lon IS NOT NULL'),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_stores_lat_lon', table_name='stores')
@@ -0,0 +1,60 @@
+"""add_trigram_and_fulltext_search_indexes
+
+Revision ID: 7d2e4c9f1a36
+Revises: 5b0e9d3a7c21
+Create Date: 2026-10-17 19:05:52.318406
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7d2e4c9f1a36'
+down_revision: Union[str, Sequence[str], None] = '5b0e9d3a7c21'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Columns searched with ILIKE '%q%' by the q= filters (see app.services.text_search)
+TRIGRAM_COLUMNS = [
+    ('products', 'name'),
+    ('products', 'description'),
+    ('stores', 'name'),
+    ('stores', 'address'),
+    ('stores', 'homepage'),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+
+    for table, column in TRIGRAM_COLUMNS:
+        op.create_index(
+            f'ix_{table}_{column}_trgm',
+            table,
+            [sa.text(f'{column} gin_trgm_ops')],
+            postgresql_using='gin',
+        )
+
+    # Stemmed Spanish + English document; the name outweighs the description
+    op.execute("""
+        ALTER TABLE products ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+            setweight(to_tsvector('spanish', coalesce(name, '')), 'A') ||
+            setweight(to_tsvector('english', coalesce(name, '')), 'A') ||
+            setweight(to_tsvector('spanish', coalesce(description, '')), 'B') ||
+            setweight(to_tsvector('english', coalesce(description, '')), 'B')
+        ) STORED
+    """)
+    op.create_index('ix_products_search_vector', 'products', ['search_vector'], postgresql_using='gin')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_products_search_vector', table_name='products')
+    op.drop_column('products', 'search_vector')
+    for table, column in reversed(TRIGRAM_COLUMNS):
+        op.drop_index(f'ix_{table}_{column}_trgm', table_name=table)
+    # pg_trgm is left installed; other objects may depend on it
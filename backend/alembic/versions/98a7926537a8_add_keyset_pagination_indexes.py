@@ -0,0 +1,45 @@
+"""add_keyset_pagination_indexes
+
+Revision ID: 98a7926537a8
+Revises: d7d41e601bcb
+Create Date: 2026-10-17 10:12:41.118204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '98a7926537a8'
+down_revision: Union[str, Sequence[str], None] = 'd7d41e601bcb'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # One (sort key, id) index per cursor sort mode so "WHERE (key, id) < (:k, :id)"
+    # is an index range scan. B-tree indexes are scanned backwards for the
+    # opposite direction, except price DESC NULLS LAST which needs its own.
+    op.create_index('ix_products_updated_at_id', 'products', ['updated_at', 'id'])
+    op.create_index('ix_products_created_at_id', 'products', ['created_at', 'id'])
+    op.create_index('ix_products_price_id', 'products', ['price', 'id'])
+    op.create_index(
+        'ix_products_price_desc_id',
+        'products',
+        [sa.text('price DESC NULLS LAST'), sa.text('id DESC')],
+    )
+    op.create_index('ix_products_name_id', 'products', ['name', 'id'])
+    op.create_index('ix_stores_name_id', 'stores', ['name', 'id'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_stores_name_id', table_name='stores')
+    op.drop_index('ix_products_name_id', table_name='products')
+    op.drop_index('ix_products_price_desc_id', table_name='products')
+    op.drop_index('ix_products_price_id', table_name='products')
+    op.drop_index('ix_products_created_at_id', table_name='products')
+    op.drop_index('ix_products_updated_at_id', table_name='products')
@@ -0,0 +1,37 @@
+"""add_random_key_to_products
+
+Revision ID: a4f1c8e63b5d
+Revises: 7d2e4c9f1a36
+Create Date: 2026-10-17 20:11:26.904153
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a4f1c8e63b5d'
+down_revision: Union[str, Sequence[str], None] = '7d2e4c9f1a36'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Volatile default: existing rows each get their own value
+    op.add_column(
+        'products',
+        sa.Column('random_key', sa.Float(), server_default=sa.text('random()'), nullable=False),
+    )
+    # sort_by=random and the per-store shuffle of /products/store/{id}
+    op.create_index('ix_products_random_key_id', 'products', ['random_key', 'id'])
+    op.create_index('ix_products_store_id_random_key_id', 'products', ['store_id', 'random_key', 'id'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_products_store_id_random_key_id', table_name='products')
+    op.drop_index('ix_products_random_key_id', table_name='products')
+    op.drop_column('products', 'random_key')
@@ -0,0 +1,51 @@
+"""add_crawl_ledger
+
+Revision ID: b5d8e3f17a42
+Revises: f3b86d0e25a9
+Create Date: 2026-10-19 08:41:12.630417
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b5d8e3f17a42'
+down_revision: Union[str, Sequence[str], None] = 'f3b86d0e25a9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Sitemap lastmod, HTTP validators and content hash per product page, for incremental crawls
+    op.create_table(
+        'crawl_ledger',
+        sa.Column('url_hash', sa.String(length=64), nullable=False),
+        sa.Column('url', sa.Text(), nullable=False),
+        sa.Column('store_id', sa.Integer(), nullable=True),
+        sa.Column('lastmod', sa.String(), nullable=True),
+        sa.Column('etag', sa.String(), nullable=True),
+        sa.Column('last_modified', sa.String(), nullable=True),
+        sa.Column('content_hash', sa.String(length=64), nullable=True),
+        sa.Column('fetched_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('changed_at', sa.DateTime(timezone=True), nullable=False),
+        sa.ForeignKeyConstraint(['store_id'], ['stores.id']),
+        sa.PrimaryKeyConstraint('url_hash'),
+    )
+    op.create_index(op.f('ix_crawl_ledger_store_id'), 'crawl_ledger', ['store_id'], unique=False)
+    op.create_table(
+        'crawl_sweeps',
+        sa.Column('spider', sa.String(), nullable=False),
+        sa.Column('swept_at', sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint('spider'),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('crawl_sweeps')
+    op.drop_index(op.f('ix_crawl_ledger_store_id'), table_name='crawl_ledger')
+    op.drop_table('crawl_ledger')
@@ -0,0 +1,36 @@
+"""add_cache_generations_table
+
+Revision ID: b93d2f7a4c18
+Revises: a4f1c8e63b5d
+Create Date: 2026-10-17 21:02:48.310527
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b93d2f7a4c18'
+down_revision: Union[str, Sequence[str], None] = 'a4f1c8e63b5d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Write-driven version counters behind the read endpoints' ETags
+    table = op.create_table(
+        'cache_generations',
+        sa.Column('name', sa.String(length=50), nullable=False),
+        sa.Column('generation', sa.BigInteger(), server_default='0', nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.PrimaryKeyConstraint('name'),
+    )
+    op.bulk_insert(table, [{'name': name, 'generation': 0} for name in ('products', 'stores', 'tags', 'users')])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('cache_generations')
@@ -0,0 +1,37 @@
+"""add_blob_store_image_digests
+
+Revision ID: c5e8a1d3f720
+Revises: b93d2f7a4c18
+Create Date: 2026-10-17 21:40:12.581904
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c5e8a1d3f720'
+down_revision: Union[str, Sequence[str], None] = 'b93d2f7a4c18'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # SHA-256 keys into the blob store; the bytea columns stay until
+    # scripts/utils/migrate_images_to_blob_store.py has moved every image out
+    op.add_column('products', sa.Column('image_sha256', sa.String(length=64), nullable=True))
+    op.create_index('ix_products_image_sha256', 'products', ['image_sha256'])
+    op.add_column('stores', sa.Column('logo_sha256', sa.String(length=64), nullable=True))
+    op.add_column('users', sa.Column('profile_picture_sha256', sa.String(length=64), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Run migrate_images_to_blob_store.py --restore first, or images moved out are lost to the app
+    op.drop_column('users', 'profile_picture_sha256')
+    op.drop_column('stores', 'logo_sha256')
+    op.drop_index('ix_products_image_sha256', table_name='products')
+    op.drop_column('products', 'image_sha256')
@@ -0,0 +1,56 @@
+"""add_is_test_data_flag_to_products
+
+Revision ID: c81e5a0f27d4
+Revises: 3f6c2b9d41e7
+Create Date: 2026-10-17 16:45:03.227719
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c81e5a0f27d4'
+down_revision: Union[str, Sequence[str], None] = '3f6c2b9d41e7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Frozen copy of app.utils.test_data.TEST_DATA_TAGS at the time of this migration
+TEST_DATA_TAGS = ("mock-data", "test-data", "staging-only", "test-location")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        'products',
+        sa.Column('is_test_data', sa.Boolean(), nullable=False, server_default=sa.false()),
+    )
+
+    # Backfill from the tag associations
+    op.execute(
+        sa.text("""
+            UPDATE products SET is_test_data = true
+            WHERE id IN (
+                SELECT pt.product_id
+                FROM product_tags pt
+                JOIN tags t ON t.id = pt.tag_id
+                WHERE t.name IN :tags
+            )
+        """).bindparams(sa.bindparam('tags', value=list(TEST_DATA_TAGS), expanding=True))
+    )
+
+    # Test rows are a small minority: a partial index finds them for cleanup/inspection
+    op.create_index(
+        'ix_products_is_test_data',
+        'products',
+        ['id'],
+        postgresql_where=sa.text('is_test_data'),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_products_is_test_data', table_name='products')
+    op.drop_column('products', 'is_test_data')
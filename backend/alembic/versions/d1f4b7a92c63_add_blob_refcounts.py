@@ -0,0 +1,49 @@
+"""add_blob_refcounts
+
+Revision ID: d1f4b7a92c63
+Revises: c5e8a1d3f720
+Create Date: 2026-10-17 23:05:48.214637
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd1f4b7a92c63'
+down_revision: Union[str, Sequence[str], None] = 'c5e8a1d3f720'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'blobs',
+        sa.Column('key', sa.String(length=64), nullable=False),
+        sa.Column('size', sa.BigInteger(), nullable=True),
+        sa.Column('refcount', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.PrimaryKeyConstraint('key'),
+    )
+    # Count what is referenced today; sizes need the blob store, so
+    # scripts/utils/blob_dedup.py --recount fills them in afterwards
+    op.execute(
+        """
+        INSERT INTO blobs (key, refcount)
+        SELECT key, COUNT(*) FROM (
+            SELECT image_sha256 AS key FROM products WHERE image_sha256 IS NOT NULL
+            UNION ALL SELECT logo_sha256 FROM stores WHERE logo_sha256 IS NOT NULL
+            UNION ALL SELECT profile_picture_sha256 FROM users WHERE profile_picture_sha256 IS NOT NULL
+        ) refs
+        GROUP BY key
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('blobs')
@@ -0,0 +1,40 @@
+"""add_image_sources
+
+Revision ID: e7a2c9d41b05
+Revises: d1f4b7a92c63
+Create Date: 2026-10-18 09:12:37.508211
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e7a2c9d41b05'
+down_revision: Union[str, Sequence[str], None] = 'd1f4b7a92c63'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Validators of scraped image URLs, for If-None-Match/If-Modified-Since on the next crawl
+    op.create_table(
+        'image_sources',
+        sa.Column('url_hash', sa.String(length=64), nullable=False),
+        sa.Column('url', sa.Text(), nullable=False),
+        sa.Column('sha256', sa.String(length=64), nullable=False),
+        sa.Column('filename', sa.String(), nullable=True),
+        sa.Column('content_type', sa.String(), nullable=True),
+        sa.Column('etag', sa.String(), nullable=True),
+        sa.Column('last_modified', sa.String(), nullable=True),
+        sa.Column('checked_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.PrimaryKeyConstraint('url_hash'),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('image_sources')
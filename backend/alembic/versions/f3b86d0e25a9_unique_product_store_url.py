@@ -0,0 +1,172 @@
+"""unique_product_store_url
+
+Revision ID: f3b86d0e25a9
+Revises: e7a2c9d41b05
+Create Date: 2026-10-18 11:27:54.093152
+
+"""
+import logging
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3b86d0e25a9'
+down_revision: Union[str, Sequence[str], None] = 'e7a2c9d41b05'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+logger = logging.getLogger('alembic.runtime.migration')
+
+# Frozen copy of app.utils.test_data.TEST_DATA_TAGS, as in c81e5a0f27d4
+TEST_DATA_TAGS = ("mock-data", "test-data", "staging-only", "test-location")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Rows scraped twice before the index existed are merged into the oldest
+    # row of their (store_id, url): it takes over their tags and reviews and
+    # the copies are deleted.
+    bind = op.get_bind()
+    op.execute(
+        """
+        CREATE TEMPORARY TABLE product_url_merge AS
+        SELECT p.id AS duplicate_id, k.keep_id
+        FROM products p
+        JOIN (
+            SELECT store_id, url, min(id) AS keep_id
+            FROM products
+            WHERE store_id IS NOT NULL AND url IS NOT NULL
+            GROUP BY store_id, url
+            HAVING count(*) > 1
+        ) k ON k.store_id = p.store_id AND k.url = p.url
+        WHERE p.id <> k.keep_id
+        """
+    )
+    pairs = bind.execute(
+        sa.text("SELECT keep_id, duplicate_id FROM product_url_merge ORDER BY keep_id, duplicate_id")
+    ).all()
+    if pairs:
+        _merge_duplicates(bind, pairs)
+    op.execute("DROP TABLE product_url_merge")
+
+    op.create_index(
+        'uq_products_store_url',
+        'products',
+        ['store_id', 'url'],
+        unique=True,
+        postgresql_where=sa.text('url IS NOT NULL'),
+    )
+
+
+def _merge_duplicates(bind, pairs) -> None:
+    op.execute(
+        """
+        INSERT INTO product_tags (product_id, tag_id)
+        SELECT DISTINCT m.keep_id, pt.tag_id
+        FROM product_tags pt
+        JOIN product_url_merge m ON m.duplicate_id = pt.product_id
+        ON CONFLICT DO NOTHING
+        """
+    )
+    op.execute("DELETE FROM product_tags WHERE product_id IN (SELECT duplicate_id FROM product_url_merge)")
+
+    # One review per user and product: a user's review of the kept row wins,
+    # else their latest review of a copy moves over
+    moved_reviews = bind.execute(sa.text(
+        """
+        UPDATE product_reviews AS r SET product_id = m.keep_id
+        FROM product_url_merge m
+        WHERE r.product_id = m.duplicate_id
+          AND NOT EXISTS (
+              SELECT 1 FROM product_reviews kept
+              WHERE kept.product_id = m.keep_id AND kept.user_id = r.user_id
+          )
+          AND r.id = (
+              SELECT max(other.id)
+              FROM product_reviews other
+              JOIN product_url_merge om ON om.duplicate_id = other.product_id
+              WHERE om.keep_id = m.keep_id AND other.user_id = r.user_id
+          )
+        """
+    )).rowcount
+    dropped_reviews = bind.execute(sa.text(
+        "SELECT id, product_id, user_id FROM product_reviews "
+        "WHERE product_id IN (SELECT duplicate_id FROM product_url_merge) ORDER BY id"
+    )).all()
+
+    op.execute("DELETE FROM product_reviews WHERE product_id IN (SELECT duplicate_id FROM product_url_merge)")
+    op.execute(
+        """
+        DELETE FROM product_rating_stats
+        WHERE product_id IN (SELECT keep_id FROM product_url_merge)
+           OR product_id IN (SELECT duplicate_id FROM product_url_merge)
+        """
+    )
+    # Same aggregate as services.rating_stats
+    op.execute(
+        """
+        INSERT INTO product_rating_stats (
+            product_id, review_count, average_product_rating, average_info_rating,
+            rating_1_count, rating_2_count, rating_3_count, rating_4_count, rating_5_count
+        )
+        SELECT
+            product_id,
+            count(id),
+            avg(product_rating),
+            avg(info_rating),
+            count(*) FILTER (WHERE product_rating = 1),
+            count(*) FILTER (WHERE product_rating = 2),
+            count(*) FILTER (WHERE product_rating = 3),
+            count(*) FILTER (WHERE product_rating = 4),
+            count(*) FILTER (WHERE product_rating = 5)
+        FROM product_reviews
+        WHERE product_id IN (SELECT keep_id FROM product_url_merge)
+        GROUP BY product_id
+        """
+    )
+
+    # The copies' images are released, as a delete through the ORM would
+    op.execute(
+        """
+        UPDATE blobs SET refcount = blobs.refcount - released.released_count
+        FROM (
+            SELECT p.image_sha256 AS key, count(*) AS released_count
+            FROM products p
+            JOIN product_url_merge m ON m.duplicate_id = p.id
+            WHERE p.image_sha256 IS NOT NULL
+            GROUP BY p.image_sha256
+        ) released
+        WHERE blobs.key = released.key
+        """
+    )
+    op.execute("DELETE FROM products WHERE id IN (SELECT duplicate_id FROM product_url_merge)")
+    op.execute(
+        sa.text("""
+            UPDATE products SET is_test_data = EXISTS (
+                SELECT 1
+                FROM product_tags pt
+                JOIN tags t ON t.id = pt.tag_id
+                WHERE pt.product_id = products.id AND t.name IN :tags
+            )
+            WHERE id IN (SELECT keep_id FROM product_url_merge)
+        """).bindparams(sa.bindparam('tags', value=list(TEST_DATA_TAGS), expanding=True))
+    )
+    op.execute("UPDATE cache_generations SET generation = generation + 1 WHERE name = 'products'")
+
+    logger.warning(
+        "Merged %d duplicate products into %d (store_id, url) rows; %d reviews moved, %d dropped "
+        "(same user as a kept review). Reindex search to drop the deleted copies.",
+        len(pairs), len({keep for keep, _ in pairs}), moved_reviews, len(dropped_reviews),
+    )
+    for keep, duplicate in pairs:
+        logger.info("Product %d merged into %d", duplicate, keep)
+    for review_id, product_id, user_id in dropped_reviews:
+        logger.info("Dropped review %d of product %d by user %d", review_id, product_id, user_id)
+
+
+def downgrade() -> None:
+    """Downgrade schema (merged products stay merged)."""
+    op.drop_index('uq_products_store_url', table_name='products')
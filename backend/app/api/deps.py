@@ -1,6 +1,13 @@
 # backend/app/api/deps.py
-from typing import Generator
-from app.db.session import SessionLocal
+from typing import AsyncGenerator, Callable, Generator
+
+from fastapi import Depends, Request
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.db.cache_generations import read_generations
+from app.db.session import AsyncSessionLocal, SessionLocal
+from app.services.http_cache import check_conditional
 
 
 def get_db() -> Generator:
@@ -9,3 +16,26 @@ def get_db() -> Generator:
         yield db
     finally:
         db.close()
+
+
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+def conditional_get(*resources: str) -> Callable[..., None]:
+    """Route dependency: 304 when If-None-Match matches the current ETag of `resources`."""
+
+    def dependency(request: Request, db: Session = Depends(get_db)) -> None:
+        check_conditional(request, read_generations(db, resources))
+
+    return dependency
+
+
+def async_conditional_get(*resources: str) -> Callable[..., None]:
+    """`conditional_get` for the async routes."""
+
+    async def dependency(request: Request, db: AsyncSession = Depends(get_async_db)) -> None:
+        check_conditional(request, await db.run_sync(read_generations, resources))
+
+    return dependency
@@ -8,6 +8,7 @@ from typing import Dict, Any, List
 from app.api.deps import get_db
 from app.db.models import User, Product, Store, Tag, UserRole
 from app.auth.security import get_current_user
+from app.storage.dedup import dedup_report
 
 router = APIRouter()
 
@@ -146,4 +147,14 @@ def get_users_list(
             "stores": u[4]
         }
         for u in users
-    ]
\ No newline at end of file
+    ]
+
+
+@router.get("/images/dedup")
+def get_image_dedup_report(
+    top: int = 10,
+    db: Session = Depends(get_db),
+    admin: User = Depends(require_admin)
+) -> Dict[str, Any]:
+    """Storage saved by keeping each distinct image once, and the most shared images."""
+    return dedup_report(db, top=min(top, 100))
@@ -0,0 +1,94 @@
+# backend/app/api/v1/async_reads.py
+"""Async variants of the hot read endpoints.
+
+Enabled with `ASYNC_DB_READS=true` (see `app.main`). Each route keeps the
+parameters and the response of its sync counterpart: the sync handler runs
+through `AsyncSession.run_sync` on an asyncpg connection, so a request waiting
+on Postgres no longer holds one of Starlette's threadpool slots, and search
+awaits Elasticsearch instead of blocking a worker thread. The sync routers
+stay registered behind these routes; unset the flag to fall back to them.
+"""
+import inspect
+from functools import wraps
+from typing import Any, Callable, Optional
+
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import Response
+from pydantic import TypeAdapter
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.api.deps import async_conditional_get, get_async_db
+from app.api.v1 import products, reviews, search, stores
+from app.logging_config import get_logger
+from app.schemas import product as product_schema
+from app.schemas import review as review_schema
+from app.search.client import search_client
+from app.search.queries import build_product_aggregation_query
+from app.services.http_cache import PRODUCT_RESOURCES, STORE_RESOURCES
+
+router = APIRouter()
+logger = get_logger("api.async_reads")
+
+
+def run_sync_endpoint(endpoint: Callable[..., Any], response_model: Optional[Any] = None) -> Callable[..., Any]:
+    """Async endpoint with `endpoint`'s signature whose `db` is an AsyncSession."""
+    signature = inspect.signature(endpoint)
+    parameters = [
+        param.replace(default=Depends(get_async_db), annotation=AsyncSession) if param.name == "db" else param
+        for param in signature.parameters.values()
+    ]
+    adapter = TypeAdapter(response_model) if response_model is not None else None
+
+    def call(session: Session, kwargs: dict[str, Any]) -> Any:
+        result = endpoint(db=session, **kwargs)
+        if adapter is None or isinstance(result, Response):
+            return result
+        # Serialize inside run_sync: lazy loads cannot run on the event loop
+        return adapter.dump_python(adapter.validate_python(result, from_attributes=True), mode="json")
+
+    @wraps(endpoint)
+    async def handler(db: AsyncSession, **kwargs: Any) -> Any:
+        return await db.run_sync(call, kwargs)
+
+    handler.__signature__ = signature.replace(parameters=parameters)
+    return handler
+
+
+@wraps(search.search_products)
+async def search_products(**params: Any) -> dict[str, Any]:
+    if not await search_client.async_is_available():
+        logger.warning("Elasticsearch unavailable")
+        raise HTTPException(status_code=503, detail="Search service temporarily unavailable")
+
+    include_aggregations = params.pop("include_aggregations")
+    try:
+        response = await search_client.async_search(search.product_search_query(**params))
+        result = search.search_result(response, params["limit"], params["offset"])
+        if include_aggregations:
+            agg_response = await search_client.async_search(build_product_aggregation_query(query=params["q"]))
+            result['aggregations'] = search.search_aggregations(agg_response)
+        return result
+    except Exception as e:
+        logger.error("Error in product search", error=str(e))
+        raise HTTPException(status_code=500, detail="Search request failed")
+
+
+# Registered ahead of the sync routers, so `{product_id:int}` keeps /products/my
+# and friends falling through to them. Hidden from the schema: the sync routes
+# document the same contract. Database-backed routes revalidate like their sync
+# counterparts; search results have no generation to tag them with.
+ROUTES = [
+    ("/products/", run_sync_endpoint(products.list_products), PRODUCT_RESOURCES),
+    ("/products/{product_id:int}", run_sync_endpoint(products.get_product, product_schema.ProductOut),
+     PRODUCT_RESOURCES),
+    ("/products/{product_id:int}/reviews",
+     run_sync_endpoint(reviews.list_product_reviews, list[review_schema.ProductReviewOut]), None),
+    ("/stores/", run_sync_endpoint(stores.list_stores), STORE_RESOURCES),
+    ("/stores", run_sync_endpoint(stores.list_stores), STORE_RESOURCES),
+    ("/search/products/", search_products, None),
+]
+
+for path, endpoint, resources in ROUTES:
+    dependencies = [Depends(async_conditional_get(*resources))] if resources else None
+    router.add_api_route(path, endpoint, methods=["GET"], include_in_schema=False, dependencies=dependencies)
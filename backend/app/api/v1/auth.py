@@ -1,6 +1,5 @@
 # backend/app/api/v1/auth.py
-from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks, UploadFile, File
-from fastapi.responses import Response
+from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks, Request, UploadFile, File
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
 
@@ -16,6 +15,8 @@ from app.auth.utils import (
     send_reset_email,
 )
 from app.auth.security import get_current_user
+from app.storage.blobs import image_response, store_image
+from app.storage.normalize import ImageNormalizationError, normalize_upload_sync
 
 router = APIRouter()
 
@@ -196,34 +197,28 @@ def upload_profile_picture(
     db: Session = Depends(get_db),
 ):
     """Upload a profile picture for the current user."""
-    # Read and store the image data
-    picture_data = file.file.read()
-
     # Merge the user into this session to track changes
     user = db.merge(current_user)
-    user.profile_picture_data = picture_data
-    user.profile_picture_filename = file.filename
-    user.profile_picture_content_type = file.content_type
+    try:
+        image = normalize_upload_sync(file.file.read(), file.filename)
+    except ImageNormalizationError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    # Write the bytes to the blob store; the row keeps their digest
+    store_image(user, "profile_picture", image.data, image.filename, image.content_type)
 
     db.commit()
-    return {"message": "Profile picture uploaded successfully"}
+    return {"message": "Profile picture uploaded successfully", "bytes_saved": image.bytes_saved}
 
 
 @router.get("/user/{user_id}/profile-picture")
-def get_user_profile_picture(user_id: int, db: Session = Depends(get_db)):
+def get_user_profile_picture(user_id: int, request: Request, v: str | None = None, db: Session = Depends(get_db)):
     """Get the profile picture for a user."""
     user = db.query(User).filter(User.id == user_id).first()
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
-    if not user.profile_picture_data:
+    response = image_response(user, "profile_picture", "profile.jpg", request, v)
+    if response is None:
         raise HTTPException(status_code=404, detail="User has no profile picture")
-
-    return Response(
-        content=user.profile_picture_data,
-        media_type=user.profile_picture_content_type or "image/jpeg",
-        headers={
-            "Content-Disposition": f'inline; filename="{user.profile_picture_filename or "profile.jpg"}"',
-            "Cache-Control": "public, max-age=86400",
-        }
-    )
+    return response
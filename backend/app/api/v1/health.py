@@ -1,6 +1,8 @@
 import os
 from fastapi import APIRouter
 
+from app.db.engines import pool_metrics
+
 router = APIRouter()
 
 
@@ -23,3 +25,9 @@ def health_check():
         'environment': required_vars,
         'warnings': [] if all_set else ['Missing environment variables: ' + ', '.join(k for k, v in required_vars.items() if not v)]
     }
+
+
+@router.get('/health/db')
+def database_pool_health():
+    """Connection pool utilization and checkout wait times per engine role."""
+    return {'pools': pool_metrics()}
@@ -1,20 +1,38 @@
 # backend/app/api/v1/products.py
 from collections.abc import Generator
-from sqlalchemy import or_, func, and_, not_
-from fastapi import APIRouter, Depends, HTTPException, Response, UploadFile, File
+from datetime import datetime
+from decimal import Decimal
+from sqlalchemy import or_, and_, not_
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, UploadFile, File
 from sqlalchemy.orm import Session, joinedload
 
-from app.db.models import Product, User, Tag, Store, ProductReview
+from app.db.models import Product, User, Tag, Store, ProductRatingStats
 from app.schemas import product as schema
 from app.auth.security import get_current_user
-from app.api.deps import get_db
+from app.api.deps import conditional_get, get_db
 from app.search.indexing import index_product, delete_product_from_index
 from app.search.client import search_client
 from app.logging_config import get_logger
-from app.utils.test_data import get_excluded_test_tags
+from app.services.product_listing import (
+    json_response,
+    load_rating_stats,
+    product_listing_query,
+    products_response,
+    serialize_product_rows,
+)
+from app.services.http_cache import PRODUCT_RESOURCES
+from app.services.geo import distance_sort_key, fetch_nearest
+from app.services.pagination import SortKey, cursor_headers, decode_cursor, fetch_page, next_cursor
+from app.services.shuffle import SHUFFLE_SORT_KEY, fetch_shuffled, resolve_seed, shuffle_sort
+from app.services.text_search import PRODUCT_SEARCH_VECTOR, text_match, text_rank
+from app.storage.blobs import clear_image, image_response, store_image
+from app.storage.normalize import ImageNormalizationError, normalize_upload
+from app.storage.variants import schedule_variants, variant_response
 
 router = APIRouter()
 logger = get_logger("api.products")
+# ETag / If-None-Match on the read routes (see services.http_cache)
+conditional = Depends(conditional_get(*PRODUCT_RESOURCES))
 
 
 def enrich_products_with_ratings(products: list[Product], db: Session) -> list[Product]:
@@ -22,29 +40,7 @@ def enrich_products_with_ratings(products: list[Product], db: Session) -> list[P
     if not products:
         return products
 
-    product_ids = [p.id for p in products]
-
-    # Get rating stats for all products in one query
-    rating_stats = db.query(
-        ProductReview.product_id,
-        func.avg(ProductReview.product_rating).label('avg_product_rating'),
-        func.avg(ProductReview.info_rating).label('avg_info_rating'),
-        func.count(ProductReview.id).label('review_count')
-    ).filter(
-        ProductReview.product_id.in_(product_ids)
-    ).group_by(
-        ProductReview.product_id
-    ).all()
-
-    # Create a lookup dict
-    stats_dict = {
-        stat.product_id: {
-            'average_product_rating': round(stat.avg_product_rating, 1) if stat.avg_product_rating else None,
-            'average_info_rating': round(stat.avg_info_rating, 1) if stat.avg_info_rating else None,
-            'review_count': stat.review_count
-        }
-        for stat in rating_stats
-    }
+    stats_dict = load_rating_stats(db, [p.id for p in products])
 
     # Enrich products with rating data
     for product in products:
@@ -56,10 +52,28 @@ def enrich_products_with_ratings(products: list[Product], db: Session) -> list[P
     return products
 
 
+# Keyset sort modes for list_products; every one is backed by a (key, id) index
+PRODUCT_SORT_KEYS = {
+    "updated_at": SortKey(Product.updated_at, Product.id, "updated_at", parse=datetime.fromisoformat),
+    "updated_at_asc": SortKey(Product.updated_at, Product.id, "updated_at", descending=False,
+                              parse=datetime.fromisoformat),
+    "created_at": SortKey(Product.created_at, Product.id, "created_at", parse=datetime.fromisoformat),
+    "created_at_asc": SortKey(Product.created_at, Product.id, "created_at", descending=False,
+                              parse=datetime.fromisoformat),
+    "price_desc": SortKey(Product.price, Product.id, "price", nullable=True, parse=Decimal),
+    "price_asc": SortKey(Product.price, Product.id, "price", descending=False, nullable=True, parse=Decimal),
+    "name_asc": SortKey(Product.name, Product.id, "name", descending=False),
+    # Reads the maintained product_rating_stats row; unrated products sort last
+    "rating": SortKey(ProductRatingStats.average_product_rating, Product.id, "average_product_rating",
+                      nullable=True, parse=float),
+}
+PRODUCT_SORT_ALIASES = {"newest": "updated_at", "oldest": "updated_at_asc"}
+
+
 # ───────────────────────────────────────────
 # CRUD endpoints
 # ───────────────────────────────────────────
-@router.get("/", response_model=list[schema.ProductOut])
+@router.get("/", response_model=list[schema.ProductOut], dependencies=[conditional])
 def list_products(
     store_id: int | None = None,
     store_ids: str | None = None,  # Comma-separated list of store IDs
@@ -74,28 +88,16 @@ def list_products(
     include_test_data: bool = False,  # Include mock/test data in results
     limit: int = 20,
     offset: int = 0,
+    cursor: str | None = None,  # Opaque keyset cursor from X-Next-Cursor; takes precedence over offset
+    seed: int | None = None,  # sort_by=random: same seed, same order (the cursor remembers it)
     db: Session = Depends(get_db),
 ):
-    # Start with eager loading to prevent N+1 queries
-    query = db.query(Product).options(
-        joinedload(Product.store),
-        joinedload(Product.creator),
-        joinedload(Product.tags)
-    )
+    # Column-only query: no ORM objects, no image/logo BLOBs
+    query = product_listing_query(db)
 
     # Exclude test/mock data by default unless explicitly requested
     if not include_test_data:
-        excluded_tags = get_excluded_test_tags()
-        if excluded_tags:
-            # Subquery to find products with excluded tags
-            excluded_products = (
-                db.query(Product.id)
-                .join(Product.tags)
-                .filter(Tag.name.in_(excluded_tags))
-                .subquery()
-            )
-            # Exclude products that have any of the excluded tags
-            query = query.filter(~Product.id.in_(excluded_products))
+        query = query.filter(Product.is_test_data.is_(False))
 
     # Handle multiple store IDs if provided
     if store_ids is not None:
@@ -112,16 +114,12 @@ def list_products(
 
     if store_name is not None:
         # Join with Store table to filter by store name (case-insensitive partial match)
-        from app.db.models import Store
         query = query.join(Store).filter(Store.name.ilike(f"%{store_name}%"))
 
     if q:
-        search_term = f"%{q}%"
+        # Trigram + full-text indexed match (see services.text_search)
         query = query.filter(
-            or_(
-                Product.name.ilike(search_term),
-                Product.description.ilike(search_term)
-            )
+            text_match(db, q, [Product.name, Product.description], PRODUCT_SEARCH_VECTOR)
         )
 
     if min_price is not None:
@@ -134,118 +132,107 @@ def list_products(
         tag_list = [tag.strip() for tag in tags.split(',')]
         # Only apply tag filter if tag_list contains actual tag names
         if tag_list and any(tag_name for tag_name in tag_list):
-            query = query.join(Product.tags).filter(Tag.name.in_(tag_list))
+            # EXISTS instead of a join so products matching several tags aren't duplicated
+            query = query.filter(Product.tags.any(Tag.name.in_(tag_list)))
 
-    # Handle distance-based sorting
+    # Nearest first: bounding-box rings over the stores (lat, lon) index
     if sort_by == "distance" and user_lat is not None and user_lon is not None:
-        from app.db.models import Store
-        # Join with Store table
-        query = query.join(Store)
-
-        # Calculate distance using Haversine formula
-        # This uses PostgreSQL's math functions for distance calculation
-        # Distance in kilometers
-        distance = func.acos(
-            func.cos(func.radians(user_lat)) *
-            func.cos(func.radians(Store.lat)) *
-            func.cos(func.radians(Store.lon) - func.radians(user_lon)) +
-            func.sin(func.radians(user_lat)) *
-            func.sin(func.radians(Store.lat))
-        ) * 6371  # Earth's radius in km
-
-        # Filter out stores without coordinates and sort by distance
-        query = query.filter(Store.lat.isnot(None), Store.lon.isnot(None))
-        query = query.order_by(distance)
-    elif sort_by == "price_desc":
-        query = query.order_by(Product.price.desc())
-    elif sort_by == "name_asc":
-        query = query.order_by(Product.name.asc())
-    elif sort_by == "random":
-        query = query.order_by(func.random())
-    elif sort_by == "newest" or sort_by == "updated_at":
-        query = query.order_by(Product.updated_at.desc())
-    elif sort_by == "oldest" or sort_by == "updated_at_asc":
-        query = query.order_by(Product.updated_at.asc())
-    elif sort_by == "created_at":
-        query = query.order_by(Product.created_at.desc())
-    elif sort_by == "created_at_asc":
-        query = query.order_by(Product.created_at.asc())
+        if store_name is None:
+            query = query.join(Store)
+        sort_key = distance_sort_key(user_lat, user_lon, Store.lat, Store.lon, Product.id)
+        after = None
+        if cursor:
+            after = decode_cursor(cursor, "distance", sort_key)
+            if after[0] is None:
+                raise HTTPException(400, "Invalid cursor")
+        rows = fetch_nearest(
+            query, sort_key, user_lat, user_lon, Store.lat, Store.lon,
+            limit=limit, offset=0 if cursor else offset, after=after,
+        )
+        headers = cursor_headers(next_cursor(rows, sort_key, "distance", limit))
+        return json_response(serialize_product_rows(db, rows), headers=headers)
+
+    if sort_by == "random":
+        return _shuffled_response(db, query, seed, cursor, offset, limit)
+    elif q and sort_by in (None, "relevance"):
+        # Searches come back best match first unless another order is requested
+        rank = text_rank(db, q, Product.name, PRODUCT_SEARCH_VECTOR)
+        query = query.add_columns(rank.label("relevance"))
+        sort = "relevance"
+        sort_key = SortKey(rank, Product.id, "relevance", parse=float)
     else:
         # Default sort by last modification date if no valid sort_by specified
-        query = query.order_by(Product.updated_at.desc())
+        sort = PRODUCT_SORT_ALIASES.get(sort_by, sort_by)
+        if sort not in PRODUCT_SORT_KEYS:
+            sort = "updated_at"
+        sort_key = PRODUCT_SORT_KEYS[sort]
+        if sort == "rating":
+            query = query.outerjoin(
+                ProductRatingStats, ProductRatingStats.product_id == Product.id
+            ).add_columns(ProductRatingStats.average_product_rating)
 
-    products = query.offset(offset).limit(limit).all()
-    return enrich_products_with_ratings(products, db)
+    rows = fetch_page(query, sort_key, sort, cursor, offset, limit)
+    headers = cursor_headers(next_cursor(rows, sort_key, sort, limit))
+    return json_response(serialize_product_rows(db, rows), headers=headers)
 
 
-@router.get("/my", response_model=list[schema.ProductOut])
+@router.get("/my", response_model=list[schema.ProductOut], dependencies=[Depends(get_current_user), conditional])
 def list_my_products(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    """List products created by the current user - with eager loading to prevent N+1 queries."""
-    products = (
-        db.query(Product)
-        .options(
-            joinedload(Product.store),
-            joinedload(Product.creator),
-            joinedload(Product.tags)
-        )
+    """List products created by the current user."""
+    query = (
+        product_listing_query(db)
         .filter(Product.creator_id == current_user.id)
         .order_by(Product.created_at.desc())
-        .all()
     )
-    return enrich_products_with_ratings(products, db)
+    return products_response(db, query)
 
 
-@router.get("/store/{store_id}", response_model=list[schema.ProductOut])
+@router.get("/store/{store_id}", response_model=list[schema.ProductOut], dependencies=[conditional])
 def list_products_by_store(
     store_id: int,
     include_test_data: bool = False,
+    limit: int = 50,
+    offset: int = 0,
+    cursor: str | None = None,
+    seed: int | None = None,
     db: Session = Depends(get_db)
 ):
-    """List products for a specific store - with eager loading to prevent N+1 queries."""
-    query = (
-        db.query(Product)
-        .options(
-            joinedload(Product.store),
-            joinedload(Product.creator),
-            joinedload(Product.tags)
-        )
-        .filter(Product.store_id == store_id)
-    )
+    """List products for a specific store in shuffled order.
+
+    Follow `X-Next-Cursor` for more pages; the order stays the same for a given `seed`.
+    """
+    query = product_listing_query(db).filter(Product.store_id == store_id)
 
     # Exclude test/mock data by default unless explicitly requested
     if not include_test_data:
-        excluded_tags = get_excluded_test_tags()
-        if excluded_tags:
-            excluded_products = (
-                db.query(Product.id)
-                .join(Product.tags)
-                .filter(Tag.name.in_(excluded_tags))
-                .subquery()
-            )
-            query = query.filter(~Product.id.in_(excluded_products))
+        query = query.filter(Product.is_test_data.is_(False))
 
-    products = query.order_by(func.random()).all()
-    return enrich_products_with_ratings(products, db)
+    return _shuffled_response(db, query, seed, cursor, offset, limit)
 
 
-@router.get("/user/{user_id}", response_model=list[schema.ProductOut])
+def _shuffled_response(db: Session, query, seed: int | None, cursor: str | None, offset: int, limit: int) -> Response:
+    server_seeded = seed is None and not cursor
+    seed = resolve_seed(seed, cursor)
+    rows = fetch_shuffled(query.add_columns(Product.random_key), seed, cursor, offset, limit)
+    headers = cursor_headers(next_cursor(rows, SHUFFLE_SORT_KEY, shuffle_sort(seed), limit))
+    if server_seeded:
+        # A fresh order on every request: nothing to revalidate
+        headers["Cache-Control"] = "no-store"
+    return json_response(serialize_product_rows(db, rows), headers=headers)
+
+
+@router.get("/user/{user_id}", response_model=list[schema.ProductOut], dependencies=[conditional])
 def list_products_by_user(user_id: int, db: Session = Depends(get_db)):
-    """List products uploaded by a specific user - with eager loading to prevent N+1 queries."""
-    products = (
-        db.query(Product)
-        .options(
-            joinedload(Product.store),
-            joinedload(Product.creator),
-            joinedload(Product.tags)
-        )
+    """List products uploaded by a specific user."""
+    query = (
+        product_listing_query(db)
         .filter(Product.creator_id == user_id)
         .order_by(Product.created_at.desc())
-        .all()
     )
-    return enrich_products_with_ratings(products, db)
+    return products_response(db, query)
 
 
 # TODO HOW TO UPDATE PRODUCT
@@ -321,10 +308,9 @@ def create_product(
     return product
 
 
-@router.get("/{product_id}", response_model=schema.ProductOut)
+@router.get("/{product_id}", response_model=schema.ProductOut, dependencies=[conditional])
 def get_product(product_id: int, db: Session = Depends(get_db)):
     # Use query with joinedload to include creator information
-    from sqlalchemy.orm import joinedload
     product = db.query(Product).options(
         joinedload(Product.creator),
         joinedload(Product.store)
@@ -419,28 +405,50 @@ def add_tag_to_product(
 
 
 @router.get("/{product_id}/image")
-def get_product_image(product_id: int, db: Session = Depends(get_db)):
-    """Get the image data for a product."""
+def get_product_image(
+    product_id: int,
+    request: Request,
+    w: int | None = None,  # Resized variant at least this wide (see image_srcset)
+    v: str | None = None,  # Content version from image_url; makes the response immutable
+    db: Session = Depends(get_db),
+):
+    """Get the image data for a product.
+
+    ETag is the content hash: If-None-Match gets a 304 without reading the image.
+    """
     product = db.get(Product, product_id)
     if not product:
         raise HTTPException(404, "Product not found")
-    
-    if not product.image_data:
+
+    if w is not None and product.image_sha256:
+        # Rendered on first request if the upload-time job hasn't made it yet
+        response = variant_response(product.image_sha256, w, request.headers.get("accept"), request, v)
+        if response is not None:
+            return response
+
+    # Served from the blob store (nginx X-Accel-Redirect in production)
+    response = image_response(product, "image", "image.jpg", request, v)
+    if response is None:
         raise HTTPException(404, "No image data available for this product")
-    
-    # Return the image data with proper content type
-    return Response(
-        content=product.image_data,
-        media_type=product.image_content_type or "image/jpeg",
-        headers={
-            "Content-Disposition": f"inline; filename={product.image_filename or 'image.jpg'}"
-        }
-    )
+    return response
+
+
+@router.get("/{product_id}/image/{width}")
+def get_product_image_variant(
+    product_id: int,
+    width: int,
+    request: Request,
+    v: str | None = None,
+    db: Session = Depends(get_db),
+):
+    """Resized product image; the URLs of `image_srcset`."""
+    return get_product_image(product_id, request, w=width, v=v, db=db)
 
 
 @router.post("/{product_id}/image", response_model=schema.ProductOut)
 async def upload_product_image(
     product_id: int,
+    response: Response,
     file: UploadFile = File(...),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
@@ -464,10 +472,15 @@ async def upload_product_image(
     if len(file_data) > 10 * 1024 * 1024:  # 10MB limit
         raise HTTPException(400, "File too large. Maximum size is 10MB")
     
-    # Update product with image data
-    product.image_data = file_data
-    product.image_filename = file.filename
-    product.image_content_type = file.content_type
+    # Upright, capped and metadata-free, re-encoded in the image worker pool
+    try:
+        image = await normalize_upload(file_data, file.filename)
+    except ImageNormalizationError as e:
+        raise HTTPException(400, str(e))
+
+    # Write the bytes to the blob store; the row keeps their digest
+    key = store_image(product, "image", image.data, image.filename, image.content_type)
+    schedule_variants(key, image.data)
     product.updated_by_id = current_user.id
     
     db.commit()
@@ -476,7 +489,9 @@ async def upload_product_image(
     logger.info("Product image uploaded", 
                product_id=product.id, 
                filename=file.filename,
-               size_bytes=len(file_data))
+               size_bytes=len(image.data),
+               bytes_saved=image.bytes_saved)
+    response.headers["X-Image-Bytes-Saved"] = str(image.bytes_saved)
     
     # Update in Elasticsearch if available
     if search_client.is_available():
@@ -504,9 +519,7 @@ def delete_product_image(
         raise HTTPException(403, "You can only edit products you created")
     
     # Clear image data
-    product.image_data = None
-    product.image_filename = None
-    product.image_content_type = None
+    clear_image(product, "image")
     product.updated_by_id = current_user.id
     
     db.commit()
@@ -11,11 +11,12 @@ import hashlib
 import hmac
 from datetime import datetime
 
-from app.api.deps import get_db
+from app.api.deps import conditional_get, get_db
 
 from app.api.v1.products import list_products as _list_products
 from app.api.v1.stores import list_stores as _list_stores
 from app.api.v1.search import search_products as _search_products
+from app.services.http_cache import PRODUCT_RESOURCES, STORE_RESOURCES
 
 router = APIRouter()
 security = HTTPBearer(auto_error=False)  # Don't auto-error if no header present
@@ -57,6 +58,8 @@ def verify_api_key(
 
 @router.get("/products", 
     summary="Search and retrieve products",
+    # Authenticate before answering If-None-Match
+    dependencies=[Depends(verify_api_key), Depends(conditional_get(*PRODUCT_RESOURCES))],
     description="""
     Search products in the Partle marketplace with advanced filtering options.
     
@@ -109,29 +112,26 @@ def get_products_public(
     q: Optional[str] = Query(None, description="Search term to find products by name or description (e.g., 'wireless headphones', 'adhesive tape')"),
     limit: int = Query(20, le=100, description="Number of products to return (1-100, default: 20)"),
     offset: int = Query(0, description="Number of products to skip for pagination (default: 0)"),
+    cursor: Optional[str] = Query(
+        None,
+        description="Opaque cursor from the X-Next-Cursor header of the previous page; faster than offset for deep pages",
+    ),
     min_price: Optional[float] = Query(None, description="Minimum price filter in EUR (e.g., 10.50)"),
     max_price: Optional[float] = Query(None, description="Maximum price filter in EUR (e.g., 100.00)"), 
     tags: Optional[str] = Query(None, description="Filter by tags, comma-separated (e.g., 'electronics,bluetooth' or 'adhesive,tape')"),
     db: Session = Depends(get_db)
 ):
     """Get products with public read-only access"""
-    # Get products but exclude binary image_data field to prevent serialization errors
-    products = _list_products(
-        q=q, limit=limit, offset=offset, 
-        min_price=min_price, max_price=max_price, 
+    # The listing path never selects image BLOBs; images are served by /v1/products/{id}/image
+    return _list_products(
+        q=q, limit=limit, offset=offset, cursor=cursor,
+        min_price=min_price, max_price=max_price,
         tags=tags, sort_by="created_at", db=db
     )
-    
-    # Clear image_data field from each product to prevent UnicodeDecodeError
-    # The image can still be accessed via /v1/products/{id}/image endpoint
-    for product in products:
-        if hasattr(product, 'image_data'):
-            product.image_data = None
-    
-    return products
 
 @router.get("/stores",
     summary="Browse marketplace stores",
+    dependencies=[Depends(verify_api_key), Depends(conditional_get(*STORE_RESOURCES))],
     description="""
     Retrieve information about stores in the Partle marketplace.
     
@@ -175,10 +175,11 @@ def get_stores_public(
     api_key: str = Depends(verify_api_key),
     limit: int = Query(20, le=50, description="Number of stores to return (1-50, default: 20)"),
     offset: int = Query(0, description="Number of stores to skip for pagination (default: 0)"),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from the X-Next-Cursor header of the previous page"),
     db: Session = Depends(get_db)
 ):
     """Get stores with public read-only access"""
-    return _list_stores(limit=limit, offset=offset, db=db)
+    return _list_stores(limit=limit, offset=offset, cursor=cursor, db=db)
 
 @router.get("/search",
     summary="Search products for AI assistants",
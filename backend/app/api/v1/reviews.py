@@ -1,13 +1,13 @@
 # backend/app/api/v1/reviews.py
-from sqlalchemy import func
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session, joinedload
 
-from app.db.models import ProductReview, Product, User
+from app.db.models import ProductReview, ProductRatingStats, Product, User
 from app.schemas import review as schema
 from app.auth.security import get_current_user, get_optional_user
 from app.api.deps import get_db
 from app.logging_config import get_logger
+from app.services.rating_stats import rating_distribution, refresh_rating_stats
 
 router = APIRouter()
 logger = get_logger("api.reviews")
@@ -60,32 +60,17 @@ def get_product_rating_summary(
             detail=f"Product with id {product_id} not found"
         )
 
-    # Get aggregate statistics
-    stats = db.query(
-        func.count(ProductReview.id).label('total_reviews'),
-        func.avg(ProductReview.product_rating).label('avg_product_rating'),
-        func.avg(ProductReview.info_rating).label('avg_info_rating'),
-    ).filter(ProductReview.product_id == product_id).first()
-
-    # Get rating distribution
-    rating_dist = db.query(
-        ProductReview.product_rating,
-        func.count(ProductReview.id).label('count')
-    ).filter(
-        ProductReview.product_id == product_id
-    ).group_by(
-        ProductReview.product_rating
-    ).all()
-
-    # Convert to dict
-    distribution = {rating: count for rating, count in rating_dist}
+    # Aggregates are maintained on review writes; this is a primary-key lookup
+    stats = db.get(ProductRatingStats, product_id)
 
     return schema.ProductRatingSummary(
         product_id=product_id,
-        total_reviews=stats.total_reviews or 0,
-        average_product_rating=round(stats.avg_product_rating, 1) if stats.avg_product_rating else None,
-        average_info_rating=round(stats.avg_info_rating, 1) if stats.avg_info_rating else None,
-        rating_distribution=distribution
+        total_reviews=stats.review_count if stats else 0,
+        average_product_rating=(
+            round(stats.average_product_rating, 1) if stats and stats.average_product_rating else None
+        ),
+        average_info_rating=round(stats.average_info_rating, 1) if stats and stats.average_info_rating else None,
+        rating_distribution=rating_distribution(stats)
     )
 
 
@@ -127,6 +112,7 @@ def create_product_review(
     )
 
     db.add(review)
+    refresh_rating_stats(db, product_id)
     db.commit()
     db.refresh(review)
 
@@ -187,6 +173,7 @@ def update_product_review(
     update_data = review_update.model_dump(exclude_unset=True)
     for field, value in update_data.items():
         setattr(review, field, value)
+    refresh_rating_stats(db, product_id)
 
     db.commit()
     db.refresh(review)
@@ -227,6 +214,7 @@ def delete_product_review(
         )
 
     db.delete(review)
+    refresh_rating_stats(db, product_id)
     db.commit()
 
     logger.info(f"User {current_user.id} deleted review {review_id}")
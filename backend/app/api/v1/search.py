@@ -8,7 +8,6 @@ from app.search.client import search_client
 from app.search.queries import build_product_search_query, build_product_aggregation_query
 from app.search.indexing import initialize_product_index, reindex_all_products
 from app.schemas import product as schema
-from app.utils.test_data import get_excluded_test_tags
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
@@ -43,82 +42,20 @@ def search_products(
         )
     
     try:
-        # Parse tags
-        tag_list = None
-        if tags:
-            tag_list = [tag.strip() for tag in tags.split(',') if tag.strip()]
-
-        # Get excluded tags for test data
-        excluded_tags = None
-        if not include_test_data:
-            excluded_tags = get_excluded_test_tags()
-        
-        # Build location dict
-        location = None
-        if lat is not None and lon is not None:
-            location = {'lat': lat, 'lon': lon}
-        
-        # Build search query
-        search_query = build_product_search_query(
-            query=q,
-            min_price=min_price,
-            max_price=max_price,
-            tags=tag_list,
-            excluded_tags=excluded_tags,
-            store_id=store_id,
-            location=location,
-            distance_km=distance_km,
-            sort_by=sort_by,
-            limit=limit,
-            offset=offset
+        search_query = product_search_query(
+            q=q, min_price=min_price, max_price=max_price, tags=tags, store_id=store_id,
+            lat=lat, lon=lon, distance_km=distance_km, sort_by=sort_by,
+            include_test_data=include_test_data, limit=limit, offset=offset,
         )
-        
-        # Execute search
-        response = search_client.search(search_query)
-        
-        # Extract products from response
-        products = []
-        for hit in response['hits']['hits']:
-            source = hit['_source']
-            # Convert back to the format expected by frontend
-            product = {
-                'id': source['id'],
-                'name': source['name'],
-                'description': source.get('description'),
-                'spec': source.get('spec'),
-                'price': source.get('price'),
-                'url': source.get('url'),
-                'image_url': source.get('image_url'),
-                'lat': source.get('location', {}).get('lat') if source.get('location') else None,
-                'lon': source.get('location', {}).get('lon') if source.get('location') else None,
-                'store_id': source.get('store_id'),
-                'created_at': source.get('created_at'),
-                'updated_at': source.get('updated_at'),
-                'updated_by_id': source.get('creator_id'),  # Map for compatibility
-                'tags': [{'name': tag} for tag in source.get('tags', [])]  # Convert to expected format
-            }
-            products.append(product)
-        
-        result = {
-            'products': products,
-            'total': response['hits']['total']['value'],
-            'limit': limit,
-            'offset': offset
-        }
-        
+        result = search_result(search_client.search(search_query), limit, offset)
+
         # Add aggregations if requested
         if include_aggregations:
-            agg_query = build_product_aggregation_query(query=q)
-            agg_response = search_client.search(agg_query)
-            
-            result['aggregations'] = {
-                'price_ranges': agg_response.get('aggregations', {}).get('price_ranges', {}),
-                'tags': agg_response.get('aggregations', {}).get('tags', {}),
-                'store_types': agg_response.get('aggregations', {}).get('store_types', {})
-            }
-        
+            agg_response = search_client.search(build_product_aggregation_query(query=q))
+            result['aggregations'] = search_aggregations(agg_response)
+
         return result
-        
+
     except Exception as e:
         logger.error(f"Error in product search: {e}")
         raise HTTPException(
@@ -126,6 +63,87 @@ def search_products(
             detail="Search request failed"
         )
 
+
+def product_search_query(
+    q: Optional[str],
+    min_price: Optional[float],
+    max_price: Optional[float],
+    tags: Optional[str],
+    store_id: Optional[int],
+    lat: Optional[float],
+    lon: Optional[float],
+    distance_km: Optional[float],
+    sort_by: Optional[str],
+    include_test_data: bool,
+    limit: int,
+    offset: int,
+) -> Dict[str, Any]:
+    """Elasticsearch body for the search_products parameters."""
+    # Parse tags
+    tag_list = None
+    if tags:
+        tag_list = [tag.strip() for tag in tags.split(',') if tag.strip()]
+
+    # Build location dict
+    location = None
+    if lat is not None and lon is not None:
+        location = {'lat': lat, 'lon': lon}
+
+    return build_product_search_query(
+        query=q,
+        min_price=min_price,
+        max_price=max_price,
+        tags=tag_list,
+        exclude_test_data=not include_test_data,
+        store_id=store_id,
+        location=location,
+        distance_km=distance_km,
+        sort_by=sort_by,
+        limit=limit,
+        offset=offset
+    )
+
+
+def search_result(response: Dict[str, Any], limit: int, offset: int) -> Dict[str, Any]:
+    """Shape an Elasticsearch response the way the frontend expects."""
+    products = []
+    for hit in response['hits']['hits']:
+        source = hit['_source']
+        # Convert back to the format expected by frontend
+        product = {
+            'id': source['id'],
+            'name': source['name'],
+            'description': source.get('description'),
+            'spec': source.get('spec'),
+            'price': source.get('price'),
+            'url': source.get('url'),
+            'image_url': source.get('image_url'),
+            'lat': source.get('location', {}).get('lat') if source.get('location') else None,
+            'lon': source.get('location', {}).get('lon') if source.get('location') else None,
+            'store_id': source.get('store_id'),
+            'created_at': source.get('created_at'),
+            'updated_at': source.get('updated_at'),
+            'updated_by_id': source.get('creator_id'),  # Map for compatibility
+            'tags': [{'name': tag} for tag in source.get('tags', [])]  # Convert to expected format
+        }
+        products.append(product)
+
+    return {
+        'products': products,
+        'total': response['hits']['total']['value'],
+        'limit': limit,
+        'offset': offset
+    }
+
+
+def search_aggregations(agg_response: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        'price_ranges': agg_response.get('aggregations', {}).get('price_ranges', {}),
+        'tags': agg_response.get('aggregations', {}).get('tags', {}),
+        'store_types': agg_response.get('aggregations', {}).get('store_types', {})
+    }
+
+
 @router.post("/products/reindex")
 def reindex_products(
     force: bool = Query(False, description="Force recreate index"),
@@ -12,71 +12,105 @@ Endpoints:
 """
 from collections.abc import Generator
 
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
+from fastapi import APIRouter, Depends, HTTPException, Request, status, UploadFile, File
 from fastapi.responses import Response
 from sqlalchemy.orm import Session
-from sqlalchemy import or_, func
+from sqlalchemy import func
 
 from app.auth.security import get_current_user
 from app.db.models import Store, User, Tag
 from app.schemas import store as schema
-from app.api.deps import get_db
+from app.api.deps import conditional_get, get_db
+from app.services.http_cache import STORE_RESOURCES
+from app.services.pagination import SortKey, cursor_headers, fetch_page, next_cursor
+from app.services.product_listing import json_response
+from app.services.text_search import text_match, text_rank
+from app.storage.blobs import image_response, store_image
+from app.storage.normalize import ImageNormalizationError, normalize_upload_sync
 
 router = APIRouter(tags=["Stores"])
+# ETag / If-None-Match on the read routes (see services.http_cache)
+conditional = Depends(conditional_get(*STORE_RESOURCES))
 
 # ─────────────────────────────────────────────
 # Routes
 # ─────────────────────────────────────────────
 
-@router.get("/", response_model=list[schema.StoreRead])
+# Keyset sort modes for list_stores. Stores have no timestamp column; ids are
+# assigned in creation order, so the created_at modes page by id.
+STORE_SORT_KEYS = {
+    "id": SortKey(Store.id, Store.id, "id", descending=False),
+    "created_at": SortKey(Store.id, Store.id, "id"),
+    "created_at_asc": SortKey(Store.id, Store.id, "id", descending=False),
+    "name_asc": SortKey(Store.name, Store.id, "name", descending=False),
+}
+
+
+@router.get("/", response_model=list[schema.StoreRead], dependencies=[conditional])
 def list_stores(
     q: str | None = None,
     tags: str | None = None,
     sort_by: str | None = None,
     limit: int = 20,
     offset: int = 0,
+    cursor: str | None = None,
     db: Session = Depends(get_db)
 ):
-    """Return stores with optional search, filtering and pagination."""
+    """Return stores with optional search, filtering and pagination.
+
+    Pass the `X-Next-Cursor` response header back as `cursor` to fetch the next
+    page in constant time; `offset` keeps working for existing callers.
+    """
     query = db.query(Store)
 
     if q:
-        search_term = f"%{q}%"
-        query = query.filter(
-            or_(
-                Store.name.ilike(search_term),
-                Store.address.ilike(search_term),
-                Store.homepage.ilike(search_term)
-            )
-        )
+        # Served by the pg_trgm GIN indexes on these columns
+        query = query.filter(text_match(db, q, [Store.name, Store.address, Store.homepage]))
 
     if tags:
         tag_list = [tag.strip() for tag in tags.split(',')]
         if tag_list:
-            query = query.join(Store.tags).filter(Tag.name.in_(tag_list))
+            query = query.filter(Store.tags.any(Tag.name.in_(tag_list)))
+
+    if sort_by == "random":
+        if cursor:
+            raise HTTPException(400, "Cursor pagination is not supported for sort_by=random")
+        stores = query.order_by(func.random()).offset(offset).limit(limit).all()
+        # A fresh order on every request: nothing to revalidate
+        return _stores_response(stores, {"Cache-Control": "no-store"})
 
-    if sort_by == "created_at":
-        query = query.order_by(Store.created_at.desc())
-    elif sort_by == "created_at_asc":
-        query = query.order_by(Store.created_at.asc())
-    elif sort_by == "random":
-        query = query.order_by(func.random())
+    if q and sort_by in (None, "relevance"):
+        # Best match first; rows are Store objects, so this order pages by offset only
+        if cursor:
+            raise HTTPException(400, "Cursor pagination is not supported for relevance ordering")
+        rank = text_rank(db, q, Store.name)
+        stores = query.order_by(rank.desc(), Store.id).offset(offset).limit(limit).all()
+        return _stores_response(stores)
 
-    return query.offset(offset).limit(limit).all()
+    sort = sort_by if sort_by in STORE_SORT_KEYS else "id"
+    sort_key = STORE_SORT_KEYS[sort]
+    stores = fetch_page(query, sort_key, sort, cursor, offset, limit)
+    return _stores_response(stores, cursor_headers(next_cursor(stores, sort_key, sort, limit)))
+
+
+def _stores_response(stores: list[Store], headers: dict[str, str] | None = None) -> Response:
+    payload = [schema.StoreRead.model_validate(store).model_dump(mode="json") for store in stores]
+    return json_response(payload, headers=headers)
 
 
 # Allow `/v1/stores` (without the trailing slash) to work too.
 # `include_in_schema=False` prevents duplicate docs entries.
-@router.get("", response_model=list[schema.StoreRead], include_in_schema=False)
+@router.get("", response_model=list[schema.StoreRead], include_in_schema=False, dependencies=[conditional])
 def list_stores_alt(
     q: str | None = None,
     tags: str | None = None,
     sort_by: str | None = None,
     limit: int = 20,
     offset: int = 0,
+    cursor: str | None = None,
     db: Session = Depends(get_db)
 ):
-    return list_stores(q=q, tags=tags, sort_by=sort_by, limit=limit, offset=offset, db=db)
+    return list_stores(q=q, tags=tags, sort_by=sort_by, limit=limit, offset=offset, cursor=cursor, db=db)
 
 
 @router.post("/", response_model=schema.StoreRead, status_code=status.HTTP_201_CREATED)
@@ -93,20 +127,20 @@ def create_store(
     return new_store
 
 
-@router.get("/dropdown", response_model=list[dict])
+@router.get("/dropdown", response_model=list[dict], dependencies=[conditional])
 def list_stores_for_dropdown(db: Session = Depends(get_db)):
     """Fast endpoint for dropdown - only returns id and name."""
     stores = db.query(Store.id, Store.name).all()
     return [{"id": store.id, "name": store.name} for store in stores]
 
 
-@router.get("/user/{user_id}", response_model=list[schema.StoreRead])
+@router.get("/user/{user_id}", response_model=list[schema.StoreRead], dependencies=[conditional])
 def list_stores_by_user(user_id: int, db: Session = Depends(get_db)):
     """List stores owned by a specific user."""
     return db.query(Store).filter(Store.owner_id == user_id).order_by(Store.created_at.desc()).all()
 
 
-@router.get("/{store_id}", response_model=schema.StoreRead)
+@router.get("/{store_id}", response_model=schema.StoreRead, dependencies=[conditional])
 def get_store(store_id: int, db: Session = Depends(get_db)):
     """Retrieve a single store by *id*."""
     store = db.get(Store, store_id)  # SQLAlchemy 1.4+ style
@@ -162,31 +196,26 @@ def upload_store_logo(
     if store.owner_id != current_user.id:
         raise HTTPException(status_code=403, detail="Not authorized to update this store")
 
-    # Read and store the image data
-    logo_data = file.file.read()
-    store.logo_data = logo_data
-    store.logo_filename = file.filename
-    store.logo_content_type = file.content_type
+    try:
+        image = normalize_upload_sync(file.file.read(), file.filename)
+    except ImageNormalizationError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    # Write the bytes to the blob store; the row keeps their digest
+    store_image(store, "logo", image.data, image.filename, image.content_type)
 
     db.commit()
-    return {"message": "Logo uploaded successfully"}
+    return {"message": "Logo uploaded successfully", "bytes_saved": image.bytes_saved}
 
 
 @router.get("/{store_id}/logo")
-def get_store_logo(store_id: int, db: Session = Depends(get_db)):
-    """Get the logo image for a store."""
+def get_store_logo(store_id: int, request: Request, v: str | None = None, db: Session = Depends(get_db)):
+    """Get the logo image for a store (`v` from `logo_url` makes it cacheable for good)."""
     store = db.get(Store, store_id)
     if not store:
         raise HTTPException(status_code=404, detail="Store not found")
 
-    if not store.logo_data:
+    response = image_response(store, "logo", "logo.jpg", request, v)
+    if response is None:
         raise HTTPException(status_code=404, detail="Store has no logo")
-
-    return Response(
-        content=store.logo_data,
-        media_type=store.logo_content_type or "image/jpeg",
-        headers={
-            "Content-Disposition": f'inline; filename="{store.logo_filename or "logo.jpg"}"',
-            "Cache-Control": "public, max-age=86400",
-        }
-    )
\ No newline at end of file
+    return response
\ No newline at end of file
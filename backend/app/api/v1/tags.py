@@ -3,9 +3,10 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from app.schemas.tag import Tag, TagCreate
 from app.db import models
-from app.api.deps import get_db
+from app.api.deps import conditional_get, get_db
 from app.auth.security import get_current_user
 from app.db.models import User
+from app.services.http_cache import TAG_RESOURCES
 
 router = APIRouter()
 
@@ -33,7 +34,7 @@ def create_tag(
     return tag
 
 
-@router.get("/", response_model=list[Tag])
+@router.get("/", response_model=list[Tag], dependencies=[Depends(conditional_get(*TAG_RESOURCES))])
 def read_tags(
     db: Session = Depends(get_db),
     skip: int = 0,
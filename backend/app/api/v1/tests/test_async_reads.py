@@ -0,0 +1,129 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+
+pytest.importorskip("aiosqlite")
+
+from app.api.deps import get_async_db, get_db  # noqa: E402
+from app.api.v1 import async_reads, products, reviews, search, stores  # noqa: E402
+from app.db.models import Base, Product, ProductReview, Store, Tag, User  # noqa: E402
+from app.middleware.http_cache import HTTPCacheMiddleware  # noqa: E402
+from app.search.client import search_client  # noqa: E402
+from app.services.rating_stats import refresh_rating_stats  # noqa: E402
+
+
+def _app(with_async: bool) -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(HTTPCacheMiddleware)
+    if with_async:
+        app.include_router(async_reads.router, prefix="/v1")
+    app.include_router(stores.router, prefix="/v1/stores")
+    app.include_router(products.router, prefix="/v1/products")
+    app.include_router(reviews.router, prefix="/v1/products")
+    app.include_router(search.router, prefix="/v1/search")
+    return app
+
+
+@pytest.fixture
+def clients(tmp_path):
+    """A sync-only app and an async-enabled app reading the same SQLite file."""
+    path = tmp_path / "reads.db"
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    SyncSession = sessionmaker(bind=engine, autoflush=False)
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{path}", poolclass=NullPool)
+    AsyncSession = async_sessionmaker(bind=async_engine, expire_on_commit=False)
+    async_sessions = []
+
+    def override_get_db():
+        with SyncSession() as db:
+            yield db
+
+    async def override_get_async_db():
+        async_sessions.append(1)
+        async with AsyncSession() as db:
+            yield db
+
+    with SyncSession() as db:
+        user = User(email="reader@example.com", username="reader")
+        store = Store(name="Async Hardware", type="physical", lat=40.4, lon=-3.7)
+        tag = Tag(name="tools")
+        db.add_all([user, store, tag])
+        db.flush()
+        for i in range(5):
+            db.add(Product(name=f"Widget {i}", price=i + 1, store_id=store.id, creator_id=user.id, tags=[tag]))
+        db.flush()
+        first = db.query(Product).order_by(Product.id).first()
+        db.add(ProductReview(product_id=first.id, user_id=user.id, product_rating=4, info_rating=5, comment="ok"))
+        refresh_rating_stats(db, first.id)
+        db.commit()
+
+    sync_app, async_app = _app(False), _app(True)
+    for app in (sync_app, async_app):
+        app.dependency_overrides[get_db] = override_get_db
+        app.dependency_overrides[get_async_db] = override_get_async_db
+    with TestClient(sync_app) as sync_client, TestClient(async_app) as async_client:
+        yield sync_client, async_client, async_sessions
+    engine.dispose()
+
+
+@pytest.mark.parametrize(
+    "url",
+    [
+        "/v1/products/?limit=3",
+        "/v1/products/?sort_by=price_asc&tags=tools",
+        "/v1/products/1",
+        "/v1/products/1/reviews",
+        "/v1/stores/",
+        "/v1/stores?q=hardware",
+    ],
+)
+def test_async_reads_match_sync_endpoints(clients, url):
+    sync_client, async_client, async_sessions = clients
+    expected, actual = sync_client.get(url), async_client.get(url)
+    assert async_sessions, "served by the sync route"
+    assert actual.status_code == expected.status_code == 200
+    assert actual.json() == expected.json()
+    assert actual.headers.get("X-Next-Cursor") == expected.headers.get("X-Next-Cursor")
+    assert actual.headers.get("ETag") == expected.headers.get("ETag")
+
+
+def test_async_reads_answer_conditional_gets(clients):
+    _, async_client, _ = clients
+    etag = async_client.get("/v1/products/1").headers["ETag"]
+    assert async_client.get("/v1/products/1", headers={"If-None-Match": etag}).status_code == 304
+    assert async_client.get("/v1/stores/", headers={"If-None-Match": etag}).status_code == 200
+
+
+def test_async_reads_keep_sync_semantics(clients):
+    sync_client, async_client, _ = clients
+    assert async_client.get("/v1/products/999").status_code == 404
+    assert async_client.get("/v1/products/?sort_by=price_asc&cursor=bogus").status_code == 400
+    # Non-integer paths fall through to the sync routes (auth required, not a 422)
+    assert async_client.get("/v1/products/my").status_code == sync_client.get("/v1/products/my").status_code
+
+
+def test_async_search_awaits_elasticsearch(clients, monkeypatch):
+    sync_client, async_client, _ = clients
+    response = {
+        "hits": {"total": {"value": 1}, "hits": [{"_source": {"id": 1, "name": "Widget 0", "tags": ["tools"]}}]}
+    }
+
+    async def async_search(query):
+        return response
+
+    async def async_is_available():
+        return True
+
+    monkeypatch.setattr(search_client, "search", lambda query: response)
+    monkeypatch.setattr(search_client, "is_available", lambda: True)
+    monkeypatch.setattr(search_client, "async_search", async_search)
+    monkeypatch.setattr(search_client, "async_is_available", async_is_available)
+
+    url = "/v1/search/products/?q=widget&limit=5"
+    assert async_client.get(url).json() == sync_client.get(url).json()
+    assert async_client.get(url).json()["products"][0]["tags"] == [{"name": "tools"}]
@@ -10,3 +10,9 @@ def test_health_check(client, db):
         'CLOUDFLARE_WORKER_API_KEY',
     }
     assert isinstance(payload.get('warnings'), list)
+
+
+def test_database_pool_health_lists_engines(client, db):
+    resp = client.get('/v1/health/db')
+    assert resp.status_code == 200
+    assert 'api' in resp.json()['pools']
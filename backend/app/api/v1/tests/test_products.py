@@ -1,3 +1,5 @@
+import os
+
 import pytest
 
 
@@ -115,3 +117,720 @@ def test_update_product_not_found(client, db):
     headers = {"Authorization": f"Bearer {token}"}
     resp = client.patch("/v1/products/999", json={"name": "whatever"}, headers=headers)
     assert resp.status_code == 404
+
+
+def test_product_listing_exposes_image_flags_without_blob(client, db):
+    """Listing returns has_image/image_url computed in SQL, never the image bytes."""
+    import hashlib
+
+    from app.db.models import Product
+
+    user = {"email": "imgs@example.com", "password": "pw"}
+    client.post("/v1/auth/register", json=user)
+    login = client.post("/v1/auth/login", data={"username": user["email"], "password": user["password"]})
+    headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+    store_id = client.post(
+        "/v1/stores/",
+        json={"name": "Img", "lat": 0.0, "lon": 0.0, "type": "physical"},
+        headers=headers,
+    ).json()["id"]
+    with_image = client.post(
+        "/v1/products/", json={"name": "A", "store_id": store_id, "price": "9.50"}, headers=headers
+    )
+    client.post("/v1/products/", json={"name": "B", "store_id": store_id}, headers=headers)
+    product_id = with_image.json()["id"]
+    upload = client.post(
+        f"/v1/products/{product_id}/image",
+        files={"file": ("a.png", _image_bytes(), "image/png")},
+        headers=headers,
+    )
+    assert upload.status_code == 200
+    assert upload.json()["has_image"] is True
+    digest = db.get(Product, product_id).image_sha256
+
+    for url in ("/v1/products/", f"/v1/products/store/{store_id}", "/v1/products/my"):
+        resp = client.get(url, headers=headers)
+        assert resp.status_code == 200
+        by_name = {p["name"]: p for p in resp.json()}
+        assert "image_data" not in by_name["A"]
+        assert by_name["A"]["has_image"] is True
+        assert by_name["A"]["image_url"] == f"/v1/products/{product_id}/image?v={digest[:16]}"
+        assert by_name["A"]["price"] == "9.50"
+        assert by_name["A"]["creator"]["id"] == by_name["A"]["creator_id"]
+        assert by_name["B"]["has_image"] is False
+        assert by_name["B"]["image_url"] is None
+
+    image = client.get(f"/v1/products/{product_id}/image")
+    assert hashlib.sha256(image.content).hexdigest() == digest
+
+
+def _walk_cursor(client, url, limit, **params):
+    """Follow X-Next-Cursor until exhausted and return the ids in order."""
+    ids, cursor = [], None
+    for _ in range(50):
+        page_params = {**params, "limit": limit, **({"cursor": cursor} if cursor else {})}
+        resp = client.get(url, params=page_params)
+        assert resp.status_code == 200
+        ids += [item["id"] for item in resp.json()]
+        cursor = resp.headers.get("X-Next-Cursor")
+        if not cursor:
+            return ids
+    raise AssertionError("cursor never ran out")
+
+
+def _auth_headers(client, email):
+    user = {"email": email, "password": "pw"}
+    client.post("/v1/auth/register", json=user)
+    login = client.post("/v1/auth/login", data={"username": user["email"], "password": user["password"]})
+    return {"Authorization": f"Bearer {login.json()['access_token']}"}
+
+
+def _image_bytes(color="red", size=(16, 16), fmt="PNG"):
+    import io
+
+    from PIL import Image
+
+    out = io.BytesIO()
+    Image.new("RGB", size, color).save(out, format=fmt)
+    return out.getvalue()
+
+
+def _seed_pager_products(client, db):
+    """Eight products with duplicate and NULL prices and clashing timestamps."""
+    from datetime import datetime, timedelta
+    from app.db.models import Product
+
+    headers = _auth_headers(client, "pager@example.com")
+    store_id = client.post(
+        "/v1/stores/",
+        json={"name": "Pager", "lat": 0.0, "lon": 0.0, "type": "physical"},
+        headers=headers,
+    ).json()["id"]
+    for i, price in enumerate([5, 3, None, 5, 1, None, 3, 8]):
+        payload = {"name": f"P{i % 3}-{i}", "store_id": store_id}
+        if price is not None:
+            payload["price"] = price
+        assert client.post("/v1/products/", json=payload, headers=headers).status_code == 201
+
+    # SQLite keeps server-default timestamps as text without microseconds, which
+    # doesn't compare with bound datetimes; rewrite them through the ORM instead.
+    # Pairs of rows share a timestamp so the id tie-breaker is exercised.
+    base = datetime(2025, 1, 1, 12, 0, 0)
+    for product in db.query(Product).all():
+        stamp = base + timedelta(minutes=product.id // 2)
+        product.created_at = stamp
+        product.updated_at = stamp
+    db.commit()
+
+
+@pytest.mark.parametrize(
+    "sort_by",
+    ["updated_at", "updated_at_asc", "created_at", "created_at_asc", "price_desc", "price_asc", "name_asc"],
+)
+def test_product_cursor_pagination_matches_offset(client, db, sort_by):
+    """Walking the keyset cursor yields the same sequence as one big offset page."""
+    _seed_pager_products(client, db)
+
+    everything = client.get("/v1/products/", params={"sort_by": sort_by, "limit": 100}).json()
+    walked = _walk_cursor(client, "/v1/products/", limit=3, sort_by=sort_by)
+    assert walked == [item["id"] for item in everything]
+    assert len(walked) == 8
+
+
+def test_default_sort_cursor_walks_every_product(client, db):
+    _seed_pager_products(client, db)
+    everything = client.get("/v1/products/", params={"limit": 100}).json()
+    assert _walk_cursor(client, "/v1/products/", limit=3) == [item["id"] for item in everything]
+
+
+def test_cursor_from_other_sort_is_rejected(client, db):
+    _seed_pager_products(client, db)
+    first = client.get("/v1/products/", params={"sort_by": "price_desc", "limit": 2})
+    cursor = first.headers["X-Next-Cursor"]
+    resp = client.get("/v1/products/", params={"sort_by": "name_asc", "cursor": cursor})
+    assert resp.status_code == 400
+    assert resp.json()["detail"] == "Cursor does not match sort_by"
+
+
+def test_cursor_from_other_sort_is_rejected_by_random(client, db):
+    _seed_pager_products(client, db)
+    cursor = client.get("/v1/products/", params={"limit": 2}).headers["X-Next-Cursor"]
+    resp = client.get("/v1/products/", params={"sort_by": "random", "cursor": cursor})
+    assert resp.status_code == 400
+
+
+def test_seeded_random_sort_is_stable_and_pages(client, db):
+    """A seed fixes the shuffle; the cursor walk, offsets and store pages all agree with it."""
+    from app.db.models import Product
+    from app.services.shuffle import rotate_random_keys
+
+    _seed_pager_products(client, db)
+    store_id = db.query(Product.store_id).first()[0]
+    params = {"sort_by": "random", "seed": 7}
+
+    everything = [p["id"] for p in client.get("/v1/products/", params={**params, "limit": 100}).json()]
+    assert sorted(everything) == sorted(p.id for p in db.query(Product).all())
+    assert [p["id"] for p in client.get("/v1/products/", params={**params, "limit": 100}).json()] == everything
+    assert _walk_cursor(client, "/v1/products/", limit=3, **params) == everything
+    # The cursor carries the seed, so follow-up pages need not repeat it
+    first = client.get("/v1/products/", params={**params, "limit": 3})
+    rest = client.get("/v1/products/", params={"sort_by": "random", "cursor": first.headers["X-Next-Cursor"]})
+    assert [p["id"] for p in rest.json()][:3] == everything[3:6]
+    for offset in (2, 5, 7):
+        page = client.get("/v1/products/", params={**params, "limit": 3, "offset": offset}).json()
+        assert [p["id"] for p in page] == everything[offset:offset + 3]
+
+    url = f"/v1/products/store/{store_id}"
+    assert _walk_cursor(client, url, limit=3, seed=7) == everything
+
+    keys = dict(db.query(Product.id, Product.random_key).all())
+    assert rotate_random_keys(db) == len(keys)
+    db.expire_all()
+    assert all(0 <= key < 1 for _, key in db.query(Product.id, Product.random_key).all())
+    assert dict(db.query(Product.id, Product.random_key).all()) != keys
+
+
+def _make_cursor(*parts):
+    import base64
+    import json
+    return base64.urlsafe_b64encode(json.dumps(list(parts)).encode()).decode().rstrip("=")
+
+
+@pytest.mark.parametrize(
+    "params",
+    [
+        {"cursor": "not-a-cursor"},
+        {"sort_by": "price_desc", "cursor": _make_cursor("price_desc", "abc", 1)},
+        {"sort_by": "updated_at", "cursor": _make_cursor("updated_at", "garbage", 1)},
+        {"sort_by": "updated_at", "cursor": _make_cursor("updated_at", 5, 1)},
+        {"sort_by": "distance", "user_lat": 40.0, "user_lon": -3.0, "cursor": _make_cursor("distance", "x", 1)},
+    ],
+)
+def test_malformed_cursor_is_a_400(client, db, params):
+    resp = client.get("/v1/products/", params=params)
+    assert resp.status_code == 400
+    assert resp.json()["detail"] == "Invalid cursor"
+
+
+def test_store_cursor_pagination(client, db):
+    headers = _auth_headers(client, "stores-pager@example.com")
+    for name in ["b", "a", "c", "a", "d"]:
+        client.post("/v1/stores/", json={"name": name, "type": "physical"}, headers=headers)
+
+    for sort_by in [None, "name_asc", "created_at"]:
+        params = {"sort_by": sort_by} if sort_by else {}
+        everything = client.get("/v1/stores/", params={**params, "limit": 100}).json()
+        walked = _walk_cursor(client, "/v1/stores/", limit=2, **params)
+        assert walked == [store["id"] for store in everything]
+        assert len(walked) == 5
+
+
+def test_test_data_flag_hides_products_and_repairs(client, db):
+    """Tagging a product as test data flips is_test_data; the sync repairs raw SQL writes."""
+    from sqlalchemy import insert
+
+    from app.db.models import Product, product_tags
+    from app.services.test_data_flags import sync_test_data_flags
+
+    headers = _auth_headers(client, "flags@example.com")
+    store_id = client.post("/v1/stores/", json={"name": "Flags", "type": "physical"}, headers=headers).json()["id"]
+    mock_id = client.post("/v1/products/", json={"name": "Mock", "store_id": store_id}, headers=headers).json()["id"]
+    real_id = client.post("/v1/products/", json={"name": "Real", "store_id": store_id}, headers=headers).json()["id"]
+    tag_id = client.post("/v1/tags/", json={"name": "mock-data"}, headers=headers).json()["id"]
+    assert client.post(f"/v1/products/{mock_id}/tags/{tag_id}").status_code == 201
+
+    for url in ("/v1/products/", f"/v1/products/store/{store_id}"):
+        assert [p["id"] for p in client.get(url).json()] == [real_id]
+        shown = {p["id"] for p in client.get(url, params={"include_test_data": True}).json()}
+        assert shown == {mock_id, real_id}
+
+    # A raw SQL tag write bypasses the ORM events until the sync runs
+    db.execute(insert(product_tags).values(product_id=real_id, tag_id=tag_id))
+    db.commit()
+    assert [p["id"] for p in client.get("/v1/products/").json()] == [real_id]
+    assert sync_test_data_flags(db) == 1
+    assert client.get("/v1/products/").json() == []
+    assert db.get(Product, real_id).is_test_data is True
+
+
+def test_test_data_flag_follows_tag_products_and_assignment(db):
+    """Only Product.tags has listeners; the tag.products backref and a reassignment reach them too."""
+    from app.db.models import Product, Store, StoreType, Tag
+
+    store = Store(name="Backref", type=StoreType.physical)
+    product, other = Product(name="Drill", store=store), Product(name="Saw", store=store)
+    mock, real = Tag(name="mock-data"), Tag(name="tools")
+    db.add_all([product, other, mock, real])
+    db.commit()
+
+    mock.products.append(product)
+    assert product.is_test_data is True
+    db.commit()
+    # product.tags is unloaded again after the commit: the flag is settled at flush
+    mock.products.remove(product)
+    db.flush()
+    assert product.is_test_data is False
+
+    other.tags = [real, mock]
+    assert other.is_test_data is True
+    other.tags = [real]
+    db.commit()
+    assert (product.is_test_data, other.is_test_data) == (False, False)
+
+
+def test_distance_sort_matches_brute_force(client, db):
+    """Ring-widening nearest-first walk equals a full sort by haversine distance."""
+    import math
+
+    headers = _auth_headers(client, "geo@example.com")
+    user_lat, user_lon = 40.4168, -3.7038  # Madrid
+    places = {
+        "Sol": (40.4169, -3.7035),
+        "Getafe": (40.3083, -3.7327),
+        "Toledo": (39.8628, -4.0273),
+        "Paris": (48.8566, 2.3522),
+        "Tokyo": (35.6762, 139.6503),
+        "Fiji": (-17.7134, 178.065),
+        "Nowhere": (None, None),
+    }
+    coords = {}
+    for name, (lat, lon) in places.items():
+        store_id = client.post(
+            "/v1/stores/", json={"name": name, "lat": lat, "lon": lon, "type": "physical"}, headers=headers
+        ).json()["id"]
+        for i in range(2):
+            product = client.post("/v1/products/", json={"name": f"{name}-{i}", "store_id": store_id}, headers=headers)
+            coords[product.json()["id"]] = (lat, lon)
+
+    def haversine(lat, lon):
+        a = (math.sin(math.radians(lat - user_lat) / 2) ** 2
+             + math.cos(math.radians(user_lat)) * math.cos(math.radians(lat))
+             * math.sin(math.radians(lon - user_lon) / 2) ** 2)
+        return 2 * 6371.0 * math.asin(math.sqrt(a))
+
+    expected = sorted(
+        (pid for pid, (lat, _) in coords.items() if lat is not None),
+        key=lambda pid: (haversine(*coords[pid]), pid),
+    )
+    params = {"sort_by": "distance", "user_lat": user_lat, "user_lon": user_lon}
+    assert _walk_cursor(client, "/v1/products/", limit=3, **params) == expected
+
+    page = client.get("/v1/products/", params={**params, "limit": 4, "offset": 5}).json()
+    assert [p["id"] for p in page] == expected[5:9]
+    assert page[0]["distance_km"] == pytest.approx(haversine(*coords[expected[5]]), rel=1e-6)
+
+
+def test_search_orders_by_relevance(client, db):
+    """q= returns name matches before description-only matches and pages by cursor."""
+    headers = _auth_headers(client, "search@example.com")
+    store = client.post("/v1/stores/", json={"name": "Ferretería Tape", "type": "physical"}, headers=headers)
+    store_id = store.json()["id"]
+    client.post("/v1/stores/", json={"name": "Other", "address": "Calle Tape 1", "type": "physical"}, headers=headers)
+    ids = {}
+    for name, description in [
+        ("Rollo", "cinta tape adhesiva"),
+        ("Tape 19mm", None),
+        ("Martillo", None),
+        ("Duct tape", "plata"),
+        ("Clavos", "no tape here"),
+    ]:
+        payload = {"name": name, "description": description, "store_id": store_id}
+        ids[name] = client.post("/v1/products/", json=payload, headers=headers).json()["id"]
+
+    found = [p["id"] for p in client.get("/v1/products/", params={"q": "tape"}).json()]
+    assert set(found[:2]) == {ids["Tape 19mm"], ids["Duct tape"]}
+    assert set(found[2:]) == {ids["Rollo"], ids["Clavos"]}
+    assert _walk_cursor(client, "/v1/products/", limit=2, q="tape") == found
+
+    by_name = client.get("/v1/products/", params={"q": "tape", "sort_by": "name_asc"}).json()
+    assert [p["name"] for p in by_name] == ["Clavos", "Duct tape", "Rollo", "Tape 19mm"]
+
+    stores = client.get("/v1/stores/", params={"q": "tape"}).json()
+    assert [s["name"] for s in stores] == ["Ferretería Tape", "Other"]
+
+
+@pytest.mark.skipif(not os.getenv("TEST_POSTGRES_URL"), reason="TEST_POSTGRES_URL not set")
+def test_relevance_cursor_walks_fractional_postgres_ranks(client):
+    """Trigram/ts_rank scores are fractional; paging by cursor must neither skip nor repeat rows."""
+    from sqlalchemy import create_engine, text
+    from sqlalchemy.orm import sessionmaker
+
+    from app.api.v1 import products
+    from app.db.models import Base, Product, Store, StoreType
+
+    engine = create_engine(os.environ["TEST_POSTGRES_URL"])
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+        conn.execute(text("""
+            ALTER TABLE products ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS (
+                to_tsvector('english', coalesce(name, '') || ' ' || coalesce(description, ''))
+            ) STORED
+        """))
+    Session = sessionmaker(bind=engine)
+
+    def pg_db():
+        with Session() as db:
+            yield db
+
+    original = client.app.dependency_overrides[products.get_db]
+    client.app.dependency_overrides[products.get_db] = pg_db
+    try:
+        with Session() as db:
+            store = Store(name="Ferretería", type=StoreType.physical)
+            names = ["Tape", "Tape 19mm", "Duct tape", "Duct tape silver 50m", "Masking tape", "Tapes",
+                     "Tape measure 5m", "Tape measure 8m", "Double sided tape", "Tapestry needle"]
+            db.add_all([Product(name=name, description="cinta adhesiva", store=store) for name in names])
+            db.commit()
+
+        everything = client.get("/v1/products/", params={"q": "tape", "limit": 100})
+        found = [p["id"] for p in everything.json()]
+        assert len(found) == len(names)
+        for limit in (1, 2, 3):
+            assert _walk_cursor(client, "/v1/products/", limit=limit, q="tape") == found
+    finally:
+        client.app.dependency_overrides[products.get_db] = original
+        Base.metadata.drop_all(engine)
+        engine.dispose()
+
+
+def test_conditional_get_revalidates_until_a_write(client, db):
+    """Read endpoints answer a matching If-None-Match with 304 until a write bumps the generation."""
+    from app.services.test_data_flags import sync_test_data_flags
+
+    headers = _auth_headers(client, "etag@example.com")
+    store_id = client.post("/v1/stores/", json={"name": "Etag", "type": "physical"}, headers=headers).json()["id"]
+    product = client.post("/v1/products/", json={"name": "Cached", "store_id": store_id}, headers=headers)
+    product_id = product.json()["id"]
+
+    urls = ["/v1/products/", f"/v1/products/{product_id}", f"/v1/products/store/{store_id}?seed=3",
+            "/v1/stores/", f"/v1/stores/{store_id}", "/v1/tags/"]
+    etags = {}
+    for url in urls:
+        first = client.get(url)
+        assert first.status_code == 200
+        etags[url] = first.headers["ETag"]
+        assert first.headers["Cache-Control"] == "public, max-age=0, must-revalidate"
+        revalidated = client.get(url, headers={"If-None-Match": etags[url]})
+        assert revalidated.status_code == 304
+        assert revalidated.content == b""
+        assert revalidated.headers["ETag"] == etags[url]
+
+    # Same path, other query: another representation
+    assert client.get("/v1/products/", params={"limit": 1}).headers["ETag"] != etags["/v1/products/"]
+    # A server-picked shuffle is never the same twice
+    unseeded = client.get(f"/v1/products/store/{store_id}")
+    assert "ETag" not in unseeded.headers and unseeded.headers["Cache-Control"] == "no-store"
+
+    # An ORM write through the API invalidates products, not tags
+    assert client.patch(f"/v1/products/{product_id}", json={"name": "Renamed"}, headers=headers).status_code == 200
+    changed = client.get(f"/v1/products/{product_id}", headers={"If-None-Match": etags[f"/v1/products/{product_id}"]})
+    assert changed.status_code == 200 and changed.json()["name"] == "Renamed"
+    assert client.get("/v1/tags/", headers={"If-None-Match": etags["/v1/tags/"]}).status_code == 304
+
+    # Core statements mark their resources explicitly
+    etag = client.get("/v1/products/").headers["ETag"]
+    sync_test_data_flags(db)
+    assert client.get("/v1/products/", headers={"If-None-Match": etag}).status_code == 200
+
+
+def test_images_are_served_from_the_blob_store(client, db, blob_storage, monkeypatch):
+    """Uploads land in content-addressed files; legacy bytea rows are moved by the backfill."""
+    import hashlib
+
+    from app.db.models import Product, Store
+    from app.storage.migration import move_images_to_blob_store
+
+    headers = _auth_headers(client, "blobs@example.com")
+    store_id = client.post("/v1/stores/", json={"name": "Blobs", "type": "physical"}, headers=headers).json()["id"]
+    product_id = client.post("/v1/products/", json={"name": "Pic", "store_id": store_id}, headers=headers).json()["id"]
+    data = _image_bytes("blue")
+
+    client.post(f"/v1/products/{product_id}/image", files={"file": ("a.png", data, "image/png")}, headers=headers)
+    client.post(f"/v1/stores/{store_id}/logo", files={"file": ("logo.png", data, "image/png")}, headers=headers)
+    digest = db.get(Product, product_id).image_sha256
+    assert db.get(Store, store_id).logo_sha256 == digest
+
+    image = client.get(f"/v1/products/{product_id}/image")
+    assert (blob_storage / digest[:2] / digest[2:4] / digest).read_bytes() == image.content
+    assert hashlib.sha256(image.content).hexdigest() == digest
+    assert image.headers["content-type"] == "image/webp"
+
+    monkeypatch.setenv("BLOB_ACCEL_REDIRECT_PREFIX", "/_blobs/")
+    accel = client.get(f"/v1/stores/{store_id}/logo")
+    assert accel.headers["X-Accel-Redirect"] == f"/_blobs/{digest[:2]}/{digest[2:4]}/{digest}"
+    assert accel.content == b""
+    monkeypatch.delenv("BLOB_ACCEL_REDIRECT_PREFIX")
+
+    # A row written before the blob store still serves its bytea until backfilled
+    legacy = Product(name="Legacy", store_id=store_id, image_data=b"old bytes", image_content_type="image/jpeg")
+    db.add(legacy)
+    db.commit()
+    assert client.get(f"/v1/products/{legacy.id}/image").content == b"old bytes"
+    report = move_images_to_blob_store(db, batch_size=1)
+    assert report["products"] == {"rows": 1, "bytes": len(b"old bytes")}
+    db.expire_all()
+    assert db.get(Product, legacy.id).image_sha256 == hashlib.sha256(b"old bytes").hexdigest()
+    assert client.get(f"/v1/products/{legacy.id}/image").content == b"old bytes"
+    assert move_images_to_blob_store(db)["products"]["rows"] == 0
+
+
+def test_image_variants_are_generated_once_and_listed_in_srcset(client, db, blob_storage):
+    """Uploads render 200/400/800px WebP+JPEG variants; missing ones render on first request."""
+    import io
+
+    from PIL import Image
+
+    from app.db.models import Product
+    from app.storage.variants import VARIANT_FORMATS, VARIANT_WIDTHS, variant_key
+
+    headers = _auth_headers(client, "variants@example.com")
+    store_id = client.post("/v1/stores/", json={"name": "Thumbs", "type": "physical"}, headers=headers).json()["id"]
+    product_id = client.post("/v1/products/", json={"name": "Big", "store_id": store_id}, headers=headers).json()["id"]
+    original = io.BytesIO()
+    Image.new("RGB", (1600, 1200), "red").save(original, format="PNG")
+    client.post(f"/v1/products/{product_id}/image",
+                files={"file": ("big.png", original.getvalue(), "image/png")}, headers=headers)
+
+    key = db.get(Product, product_id).image_sha256
+    variants = [variant_key(key, width, fmt) for width in VARIANT_WIDTHS for fmt in VARIANT_FORMATS]
+    assert all((blob_storage / key[:2] / key[2:4] / name).exists() for name in variants)
+
+    base = f"/v1/products/{product_id}/image"
+    version = key[:16]
+    srcset = f"{base}/200?v={version} 200w, {base}/400?v={version} 400w, {base}/800?v={version} 800w"
+    assert client.get("/v1/products/").json()[0]["image_srcset"] == srcset
+    assert client.get(f"/v1/products/{product_id}").json()["image_srcset"] == srcset
+
+    webp = client.get(f"{base}/400", headers={"Accept": "image/avif,image/webp,*/*"})
+    assert webp.headers["content-type"] == "image/webp"
+    assert Image.open(io.BytesIO(webp.content)).size == (400, 300)
+    # ?w= snaps up to the next variant; no WebP in Accept means JPEG
+    jpeg = client.get(base, params={"w": 300})
+    assert jpeg.headers["content-type"] == "image/jpeg"
+    assert Image.open(io.BytesIO(jpeg.content)).size == (400, 300)
+    assert len(jpeg.content) < len(original.getvalue())
+
+    # Lazily re-rendered when missing
+    (blob_storage / key[:2] / key[2:4] / variant_key(key, 200, "jpeg")).unlink()
+    assert Image.open(io.BytesIO(client.get(f"{base}/200").content)).size == (200, 150)
+
+    # Bytes Pillow can't decode (stored before upload normalization) still serve the original
+    from app.storage.blobs import store_image
+
+    store_image(db.get(Product, product_id), "image", b"not an image", "x.png", "image/png")
+    db.commit()
+    assert client.get(f"{base}/200").content == b"not an image"
+
+
+def test_repeat_image_views_transfer_no_bytes(client, db):
+    """Versioned image URLs are immutable; revalidation is a bodiless 304; ranges are honoured."""
+    import io
+
+    from PIL import Image
+
+    headers = _auth_headers(client, "imgcache@example.com")
+    store_id = client.post("/v1/stores/", json={"name": "Cache", "type": "physical"}, headers=headers).json()["id"]
+    product_id = client.post("/v1/products/", json={"name": "Img", "store_id": store_id}, headers=headers).json()["id"]
+    data = io.BytesIO()
+    Image.new("RGB", (640, 480), "green").save(data, format="JPEG")
+    data = data.getvalue()
+    client.post(f"/v1/products/{product_id}/image", files={"file": ("g.jpg", data, "image/jpeg")}, headers=headers)
+    client.post(f"/v1/stores/{store_id}/logo", files={"file": ("l.jpg", data, "image/jpeg")}, headers=headers)
+
+    product = client.get(f"/v1/products/{product_id}").json()
+    logo_url = client.get(f"/v1/stores/{store_id}").json()["logo_url"]
+    variant_url = product["image_srcset"].split(", ")[0].split(" ")[0]
+    for url in (product["image_url"], variant_url, logo_url):
+        first = client.get(url, headers={"Accept": "image/webp"})
+        assert first.status_code == 200 and first.content
+        assert first.headers["Cache-Control"] == "public, max-age=31536000, immutable"
+        repeat = client.get(url, headers={"Accept": "image/webp", "If-None-Match": first.headers["ETag"]})
+        assert repeat.status_code == 304
+        assert repeat.content == b""
+
+    # Unversioned (or stale) URLs must revalidate, and still get the 304
+    bare = client.get(f"/v1/products/{product_id}/image")
+    assert bare.headers["Cache-Control"] == "public, no-cache"
+    stale = client.get(f"/v1/products/{product_id}/image?v=0000", headers={"If-None-Match": bare.headers["ETag"]})
+    assert stale.status_code == 304 and stale.headers["Cache-Control"] == "public, no-cache"
+
+    stored = bare.content
+    partial = client.get(product["image_url"], headers={"Range": "bytes=0-99"})
+    assert partial.status_code == 206
+    assert partial.content == stored[:100]
+    assert partial.headers["Content-Range"] == f"bytes 0-99/{len(stored)}"
+    assert client.get(product["image_url"], headers={"Range": f"bytes={len(stored)}-"}).status_code == 416
+
+
+def test_legacy_bytea_images_support_ranges_and_etags(client, db):
+    import hashlib
+
+    from app.db.models import Product
+
+    legacy = Product(name="Old", image_data=b"0123456789", image_content_type="image/jpeg")
+    db.add(legacy)
+    db.commit()
+    url = f"/v1/products/{legacy.id}/image"
+    tail = client.get(url, headers={"Range": "bytes=-3"})
+    assert tail.status_code == 206 and tail.content == b"789"
+    assert tail.headers["Content-Range"] == "bytes 7-9/10"
+    assert client.get(url, headers={"Range": "bytes=20-"}).status_code == 416
+    full = client.get(url)
+    assert full.content == b"0123456789"
+
+    # Not yet in the blob store, but validated by the digest it will be stored under
+    etag = f'"{hashlib.sha256(b"0123456789").hexdigest()}"'
+    assert full.headers["ETag"] == etag
+    assert client.get(url, headers={"If-None-Match": etag}).status_code == 304
+    stale = client.get(url, headers={"Range": "bytes=0-1", "If-Range": '"other"'})
+    assert stale.status_code == 200
+    assert client.get(url, headers={"Range": "bytes=0-1", "If-Range": etag}).content == b"01"
+
+
+def test_shared_images_are_stored_once_and_refcounted(client, db):
+    """Products with the same image share one blob; the admin report shows the savings."""
+    from app.db.blob_refs import Blob
+    from app.db.models import User, UserRole
+    from app.storage.blobs import blob_key
+    from app.storage.normalize import normalize_image
+
+    headers = _auth_headers(client, "dedup@example.com")
+    store_id = client.post("/v1/stores/", json={"name": "Dedup", "type": "physical"}, headers=headers).json()["id"]
+    uploads = {"placeholder": _image_bytes("gray", (64, 64)), "other": _image_bytes("white")}
+    # What the blob store keeps of each upload
+    placeholder, other = (normalize_image(uploads[name]).data for name in ("placeholder", "other"))
+    ids = [
+        client.post("/v1/products/", json={"name": f"P{i}", "store_id": store_id}, headers=headers).json()["id"]
+        for i in range(3)
+    ]
+    for product_id in ids:
+        client.post(f"/v1/products/{product_id}/image",
+                    files={"file": ("p.png", uploads["placeholder"], "image/png")}, headers=headers)
+
+    def refcount(data):
+        db.expire_all()
+        blob = db.get(Blob, blob_key(data))
+        return blob.refcount if blob else 0
+
+    assert refcount(placeholder) == 3
+    assert db.get(Blob, blob_key(placeholder)).size == len(placeholder)
+
+    client.post(f"/v1/products/{ids[0]}/image",
+                files={"file": ("o.png", uploads["other"], "image/png")}, headers=headers)
+    assert (refcount(placeholder), refcount(other)) == (2, 1)
+    client.delete(f"/v1/products/{ids[1]}/image", headers=headers)
+    client.delete(f"/v1/products/{ids[0]}", headers=headers)
+    assert (refcount(placeholder), refcount(other)) == (1, 0)
+    client.post(f"/v1/products/{ids[1]}/image",
+                files={"file": ("p.png", uploads["placeholder"], "image/png")}, headers=headers)
+
+    assert client.get("/v1/admin/images/dedup", headers=headers).status_code == 403
+    user = db.query(User).filter(User.email == "dedup@example.com").one()
+    user.role = UserRole.admin
+    db.commit()
+    report = client.get("/v1/admin/images/dedup", headers=headers).json()
+    assert report["references"] == 2 and report["blobs"] == 1
+    assert report["saved_bytes"] == len(placeholder)
+    assert report["orphans"] == {"blobs": 1, "bytes": len(other)}
+    assert report["most_shared"][0]["references"] == 2
+
+    from datetime import timedelta
+
+    from app.storage.backends import get_blob_backend
+    from app.storage.dedup import collect_orphan_blobs, recount_blobs
+
+    assert recount_blobs(db, check_only=True)["corrected"] == 0
+    assert collect_orphan_blobs(db, grace=timedelta(hours=-1)) == {"blobs": 1, "bytes": len(other)}
+    assert not get_blob_backend().exists(blob_key(other))
+    assert get_blob_backend().exists(blob_key(placeholder))
+
+    # Referenced again between the scan and the row lock: the locked re-read keeps it
+    from sqlalchemy import event, update
+
+    client.post(f"/v1/products/{ids[2]}/image",
+                files={"file": ("o.png", uploads["other"], "image/png")}, headers=headers)
+    client.delete(f"/v1/products/{ids[2]}/image", headers=headers)
+    assert refcount(other) == 0
+
+    def writer_commits_first(state):
+        if state.statement._for_update_arg is not None:
+            state.session.connection().execute(
+                update(Blob.__table__).where(Blob.key == blob_key(other)).values(refcount=1)
+            )
+
+    event.listen(db, "do_orm_execute", writer_commits_first)
+    try:
+        assert collect_orphan_blobs(db, grace=timedelta(hours=-1)) == {"blobs": 0, "bytes": 0}
+    finally:
+        event.remove(db, "do_orm_execute", writer_commits_first)
+    assert get_blob_backend().exists(blob_key(other))
+
+
+def test_uploads_are_normalized_before_storage(client, db, monkeypatch):
+    """Uploads are turned upright, capped, stripped of metadata and re-encoded; savings are reported."""
+    import io
+
+    from PIL import Image
+
+    from app.db.models import Product
+
+    headers = _auth_headers(client, "normalize@example.com")
+    store_id = client.post("/v1/stores/", json={"name": "Norm", "type": "physical"}, headers=headers).json()["id"]
+    product = client.post("/v1/products/", json={"name": "Photo", "store_id": store_id}, headers=headers)
+    product_id = product.json()["id"]
+
+    monkeypatch.setenv("IMAGE_UPLOAD_MAX_DIMENSION", "1024")
+    # A sideways camera shot: 1500x500 pixels tagged "rotate 90°", with EXIF metadata
+    exif = Image.Exif()
+    exif[0x0112] = 6
+    exif[0x010F] = "Camera maker"
+    original = io.BytesIO()
+    Image.effect_noise((1500, 500), 64).convert("RGB").save(original, format="PNG", exif=exif)
+    original = original.getvalue()
+
+    upload = client.post(
+        f"/v1/products/{product_id}/image", files={"file": ("IMG_0001.png", original, "image/png")}, headers=headers
+    )
+    assert upload.status_code == 200
+    stored = client.get(f"/v1/products/{product_id}/image")
+    assert int(upload.headers["X-Image-Bytes-Saved"]) == len(original) - len(stored.content) > 0
+    assert stored.headers["content-type"] == "image/webp"
+    assert db.get(Product, product_id).image_filename == "IMG_0001.webp"
+    with Image.open(io.BytesIO(stored.content)) as img:
+        assert img.size == (341, 1024)
+        assert not img.getexif() and "icc_profile" not in img.info
+
+    monkeypatch.setenv("IMAGE_UPLOAD_FORMAT", "avif")
+    logo = client.post(f"/v1/stores/{store_id}/logo", files={"file": ("l.png", original, "image/png")}, headers=headers)
+    assert logo.json()["bytes_saved"] > 0
+    assert client.get(f"/v1/stores/{store_id}/logo").headers["content-type"] == "image/avif"
+
+    bad = client.post(f"/v1/products/{product_id}/image",
+                      files={"file": ("x.png", b"not an image", "image/png")}, headers=headers)
+    assert bad.status_code == 400
+
+
+def test_normalizing_never_grows_an_image():
+    """A compliant upload smaller than its re-encode is kept; other savings bottom out at 0."""
+    import io
+
+    from PIL import Image
+
+    from app.storage.normalize import normalize_image
+
+    small = io.BytesIO()
+    Image.effect_noise((256, 256), 64).convert("RGB").save(small, format="WEBP", quality=5)
+    small = small.getvalue()
+    image = normalize_image(small, "small.webp")
+    assert image.data == small and image.bytes_saved == 0
+
+    # Tagged with metadata, so re-encoded anyway: larger, but reported as no saving
+    tagged = io.BytesIO()
+    exif = Image.Exif()
+    exif[0x010F] = "Camera maker"
+    Image.effect_noise((256, 256), 64).convert("RGB").save(tagged, format="WEBP", quality=5, exif=exif)
+    image = normalize_image(tagged.getvalue(), "tagged.webp")
+    assert len(image.data) > len(tagged.getvalue()) and image.bytes_saved == 0
+    with Image.open(io.BytesIO(image.data)) as img:
+        assert not img.getexif()
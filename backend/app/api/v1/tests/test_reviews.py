@@ -0,0 +1,77 @@
+from sqlalchemy import func
+
+from app.db.models import ProductRatingStats, ProductReview
+from app.services.rating_stats import rebuild_all_rating_stats
+
+
+def _user(client, email):
+    client.post("/v1/auth/register", json={"email": email, "password": "pw"})
+    login = client.post("/v1/auth/login", data={"username": email, "password": "pw"})
+    return {"Authorization": f"Bearer {login.json()['access_token']}"}
+
+
+def _product(client, headers, name="Rated"):
+    return client.post("/v1/products/", json={"name": name}, headers=headers).json()["id"]
+
+
+def test_rating_stats_follow_review_writes(client, db):
+    """Create, update and delete keep product_rating_stats in step with the reviews."""
+    alice = _user(client, "alice@example.com")
+    bob = _user(client, "bob@example.com")
+    product_id = _product(client, alice)
+
+    client.post(f"/v1/products/{product_id}/reviews", json={"product_rating": 5, "info_rating": 4}, headers=alice)
+    review = client.post(
+        f"/v1/products/{product_id}/reviews", json={"product_rating": 2, "info_rating": 2}, headers=bob
+    ).json()
+
+    summary = client.get(f"/v1/products/{product_id}/ratings").json()
+    assert summary["total_reviews"] == 2
+    assert summary["average_product_rating"] == 3.5
+    assert summary["average_info_rating"] == 3.0
+    assert summary["rating_distribution"] == {"2": 1, "5": 1}
+
+    client.put(f"/v1/products/{product_id}/reviews/{review['id']}", json={"product_rating": 3}, headers=bob)
+    listed = client.get("/v1/products/").json()[0]
+    assert listed["average_product_rating"] == 4.0
+    assert listed["review_count"] == 2
+
+    client.delete(f"/v1/products/{product_id}/reviews/{review['id']}", headers=bob)
+    summary = client.get(f"/v1/products/{product_id}/ratings").json()
+    assert summary["total_reviews"] == 1
+    assert summary["rating_distribution"] == {"5": 1}
+
+    alice_review_id = client.get(f"/v1/products/{product_id}/reviews/my", headers=alice).json()["id"]
+    client.delete(f"/v1/products/{product_id}/reviews/{alice_review_id}", headers=alice)
+    assert db.query(ProductRatingStats).count() == 0
+    assert client.get(f"/v1/products/{product_id}/ratings").json()["total_reviews"] == 0
+
+
+def test_rebuild_rating_stats_repairs_drift(client, db):
+    alice = _user(client, "carol@example.com")
+    first = _product(client, alice, "First")
+    second = _product(client, alice, "Second")
+    client.post(f"/v1/products/{first}/reviews", json={"product_rating": 4, "info_rating": 5}, headers=alice)
+    client.post(f"/v1/products/{second}/reviews", json={"product_rating": 1, "info_rating": 1}, headers=alice)
+
+    # Simulate drift: a stale row and a missing one
+    db.query(ProductRatingStats).filter_by(product_id=first).update({"review_count": 7})
+    db.query(ProductRatingStats).filter_by(product_id=second).delete()
+    db.commit()
+
+    assert rebuild_all_rating_stats(db) == 2
+    stats = {s.product_id: s for s in db.query(ProductRatingStats).all()}
+    assert stats[first].review_count == 1
+    assert stats[first].average_info_rating == 5.0
+    assert stats[second].rating_1_count == 1
+    assert db.query(func.count(ProductReview.id)).scalar() == 2
+
+
+def test_sort_by_rating_uses_stats(client, db):
+    alice = _user(client, "dave@example.com")
+    low, high, unrated = (_product(client, alice, name) for name in ("Low", "High", "Unrated"))
+    client.post(f"/v1/products/{low}/reviews", json={"product_rating": 2, "info_rating": 3}, headers=alice)
+    client.post(f"/v1/products/{high}/reviews", json={"product_rating": 5, "info_rating": 3}, headers=alice)
+
+    ids = [p["id"] for p in client.get("/v1/products/", params={"sort_by": "rating"}).json()]
+    assert ids == [high, low, unrated]
@@ -0,0 +1,104 @@
+# backend/app/db/blob_refs.py
+"""Reference counts of the content-addressed image blobs.
+
+Rows point at an image by its SHA-256 (`products.image_sha256`,
+`stores.logo_sha256`, `users.profile_picture_sha256`); the `blobs` table holds
+one row per distinct digest with its size and how many of those columns name
+it. A placeholder shared by 5,000 scraped products is one blob with
+`refcount = 5000`.
+
+Counts are maintained by a session hook, in the same transaction as the rows
+that change, so they stay exact across the API routers, bulk import and the
+scraper pipelines. Bulk Core statements bypass it: call `adjust_refcounts`
+next to them (or `app.storage.dedup.recount_blobs` afterwards).
+"""
+from collections import Counter
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import BigInteger, DateTime, Integer, String, event, func, insert, inspect, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Mapped, Session, mapped_column
+
+from app.db.base_class import Base
+from app.storage.backends import get_blob_backend
+
+# Table -> columns holding a blob key
+BLOB_REFERENCES = {
+    "products": ("image_sha256",),
+    "stores": ("logo_sha256",),
+    "users": ("profile_picture_sha256",),
+}
+
+
+class Blob(Base):
+    __tablename__ = "blobs"
+
+    key: Mapped[str] = mapped_column(String(64), primary_key=True)
+    # Unknown (NULL) for blobs counted by the SQL backfill, until recount_blobs fills it in
+    size: Mapped[Optional[int]] = mapped_column(BigInteger, nullable=True)
+    refcount: Mapped[int] = mapped_column(Integer, default=0, server_default="0", nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), onupdate=func.now()
+    )
+
+
+def blob_size(key: str) -> Optional[int]:
+    try:
+        return get_blob_backend().size(key)
+    except OSError:
+        return None
+
+
+def adjust_refcounts(conn, deltas: dict[str, int]) -> None:
+    """Apply `{key: +n/-n}` to the counts on `conn`, inside its current transaction."""
+    table = Blob.__table__
+    for key, delta in sorted(deltas.items()):
+        if not delta:
+            continue
+        result = conn.execute(update(table).where(table.c.key == key).values(refcount=table.c.refcount + delta))
+        if result.rowcount or delta < 0:
+            # A release of an untracked blob predates the table: nothing to count down
+            continue
+        try:
+            with conn.begin_nested():
+                conn.execute(insert(table).values(key=key, size=blob_size(key), refcount=delta))
+        except IntegrityError:
+            # Inserted concurrently: count on the row that now exists
+            conn.execute(update(table).where(table.c.key == key).values(refcount=table.c.refcount + delta))
+
+
+def _reference_deltas(session: Session) -> Counter:
+    deltas: Counter = Counter()
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        columns = BLOB_REFERENCES.get(getattr(obj, "__tablename__", None), ())
+        if not columns:
+            continue
+        state = inspect(obj)
+        for column in columns:
+            history = state.attrs[column].history
+            if obj in session.new:
+                added, removed = history.added, ()
+            elif obj in session.deleted:
+                added, removed = (), (*history.unchanged, *history.deleted)
+            else:
+                added, removed = history.added, history.deleted
+            deltas.update(key for key in added if key)
+            deltas.subtract(key for key in removed if key)
+    return deltas
+
+
+@event.listens_for(Session, "before_flush")
+def _load_released_references(session: Session, flush_context, instances) -> None:
+    # A deleted row's digest may be expired; it can't be loaded once the row is gone
+    for obj in session.deleted:
+        for column in BLOB_REFERENCES.get(getattr(obj, "__tablename__", None), ()):
+            getattr(obj, column)
+
+
+@event.listens_for(Session, "after_flush")
+def _count_blob_references(session: Session, flush_context) -> None:
+    deltas = {key: delta for key, delta in _reference_deltas(session).items() if delta}
+    if deltas:
+        adjust_refcounts(session.connection(), deltas)
@@ -0,0 +1,114 @@
+# backend/app/db/cache_generations.py
+"""Write-driven generation counters behind the read endpoints' ETags.
+
+One row per cached resource (`products`, `stores`, `tags`, `users`). Any ORM
+session that inserts, updates or deletes a row of a tracked table bumps the
+matching counter once its transaction commits, so the API routers, bulk
+import and the scraper pipelines all invalidate without knowing about HTTP
+caching. Bulk Core statements bypass the ORM: call `mark_changed` next to them.
+
+The bump runs after commit, on its own short transaction: readers never see a
+new generation before the data it stands for, and concurrent writers don't
+queue on the counter row for the length of their transactions.
+"""
+from datetime import datetime
+
+from sqlalchemy import BigInteger, DateTime, String, event, func, insert, select, update
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from sqlalchemy.orm import Mapped, Session, mapped_column
+
+from app.db.base_class import Base
+from app.logging_config import get_logger
+
+logger = get_logger("db.cache_generations")
+
+# Table written -> resource whose cached reads it affects
+RESOURCE_BY_TABLE = {
+    "products": "products",
+    "product_tags": "products",
+    "product_reviews": "products",
+    "product_rating_stats": "products",
+    "stores": "stores",
+    "store_tags": "stores",
+    "tags": "tags",
+    "users": "users",
+}
+RESOURCES = frozenset(RESOURCE_BY_TABLE.values())
+
+_PENDING = "cache_generations.pending"
+
+
+class CacheGeneration(Base):
+    __tablename__ = "cache_generations"
+
+    name: Mapped[str] = mapped_column(String(50), primary_key=True)
+    generation: Mapped[int] = mapped_column(BigInteger, default=0, server_default="0", nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), onupdate=func.now()
+    )
+
+
+def mark_changed(session: Session, *resources: str) -> None:
+    """Bump `resources` when `session` next commits (for writes the ORM doesn't see)."""
+    unknown = set(resources) - RESOURCES
+    if unknown:
+        raise ValueError(f"Unknown cache resources: {sorted(unknown)}")
+    session.info.setdefault(_PENDING, set()).update(resources)
+
+
+def read_generations(session: Session, resources: tuple[str, ...]) -> dict[str, int]:
+    """Current generation of each resource (0 until its first write)."""
+    rows = session.execute(
+        select(CacheGeneration.name, CacheGeneration.generation).where(CacheGeneration.name.in_(resources))
+    )
+    generations = dict.fromkeys(resources, 0)
+    generations.update(rows.all())
+    return generations
+
+
+def bump_generations(bind, resources: set[str]) -> None:
+    """Increment each resource's counter in its own committed transaction."""
+    table = CacheGeneration.__table__
+    with bind.connect() as conn:
+        for name in sorted(resources):
+            result = conn.execute(
+                update(table).where(table.c.name == name).values(generation=table.c.generation + 1)
+            )
+            if not result.rowcount:
+                try:
+                    with conn.begin_nested():
+                        conn.execute(insert(table).values(name=name, generation=1))
+                except IntegrityError:
+                    # Created concurrently: bump the row that now exists
+                    conn.execute(
+                        update(table).where(table.c.name == name).values(generation=table.c.generation + 1)
+                    )
+        conn.commit()
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_changed_resources(session: Session, flush_context) -> None:
+    changed = set()
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        table = getattr(obj, "__tablename__", None)
+        if table in RESOURCE_BY_TABLE and (obj not in session.dirty or session.is_modified(obj)):
+            changed.add(RESOURCE_BY_TABLE[table])
+    if changed:
+        session.info.setdefault(_PENDING, set()).update(changed)
+
+
+@event.listens_for(Session, "after_commit")
+def _bump_after_commit(session: Session) -> None:
+    resources = session.info.pop(_PENDING, None)
+    if not resources:
+        return
+    try:
+        bump_generations(session.get_bind(), resources)
+    except SQLAlchemyError as e:
+        # The write itself is committed; clients revalidate on the next bump
+        logger.warning("Failed to bump cache generations", resources=sorted(resources), error=str(e))
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_after_rollback(session: Session) -> None:
+    session.info.pop(_PENDING, None)
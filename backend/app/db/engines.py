@@ -0,0 +1,236 @@
+# backend/app/db/engines.py
+"""Process-wide SQLAlchemy engines, one per role.
+
+Every subsystem gets its engine here instead of calling `create_engine`:
+
+- `api`: FastAPI routers (sync and async sessions)
+- `scraper`: Scrapy pipelines and URL filters
+- `mcp`: MCP monitoring tools
+- `scripts`: one-off maintenance and benchmark scripts
+
+Each role has its own pool size, recycle and statement timeout, overridable
+per role with `DB_<ROLE>_<SETTING>` env vars (e.g. `DB_API_POOL_SIZE=20`,
+`DB_SCRAPER_STATEMENT_TIMEOUT_MS=0`). Postgres connections are tagged with
+`application_name=partle-<role>` so they are identifiable in
+`pg_stat_activity`. Every pool records how long checkouts wait for a
+connection; `pool_metrics()` reports that together with utilization.
+"""
+import os
+import statistics
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, fields, replace
+from typing import Any, Optional, Union
+
+from sqlalchemy import create_engine
+from sqlalchemy.engine import URL, Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+# Async drivers for the same database (asyncpg for Postgres, aiosqlite for SQLite)
+ASYNC_DRIVERS = {"postgresql": "postgresql+asyncpg", "sqlite": "sqlite+aiosqlite"}
+
+
+@dataclass(frozen=True)
+class PoolSettings:
+    pool_size: int
+    max_overflow: int
+    pool_timeout: int = 30            # seconds to wait for a free connection
+    pool_recycle: int = 1800          # seconds before a connection is replaced
+    pool_pre_ping: bool = True
+    statement_timeout_ms: int = 30_000  # 0 disables the limit
+
+
+DEFAULT_POOL_SETTINGS = {
+    "api": PoolSettings(pool_size=10, max_overflow=20, statement_timeout_ms=15_000),
+    # Long-running crawls write in bulk; a few connections, generous timeout
+    "scraper": PoolSettings(pool_size=3, max_overflow=2, statement_timeout_ms=120_000),
+    "mcp": PoolSettings(pool_size=2, max_overflow=3, statement_timeout_ms=10_000),
+    # Migrations and backfills may legitimately run for a long time
+    "scripts": PoolSettings(pool_size=2, max_overflow=2, statement_timeout_ms=0),
+}
+
+
+def pool_settings(role: str) -> PoolSettings:
+    """Defaults of `role` with any `DB_<ROLE>_<SETTING>` env overrides applied."""
+    settings = DEFAULT_POOL_SETTINGS[role]
+    overrides: dict[str, Any] = {}
+    for field in fields(PoolSettings):
+        raw = os.getenv(f"DB_{role.upper()}_{field.name.upper()}")
+        if raw is not None:
+            overrides[field.name] = raw.lower() == "true" if field.type in (bool, "bool") else int(raw)
+    return replace(settings, **overrides)
+
+
+class PoolMetrics:
+    """Checkout wait times of one pool (thread-safe)."""
+
+    def __init__(self, window: int = 1000):
+        self._lock = threading.Lock()
+        self._recent: deque[float] = deque(maxlen=window)
+        self.checkouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def record(self, wait: float) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+            self._recent.append(wait)
+
+    def snapshot(self) -> dict[str, Any]:
+        with self._lock:
+            recent = sorted(self._recent)
+        p95 = statistics.quantiles(recent, n=20)[-1] if len(recent) > 1 else (recent[0] if recent else 0.0)
+        return {
+            "checkouts": self.checkouts,
+            "wait_ms_avg": round(self.total_wait / self.checkouts * 1000, 3) if self.checkouts else 0.0,
+            "wait_ms_p95": round(p95 * 1000, 3),
+            "wait_ms_max": round(self.max_wait * 1000, 3),
+        }
+
+
+class _TimedCheckout:
+    """Mixin timing how long `_do_get` waits for a connection."""
+    metrics: PoolMetrics
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            self.metrics.record(time.perf_counter() - start)
+
+
+def _instrumented_pool(base: type, name: str) -> tuple[type, PoolMetrics]:
+    # Metrics live on a per-engine subclass so they survive pool.recreate() on dispose()
+    metrics = PoolMetrics()
+    return type(name, (_TimedCheckout, base), {"metrics": metrics}), metrics
+
+
+_lock = threading.Lock()
+_engines: dict[tuple[str, bool], Union[Engine, AsyncEngine]] = {}
+_metrics: dict[tuple[str, bool], PoolMetrics] = {}
+
+
+def database_url() -> str:
+    url = os.getenv("DATABASE_URL")
+    if not url:
+        raise RuntimeError("DATABASE_URL is not set")
+    return url
+
+
+def async_database_url(url: Union[str, URL]) -> URL:
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend == "postgresql" and "sslmode" in parsed.query:
+        # asyncpg spells libpq's sslmode as ssl
+        query = dict(parsed.query)
+        query["ssl"] = query.pop("sslmode")
+        parsed = parsed.set(query=query)
+    return parsed.set(drivername=ASYNC_DRIVERS.get(backend, parsed.drivername))
+
+
+def _engine_kwargs(role: str, url: URL, is_async: bool) -> tuple[dict[str, Any], Optional[PoolMetrics]]:
+    if url.get_backend_name() != "postgresql":
+        # SQLite (tests, local tooling) keeps SQLAlchemy's default pooling
+        return {}, None
+
+    settings = pool_settings(role)
+    application_name = f"partle-{role}"
+    if is_async:
+        server_settings = {"application_name": application_name}
+        if settings.statement_timeout_ms:
+            server_settings["statement_timeout"] = str(settings.statement_timeout_ms)
+        connect_args: dict[str, Any] = {"server_settings": server_settings}
+    else:
+        connect_args = {"application_name": application_name}
+        if settings.statement_timeout_ms:
+            connect_args["options"] = f"-c statement_timeout={settings.statement_timeout_ms}"
+
+    poolclass, metrics = _instrumented_pool(
+        AsyncAdaptedQueuePool if is_async else QueuePool,
+        f"{role.title()}{'Async' if is_async else ''}Pool",
+    )
+    return {
+        "poolclass": poolclass,
+        "pool_size": settings.pool_size,
+        "max_overflow": settings.max_overflow,
+        "pool_timeout": settings.pool_timeout,
+        "pool_recycle": settings.pool_recycle,
+        "pool_pre_ping": settings.pool_pre_ping,
+        "connect_args": connect_args,
+    }, metrics
+
+
+def create_engine_for(role: str, url: Union[str, URL]) -> Engine:
+    """New, uncached engine for `role` against an explicit URL (e.g. copying between databases)."""
+    if role not in DEFAULT_POOL_SETTINGS:
+        raise ValueError(f"Unknown database role: {role}")
+    url = make_url(url)
+    kwargs, _ = _engine_kwargs(role, url, is_async=False)
+    return create_engine(url, echo=False, **kwargs)
+
+
+def get_engine(role: str = "api") -> Engine:
+    """The shared sync engine of `role` on DATABASE_URL."""
+    return _get(role, is_async=False)
+
+
+def get_async_engine(role: str = "api") -> AsyncEngine:
+    """The shared async engine of `role` on DATABASE_URL."""
+    return _get(role, is_async=True)
+
+
+def _get(role: str, is_async: bool):
+    if role not in DEFAULT_POOL_SETTINGS:
+        raise ValueError(f"Unknown database role: {role}")
+    key = (role, is_async)
+    engine = _engines.get(key)
+    if engine is not None:
+        return engine
+    with _lock:
+        if key not in _engines:
+            url = make_url(database_url())
+            if is_async:
+                url = async_database_url(url)
+            kwargs, metrics = _engine_kwargs(role, url, is_async)
+            factory = create_async_engine if is_async else create_engine
+            _engines[key] = factory(url, echo=False, **kwargs)
+            if metrics:
+                _metrics[key] = metrics
+        return _engines[key]
+
+
+async def dispose_async_engines() -> None:
+    """Close the pooled connections of every async engine; called at app shutdown."""
+    for (role, is_async), engine in list(_engines.items()):
+        if is_async:
+            await engine.dispose()
+
+
+def pool_metrics() -> dict[str, Any]:
+    """Utilization and checkout wait times of every engine created in this process."""
+    report = {}
+    for (role, is_async), engine in list(_engines.items()):
+        pool = engine.pool if not is_async else engine.sync_engine.pool
+        entry: dict[str, Any] = {"pool": type(pool).__name__}
+        if isinstance(pool, QueuePool):
+            capacity = pool.size() + max(pool._max_overflow, 0)
+            checked_out = pool.checkedout()
+            entry.update({
+                "size": pool.size(),
+                "max_overflow": pool._max_overflow,
+                "checked_out": checked_out,
+                "checked_in": pool.checkedin(),
+                "overflow": max(pool.overflow(), 0),
+                "utilization": round(checked_out / capacity, 3) if capacity else 0.0,
+            })
+        metrics = _metrics.get((role, is_async))
+        if metrics:
+            entry.update(metrics.snapshot())
+        report[f"{role}{'_async' if is_async else ''}"] = entry
+    return report
+
@@ -1,4 +1,5 @@
 # backend/app/db/models.py
+import random
 from typing import Optional, TYPE_CHECKING
 from enum import Enum
 from datetime import datetime
@@ -16,9 +17,22 @@ from sqlalchemy import (
     func,
     Table,
     UniqueConstraint,
+    Boolean,
+    event,
+    false,
+    Index,
+    inspect,
+    text,
 )
-from sqlalchemy.orm import relationship, Mapped, mapped_column
+from sqlalchemy.orm import relationship, Mapped, mapped_column, column_property, object_session, Session
 from app.db.base_class import Base
+# Registers the write listeners that invalidate the read endpoints' ETags
+from app.db.cache_generations import CacheGeneration  # noqa: F401
+# Registers the listener that keeps blob reference counts in step with *_sha256
+from app.db.blob_refs import Blob  # noqa: F401
+from app.storage.blobs import versioned_url
+from app.storage.variants import image_srcset
+from app.utils.test_data import TEST_DATA_TAGS
 
 
 # Association Tables
@@ -81,7 +95,12 @@ class User(Base):
     username: Mapped[Optional[str]] = mapped_column(String(50), unique=True, index=True, nullable=True)
     password_hash: Mapped[Optional[str]] = mapped_column(String, nullable=True)
     role: Mapped[UserRole] = mapped_column(PgEnum(UserRole, name="user_role"), default=UserRole.user, nullable=False)
-    profile_picture_data: Mapped[Optional[bytes]] = mapped_column(LargeBinary, nullable=True)
+    # BLOB columns are deferred so listing queries never pull them by accident.
+    # New images live in the blob store (app.storage.blobs) under *_sha256;
+    # *_data only holds rows not yet moved by migrate_images_to_blob_store.py.
+    # active_history: the old digest is loaded on change, to release its refcount
+    profile_picture_sha256: Mapped[Optional[str]] = mapped_column(String(64), nullable=True, active_history=True)
+    profile_picture_data: Mapped[Optional[bytes]] = mapped_column(LargeBinary, nullable=True, deferred=True)
     profile_picture_filename: Mapped[Optional[str]] = mapped_column(String, nullable=True)
     profile_picture_content_type: Mapped[Optional[str]] = mapped_column(String, nullable=True)
     stores: Mapped[list["Store"]] = relationship(back_populates="owner")
@@ -110,7 +129,8 @@ class Store(Base):
     lon: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
     address: Mapped[Optional[str]] = mapped_column(String, nullable=True)
     homepage: Mapped[Optional[str]] = mapped_column(String, nullable=True)
-    logo_data: Mapped[Optional[bytes]] = mapped_column(LargeBinary, nullable=True)
+    logo_sha256: Mapped[Optional[str]] = mapped_column(String(64), nullable=True, active_history=True)
+    logo_data: Mapped[Optional[bytes]] = mapped_column(LargeBinary, nullable=True, deferred=True)
     logo_filename: Mapped[Optional[str]] = mapped_column(String, nullable=True)
     logo_content_type: Mapped[Optional[str]] = mapped_column(String, nullable=True)
 
@@ -123,11 +143,24 @@ class Store(Base):
         secondary=store_tags, back_populates="stores"
     )
 
+    @property
+    def logo_url(self) -> Optional[str]:
+        if not (self.logo_sha256 or self.logo_filename):
+            return None
+        return versioned_url(f"/v1/stores/{self.id}/logo", self.logo_sha256)
+
 
 class Product(Base):
     __tablename__ = "products"
+    # Postgres also has a generated `search_vector` tsvector column (not mapped;
+    # see app.services.text_search)
     __table_args__ = (
         UniqueConstraint('store_id', 'sku', name='unique_store_sku'),
+        # One product per store page: the conflict target of the scraper's batched upsert
+        Index(
+            'uq_products_store_url', 'store_id', 'url', unique=True,
+            postgresql_where=text('url IS NOT NULL'), sqlite_where=text('url IS NOT NULL'),
+        ),
     )
 
     id: Mapped[int] = mapped_column(primary_key=True)
@@ -140,9 +173,21 @@ class Product(Base):
     lat: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
     lon: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
     description: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
-    image_data: Mapped[Optional[bytes]] = mapped_column(LargeBinary, nullable=True)
+    image_sha256: Mapped[Optional[str]] = mapped_column(String(64), nullable=True, index=True, active_history=True)
+    image_data: Mapped[Optional[bytes]] = mapped_column(LargeBinary, nullable=True, deferred=True)
     image_filename: Mapped[Optional[str]] = mapped_column(String, nullable=True)
     image_content_type: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    # Denormalized "has a TEST_DATA_TAGS tag" flag, kept in sync by the tag collection events below
+    is_test_data: Mapped[bool] = mapped_column(Boolean, default=False, server_default=false(), nullable=False)
+    # Shuffle position in [0, 1) for sort_by=random; rerolled by scripts/utils/rotate_random_keys.py
+    random_key: Mapped[float] = mapped_column(
+        Float, default=random.random, server_default=func.random(), nullable=False
+    )
+    # Blob-store digest, else a length check of a legacy BLOB - Postgres answers
+    # that from the TOAST header without detoasting it
+    has_image: Mapped[bool] = column_property(
+        image_sha256.column.is_not(None) | (func.coalesce(func.length(image_data), 0) > 0)
+    )
 
     store_id: Mapped[Optional[int]] = mapped_column(
         ForeignKey("stores.id", ondelete="SET NULL"), nullable=True
@@ -171,6 +216,48 @@ class Product(Base):
         secondary=product_tags, back_populates="products"
     )
     reviews: Mapped[list["ProductReview"]] = relationship(back_populates="product")
+    rating_stats: Mapped[Optional["ProductRatingStats"]] = relationship(
+        back_populates="product", passive_deletes=True
+    )
+
+    @property
+    def image_url(self) -> Optional[str]:
+        # ?v= pins the URL to the current content so clients may cache it for good
+        return versioned_url(f"/v1/products/{self.id}/image", self.image_sha256) if self.has_image else None
+
+    @property
+    def image_srcset(self) -> Optional[str]:
+        return image_srcset(f"/v1/products/{self.id}/image", self.image_sha256) if self.has_image else None
+
+
+@event.listens_for(Product.tags, "append")
+def _flag_test_data_on_tag_append(product: Product, tag: Tag, initiator):
+    if tag.name in TEST_DATA_TAGS:
+        product.is_test_data = True
+    return tag
+
+
+@event.listens_for(Product.tags, "remove")
+def _flag_test_data_on_tag_remove(product: Product, tag: Tag, initiator):
+    if tag.name not in TEST_DATA_TAGS:
+        return
+    if "tags" in inspect(product).unloaded:
+        # Removed through tag.products: the collection can't be loaded inside
+        # this event, so the flag is recomputed at the next flush
+        session = object_session(product)
+        if session is not None:
+            session.info.setdefault("test_data_recheck", set()).add(product)
+        return
+    product.is_test_data = any(
+        other.name in TEST_DATA_TAGS for other in product.tags if other is not tag
+    )
+
+
+@event.listens_for(Session, "before_flush")
+def _recheck_test_data_flags(session, flush_context, instances):
+    for product in session.info.pop("test_data_recheck", ()):
+        if product not in session.deleted:
+            product.is_test_data = any(tag.name in TEST_DATA_TAGS for tag in product.tags)
 
 
 class Credential(Base):
@@ -221,3 +308,69 @@ class ProductReview(Base):
     # Relationships
     product: Mapped["Product"] = relationship(back_populates="reviews")
     user: Mapped[User] = relationship(back_populates="reviews")
+
+
+class ProductRatingStats(Base):
+    """Per-product review aggregates, kept in sync by every review write."""
+    __tablename__ = "product_rating_stats"
+
+    product_id: Mapped[int] = mapped_column(
+        ForeignKey("products.id", ondelete="CASCADE"), primary_key=True
+    )
+    review_count: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    average_product_rating: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+    average_info_rating: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+
+    # Distribution of product ratings (1-5 stars)
+    rating_1_count: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    rating_2_count: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    rating_3_count: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    rating_4_count: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    rating_5_count: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), onupdate=func.now()
+    )
+
+    product: Mapped["Product"] = relationship(back_populates="rating_stats")
+
+
+class ImageSource(Base):
+    """Where a scraped image was downloaded from, for conditional re-fetches next crawl."""
+    __tablename__ = "image_sources"
+
+    # SHA-256 of the URL: image URLs can outgrow a btree index entry
+    url_hash: Mapped[str] = mapped_column(String(64), primary_key=True)
+    url: Mapped[str] = mapped_column(Text)
+    sha256: Mapped[str] = mapped_column(String(64))
+    filename: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    content_type: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    etag: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    last_modified: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    checked_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), onupdate=func.now()
+    )
+
+
+class CrawlLedgerEntry(Base):
+    """Validators of a scraped product page, so incremental crawls fetch only changed pages."""
+    __tablename__ = "crawl_ledger"
+
+    # SHA-256 of the URL, as in image_sources
+    url_hash: Mapped[str] = mapped_column(String(64), primary_key=True)
+    url: Mapped[str] = mapped_column(Text)
+    store_id: Mapped[Optional[int]] = mapped_column(ForeignKey("stores.id"), nullable=True, index=True)
+    lastmod: Mapped[Optional[str]] = mapped_column(String, nullable=True)  # As listed in the sitemap
+    etag: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    last_modified: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    content_hash: Mapped[Optional[str]] = mapped_column(String(64), nullable=True)
+    fetched_at: Mapped[datetime] = mapped_column(DateTime(timezone=True))
+    changed_at: Mapped[datetime] = mapped_column(DateTime(timezone=True))
+
+
+class CrawlSweep(Base):
+    """When a spider last completed a full (non-incremental) crawl."""
+    __tablename__ = "crawl_sweeps"
+
+    spider: Mapped[str] = mapped_column(String, primary_key=True)
+    swept_at: Mapped[datetime] = mapped_column(DateTime(timezone=True))
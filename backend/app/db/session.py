@@ -1,6 +1,6 @@
 import os
 from pathlib import Path
-from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 from sqlalchemy.orm import sessionmaker, declarative_base
 from dotenv import load_dotenv
 
@@ -10,6 +10,11 @@ load_dotenv(Path(__file__).parents[2] / '.env', override=True)
 DATABASE_URL = os.getenv("DATABASE_URL")
 assert DATABASE_URL, "DATABASE_URL is not set"
 
-engine = create_engine(DATABASE_URL, echo=False)
+from app.db.engines import get_async_engine, get_engine  # noqa: E402  (needs the .env loaded)
+
+engine = get_engine("api")
 SessionLocal = sessionmaker(bind=engine, autocommit=False, autoflush=False)
+
+async_engine = get_async_engine("api")
+AsyncSessionLocal = async_sessionmaker(bind=async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
 Base = declarative_base()
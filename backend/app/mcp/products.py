@@ -14,6 +14,7 @@ logger = logging.getLogger(__name__)
 
 # Server configuration
 API_BASE_URL = os.getenv('PARTLE_API_URL', 'http://localhost:8000')
+PAGE_SIZE = 500  # Rows per request when an endpoint is read to the end
 
 # Initialize MCP server
 mcp_server = Server('partle-products')
@@ -26,6 +27,20 @@ def get_http_client():
         yield client
 
 
+def _get_all_pages(client: httpx.Client, url: str, params: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+    """GET every page of a cursor-paginated list endpoint, following X-Next-Cursor."""
+    params = {**(params or {}), 'limit': PAGE_SIZE}
+    items = []
+    while True:
+        response = client.get(url, params=params)
+        response.raise_for_status()
+        items += response.json()
+        cursor = response.headers.get('X-Next-Cursor')
+        if not cursor:
+            return items
+        params = {**params, 'cursor': cursor}
+
+
 @mcp_server.list_tools()
 async def list_tools() -> List[Tool]:
     """List available tools for products management."""
@@ -256,12 +271,12 @@ async def _get_products_by_store(args: Dict[str, Any]) -> List[TextContent]:
         params['include_test_data'] = args['include_test_data']
 
     with get_http_client() as client:
-        response = client.get(f'/v1/products/store/{store_id}', params=params)
-        if response.status_code == 404:
-            return [TextContent(type='text', text=f'Store with ID {store_id} not found or has no products.')]
-        
-        response.raise_for_status()
-        products = response.json()
+        try:
+            products = _get_all_pages(client, f'/v1/products/store/{store_id}', params)
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code == 404:
+                return [TextContent(type='text', text=f'Store with ID {store_id} not found or has no products.')]
+            raise
         
         if not products:
             return [TextContent(type='text', text=f'No products found for store ID {store_id}.')]
@@ -4,15 +4,18 @@ import json
 import subprocess
 import asyncio
 import os
+import signal
 from typing import Optional, Any, Dict, List
 from datetime import datetime, timedelta
 from pathlib import Path
 from mcp.server import Server
 from mcp.types import Tool, TextContent
 import httpx
-from sqlalchemy import create_engine, text
+from sqlalchemy import text
 from contextlib import contextmanager
 
+from app.db.engines import get_engine
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -24,6 +27,9 @@ DATABASE_URL = os.getenv('DATABASE_URL')
 # Initialize MCP server
 mcp_server = Server('partle-scraper-monitor')
 
+# A stopped schedule gives its spiders the orchestrator's STOP_TIMEOUT (60s) to close
+SCHEDULE_STOP_TIMEOUT = 75
+
 # Track running scrapers
 RUNNING_SCRAPERS: Dict[str, subprocess.Popen] = {}
 SCRAPER_LOGS: Dict[str, List[str]] = {}
@@ -145,8 +151,7 @@ def get_scraper_stats() -> Dict[str, Any]:
         return {'error': 'DATABASE_URL not configured'}
 
     try:
-        engine = create_engine(DATABASE_URL)
-        with engine.connect() as conn:
+        with get_engine("mcp").connect() as conn:
             # Total products
             total_products = conn.execute(
                 text("SELECT COUNT(*) FROM products")
@@ -264,6 +269,54 @@ async def start_scraper(spider_name: str, options: Dict[str, Any] = None) -> Dic
         }
 
 
+async def start_schedule(spider_names: List[str], options: Dict[str, Any] = None) -> Dict[str, Any]:
+    """Start several scrapers as one orchestrated schedule (run_schedule.py).
+
+    The orchestrator runs them in parallel under the global browser, DB
+    connection and memory limits of schedule.json.
+    """
+    if 'schedule' in RUNNING_SCRAPERS:
+        return {
+            'success': False,
+            'message': 'A schedule is already running'
+        }
+
+    try:
+        cmd = ['uv', 'run', 'python', 'run_schedule.py', '--spiders', *spider_names]
+        if options:
+            if options.get('no_resume'):
+                cmd.append('--no-resume')
+            if options.get('dry_run'):
+                cmd.append('--dry-run')
+
+        process = subprocess.Popen(
+            cmd,
+            cwd=get_scraper_base_path(),
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            bufsize=1,
+            # Its own process group, so the spiders can be killed with it if it hangs
+            start_new_session=True
+        )
+
+        RUNNING_SCRAPERS['schedule'] = process
+        SCRAPER_LOGS['schedule'] = []
+        asyncio.create_task(monitor_scraper_output('schedule', process))
+
+        return {
+            'success': True,
+            'message': f'Started schedule of {len(spider_names)} scrapers',
+            'pid': process.pid
+        }
+    except Exception as e:
+        logger.error(f"Failed to start schedule: {e}")
+        return {
+            'success': False,
+            'message': f'Failed to start schedule: {str(e)}'
+        }
+
+
 async def monitor_scraper_output(spider_name: str, process: subprocess.Popen):
     """Monitor scraper output and store logs."""
     try:
@@ -292,13 +345,18 @@ async def stop_scraper(spider_name: str) -> Dict[str, Any]:
 
     try:
         process = RUNNING_SCRAPERS[spider_name]
+        # A schedule stops its spider processes itself on SIGTERM
         process.terminate()
 
         # Wait for process to end
+        timeout = SCHEDULE_STOP_TIMEOUT if spider_name == 'schedule' else 10
         try:
-            process.wait(timeout=10)
+            await asyncio.to_thread(process.wait, timeout)
         except subprocess.TimeoutExpired:
-            process.kill()
+            if spider_name == 'schedule':
+                os.killpg(process.pid, signal.SIGKILL)
+            else:
+                process.kill()
             process.wait()
 
         del RUNNING_SCRAPERS[spider_name]
@@ -414,19 +472,25 @@ async def list_tools() -> List[Tool]:
         ),
         Tool(
             name='bulk_start_scrapers',
-            description='Start multiple scrapers at once',
+            description='Start multiple scrapers as one schedule, in parallel under global browser, '
+                        'DB connection and memory limits (logs under the "schedule" name)',
             inputSchema={
                 'type': 'object',
                 'properties': {
                     'spider_names': {
                         'type': 'array',
                         'items': {'type': 'string'},
-                        'description': 'List of scraper names to start'
+                        'description': 'List of scraper names to start (must be in schedule.json)'
                     },
-                    'stagger_seconds': {
-                        'type': 'integer',
-                        'default': 30,
-                        'description': 'Seconds to wait between starting each scraper'
+                    'no_resume': {
+                        'type': 'boolean',
+                        'default': False,
+                        'description': 'Start fresh without resuming previous crawls'
+                    },
+                    'dry_run': {
+                        'type': 'boolean',
+                        'default': False,
+                        'description': 'Run without saving to database'
                     }
                 },
                 'required': ['spider_names']
@@ -535,17 +599,13 @@ async def call_tool(name: str, arguments: Optional[Dict[str, Any]] = None) -> Li
 
         elif name == 'bulk_start_scrapers':
             spider_names = arguments['spider_names']
-            stagger = arguments.get('stagger_seconds', 30)
+            result = await start_schedule(spider_names, arguments)
 
-            results = []
-            for spider_name in spider_names:
-                result = await start_scraper(spider_name)
-                results.append(f"{spider_name}: {'✅ Started' if result['success'] else '❌ ' + result['message']}")
-
-                if stagger > 0 and spider_name != spider_names[-1]:
-                    await asyncio.sleep(stagger)
-
-            return [TextContent(type='text', text='\n'.join(results))]
+            if result['success']:
+                text = f"✅ {result['message']}: {', '.join(spider_names)} (PID: {result['pid']})"
+            else:
+                text = f"❌ {result['message']}"
+            return [TextContent(type='text', text=text)]
 
         elif name == 'stop_all_scrapers':
             if not RUNNING_SCRAPERS:
@@ -14,6 +14,7 @@ logger = logging.getLogger(__name__)
 
 # Server configuration
 API_BASE_URL = os.getenv('PARTLE_API_URL', 'http://localhost:8000')
+PAGE_SIZE = 500  # Rows per request when an endpoint is read to the end
 
 # Initialize MCP server
 mcp_server = Server('partle-stores')
@@ -26,6 +27,20 @@ def get_http_client():
         yield client
 
 
+def _get_all_pages(client: httpx.Client, url: str, params: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+    """GET every page of a cursor-paginated list endpoint, following X-Next-Cursor."""
+    params = {**(params or {}), 'limit': PAGE_SIZE}
+    items = []
+    while True:
+        response = client.get(url, params=params)
+        response.raise_for_status()
+        items += response.json()
+        cursor = response.headers.get('X-Next-Cursor')
+        if not cursor:
+            return items
+        params = {**params, 'cursor': cursor}
+
+
 @mcp_server.list_tools()
 async def list_tools() -> List[Tool]:
     """List available tools for stores management."""
@@ -259,16 +274,15 @@ async def _get_store_analytics(args: Dict[str, Any]) -> List[TextContent]:
         store = store_response.json()
         
         # Get products for this store
-        products_response = client.get(f'/v1/products/store/{store_id}')
-        products_response.raise_for_status()
-        products = products_response.json()
+        # The listing is paginated: read every page, or the totals stop at the first one
+        products = _get_all_pages(client, f'/v1/products/store/{store_id}')
         
         result = f'**Analytics for {store["name"]}**\\n\\n'
         result += f'**Total Products:** {len(products)}\\n'
         
         if products:
             # Calculate price statistics
-            prices = [p['price'] for p in products if p.get('price') is not None]
+            prices = [float(p['price']) for p in products if p.get('price') is not None]  # Decimals arrive as strings
             if prices:
                 result += f'**Products with Prices:** {len(prices)} of {len(products)}\\n'
                 result += f'**Price Range:** €{min(prices):.2f} - €{max(prices):.2f}\\n'
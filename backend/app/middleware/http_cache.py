@@ -0,0 +1,34 @@
+"""
+Adds the ETag / Cache-Control headers computed by the conditional-GET dependencies
+"""
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.services.http_cache import SCOPE_KEY
+
+
+class HTTPCacheMiddleware:
+    """Copies the validators a `conditional_get` dependency left in the scope onto 200 responses.
+
+    Plain ASGI so it also covers endpoints that return a `Response` directly.
+    A response that sets its own Cache-Control keeps it, and `no-store` drops
+    the ETag (e.g. a random feed whose seed the server picked).
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        async def send_with_validators(message: Message):
+            cached = scope.get(SCOPE_KEY)
+            if message["type"] == "http.response.start" and cached and message["status"] == 200:
+                headers = MutableHeaders(scope=message)
+                if "no-store" not in headers.get("cache-control", ""):
+                    for name, value in cached.items():
+                        headers.setdefault(name, value)
+            await send(message)
+
+        await self.app(scope, receive, send_with_validators)
@@ -2,6 +2,7 @@
 Bulk product import endpoints for CSV/Excel files with image support.
 Allows store owners to upload products in bulk with associated images.
 """
+import asyncio
 import io
 import os
 import zipfile
@@ -11,47 +12,32 @@ from fastapi import APIRouter, HTTPException, UploadFile, File, Form, Depends
 from fastapi.responses import FileResponse
 from sqlalchemy.orm import Session
 import pandas as pd
-from PIL import Image
 import logging
 
 from app.api.deps import get_db
 from app.db.models import Product, Store, Tag, User
 from app.auth.security import get_current_user
+from app.storage.blobs import store_image
+from app.storage.normalize import ImageNormalizationError, NormalizedImage, normalize_upload
+from app.storage.variants import schedule_variants
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
 
-def process_image(image_path: str) -> tuple[bytes, str]:
+async def process_image(image_path: str) -> Optional[NormalizedImage]:
     """
-    Process and validate an image file.
-    Returns image data and content type.
+    Validate and normalize an image file (decoded in the image worker pool).
+    Returns None for files that aren't readable images.
     """
     try:
-        with Image.open(image_path) as img:
-            # Validate it's a valid image
-            img.verify()
-
-        # Read the actual image data
         with open(image_path, 'rb') as f:
             image_data = f.read()
-
-        # Determine content type
-        ext = os.path.splitext(image_path)[1].lower()
-        content_types = {
-            '.jpg': 'image/jpeg',
-            '.jpeg': 'image/jpeg',
-            '.png': 'image/png',
-            '.gif': 'image/gif',
-            '.webp': 'image/webp'
-        }
-        content_type = content_types.get(ext, 'image/jpeg')
-
-        return image_data, content_type
-    except Exception as e:
+        return await normalize_upload(image_data, os.path.basename(image_path))
+    except (OSError, ImageNormalizationError) as e:
         logger.warning(f"Failed to process image {image_path}: {e}")
-        return None, None
+        return None
 
 
 def validate_dataframe(df: pd.DataFrame) -> List[str]:
@@ -149,19 +135,23 @@ async def bulk_import_products(
                     # Extract all files
                     zf.extractall(temp_dir)
 
-                    # Process each image
-                    for root, dirs, files in os.walk(temp_dir):
-                        for file in files:
-                            if file.lower().endswith(('.jpg', '.jpeg', '.png', '.gif', '.webp')):
-                                file_path = os.path.join(root, file)
-                                image_data, content_type = process_image(file_path)
-                                if image_data:
-                                    # Store by filename (without path)
-                                    images_dict[file.lower()] = {
-                                        'data': image_data,
-                                        'content_type': content_type,
-                                        'filename': file
-                                    }
+                    image_files = [
+                        (file, os.path.join(root, file))
+                        for root, dirs, files in os.walk(temp_dir)
+                        for file in files
+                        if file.lower().endswith(('.jpg', '.jpeg', '.png', '.gif', '.webp'))
+                    ]
+                    # Normalize them all concurrently: the worker pool bounds the CPU use
+                    images = await asyncio.gather(*(process_image(path) for _, path in image_files))
+                    for (file, _), image in zip(image_files, images):
+                        if image:
+                            # Store by filename (without path), as the spreadsheet names it
+                            images_dict[file.lower()] = {
+                                'data': image.data,
+                                'content_type': image.content_type,
+                                'filename': image.filename,
+                                'bytes_saved': image.bytes_saved
+                            }
         except Exception as e:
             logger.error(f"Error processing images ZIP: {e}")
             # Continue without images rather than failing entire import
@@ -191,16 +181,18 @@ async def bulk_import_products(
                 if existing:
                     raise ValueError(f"SKU '{product_data['sku']}' already exists in this store")
 
+            product = Product(**product_data)
+
             # Handle image if specified
             if 'image' in row and pd.notna(row['image']):
                 image_filename = str(row['image']).lower()
                 if image_filename in images_dict:
                     image_info = images_dict[image_filename]
-                    product_data['image_data'] = image_info['data']
-                    product_data['image_filename'] = image_info['filename']
-                    product_data['image_content_type'] = image_info['content_type']
-
-            product = Product(**product_data)
+                    # Content-addressed: an image shared by several rows is stored once
+                    key = store_image(
+                        product, "image", image_info['data'], image_info['filename'], image_info['content_type']
+                    )
+                    image_info['key'] = key
 
             # Handle tags if specified
             if 'tags' in row and pd.notna(row['tags']):
@@ -236,6 +228,11 @@ async def bulk_import_products(
         db.rollback()
         raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
 
+    # Thumbnails of every image the import used, rendered in the image worker pool
+    for image_info in images_dict.values():
+        if 'key' in image_info:
+            schedule_variants(image_info['key'], image_info['data'])
+
     # Return summary
     return {
         'success': True,
@@ -245,7 +242,8 @@ async def bulk_import_products(
         'products_failed': len(products_failed),
         'created_details': products_created[:10],  # First 10 for preview
         'failed_details': products_failed,
-        'images_processed': len(images_dict)
+        'images_processed': len(images_dict),
+        'image_bytes_saved': sum(image_info['bytes_saved'] for image_info in images_dict.values())
     }
 
 
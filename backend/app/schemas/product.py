@@ -51,8 +51,12 @@ class ProductOut(ProductIn):
     creator: Optional[UserBasic] = None
     image_filename: Optional[str] = None
     image_content_type: Optional[str] = None
+    has_image: bool = False
+    image_url: Optional[str] = None       # /v1/products/{id}/image when has_image
+    image_srcset: Optional[str] = None    # 200w/400w/800w variants of image_url for <img srcset>
     tags: list[Tag] = []
     average_product_rating: Optional[float] = None
     average_info_rating: Optional[float] = None
     review_count: Optional[int] = None
+    distance_km: Optional[float] = None   # Only set by sort_by=distance
 
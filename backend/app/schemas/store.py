@@ -22,6 +22,7 @@ class StoreRead(StoreBase):
     tags: list[Tag] = []
     logo_filename: Optional[str] = None
     logo_content_type: Optional[str] = None
+    logo_url: Optional[str] = None  # Versioned /v1/stores/{id}/logo?v=..., cacheable for good
 
     class Config:
         from_attributes = True
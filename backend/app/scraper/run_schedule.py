@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Cron-friendly runner for a whole schedule of spiders.
+
+Runs the spiders of schedule.json in parallel processes under its global
+limits (processes, browsers, DB connections, memory), each with its domain's
+concurrency/delay budget and its own JOBDIR (see
+store_scrapers/orchestrator.py). Logs, per-spider stats and the aggregated
+report go to logs/schedule_<timestamp>/. Spider durations are remembered in
+crawls/schedule_history.json so the next run starts the longest first.
+
+Usage:
+    python run_schedule.py [options]
+
+Examples:
+    python run_schedule.py
+    python run_schedule.py --spiders bricodepot mengual_bulk
+    python run_schedule.py --processes 2 --browsers 1 --no-resume
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+from dataclasses import replace
+from datetime import datetime
+from pathlib import Path
+
+from tabulate import tabulate
+
+# Add the current directory to Python path for imports
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from store_scrapers.orchestrator import Orchestrator, load_schedule, report
+
+SCRAPER_DIR = Path(__file__).parent
+HISTORY_FILE = SCRAPER_DIR / "crawls" / "schedule_history.json"
+
+
+def load_history() -> dict:
+    """Last duration in seconds of every spider that has run through a schedule."""
+    if HISTORY_FILE.exists():
+        return json.loads(HISTORY_FILE.read_text())
+    return {}
+
+
+def save_history(history: dict, runs: list):
+    """Record the durations of the spiders that finished cleanly (not stopped early)."""
+    history.update({
+        run.job.spider: round(run.seconds, 1)
+        for run in runs if run.ok and run.stats.get("finish_reason") == "finished"
+    })
+    HISTORY_FILE.parent.mkdir(parents=True, exist_ok=True)
+    HISTORY_FILE.write_text(json.dumps(history, indent=2, sort_keys=True))
+
+
+def main():
+    """Main entry point for the script."""
+    parser = argparse.ArgumentParser(
+        description="Run a schedule of Scrapy spiders under global resource limits"
+    )
+    parser.add_argument(
+        "--schedule",
+        default=str(SCRAPER_DIR / "schedule.json"),
+        help="Schedule file (default: %(default)s)"
+    )
+    parser.add_argument(
+        "--spiders",
+        nargs="+",
+        help="Run only these spiders of the schedule"
+    )
+    parser.add_argument("--processes", type=int, help="Override the schedule's process limit")
+    parser.add_argument("--browsers", type=int, help="Override the schedule's browser limit")
+    parser.add_argument("--db-connections", type=int, help="Override the schedule's DB connection limit")
+    parser.add_argument("--memory-mb", type=int, help="Override the schedule's memory limit")
+    parser.add_argument(
+        "--no-resume",
+        action="store_true",
+        help="Disable resumable crawls (start every spider fresh)"
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Run without actually saving to database (for testing)"
+    )
+
+    args = parser.parse_args()
+
+    run_dir = SCRAPER_DIR / "logs" / f"schedule_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+    run_dir.mkdir(parents=True, exist_ok=True)
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s [%(name)s] %(levelname)s: %(message)s',
+        handlers=[logging.FileHandler(run_dir / "schedule.log"), logging.StreamHandler(sys.stdout)]
+    )
+    logger = logging.getLogger(__name__)
+
+    history = load_history()
+    limits, jobs = load_schedule(args.schedule, spiders=args.spiders, history=history)
+    overrides = {
+        name: getattr(args, name)
+        for name in ("processes", "browsers", "db_connections", "memory_mb")
+        if getattr(args, name) is not None
+    }
+    limits = replace(limits, **overrides)
+    logger.info(f"Running {len(jobs)} spiders with {limits} - Logs: {run_dir}")
+
+    spider_args = ["--no-resume"] * args.no_resume + ["--dry-run"] * args.dry_run
+    orchestrator = Orchestrator(jobs, limits, run_dir, spider_args)
+    runs, wall_seconds = asyncio.run(orchestrator.run())
+    summary = report(runs, wall_seconds)
+    (run_dir / "report.json").write_text(json.dumps(summary, indent=2, default=str))
+    save_history(history, runs)
+
+    print(tabulate(summary["spiders"], headers="keys"))
+    logger.info(
+        f"Schedule finished in {summary['wall_seconds']}s "
+        f"({summary['spider_seconds']}s of spider time, {summary['parallelism']}x parallel) - "
+        f"Report: {run_dir / 'report.json'}"
+    )
+    if orchestrator.stopping:
+        logger.error("Schedule stopped before it finished")
+        sys.exit(1)
+    if summary["failed"]:
+        logger.error(f"Failed spiders: {', '.join(summary['failed'])}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -12,10 +12,14 @@ Examples:
     python run_spider.py bricodepot
     python run_spider.py bricodepot --log-level=DEBUG
     python run_spider.py bricodepot --resume
+    python run_spider.py bricodepot --set DOWNLOAD_DELAY=0.5 --stats-file stats.json
+
+To run many spiders under global limits, see run_schedule.py.
 """
 
 import sys
 import os
+import json
 import logging
 import argparse
 from datetime import datetime
@@ -62,6 +66,18 @@ def validate_spider(spider_name: str) -> bool:
     return spider_file.exists()
 
 
+def parse_settings(pairs: list) -> dict:
+    """NAME=VALUE pairs to a settings dict; values that are valid JSON are decoded."""
+    settings = {}
+    for pair in pairs:
+        name, _, value = pair.partition('=')
+        try:
+            settings[name] = json.loads(value)
+        except ValueError:
+            settings[name] = value
+    return settings
+
+
 def run_spider(spider_name: str, **kwargs):
     """Run a spider with the given configuration."""
     logger = logging.getLogger(__name__)
@@ -77,6 +93,8 @@ def run_spider(spider_name: str, **kwargs):
         # Override settings with command line options
         if kwargs.get('log_level'):
             settings.set('LOG_LEVEL', kwargs['log_level'].upper())
+        # --set overrides beat the spider's custom_settings, like `scrapy crawl -s`
+        settings.setdict(kwargs.get('settings') or {}, priority='cmdline')
         
         # Set up job directory for resumable crawls
         if kwargs.get('resume', True):  # Default to resumable
@@ -93,9 +111,14 @@ def run_spider(spider_name: str, **kwargs):
         logger.info(f"Update existing products: {config.UPDATE_EXISTING_PRODUCTS}")
         
         # Start the spider
-        process.crawl(spider_name)
+        crawler = process.create_crawler(spider_name)
+        process.crawl(crawler)
         process.start()
         
+        if kwargs.get('stats_file'):
+            with open(kwargs['stats_file'], 'w') as f:
+                json.dump(crawler.stats.get_stats(), f, indent=2, default=str)
+        
         logger.info(f"Spider '{spider_name}' completed successfully")
         return True
         
@@ -133,6 +156,17 @@ def main():
         action="store_true",
         help="Run without actually saving to database (for testing)"
     )
+    parser.add_argument(
+        "--set", "-s",
+        action="append",
+        default=[],
+        metavar="NAME=VALUE",
+        help="Override a Scrapy setting; JSON values are decoded (can be repeated)"
+    )
+    parser.add_argument(
+        "--stats-file",
+        help="Write the crawl's final Scrapy stats to this JSON file"
+    )
     
     args = parser.parse_args()
     
@@ -154,7 +188,9 @@ def main():
         args.spider,
         log_level=args.log_level,
         resume=not args.no_resume,
-        dry_run=args.dry_run
+        dry_run=args.dry_run,
+        settings=parse_settings(args.set),
+        stats_file=args.stats_file
     )
     
     if success:
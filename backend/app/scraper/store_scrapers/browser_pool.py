@@ -0,0 +1,139 @@
+"""
+Playwright browser context pool and resource blocking for HybridDownloadHandler.
+
+Rendered pages are spread over PLAYWRIGHT_CONTEXT_POOL_SIZE browser contexts
+(each holding up to PLAYWRIGHT_MAX_PAGES_PER_CONTEXT pages). A context that
+has served PLAYWRIGHT_CONTEXT_RECYCLE_PAGES pages is retired: new pages go
+to a fresh context and the old one is closed when its last page finishes,
+which returns the memory Chromium accumulates per context.
+
+Inside every page, sub-requests the scraper never reads are aborted before
+they leave the browser: images, media, fonts and stylesheets by default
+(spider attribute `blocked_resource_types`), requests to analytics and
+tracking domains (PLAYWRIGHT_BLOCKED_DOMAINS), and, for spiders with
+`block_third_party = True`, every host outside `allowed_domains`. Product
+images are downloaded by ImageDownloadPipeline, not the browser.
+"""
+
+import os
+import time
+from collections import Counter
+from urllib.parse import urlparse
+
+import psutil
+
+BLOCKED_RESOURCE_TYPES = ('image', 'media', 'font', 'stylesheet')
+BLOCKED_DOMAINS = (
+    'google-analytics.com', 'googletagmanager.com', 'doubleclick.net', 'googlesyndication.com',
+    'googleadservices.com', 'facebook.net', 'facebook.com', 'connect.facebook.net', 'hotjar.com',
+    'clarity.ms', 'bing.com', 'criteo.com', 'criteo.net', 'taboola.com', 'outbrain.com',
+    'tiktok.com', 'pinterest.com', 'onetrust.com', 'cookielaw.org', 'trustarc.com',
+    'newrelic.com', 'nr-data.net', 'segment.io', 'mixpanel.com', 'optimizely.com',
+)
+
+
+def _matches(host, domains):
+    return any(host == domain or host.endswith('.' + domain) for domain in domains)
+
+
+class ResourceBlocker:
+    """PLAYWRIGHT_ABORT_REQUEST predicate for one spider."""
+
+    def __init__(self, resource_types=BLOCKED_RESOURCE_TYPES, blocked_domains=BLOCKED_DOMAINS,
+                 first_party=None):
+        self.resource_types = frozenset(resource_types)
+        self.blocked_domains = tuple(blocked_domains)
+        # None: third-party hosts are allowed (sites load products from CDNs and search APIs)
+        self.first_party = tuple(first_party) if first_party else None
+
+    @classmethod
+    def from_spider(cls, spider, settings):
+        resource_types = getattr(spider, 'blocked_resource_types', None)
+        if resource_types is None:
+            resource_types = settings.getlist('PLAYWRIGHT_BLOCKED_RESOURCE_TYPES', BLOCKED_RESOURCE_TYPES)
+        block_third_party = getattr(spider, 'block_third_party',
+                                    settings.getbool('PLAYWRIGHT_BLOCK_THIRD_PARTY', False))
+        return cls(
+            resource_types=resource_types,
+            blocked_domains=settings.getlist('PLAYWRIGHT_BLOCKED_DOMAINS', BLOCKED_DOMAINS),
+            first_party=getattr(spider, 'allowed_domains', None) if block_third_party else None,
+        )
+
+    def __call__(self, request):
+        if request.is_navigation_request():
+            return False
+        if request.resource_type in self.resource_types:
+            return True
+        host = urlparse(request.url).hostname or ''
+        if _matches(host, self.blocked_domains):
+            return True
+        return self.first_party is not None and not _matches(host, self.first_party)
+
+
+class ContextPool:
+    """Names of the pooled contexts, which one a page goes to and when to close one."""
+
+    def __init__(self, size=2, recycle_after=100):
+        self.size = max(size, 1)
+        self.recycle_after = recycle_after
+        self.generations = [0] * self.size
+        self.served = [0] * self.size
+        self.in_flight = Counter()
+        self.retiring = set()
+        self.recycled = 0
+
+    def _name(self, slot):
+        return f'pool-{slot}-{self.generations[slot]}'
+
+    def acquire(self):
+        """Context name for a new page: the least busy slot."""
+        slot = min(range(self.size), key=lambda s: self.in_flight[self._name(s)])
+        name = self._name(slot)
+        self.in_flight[name] += 1
+        self.served[slot] += 1
+        if self.recycle_after and self.served[slot] >= self.recycle_after:
+            self.generations[slot] += 1
+            self.served[slot] = 0
+            self.retiring.add(name)
+            self.recycled += 1
+        return name
+
+    def release(self, name):
+        """Mark a page of `name` finished. True if the context is retired and now idle."""
+        self.in_flight[name] -= 1
+        if name in self.retiring and self.in_flight[name] <= 0:
+            self.retiring.discard(name)
+            del self.in_flight[name]
+            return True
+        return False
+
+
+class PageStats:
+    """Page render time and crawler + browser RSS in the Scrapy stats collector."""
+
+    def __init__(self, stats, rss_interval=5.0):
+        self.stats = stats
+        self.rss_interval = rss_interval
+        self.last_rss = 0.0
+        self.process = psutil.Process(os.getpid())
+
+    def page_done(self, seconds):
+        ms = int(seconds * 1000)
+        self.stats.inc_value('playwright_pool/pages')
+        self.stats.inc_value('playwright_pool/page_time_ms/total', ms)
+        self.stats.max_value('playwright_pool/page_time_ms/max', ms)
+        if time.monotonic() - self.last_rss >= self.rss_interval:
+            self.sample_rss()
+
+    def sample_rss(self):
+        self.last_rss = time.monotonic()
+        rss = 0
+        # Chromium runs as child processes of the Playwright driver, itself our child
+        for process in [self.process, *self.process.children(recursive=True)]:
+            try:
+                rss += process.memory_info().rss
+            except psutil.Error:
+                pass
+        rss_mb = rss // (1024 * 1024)
+        self.stats.set_value('playwright_pool/rss_mb', rss_mb)
+        self.stats.max_value('playwright_pool/rss_mb/max', rss_mb)
@@ -0,0 +1,164 @@
+"""
+Hybrid HTTP/Playwright download handler.
+
+Requests marked `playwright=True` are first fetched with Scrapy's HTTP/1.1
+client; only pages that turn out to need JavaScript are downloaded again in
+the browser. Listing pages, product pages with server-rendered markup or
+JSON-LD, sitemaps and feeds never pay for a browser render.
+
+A page needs JavaScript when:
+- none of the request's `render_selectors` meta (or the spider's
+  `render_selectors` attribute) match, if any are configured;
+- otherwise, it has no JSON-LD and less than HYBRID_MIN_TEXT_LENGTH
+  characters of visible text (an app shell);
+- or the HTTP client was answered 403, as bot walls do to non-browsers.
+
+The mode comes from the request's `render` meta, the spider's `render_mode`
+attribute or HYBRID_RENDER_MODE: 'auto' (the above), 'always' (straight to
+the browser) or 'never'. Requests with `playwright_include_page` always go
+to the browser, since their callback drives the page. When most pages of a
+callback escalate (HYBRID_LEARN_AFTER samples, HYBRID_LEARN_RATIO), later
+requests to it skip the HTTP probe.
+
+Browser downloads go through a recycled context pool with resource
+blocking (see browser_pool.py).
+
+Stats per spider: hybrid/http, hybrid/escalated (and /<reason>),
+hybrid/browser, hybrid/escalated_ratio.
+"""
+
+import inspect
+import logging
+import time
+
+from scrapy.core.downloader.handlers.http11 import HTTP11DownloadHandler
+from scrapy.http import TextResponse
+from scrapy.utils.defer import deferred_from_coro, maybe_deferred_to_future
+from scrapy_playwright.handler import ScrapyPlaywrightDownloadHandler
+
+from .browser_pool import ContextPool, PageStats, ResourceBlocker
+
+logger = logging.getLogger(__name__)
+
+RENDER_MODES = ('auto', 'always', 'never')
+# Scrapy >= 2.14 download handlers are coroutines without a spider argument
+ASYNC_DOWNLOAD_API = inspect.iscoroutinefunction(HTTP11DownloadHandler.download_request)
+
+VISIBLE_TEXT = '//body//text()[not(ancestor::script) and not(ancestor::style) and not(ancestor::noscript)]'
+
+
+def needs_js(response, selectors=None, min_text_length=200):
+    """Why `response` has to be rendered in a browser, or None if it can be parsed as is."""
+    if response.status == 403:
+        return 'status'
+    if not isinstance(response, TextResponse) or b'html' not in response.headers.get('Content-Type', b'html'):
+        return None
+    if selectors:
+        return None if any(response.css(selector) for selector in selectors) else 'selectors'
+    if response.css('script[type="application/ld+json"]'):
+        return None
+    text = ''.join(response.xpath(VISIBLE_TEXT).getall())
+    if len(''.join(text.split())) < min_text_length:
+        return 'shell'
+    return None
+
+
+class HybridDownloadHandler(ScrapyPlaywrightDownloadHandler):
+    """ScrapyPlaywrightDownloadHandler that tries plain HTTP first."""
+
+    def __init__(self, crawler):
+        super().__init__(crawler)
+        self._init_hybrid(crawler)
+
+    def _init_hybrid(self, crawler):
+        settings = crawler.settings
+        self.crawler = crawler
+        self.stats = crawler.stats
+        self.render_mode = settings.get('HYBRID_RENDER_MODE', 'auto')
+        self.min_text_length = settings.getint('HYBRID_MIN_TEXT_LENGTH', 200)
+        self.learn_after = settings.getint('HYBRID_LEARN_AFTER', 5)
+        self.learn_ratio = settings.getfloat('HYBRID_LEARN_RATIO', 0.9)
+        self.callbacks = {}  # callback name -> [probed, escalated]
+        self.pool = ContextPool(settings.getint('PLAYWRIGHT_CONTEXT_POOL_SIZE', 2),
+                                settings.getint('PLAYWRIGHT_CONTEXT_RECYCLE_PAGES', 100))
+        self.page_stats = PageStats(crawler.stats)
+        self.blocker = None
+        if not settings.get('PLAYWRIGHT_ABORT_REQUEST'):
+            self.abort_request = self._abort_request
+
+    def _abort_request(self, playwright_request):
+        if self.blocker is None:
+            self.blocker = ResourceBlocker.from_spider(self.crawler.spider, self.crawler.settings)
+        return self.blocker(playwright_request)
+
+    if ASYNC_DOWNLOAD_API:
+        async def download_request(self, request):
+            return await self._route(request, self.crawler.spider)
+    else:
+        def download_request(self, request, spider):
+            return deferred_from_coro(self._route(request, spider))
+
+    async def _http(self, request, spider):
+        if ASYNC_DOWNLOAD_API:
+            return await HTTP11DownloadHandler.download_request(self, request)
+        return await maybe_deferred_to_future(HTTP11DownloadHandler.download_request(self, request, spider))
+
+    async def _browser(self, request, spider):
+        # Pages the callback drives stay in the default context, which is never recycled
+        pooled = 'playwright_context' not in request.meta and not request.meta.get('playwright_include_page')
+        if pooled:
+            request.meta['playwright_context'] = self.pool.acquire()
+        started = time.monotonic()
+        try:
+            return await self._maybe_future_from_coro(self._download_request(request, spider))
+        finally:
+            self.page_stats.page_done(time.monotonic() - started)
+            if pooled:
+                # A retry must not revive a context that may be retired by then
+                await self._release_context(request.meta.pop('playwright_context'))
+
+    async def _release_context(self, name):
+        if not self.pool.release(name):
+            return
+        wrapper = self.context_wrappers.get(name)
+        if wrapper is not None:
+            await wrapper.context.close()
+        self.stats.inc_value('playwright_pool/contexts_recycled')
+        self.page_stats.sample_rss()
+
+    def _mode(self, request, spider):
+        mode = request.meta.get('render') or getattr(spider, 'render_mode', None) or self.render_mode
+        if mode not in RENDER_MODES:
+            raise ValueError(f"Unknown render mode {mode!r}, expected one of {RENDER_MODES}")
+        return mode
+
+    async def _route(self, request, spider):
+        if not request.meta.get('playwright'):
+            return await self._http(request, spider)
+        mode = self._mode(request, spider)
+        callback = getattr(request.callback, '__name__', 'parse')
+        probed, escalated = self.callbacks.setdefault(callback, [0, 0])
+        learned = probed >= self.learn_after and escalated >= probed * self.learn_ratio
+        if mode == 'never':
+            return await self._http(request, spider)
+        if mode == 'always' or request.meta.get('playwright_include_page') or learned:
+            self.stats.inc_value('hybrid/browser')
+            return await self._browser(request, spider)
+
+        response = await self._http(request, spider)
+        selectors = request.meta.get('render_selectors') or getattr(spider, 'render_selectors', None)
+        reason = needs_js(response, selectors, self.min_text_length)
+        self.callbacks[callback][0] += 1
+        if reason is None:
+            self.stats.inc_value('hybrid/http')
+        else:
+            self.callbacks[callback][1] += 1
+            self.stats.inc_value('hybrid/escalated')
+            self.stats.inc_value(f'hybrid/escalated/{reason}')
+            logger.debug(f"Escalating {request.url} to Playwright ({reason})")
+        total = sum(p for p, _ in self.callbacks.values())
+        self.stats.set_value('hybrid/escalated_ratio',
+                             round(sum(e for _, e in self.callbacks.values()) / total, 3))
+        if reason is None:
+            return response
+        return await self._browser(request, spider)
@@ -0,0 +1,131 @@
+"""
+Non-blocking image downloads for ImageDownloadPipeline.
+
+Images are fetched with an httpx.AsyncClient on the crawl's asyncio reactor,
+so a slow CDN never stalls page requests or other items. Downloads are
+bounded globally (IMAGE_DOWNLOAD_CONCURRENCY) and per host
+(IMAGE_DOWNLOAD_CONCURRENCY_PER_HOST), retried with exponential backoff on
+timeouts, 429 and 5xx (honouring Retry-After), and sent as conditional
+requests when the URL was fetched by an earlier crawl.
+"""
+
+import asyncio
+import hashlib
+import random
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Optional
+from urllib.parse import urlparse
+
+import httpx
+
+RETRY_STATUSES = {408, 429, 500, 502, 503, 504, 520, 521, 522, 523, 524}
+
+
+def url_hash(url: str) -> str:
+    """Primary key of a URL in image_sources."""
+    return hashlib.sha256(url.encode()).hexdigest()
+
+
+@dataclass
+class FetchResult:
+    """A 200 with the image bytes, or a 304 confirming the stored copy."""
+    status: int
+    content: bytes = b''
+    content_type: Optional[str] = None
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+    @property
+    def not_modified(self) -> bool:
+        return self.status == 304
+
+
+class ImageFetcher:
+    """Bounded, retrying, conditional image GETs."""
+
+    def __init__(self, concurrency=16, per_host=4, retries=3, timeout=30.0,
+                 backoff=1.0, max_backoff=30.0, headers=None):
+        self.client = httpx.AsyncClient(
+            timeout=timeout,
+            follow_redirects=True,
+            headers=headers,
+            limits=httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency),
+        )
+        self.per_host = per_host
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.hosts: dict[str, asyncio.Semaphore] = {}
+        self.retried = 0
+
+    @classmethod
+    def from_settings(cls, settings):
+        return cls(
+            concurrency=settings.getint('IMAGE_DOWNLOAD_CONCURRENCY', 16),
+            per_host=settings.getint('IMAGE_DOWNLOAD_CONCURRENCY_PER_HOST', 4),
+            retries=settings.getint('IMAGE_DOWNLOAD_RETRIES', 3),
+            timeout=settings.getfloat('IMAGE_DOWNLOAD_TIMEOUT', 30.0),
+            backoff=settings.getfloat('IMAGE_DOWNLOAD_BACKOFF', 1.0),
+            headers={'User-Agent': settings.get('USER_AGENT')} if settings.get('USER_AGENT') else None,
+        )
+
+    def _host_slot(self, url: str) -> asyncio.Semaphore:
+        host = urlparse(url).netloc
+        if host not in self.hosts:
+            self.hosts[host] = asyncio.Semaphore(self.per_host)
+        return self.hosts[host]
+
+    def _delay(self, attempt: int, response: Optional[httpx.Response] = None) -> float:
+        retry_after = response.headers.get('retry-after') if response is not None else None
+        if retry_after:
+            try:
+                return min(float(retry_after), self.max_backoff)
+            except ValueError:
+                try:
+                    wait = (parsedate_to_datetime(retry_after) - datetime.now(timezone.utc)).total_seconds()
+                    return min(max(wait, 0.0), self.max_backoff)
+                except (TypeError, ValueError):
+                    pass
+        # Exponential with full jitter, so retries against one host don't arrive in lockstep
+        return random.uniform(0, min(self.backoff * 2 ** attempt, self.max_backoff))
+
+    async def fetch(self, url: str, etag: Optional[str] = None,
+                    last_modified: Optional[str] = None) -> FetchResult:
+        """GET `url`, conditionally if validators are given. Raises httpx.HTTPError on failure."""
+        headers = {}
+        if etag:
+            headers['If-None-Match'] = etag
+        if last_modified:
+            headers['If-Modified-Since'] = last_modified
+
+        # The host slot stays taken during backoff: a struggling host gets fewer requests, not more
+        async with self._host_slot(url):
+            for attempt in range(self.retries + 1):
+                try:
+                    response = await self.client.get(url, headers=headers)
+                except httpx.TransportError:
+                    if attempt == self.retries:
+                        raise
+                    delay = self._delay(attempt)
+                else:
+                    if response.status_code not in RETRY_STATUSES or attempt == self.retries:
+                        break
+                    delay = self._delay(attempt, response)
+                self.retried += 1
+                await asyncio.sleep(delay)
+
+        if response.status_code == 304:
+            return FetchResult(status=304)
+        response.raise_for_status()
+        return FetchResult(
+            status=response.status_code,
+            content=response.content,
+            content_type=response.headers.get('content-type'),
+            etag=response.headers.get('etag'),
+            last_modified=response.headers.get('last-modified'),
+        )
+
+    async def close(self):
+        await self.client.aclose()
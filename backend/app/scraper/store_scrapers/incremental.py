@@ -0,0 +1,375 @@
+"""
+Sitemap-driven incremental crawls.
+
+A spider that mixes in IncrementalSitemapMixin and lists `sitemap_urls`
+(sitemaps, sitemap indexes or robots.txt files; gzipped or not) does not
+re-walk every category page on each run. It reads the retailer's sitemaps
+instead and fetches only the product URLs that are new or changed according
+to the crawl ledger (the crawl_ledger table), which keeps for every product
+page:
+
+- `lastmod`: the page is refetched when the sitemap lists a different value
+- `etag` / `last_modified`: pages without a lastmod are revalidated at most
+  every INCREMENTAL_REVALIDATE_DAYS with If-None-Match / If-Modified-Since,
+  so unchanged ones cost a 304
+- `content_hash`: of the page's structured product data (its visible text
+  without it), so a page that was fetched but hasn't changed skips parsing
+  and the database
+
+A changed page's new values are only written once DatabasePipeline has
+saved its products (the `items_persisted` signal); until then the page
+stays due.
+
+Every INCREMENTAL_FULL_SWEEP_DAYS the spider runs its `full_crawl_requests`
+instead (INCREMENTAL_CRAWL_MODE forces `full` or `incremental` runs). That is the original
+category walk, a safety net for products the sitemaps miss. Stats under
+`incremental/` count the sitemap URLs skipped against the ones fetched.
+"""
+
+import hashlib
+import inspect
+import json
+import logging
+import os
+import re
+import sys
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+
+import scrapy
+from itemadapter import ItemAdapter, is_item
+from scrapy import signals
+from scrapy.utils.gz import gunzip
+from scrapy.utils.sitemap import Sitemap, sitemap_urls_from_robots
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import sessionmaker
+
+from .config import config  # noqa: F401  (loads backend/.env before the engine reads DATABASE_URL)
+from .image_downloads import url_hash
+from .pipelines import items_persisted
+from .structured_data import FIELDS, extract_structured
+
+# Add the backend app to the Python path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', '..'))
+
+from app.db.engines import get_engine  # noqa: E402
+from app.db.models import CrawlLedgerEntry, CrawlSweep  # noqa: E402
+
+logger = logging.getLogger(__name__)
+
+LOOKUP_CHUNK = 500
+LEDGER_COLUMNS = ('lastmod', 'etag', 'last_modified', 'content_hash', 'changed_at')
+
+
+def sitemap_body(response, max_size=0):
+    """The XML of a sitemap response, gunzipped if needed; None if it isn't a sitemap."""
+    if response.body[:3] == b'\x1f\x8b\x08':
+        return gunzip(response.body, max_size=max_size)
+    if isinstance(response, scrapy.http.XmlResponse) or re.search(r'\.xml(\.gz)?$', response.url):
+        # .xml.gz served with Content-Encoding: gzip was already decompressed by HttpCompression
+        return response.body
+    return None
+
+
+def page_hash(response):
+    """Hash of what a product page says: its structured product data, else its visible text."""
+    found = extract_structured(response.selector.root, base_url=response.url)
+    if found.get('name'):
+        payload = json.dumps({field: found.get(field) for field in FIELDS}, sort_keys=True, default=str)
+    else:
+        text = response.xpath('//body//text()[not(ancestor::script) and not(ancestor::style)]').getall()
+        payload = ' '.join(' '.join(text).split())
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def _insert(db):
+    # ON CONFLICT is dialect-specific SQL
+    return {'postgresql': postgresql.insert, 'sqlite': sqlite.insert}[db.get_bind().dialect.name]
+
+
+def _aware(value):
+    # SQLite hands timestamps back without their timezone
+    return value.replace(tzinfo=timezone.utc) if value and value.tzinfo is None else value
+
+
+class CrawlLedger:
+    """Reads and (in batches) writes crawl_ledger rows and sweep dates."""
+
+    def __init__(self, engine, batch_size=200):
+        self.Session = sessionmaker(bind=engine, autocommit=False, autoflush=False)
+        self.batch_size = batch_size
+        self.pending = {}
+
+    def entries(self, urls):
+        """Ledger values of the known `urls`, by URL."""
+        found = {}
+        urls = list(urls)
+        table = CrawlLedgerEntry.__table__
+        with self.Session() as db:
+            for start in range(0, len(urls), LOOKUP_CHUNK):
+                hashes = [url_hash(url) for url in urls[start:start + LOOKUP_CHUNK]]
+                rows = db.execute(select(table).where(table.c.url_hash.in_(hashes)))
+                for row in rows.mappings():
+                    found[row['url']] = {**row, 'fetched_at': _aware(row['fetched_at']),
+                                         'changed_at': _aware(row['changed_at'])}
+        return found
+
+    def plan(self, entries, revalidate_after):
+        """Split sitemap (url, lastmod) entries into the ones to fetch and skip counts.
+
+        Returns ([(url, lastmod, ledger entry or None, reason)], Counter of skip reasons).
+        """
+        known = self.entries(url for url, _ in entries)
+        now = datetime.now(timezone.utc)
+        fetch, skipped = [], Counter()
+        for url, lastmod in entries:
+            entry = known.get(url)
+            if entry is None:
+                fetch.append((url, lastmod, None, 'new'))
+            elif lastmod and entry['lastmod']:
+                if lastmod == entry['lastmod']:
+                    skipped['lastmod'] += 1
+                else:
+                    fetch.append((url, lastmod, entry, 'changed'))
+            elif now - entry['fetched_at'] < revalidate_after:
+                skipped['recent'] += 1
+            else:
+                fetch.append((url, lastmod, entry, 'revalidate'))
+        return fetch, skipped
+
+    def record(self, url, store_id, **values):
+        self.pending[url_hash(url)] = {'url_hash': url_hash(url), 'url': url, 'store_id': store_id, **values}
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self.pending:
+            return
+        rows, self.pending = list(self.pending.values()), {}
+        with self.Session() as db:
+            stmt = _insert(db)(CrawlLedgerEntry.__table__).values(rows)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=['url_hash'],
+                set_={column: stmt.excluded[column] for column in (*LEDGER_COLUMNS, 'store_id', 'fetched_at')},
+            )
+            db.execute(stmt)
+            db.commit()
+
+    def last_sweep(self, spider_name):
+        with self.Session() as db:
+            sweep = db.get(CrawlSweep, spider_name)
+            return _aware(sweep.swept_at) if sweep else None
+
+    def mark_sweep(self, spider_name):
+        with self.Session() as db:
+            db.merge(CrawlSweep(spider=spider_name, swept_at=datetime.now(timezone.utc)))
+            db.commit()
+
+
+class IncrementalSitemapMixin:
+    """Incremental crawls for a spider; put it before scrapy.Spider in the bases.
+
+    The spider renames its `start_requests` to `full_crawl_requests` and
+    sets `sitemap_urls`. Optionally it sets `sitemap_follow` (regexes of the
+    index entries to read), `is_product_url` and `product_meta` (the meta
+    of its product page requests). `product_callback` names the method
+    that parses product pages.
+    """
+
+    sitemap_urls = ()
+    sitemap_follow = ()
+    sitemap_product_patterns = ()
+    product_callback = 'parse_product'
+    ledger = None
+
+    @classmethod
+    def from_crawler(cls, crawler, *args, **kwargs):
+        spider = super().from_crawler(crawler, *args, **kwargs)
+        settings = crawler.settings
+        spider.crawl_mode = settings.get('INCREMENTAL_CRAWL_MODE', 'auto') if spider.sitemap_urls else 'full'
+        spider.full_sweep_after = timedelta(days=settings.getfloat('INCREMENTAL_FULL_SWEEP_DAYS', 7))
+        spider.revalidate_after = timedelta(days=settings.getfloat('INCREMENTAL_REVALIDATE_DAYS', 3))
+        spider.sitemap_max_size = settings.getint('DOWNLOAD_MAXSIZE')
+        if spider.sitemap_urls:
+            spider.ledger = CrawlLedger(get_engine('scraper'), settings.getint('INCREMENTAL_LEDGER_BATCH', 200))
+        spider.held_pages, spider.held_items = {}, {}
+        crawler.signals.connect(spider.items_saved, signal=items_persisted)
+        crawler.signals.connect(spider.close_ledger, signal=signals.spider_closed)
+        return spider
+
+    def is_product_url(self, url):
+        return not self.sitemap_product_patterns or any(
+            re.search(pattern, url) for pattern in self.sitemap_product_patterns
+        )
+
+    def product_meta(self):
+        return {}
+
+    def _sweep_due(self):
+        if self.crawl_mode != 'auto':
+            return self.crawl_mode == 'full'
+        last = self.ledger.last_sweep(self.name)
+        return last is None or datetime.now(timezone.utc) - last >= self.full_sweep_after
+
+    async def start(self):
+        # Scrapy >= 2.13 starts crawls here; start_requests is kept for older versions
+        for request in self.start_requests():
+            yield request
+
+    def start_requests(self):
+        stats = self.crawler.stats
+        if self._sweep_due():
+            stats.set_value('incremental/mode', 'full')
+            self.logger.info('Full crawl (full sweep due, or INCREMENTAL_CRAWL_MODE=full)')
+            yield from self.full_crawl_requests()
+            return
+
+        stats.set_value('incremental/mode', 'incremental')
+        for url in self.sitemap_urls:
+            yield scrapy.Request(url, callback=self.parse_sitemap, dont_filter=True)
+
+    def parse_sitemap(self, response):
+        stats = self.crawler.stats
+        if response.url.endswith('/robots.txt'):
+            for url in sitemap_urls_from_robots(response.body, base_url=response.url):
+                yield scrapy.Request(url, callback=self.parse_sitemap, dont_filter=True)
+            return
+
+        body = sitemap_body(response, self.sitemap_max_size)
+        if body is None:
+            self.logger.warning(f'Not a sitemap: {response.url}')
+            return
+        sitemap = Sitemap(body)
+        stats.inc_value('incremental/sitemaps')
+
+        if sitemap.type == 'sitemapindex':
+            for entry in sitemap:
+                loc = entry['loc']
+                if not self.sitemap_follow or any(re.search(pattern, loc) for pattern in self.sitemap_follow):
+                    yield scrapy.Request(loc, callback=self.parse_sitemap, dont_filter=True)
+            return
+
+        entries = [(entry['loc'], entry.get('lastmod')) for entry in sitemap if self.is_product_url(entry['loc'])]
+        fetch, skipped = self.ledger.plan(entries, self.revalidate_after)
+        stats.inc_value('incremental/sitemap_urls', len(entries))
+        stats.inc_value('incremental/skipped', sum(skipped.values()))
+        for reason, count in skipped.items():
+            stats.inc_value(f'incremental/skipped/{reason}', count)
+        self.logger.info(f'{response.url}: {len(entries)} product URLs, fetching {len(fetch)}')
+
+        for url, lastmod, entry, reason in fetch:
+            stats.inc_value('incremental/fetched')
+            stats.inc_value(f'incremental/fetched/{reason}')
+            yield self.ledger_request(url, lastmod, entry)
+
+    def ledger_request(self, url, lastmod, entry):
+        meta = self.product_meta()
+        meta['ledger'] = {column: (entry or {}).get(column) for column in LEDGER_COLUMNS}
+        meta['ledger']['lastmod'] = lastmod
+        meta['ledger_url'] = url
+        headers = {}
+        # A browser navigation can't be answered with a 304; rendered pages rely on the content hash
+        if entry and not meta.get('playwright'):
+            if entry['etag']:
+                headers['If-None-Match'] = entry['etag']
+            if entry['last_modified']:
+                headers['If-Modified-Since'] = entry['last_modified']
+            meta['handle_httpstatus_list'] = [304]
+        return scrapy.Request(url, callback=self.parse_ledgered, headers=headers, meta=meta, dont_filter=True)
+
+    async def parse_ledgered(self, response):
+        """Parse a scheduled product page if it changed; ledger it once its products are saved."""
+        stats = self.crawler.stats
+        url = response.meta.get('ledger_url', response.url)  # As listed in the sitemap, before any redirect
+        previous = response.meta['ledger']
+        now = datetime.now(timezone.utc)
+
+        if response.status == 304:
+            stats.inc_value('incremental/not_modified')
+            self._record(url, {**previous, 'fetched_at': now, 'changed_at': previous['changed_at'] or now})
+            return
+
+        content_hash = page_hash(response)
+        changed = content_hash != previous['content_hash']
+        values = dict(
+            lastmod=previous['lastmod'],
+            etag=response.headers.get('ETag', b'').decode('latin-1') or None,
+            last_modified=response.headers.get('Last-Modified', b'').decode('latin-1') or None,
+            content_hash=content_hash,
+            fetched_at=now,
+            changed_at=now if changed or not previous['changed_at'] else previous['changed_at'],
+        )
+        if not changed:
+            stats.inc_value('incremental/unchanged')
+            self._record(url, values)
+            page = response.meta.get('playwright_page')
+            if page:
+                await page.close()
+            return
+
+        # Until its products are in the database the page must be fetched again, so its new
+        # lastmod and hash are held back: a failed parse, a dropped item or a killed crawl
+        # leaves the ledger as it was
+        stats.inc_value('incremental/parsed')
+        held = self.held_pages[url] = {'values': values, 'items': set(), 'parsed': False}
+        try:
+            output = getattr(self, self.product_callback)(response)
+            if inspect.iscoroutine(output):
+                output = await output
+            if inspect.isasyncgen(output):
+                async for value in output:
+                    self._hold_item(url, value)
+                    yield value
+            else:
+                for value in output or ():
+                    self._hold_item(url, value)
+                    yield value
+        except BaseException:
+            self._release(url)
+            raise
+        held['parsed'] = True
+        self._record_if_saved(url)
+
+    def _hold_item(self, url, value):
+        if not isinstance(value, scrapy.Request) and is_item(value) and ItemAdapter(value).get('url'):
+            item_url = ItemAdapter(value).get('url')
+            self.held_pages[url]['items'].add(item_url)
+            self.held_items[item_url] = url
+
+    def _release(self, url):
+        held = self.held_pages.pop(url, None)
+        for item_url in held['items'] if held else ():
+            self.held_items.pop(item_url, None)
+
+    def _record(self, url, values):
+        self.ledger.record(url, getattr(self, 'store_id', None), **values)
+
+    def _record_if_saved(self, url):
+        held = self.held_pages.get(url)
+        if held and held['parsed'] and not held['items']:
+            del self.held_pages[url]
+            self._record(url, held['values'])
+
+    def items_saved(self, rows, spider):
+        """DatabasePipeline committed `rows`: ledger the pages whose products are all saved."""
+        for row in rows:
+            url = self.held_items.pop(row.get('url'), None)
+            if url in self.held_pages:
+                self.held_pages[url]['items'].discard(row['url'])
+                self._record_if_saved(url)
+
+    def close_ledger(self, spider, reason):
+        if self.ledger is None:
+            return
+        self.ledger.flush()
+        stats = self.crawler.stats
+        if self.held_pages:
+            # Parsed, but their products never reached the database: fetched again next run
+            stats.set_value('incremental/unsaved', len(self.held_pages))
+        if stats.get_value('incremental/mode') == 'full' and reason == 'finished':
+            self.ledger.mark_sweep(self.name)
+        fetched = stats.get_value('incremental/fetched', 0)
+        skipped = stats.get_value('incremental/skipped', 0)
+        if fetched or skipped:
+            stats.set_value('incremental/skipped_ratio', round(skipped / (fetched + skipped), 3))
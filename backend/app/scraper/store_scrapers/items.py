@@ -13,7 +13,7 @@ class ProductItem(scrapy.Item):
     url = scrapy.Field()
     description = scrapy.Field()
     image_url = scrapy.Field()
-    image_data = scrapy.Field()  # Binary image data
+    image_sha256 = scrapy.Field()  # Blob-store key of the downloaded image
     image_filename = scrapy.Field()  # Original filename
     image_content_type = scrapy.Field()  # MIME type
     store_id = scrapy.Field()
@@ -2,11 +2,18 @@
 Enhanced middleware for bypassing anti-scraping measures
 """
 
+import asyncio
+import logging
 import random
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
 from scrapy.downloadermiddlewares.useragent import UserAgentMiddleware
 from scrapy.downloadermiddlewares.retry import RetryMiddleware
+from scrapy.utils.httpobj import urlparse_cached
 from scrapy.utils.response import response_status_message
-import time
+
+logger = logging.getLogger(__name__)
 
 class RotateUserAgentMiddleware(UserAgentMiddleware):
     """Rotate user agents to avoid detection"""
@@ -30,24 +37,103 @@ class RotateUserAgentMiddleware(UserAgentMiddleware):
         request.headers['User-Agent'] = ua
         spider.logger.debug(f'Using User-Agent: {ua[:50]}...')
 
+class DomainBackoff:
+    """Decorrelated-jitter backoff of one throttling domain"""
+
+    def __init__(self, base, cap):
+        self.base = base
+        self.cap = cap
+        self.sleep = base
+        self.until = 0.0
+
+    def throttled(self, retry_after=None):
+        """Seconds to wait after a throttled response; holds back the whole domain until then"""
+        # Decorrelated jitter: each wait is random between the base and 3x the previous one
+        self.sleep = min(self.cap, random.uniform(self.base, self.sleep * 3))
+        delay = max(self.sleep, retry_after or 0)
+        self.until = max(self.until, time.monotonic() + delay)
+        return delay
+
+    def recovered(self):
+        self.sleep = self.base
+
+    def remaining(self):
+        return max(0.0, self.until - time.monotonic())
+
+
+def retry_after_seconds(response):
+    """The response's Retry-After (delta seconds or HTTP date) in seconds, or None"""
+    value = response.headers.get('Retry-After')
+    if not value:
+        return None
+    value = value.decode('latin-1').strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        return max(0.0, (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+
 class EnhancedRetryMiddleware(RetryMiddleware):
-    """Enhanced retry with exponential backoff"""
-    
-    def process_response(self, request, response, spider):
-        if response.status in [403, 429, 503]:
-            reason = response_status_message(response.status)
-            spider.logger.warning(f'Retrying {request.url} (status {response.status}): {reason}')
-            
-            # Exponential backoff
-            retry_times = request.meta.get('retry_times', 0) + 1
-            delay = min(2 ** retry_times, 60)  # Max 60 seconds
-            
-            spider.logger.info(f'Waiting {delay} seconds before retry...')
-            time.sleep(delay)
-            
-            return self._retry(request, reason, spider) or response
-        
-        return super().process_response(request, response, spider)
+    """Retry throttled responses (403/429/503) after a per-domain backoff, without blocking.
+
+    The wait is an asyncio sleep of the one request (the reactor keeps
+    serving every other download) of at least the response's Retry-After
+    and otherwise decorrelated jitter between RETRY_BACKOFF_BASE and
+    RETRY_BACKOFF_MAX. Other requests to the same domain wait out the
+    backoff before they are sent, requests to other domains don't. A
+    Retry-After longer than RETRY_AFTER_MAX is not waited for: the
+    request is given up. Other RETRY_HTTP_CODES retry immediately, as in
+    Scrapy's RetryMiddleware. Waiting requests count toward
+    CONCURRENT_REQUESTS like any delayed download.
+    """
+
+    def __init__(self, settings):
+        super().__init__(settings)
+        self.backoff_http_codes = {int(x) for x in settings.getlist('RETRY_BACKOFF_HTTP_CODES', [403, 429, 503])}
+        self.backoff_base = settings.getfloat('RETRY_BACKOFF_BASE', 1.0)
+        self.backoff_max = settings.getfloat('RETRY_BACKOFF_MAX', 60.0)
+        self.retry_after_max = settings.getfloat('RETRY_AFTER_MAX', 300.0)
+        self.domains = {}
+
+    def _backoff(self, request):
+        domain = urlparse_cached(request).hostname or ''
+        if domain not in self.domains:
+            self.domains[domain] = DomainBackoff(self.backoff_base, self.backoff_max)
+        return self.domains[domain]
+
+    async def process_request(self, request, spider=None):
+        backoff = self.domains.get(urlparse_cached(request).hostname or '')
+        wait = backoff.remaining() if backoff else 0.0
+        if wait > 0:
+            self.crawler.stats.inc_value('retry/backoff_waits')
+            await asyncio.sleep(wait)
+
+    async def process_response(self, request, response, spider=None):
+        if response.status not in self.backoff_http_codes or request.meta.get('dont_retry', False):
+            if response.status < 400 and self.domains:
+                backoff = self.domains.get(urlparse_cached(request).hostname or '')
+                if backoff:
+                    backoff.recovered()
+            return super().process_response(request, response)
+
+        backoff = self._backoff(request)
+        retry_after = retry_after_seconds(response)
+        self.crawler.stats.inc_value(f'retry/throttled/{response.status}')
+        if retry_after is not None and retry_after > self.retry_after_max:
+            backoff.throttled(self.retry_after_max)
+            logger.warning(f'Giving up {request.url}: Retry-After {retry_after:.0f}s exceeds RETRY_AFTER_MAX')
+            return response
+
+        retry = self._retry(request, response_status_message(response.status))
+        if retry is None:
+            return response
+        delay = backoff.throttled(retry_after)
+        logger.info(f'Throttled ({response.status}) on {request.url}, retrying in {delay:.1f}s')
+        self.crawler.stats.inc_value('retry/backoff_seconds', int(delay))
+        await asyncio.sleep(delay)
+        return retry
 
 class HeadersMiddleware:
     """Add realistic browser headers"""
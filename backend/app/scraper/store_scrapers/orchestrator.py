@@ -0,0 +1,329 @@
+"""
+Runs a schedule of spiders in parallel under global resource limits.
+
+Every spider runs in its own `run_spider.py` process, so a crash or a
+memory blowup only takes that spider down. Each one gets its own JOBDIR and
+writes its final Scrapy stats to a file. A spider starts only when it fits
+all the schedule's limits:
+
+- `processes`: spiders running at once
+- `browsers`: spiders marked `browser: true`, each of which launches one Chromium
+- `db_connections`: each spider may hold the scraper engine's
+  pool_size + max_overflow connections
+- `memory_mb`: the sum of the spiders' `memory_mb`. That value is also each
+  process's MEMUSAGE_LIMIT_MB, and it must be free on the host.
+
+A spider that does not fit the limits even with nothing else running is
+started alone. Two spiders of the same domain never overlap. Each spider
+crawls with its domain's budget (`concurrency` and `delay`, passed on as
+CONCURRENT_REQUESTS_PER_DOMAIN and DOWNLOAD_DELAY). The longest spiders,
+judged by their last recorded duration, start first. That keeps the total
+crawl time close to the longest single spider. `report` merges the stats
+of every spider into one summary.
+
+SIGTERM/SIGINT (or cancelling `run`) stops the schedule: no new spiders
+start and the running ones get SIGTERM, Scrapy's graceful shutdown, and
+are killed if they haven't exited after STOP_TIMEOUT seconds. A spider
+process is never left crawling on its own.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import signal
+import sys
+import time
+from collections import Counter
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Optional
+
+import psutil
+
+from .config import config  # noqa: F401  (loads backend/.env, including DB_SCRAPER_* pool overrides)
+
+# Add the backend app to the Python path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', '..'))
+
+from app.db.engines import pool_settings  # noqa: E402
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DOMAIN_BUDGET = {'concurrency': 2, 'delay': 2.0}
+REPORT_STATS = (
+    ('items', 'item_scraped_count'),
+    ('requests', 'downloader/request_count'),
+    ('errors', 'log_count/ERROR'),
+    ('browser_pages', 'hybrid/browser'),
+)
+SCRAPER_DIR = Path(__file__).resolve().parent.parent  # run_spider.py's, the Scrapy project root
+STOP_TIMEOUT = 60  # Seconds a stopped spider gets to close before it's killed
+
+
+@dataclass(frozen=True)
+class Limits:
+    processes: int = 4
+    browsers: int = 2
+    db_connections: int = 20
+    memory_mb: int = 6144
+
+
+@dataclass
+class Job:
+    spider: str
+    domain: str
+    browser: bool = False
+    memory_mb: int = 1024
+    db_connections: int = 5
+    concurrency: int = 2
+    delay: float = 2.0
+    settings: dict = field(default_factory=dict)
+    expected_seconds: float = 0.0
+
+    def scrapy_settings(self):
+        """Settings overrides for this spider's process (they beat the spider's custom_settings)."""
+        return {
+            'CONCURRENT_REQUESTS': self.concurrency,
+            'CONCURRENT_REQUESTS_PER_DOMAIN': self.concurrency,
+            'DOWNLOAD_DELAY': self.delay,
+            'MEMUSAGE_LIMIT_MB': self.memory_mb,
+            'MEMUSAGE_WARNING_MB': self.memory_mb * 3 // 4,
+            **self.settings,
+        }
+
+
+@dataclass
+class SpiderRun:
+    job: Job
+    returncode: Optional[int]
+    seconds: float
+    stats: dict = field(default_factory=dict)
+    error: Optional[str] = None  # Why the spider couldn't be run at all
+
+    @property
+    def ok(self):
+        # run_spider.py exits 0 even when the crawler failed to start; only a closed spider has a finish_reason
+        return self.returncode == 0 and 'finish_reason' in self.stats
+
+
+def _spider_domains():
+    from .replay import spider_loader
+
+    loader = spider_loader()
+    domains = {}
+    for name in loader.list():
+        allowed = getattr(loader.load(name), 'allowed_domains', None) or []
+        domains[name] = allowed[0] if allowed else name
+    return domains
+
+
+def load_schedule(path, spiders=None, history=None, domains=None):
+    """(Limits, [Job]) from a schedule file, optionally restricted to `spiders`.
+
+    `history` maps spider names to their last duration in seconds and
+    `domains` maps them to their domain (read from `allowed_domains` if None).
+    """
+    schedule = json.loads(Path(path).read_text())
+    limits = Limits(**schedule.get('limits', {}))
+    budgets = schedule.get('domains', {})
+    domains = domains if domains is not None else _spider_domains()
+    history = history or {}
+    scraper_pool = pool_settings('scraper')
+
+    jobs = []
+    for entry in schedule['spiders']:
+        entry = {'name': entry} if isinstance(entry, str) else dict(entry)
+        name = entry.pop('name')
+        if spiders and name not in spiders:
+            continue
+        domain = entry.pop('domain', None) or domains.get(name, name)
+        budget = {**DEFAULT_DOMAIN_BUDGET, **budgets.get(domain, {})}
+        jobs.append(Job(
+            spider=name,
+            domain=domain,
+            db_connections=scraper_pool.pool_size + scraper_pool.max_overflow,
+            concurrency=budget['concurrency'],
+            delay=budget['delay'],
+            expected_seconds=history.get(name, 0.0),
+            **entry,
+        ))
+    missing = set(spiders or ()) - {job.spider for job in jobs}
+    if missing:
+        raise ValueError(f"Spiders not in {path}: {', '.join(sorted(missing))}")
+    return limits, jobs
+
+
+def available_memory_mb():
+    return psutil.virtual_memory().available // (1024 * 1024)
+
+
+class Orchestrator:
+    """Starts jobs as soon as they fit the limits and collects their SpiderRuns."""
+
+    def __init__(self, jobs, limits, run_dir, spider_args=(), launch=None, memory_available=available_memory_mb):
+        # Longest first: short spiders fill the gaps left beside the long ones
+        self.pending = sorted(jobs, key=lambda job: job.expected_seconds, reverse=True)
+        self.limits = limits
+        self.run_dir = Path(run_dir).resolve()
+        self.spider_args = list(spider_args)
+        self.launch = launch or self.launch_process
+        self.memory_available = memory_available
+        self.running = {}
+        self.processes = {}
+        self.stopping = False
+
+    def fits(self, job):
+        running = list(self.running.values())
+        if not running:
+            return True
+        if len(running) >= self.limits.processes:
+            return False
+        if any(other.domain == job.domain for other in running):
+            return False
+        if job.browser and sum(other.browser for other in running) >= self.limits.browsers:
+            return False
+        if sum(other.db_connections for other in running) + job.db_connections > self.limits.db_connections:
+            return False
+        if sum(other.memory_mb for other in running) + job.memory_mb > self.limits.memory_mb:
+            return False
+        return self.memory_available() >= job.memory_mb
+
+    async def run(self):
+        """Run every job; returns (runs, wall seconds).
+
+        After `stop` it returns the runs of the spiders that were started.
+        """
+        started = time.perf_counter()
+        tasks, runs = {}, []
+        loop = asyncio.get_running_loop()
+        handled = []
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            try:
+                loop.add_signal_handler(signum, self.stop)
+                handled.append(signum)
+            except (NotImplementedError, RuntimeError, ValueError):
+                pass  # Not the main thread, or no signal support on this platform
+        try:
+            while (self.pending and not self.stopping) or tasks:
+                for job in [] if self.stopping else list(self.pending):
+                    if self.fits(job):
+                        self.pending.remove(job)
+                        self.running[job.spider] = job
+                        logger.info(f"Starting {job.spider} ({len(self.running)} running, {len(self.pending)} pending)")
+                        tasks[asyncio.ensure_future(self.launch(job))] = (job, time.perf_counter())
+                done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    job, launched = tasks.pop(task)
+                    del self.running[job.spider]
+                    try:
+                        run = task.result()
+                    except Exception as e:
+                        logger.error(f"Could not run {job.spider}: {e}", exc_info=True)
+                        run = SpiderRun(job, None, time.perf_counter() - launched, error=str(e) or type(e).__name__)
+                    else:
+                        logger.info(f"{job.spider} exited with {run.returncode} after {run.seconds:.0f}s")
+                    runs.append(run)
+        except asyncio.CancelledError:
+            # Cancelling a launch terminates and reaps its process
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+        finally:
+            for signum in handled:
+                loop.remove_signal_handler(signum)
+        if self.pending:
+            logger.warning(f"Stopped before starting {', '.join(job.spider for job in self.pending)}")
+        return runs, time.perf_counter() - started
+
+    def stop(self):
+        """Start no more spiders and shut the running ones down (SIGTERM, then SIGKILL)."""
+        if self.stopping:
+            return
+        self.stopping = True
+        logger.warning(f"Stopping schedule: terminating {', '.join(self.processes) or 'no running spiders'}")
+        for process in self.processes.values():
+            _signal(process, signal.SIGTERM)
+        asyncio.get_running_loop().call_later(STOP_TIMEOUT, self._kill)
+
+    def _kill(self):
+        for spider, process in self.processes.items():
+            logger.error(f"{spider} didn't stop within {STOP_TIMEOUT}s, killing it")
+            _signal(process, signal.SIGKILL)
+
+    def spider_command(self, job, stats_file):
+        """The run_spider.py command line of a job."""
+        command = [
+            sys.executable, str(SCRAPER_DIR / 'run_spider.py'), job.spider,
+            '--stats-file', str(stats_file),
+            '--log-file', str(self.run_dir / f'{job.spider}.log'),
+            *self.spider_args,
+        ]
+        for key, value in job.scrapy_settings().items():
+            command += ['--set', f'{key}={json.dumps(value)}']
+        return command
+
+    async def launch_process(self, job):
+        """Run one spider through run_spider.py and read back its stats."""
+        self.run_dir.mkdir(parents=True, exist_ok=True)
+        stats_file = self.run_dir / f'{job.spider}.stats.json'
+        command = self.spider_command(job, stats_file)
+        started = time.perf_counter()
+        process = await asyncio.create_subprocess_exec(
+            *command, cwd=SCRAPER_DIR, stdout=asyncio.subprocess.DEVNULL, stderr=asyncio.subprocess.DEVNULL,
+            env={**os.environ, 'PYTHONUNBUFFERED': '1'},
+        )
+        self.processes[job.spider] = process
+        try:
+            if self.stopping:  # Stopped while it was being spawned
+                _signal(process, signal.SIGTERM)
+            returncode = await process.wait()
+        except asyncio.CancelledError:
+            _signal(process, signal.SIGTERM)
+            try:
+                await asyncio.wait_for(process.wait(), STOP_TIMEOUT)
+            except asyncio.TimeoutError:
+                _signal(process, signal.SIGKILL)
+                await process.wait()
+            raise
+        finally:
+            del self.processes[job.spider]
+        stats = json.loads(stats_file.read_text()) if stats_file.exists() else {}
+        return SpiderRun(job, returncode, time.perf_counter() - started, stats)
+
+
+def _signal(process, signum):
+    try:
+        process.send_signal(signum)
+    except ProcessLookupError:
+        pass  # Already exited
+
+
+def report(runs, wall_seconds):
+    """One summary of a schedule run: a row per spider, summed stats and the total time."""
+    rows, totals = [], Counter()
+    for run in sorted(runs, key=lambda run: run.seconds, reverse=True):
+        stats = run.stats
+        row = {
+            'spider': run.job.spider,
+            'domain': run.job.domain,
+            'status': stats.get('finish_reason') if run.ok else f'failed ({run.error or f"exit {run.returncode}"})',
+            'seconds': round(run.seconds, 1),
+        }
+        for column, key in REPORT_STATS:
+            row[column] = stats.get(key, 0)
+        row['peak_mb'] = stats.get('memusage/max', 0) // (1024 * 1024)
+        rows.append(row)
+        totals.update({key: value for key, value in stats.items()
+                       if isinstance(value, (int, float)) and not isinstance(value, bool)})
+    spider_seconds = sum(run.seconds for run in runs)
+    return {
+        'wall_seconds': round(wall_seconds, 1),
+        'spider_seconds': round(spider_seconds, 1),
+        'parallelism': round(spider_seconds / wall_seconds, 2) if wall_seconds else 0.0,
+        'failed': [run.job.spider for run in runs if not run.ok],
+        'spiders': rows,
+        'stats': dict(sorted(totals.items())),
+        'jobs': [asdict(run.job) for run in runs],
+    }
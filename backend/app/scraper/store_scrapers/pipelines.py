@@ -3,277 +3,380 @@
 # Don't forget to add your pipeline to the ITEM_PIPELINES setting
 # See: https://docs.scrapy.org/en/latest/topics/item-pipeline.html
 
+import asyncio
+import logging
 import sys
 import os
 import mimetypes
-import requests
+from collections import OrderedDict
 from urllib.parse import urlparse
-from datetime import datetime
-from typing import Optional
+import httpx
 from itemadapter import ItemAdapter
-from sqlalchemy import create_engine
+from sqlalchemy import select
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from sqlalchemy.exc import SQLAlchemyError
 
 # Add the backend app to the Python path
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', '..'))
 
-from app.db.models import Product, Store, Tag
+from app.db.engines import get_engine
+from app.db.models import ImageSource, Store, StoreType, Tag
+from app.storage.backends import get_blob_backend
+from app.storage.blobs import blob_key, put_blob
+from app.storage.image_workers import shutdown_image_pool
+from app.storage.variants import schedule_variants
 from .config import config
+from .image_downloads import ImageFetcher, url_hash
+from .product_upsert import ITEM_COLUMNS, upsert_products
+
+logger = logging.getLogger(__name__)
+
+# Sent by DatabasePipeline with `rows`, the products it has just committed
+items_persisted = object()
 
 
 class ImageDownloadPipeline:
-    """Pipeline to download images from URLs and store binary data."""
-    
+    """Pipeline to download images from URLs into the content-addressed blob store.
+
+    Downloads run on the reactor's event loop (see image_downloads.py): an
+    item waits here for its own image and then moves on to DatabasePipeline,
+    while other items and page requests keep flowing.
+
+    Catalogs reuse the same placeholder and brand images across thousands of
+    products: a URL already resolved this crawl is not downloaded again (and
+    concurrent items for one URL share a download), a URL fetched by an earlier
+    crawl is re-validated with If-None-Match/If-Modified-Since, and bytes
+    already in the store are not written again.
+    """
+
+    # URLs remembered per crawl (LRU)
+    SEEN_URLS_MAX = 10000
+    # image_sources rows written per transaction
+    SOURCES_BATCH_SIZE = 100
+
     def __init__(self):
-        self.session = None
-        
-    def open_spider(self, spider):
-        """Initialize HTTP session for image downloads."""
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        })
+        self.fetcher = None
+        self.SessionLocal = None
+        self.seen_urls: OrderedDict = OrderedDict()
+        self.in_flight: dict = {}
+        self.pending_sources: dict = {}
+
+    async def open_spider(self, spider):
+        """Create the download client and the session factory for image validators."""
+        self.fetcher = ImageFetcher.from_settings(spider.crawler.settings)
+        self.SessionLocal = sessionmaker(bind=get_engine("scraper"), autocommit=False, autoflush=False)
         spider.logger.info("Image download pipeline initialized")
-        
-    def close_spider(self, spider):
-        """Close HTTP session."""
-        if self.session:
-            self.session.close()
-            spider.logger.info("Image download pipeline closed")
-    
-    def process_item(self, item, spider):
-        """Download image from URL and store binary data in item."""
+
+    async def close_spider(self, spider):
+        """Close the client, save validators and wait for pending thumbnail renders."""
+        if self.fetcher:
+            await self.fetcher.close()
+            spider.crawler.stats.set_value('images_download_retries', self.fetcher.retried)
+            self.fetcher = None
+        await asyncio.to_thread(self._flush_sources)
+        spider.logger.info("Image download pipeline closed")
+        await asyncio.to_thread(shutdown_image_pool, True)
+
+    async def process_item(self, item, spider):
+        """Resolve the item's image URL to a blob and put its key in the item."""
         from .items import ProductItem
-        
+
         # Only process ProductItem
         if not isinstance(item, ProductItem):
             return item
-            
+
         adapter = ItemAdapter(item)
         image_url = adapter.get('image_url')
-        
+
         if not image_url:
             spider.logger.debug(f"No image URL for product: {adapter.get('name', 'Unknown')}")
             return item
-            
+
+        seen = self.seen_urls.get(image_url)
+        if seen is not None:
+            self.seen_urls.move_to_end(image_url)
+            spider.crawler.stats.inc_value('images_deduplicated')
+        else:
+            task = self.in_flight.get(image_url)
+            if task is None:
+                task = asyncio.ensure_future(self._resolve(image_url, spider))
+                self.in_flight[image_url] = task
+                task.add_done_callback(lambda _: self.in_flight.pop(image_url, None))
+            else:
+                spider.crawler.stats.inc_value('images_deduplicated')
+            seen = await asyncio.shield(task)
+
+        if seen is not None:
+            adapter['image_sha256'], adapter['image_filename'], adapter['image_content_type'] = seen
+        return item
+
+    async def _resolve(self, image_url, spider):
+        """(key, filename, content type) of the image at `image_url`, or None if it can't be had."""
+        stats = spider.crawler.stats
         try:
-            spider.logger.info(f"Downloading image: {image_url}")
-            
-            # Download the image with timeout
-            response = self.session.get(image_url, timeout=30, stream=True)
-            response.raise_for_status()
-            
-            # Get image data
-            image_data = response.content
-            
-            if not image_data:
-                spider.logger.warning(f"Empty image data from URL: {image_url}")
-                return item
-                
-            # Get content type from response headers
-            content_type = response.headers.get('content-type', 'image/jpeg')
-            
-            # Extract filename from URL
-            parsed_url = urlparse(image_url)
-            filename = os.path.basename(parsed_url.path)
-            
-            # If no filename or extension, generate one based on content type
-            if not filename or '.' not in filename:
-                extension = mimetypes.guess_extension(content_type) or '.jpg'
-                filename = f"image_{abs(hash(image_url)) % 10000}{extension}"
-            
-            # Store image data in item
-            adapter['image_data'] = image_data
-            adapter['image_filename'] = filename
-            adapter['image_content_type'] = content_type
-            
-            spider.logger.info(
-                f"Downloaded image: {filename} ({len(image_data)} bytes, {content_type})"
+            source = await asyncio.to_thread(self._load_source, image_url)
+            # Only revalidate what the blob store still has
+            if source is not None and not get_blob_backend().exists(source['sha256']):
+                source = None
+
+            result = await self.fetcher.fetch(
+                image_url,
+                etag=source['etag'] if source else None,
+                last_modified=source['last_modified'] if source else None,
             )
-            spider.crawler.stats.inc_value('images_downloaded')
-            
-        except requests.RequestException as e:
+            if result.not_modified:
+                resolved = (source['sha256'], source['filename'], source['content_type'])
+                stats.inc_value('images_not_modified')
+            else:
+                resolved = await self._store(image_url, result, spider)
+                if resolved is None:
+                    return None
+        except httpx.HTTPError as e:
             spider.logger.error(f"Failed to download image {image_url}: {e}")
-            spider.crawler.stats.inc_value('images_download_failed')
+            stats.inc_value('images_download_failed')
             # Continue without image data - don't fail the entire item
-            
+            return None
         except Exception as e:
             spider.logger.error(f"Unexpected error downloading image {image_url}: {e}")
-            spider.crawler.stats.inc_value('images_download_errors')
+            stats.inc_value('images_download_errors')
             # Continue without image data - don't fail the entire item
-            
-        return item
+            return None
+
+        self.seen_urls[image_url] = resolved
+        if len(self.seen_urls) > self.SEEN_URLS_MAX:
+            self.seen_urls.popitem(last=False)
+        key, filename, content_type = resolved
+        self.pending_sources[image_url] = {
+            'url': image_url,
+            'sha256': key,
+            'filename': filename,
+            'content_type': content_type,
+            'etag': result.etag if not result.not_modified else source['etag'],
+            'last_modified': result.last_modified if not result.not_modified else source['last_modified'],
+        }
+        if len(self.pending_sources) >= self.SOURCES_BATCH_SIZE:
+            await asyncio.to_thread(self._flush_sources)
+        return resolved
+
+    async def _store(self, image_url, result, spider):
+        image_data = result.content
+        if not image_data:
+            spider.logger.warning(f"Empty image data from URL: {image_url}")
+            return None
+
+        # Get content type from response headers
+        content_type = result.content_type or 'image/jpeg'
+
+        # Extract filename from URL
+        parsed_url = urlparse(image_url)
+        filename = os.path.basename(parsed_url.path)
+
+        # If no filename or extension, generate one based on content type
+        if not filename or '.' not in filename:
+            extension = mimetypes.guess_extension(content_type) or '.jpg'
+            filename = f"image_{abs(hash(image_url)) % 10000}{extension}"
+
+        # Store the bytes once; the item only carries their key
+        key = blob_key(image_data)
+        if get_blob_backend().exists(key):
+            spider.crawler.stats.inc_value('images_deduplicated')
+        else:
+            await asyncio.to_thread(put_blob, image_data)
+            # Listing thumbnails, rendered in the image worker pool
+            schedule_variants(key, image_data)
+
+        spider.logger.info(
+            f"Downloaded image: {filename} ({len(image_data)} bytes, {content_type})"
+        )
+        spider.crawler.stats.inc_value('images_downloaded')
+        return key, filename, content_type
+
+    def _load_source(self, image_url):
+        with self.SessionLocal() as db:
+            source = db.get(ImageSource, url_hash(image_url))
+            if source is None or source.url != image_url:
+                return None
+            return {
+                'sha256': source.sha256,
+                'filename': source.filename,
+                'content_type': source.content_type,
+                'etag': source.etag,
+                'last_modified': source.last_modified,
+            }
+
+    def _flush_sources(self):
+        pending, self.pending_sources = self.pending_sources, {}
+        if not pending or self.SessionLocal is None:
+            return
+        try:
+            with self.SessionLocal() as db:
+                for values in pending.values():
+                    db.merge(ImageSource(url_hash=url_hash(values['url']), **values))
+                db.commit()
+        except SQLAlchemyError as e:
+            # Only costs unconditional downloads next crawl
+            logger.warning(f"Failed to save image validators: {e}")
 
 
 class DatabasePipeline:
-    """Pipeline to save scraped items to the database."""
-    
+    """Pipeline to save scraped items to the database, in batches.
+
+    Items are buffered and written DB_PIPELINE_BATCH_SIZE at a time (or every
+    DB_PIPELINE_FLUSH_INTERVAL seconds, and on close) by one upsert keyed on
+    (store_id, url); see product_upsert.py. Store rows and the "in-store" tag
+    id are looked up once per spider, not once per item.
+    """
+
     def __init__(self):
         self.engine = None
         self.SessionLocal = None
-    
-    def open_spider(self, spider):
-        """Initialize database connection when spider starts."""
+        self.batch_size = 500
+        self.flush_interval = 5.0
+        self.buffer = {}
+        self.stores = {}  # store id -> StoreType, or None if it doesn't exist
+        self.in_store_tag_id = None
+        self.flush_lock = None
+        self.ticker = None
+
+    async def open_spider(self, spider):
+        """Initialize database connection and the periodic flush when spider starts."""
+        settings = spider.crawler.settings
+        self.batch_size = settings.getint('DB_PIPELINE_BATCH_SIZE', 500)
+        self.flush_interval = settings.getfloat('DB_PIPELINE_FLUSH_INTERVAL', 5.0)
         try:
-            self.engine = create_engine(config.DATABASE_URL, echo=False)
+            self.engine = get_engine("scraper")
             self.SessionLocal = sessionmaker(bind=self.engine, autocommit=False, autoflush=False)
-            spider.logger.info(f"Database connection established: {config.DATABASE_URL}")
+            with self.SessionLocal() as db:
+                self.in_store_tag_id = db.scalar(select(Tag.id).where(Tag.name == "in-store"))
+            if self.in_store_tag_id is None:
+                spider.logger.warning("'in-store' tag not found in database")
+            spider.logger.info(f"Database connection established: {self.engine.url}")
         except Exception as e:
             spider.logger.error(f"Failed to connect to database: {e}")
             raise
-    
-    def close_spider(self, spider):
-        """Clean up database connection when spider closes."""
+        self.flush_lock = asyncio.Lock()
+        self.ticker = asyncio.ensure_future(self._flush_periodically(spider))
+
+    async def close_spider(self, spider):
+        """Write what's buffered; the pooled scraper engine is shared and stays open."""
+        if self.ticker:
+            self.ticker.cancel()
+            self.ticker = None
         if self.engine:
-            self.engine.dispose()
-            spider.logger.info("Database connection closed")
-    
-    def process_item(self, item, spider):
-        """Process each scraped item and save to database."""
+            await self.flush(spider)
+            self.engine = None
+            self.SessionLocal = None
+            spider.logger.info("Database pipeline closed")
+
+    async def process_item(self, item, spider):
+        """Validate a scraped item and buffer it for the next batch."""
         if not self.SessionLocal:
             spider.logger.error("No database connection available")
             return item
-        
-        db = self.SessionLocal()
-        try:
-            adapter = ItemAdapter(item)
-            
-            # Extract and validate data from item
-            name = adapter.get('name')
-            price = adapter.get('price')
-            url = adapter.get('url')
-            description = adapter.get('description')
-            image_url = adapter.get('image_url')
-            image_data = adapter.get('image_data')
-            image_filename = adapter.get('image_filename')
-            image_content_type = adapter.get('image_content_type')
-            store_id = adapter.get('store_id')
-            
-            # Validate required fields
-            if not name or not store_id:
-                spider.logger.warning(
-                    f"Skipping item with missing required fields: "
-                    f"name='{name}', store_id={store_id}"
-                )
-                spider.crawler.stats.inc_value('pipeline/items_dropped')
-                return item
-            
-            # Validate store exists
-            store = db.query(Store).filter(Store.id == store_id).first()
-            if not store:
-                spider.logger.error(f"Store with ID {store_id} not found in database")
-                spider.crawler.stats.inc_value('pipeline/items_dropped')
-                return item
-            
-            # Sanitize price
-            if price is not None:
-                try:
-                    price = float(price)
-                    if price < 0:
-                        spider.logger.warning(f"Negative price {price} for product '{name}', setting to None")
-                        price = None
-                except (ValueError, TypeError):
-                    spider.logger.warning(f"Invalid price '{price}' for product '{name}', setting to None")
+
+        adapter = ItemAdapter(item)
+        name = adapter.get('name')
+        price = adapter.get('price')
+        store_id = adapter.get('store_id')
+
+        # Validate required fields
+        if not name or not store_id:
+            spider.logger.warning(
+                f"Skipping item with missing required fields: "
+                f"name='{name}', store_id={store_id}"
+            )
+            spider.crawler.stats.inc_value('pipeline/items_dropped')
+            return item
+
+        # Sanitize price
+        if price is not None:
+            try:
+                price = float(price)
+                if price < 0:
+                    spider.logger.warning(f"Negative price {price} for product '{name}', setting to None")
                     price = None
-            
-            # Check if product already exists by URL and store_id
-            existing_product = None
-            if url and config.ENABLE_DUPLICATE_FILTER:
-                existing_product = db.query(Product).filter(
-                    Product.url == url,
-                    Product.store_id == store_id
-                ).first()
-            
-            if existing_product and config.UPDATE_EXISTING_PRODUCTS:
-                # Update existing product
-                updated_fields = []
-                if existing_product.name != name:
-                    existing_product.name = name
-                    updated_fields.append('name')
-                if existing_product.price != price:
-                    existing_product.price = price
-                    updated_fields.append('price')
-                if existing_product.description != description:
-                    existing_product.description = description
-                    updated_fields.append('description')
-                # Note: We don't store image_url, only image_data
-                # The image_url is only used for downloading
-                if image_data and existing_product.image_data != image_data:
-                    existing_product.image_data = image_data
-                    existing_product.image_filename = image_filename
-                    existing_product.image_content_type = image_content_type
-                    updated_fields.append('image_data')
-                
-                if updated_fields:
-                    existing_product.updated_at = datetime.utcnow()
-                    if config.DEFAULT_CREATOR_ID:
-                        existing_product.updated_by_id = config.DEFAULT_CREATOR_ID
-                    
-                    spider.logger.info(
-                        f"Updated product '{name}' (ID: {existing_product.id}): "
-                        f"fields={', '.join(updated_fields)}"
-                    )
-                    spider.crawler.stats.inc_value('pipeline/items_updated')
-                else:
-                    spider.logger.debug(f"No changes needed for product '{name}' (ID: {existing_product.id})")
-                    spider.crawler.stats.inc_value('pipeline/items_unchanged')
-                
-            elif not existing_product:
-                # Create new product
-                product = Product(
-                    name=name,
-                    price=price,
-                    url=url,
-                    description=description,
-                    image_data=image_data,
-                    image_filename=image_filename,
-                    image_content_type=image_content_type,
-                    store_id=store_id,
+            except (ValueError, TypeError):
+                spider.logger.warning(f"Invalid price '{price}' for product '{name}', setting to None")
+                price = None
+
+        row = {column: adapter.get(column) for column in ITEM_COLUMNS}
+        row.update(name=name, price=price, store_id=store_id)
+        # A page scraped twice before a flush is written once, with its latest data
+        key = (store_id, row['url']) if row['url'] else (store_id, id(item))
+        if key in self.buffer:
+            spider.crawler.stats.inc_value('pipeline/items_duplicate')
+        self.buffer[key] = row
+
+        if len(self.buffer) >= self.batch_size:
+            await self.flush(spider)
+        return item
+
+    async def flush(self, spider):
+        """Write the buffered items as one batch (off the reactor thread)."""
+        async with self.flush_lock:
+            rows, self.buffer = list(self.buffer.values()), {}
+            if rows and self.SessionLocal:
+                saved = await asyncio.to_thread(self._write, rows, spider)
+                if saved:
+                    spider.crawler.signals.send_catch_log(items_persisted, rows=saved, spider=spider)
+
+    async def _flush_periodically(self, spider):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush(spider)
+            except Exception as e:
+                spider.logger.error(f"Periodic flush failed: {e}", exc_info=True)
+
+    def _write(self, rows, spider):
+        """Upsert `rows`; returns the ones that were saved."""
+        stats = spider.crawler.stats
+        with self.SessionLocal() as db:
+            unknown = {row['store_id'] for row in rows} - set(self.stores)
+            if unknown:
+                found = dict(db.execute(select(Store.id, Store.type).where(Store.id.in_(unknown))).all())
+                self.stores.update({store_id: found.get(store_id) for store_id in unknown})
+            missing = [row for row in rows if self.stores[row['store_id']] is None]
+            for row in missing:
+                spider.logger.error(f"Store with ID {row['store_id']} not found in database")
+            stats.inc_value('pipeline/items_dropped', len(missing))
+            rows = [row for row in rows if self.stores[row['store_id']] is not None]
+            if not rows:
+                return []
+
+            # New products from physical stores get the "in-store" tag
+            tag_ids_for = {
+                store_id: [self.in_store_tag_id]
+                for store_id, store_type in self.stores.items()
+                if store_type == StoreType.physical and self.in_store_tag_id is not None
+            }
+            try:
+                result = upsert_products(
+                    db, rows,
+                    update_existing=config.UPDATE_EXISTING_PRODUCTS,
                     creator_id=config.DEFAULT_CREATOR_ID,
-                    created_at=datetime.utcnow(),
-                    updated_at=datetime.utcnow()
+                    tag_ids_for=tag_ids_for,
                 )
-                
-                # Add the "in-store" tag only to products from physical stores
-                from app.db.models import StoreType
-                if store.type == StoreType.physical:
-                    in_store_tag = db.query(Tag).filter(Tag.name == "in-store").first()
-                    if in_store_tag:
-                        product.tags.append(in_store_tag)
-                        spider.logger.debug(f"Added 'in-store' tag to product '{name}' from physical store")
-                    else:
-                        spider.logger.warning("'in-store' tag not found in database")
-                else:
-                    spider.logger.debug(f"Skipping 'in-store' tag for product '{name}' from {store.type} store")
-                
-                db.add(product)
-                spider.logger.info(f"Created new product: '{name}'")
-                spider.crawler.stats.inc_value('pipeline/items_created')
-            
-            else:
-                spider.logger.debug(f"Duplicate product found, skipping: '{name}'")
-                spider.crawler.stats.inc_value('pipeline/items_duplicate')
-            
-            db.commit()
-            spider.crawler.stats.inc_value('pipeline/items_processed')
-            
-        except SQLAlchemyError as e:
-            db.rollback()
-            error_msg = f"Database error processing item '{adapter.get('name', 'Unknown')}': {e}"
-            spider.logger.error(error_msg)
-            spider.crawler.stats.inc_value('pipeline/database_errors')
-            # Don't re-raise to allow spider to continue
-        except Exception as e:
-            db.rollback()
-            error_msg = f"Unexpected error processing item '{adapter.get('name', 'Unknown')}': {e}"
-            spider.logger.error(error_msg, exc_info=True)
-            spider.crawler.stats.inc_value('pipeline/unexpected_errors')
-            # Don't re-raise to allow spider to continue
-        finally:
-            db.close()
-        
-        return item
+            except SQLAlchemyError as e:
+                db.rollback()
+                if len(rows) > 1:
+                    # Find the offending rows: retry one at a time
+                    spider.logger.warning(f"Batch of {len(rows)} failed, retrying item by item: {e}")
+                    return [saved for row in rows for saved in self._write([row], spider)]
+                spider.logger.error(f"Database error processing item '{rows[0]['name']}': {e}")
+                stats.inc_value('pipeline/database_errors')
+                return []
+
+        stats.inc_value('pipeline/batches')
+        stats.inc_value('pipeline/items_created', len(result['created']))
+        stats.inc_value('pipeline/items_updated', len(result['updated']))
+        stats.inc_value('pipeline/items_unchanged', result['unchanged'])
+        stats.inc_value('pipeline/items_processed', len(rows))
+        spider.logger.info(
+            f"Saved batch of {len(rows)} products: {len(result['created'])} created, "
+            f"{len(result['updated'])} updated, {result['unchanged']} unchanged"
+        )
+        return rows
 
 
 class StoreDeduplicationPipeline:
@@ -286,7 +389,7 @@ class StoreDeduplicationPipeline:
     def open_spider(self, spider):
         """Initialize database connection when spider starts."""
         try:
-            self.engine = create_engine(config.DATABASE_URL, echo=False)
+            self.engine = get_engine("scraper")
             self.SessionLocal = sessionmaker(bind=self.engine, autocommit=False, autoflush=False)
             spider.logger.info(f"Store deduplication pipeline initialized")
         except Exception as e:
@@ -294,10 +397,11 @@ class StoreDeduplicationPipeline:
             raise
     
     def close_spider(self, spider):
-        """Clean up database connection when spider closes."""
+        """Release the session factory; the pooled scraper engine is shared and stays open."""
         if self.engine:
-            self.engine.dispose()
-            spider.logger.info("Store deduplication pipeline connection closed")
+            self.engine = None
+            self.SessionLocal = None
+            spider.logger.info("Store deduplication pipeline closed")
     
     def normalize_store_name(self, name):
         """Normalize store name for comparison."""
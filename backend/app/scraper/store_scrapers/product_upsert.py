@@ -0,0 +1,115 @@
+"""
+Batched product upsert for DatabasePipeline.
+
+A batch of scraped products is written with one SELECT (current image of the
+rows it may touch, for blob refcounts), one
+`INSERT ... ON CONFLICT (store_id, url) DO UPDATE ... RETURNING` and one
+commit, instead of a session, four lookups and a commit per product.
+Unchanged rows are filtered by the DO UPDATE's WHERE clause, so they are
+neither rewritten nor returned.
+"""
+
+from datetime import datetime, timezone
+from typing import Optional
+
+from sqlalchemy import and_, case, null, or_, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from app.db.blob_refs import adjust_refcounts
+from app.db.cache_generations import mark_changed
+from app.db.models import Product, product_tags
+
+# Columns an item sets; every row of a batch carries all of them
+ITEM_COLUMNS = ('name', 'price', 'url', 'description', 'image_sha256', 'image_filename',
+                'image_content_type', 'store_id')
+COMPARED_COLUMNS = ('name', 'price', 'description')
+
+
+def _insert(db: Session):
+    # ON CONFLICT is dialect-specific SQL
+    return {'postgresql': postgresql.insert, 'sqlite': sqlite.insert}[db.get_bind().dialect.name]
+
+
+def upsert_products(db: Session, rows: list[dict], update_existing: bool = True,
+                    creator_id: Optional[int] = None, tag_ids_for: Optional[dict] = None) -> dict:
+    """Insert or update `rows` (dicts of ITEM_COLUMNS) and commit.
+
+    `tag_ids_for` maps a store id to the tag ids new products of that store get.
+    Returns {'created': [ids], 'updated': [ids], 'unchanged': count}.
+    """
+    table = Product.__table__
+    now = datetime.now(timezone.utc)
+
+    urls = {row['url'] for row in rows if row['url']}
+    existing = {}
+    if urls:
+        current = db.execute(
+            select(table.c.store_id, table.c.url, table.c.image_sha256).where(
+                table.c.store_id.in_({row['store_id'] for row in rows}), table.c.url.in_(urls)
+            )
+        )
+        existing = {(store_id, url): sha for store_id, url, sha in current}
+
+    stmt = _insert(db)(table).values([
+        {**{column: row[column] for column in ITEM_COLUMNS},
+         'creator_id': creator_id, 'created_at': now, 'updated_at': now}
+        for row in rows
+    ])
+    target = {'index_elements': ['store_id', 'url'], 'index_where': table.c.url.is_not(None)}
+    if update_existing:
+        excluded = stmt.excluded
+        image_changed = and_(excluded.image_sha256.is_not(None),
+                             table.c.image_sha256.is_distinct_from(excluded.image_sha256))
+        # An item without an image keeps the stored one
+        updates = {column: excluded[column] for column in COMPARED_COLUMNS}
+        updates.update(
+            image_sha256=case((image_changed, excluded.image_sha256), else_=table.c.image_sha256),
+            image_filename=case((image_changed, excluded.image_filename), else_=table.c.image_filename),
+            image_content_type=case((image_changed, excluded.image_content_type),
+                                    else_=table.c.image_content_type),
+            image_data=case((image_changed, null()), else_=table.c.image_data),
+            updated_at=now,
+        )
+        if creator_id:
+            updates['updated_by_id'] = creator_id
+        stmt = stmt.on_conflict_do_update(
+            **target,
+            set_=updates,
+            where=or_(image_changed, *(table.c[c].is_distinct_from(excluded[c]) for c in COMPARED_COLUMNS)),
+        )
+    else:
+        stmt = stmt.on_conflict_do_nothing(**target)
+    written = db.execute(stmt.returning(table.c.id, table.c.store_id, table.c.url, table.c.image_sha256)).all()
+
+    created, updated, deltas = [], [], {}
+    for product_id, store_id, url, sha in written:
+        key = (store_id, url)
+        previous = existing.get(key) if url else None
+        (updated if url and key in existing else created).append((product_id, store_id))
+        if sha == previous:
+            continue
+        # Core statements skip the ORM hooks that count blob references
+        if sha:
+            deltas[sha] = deltas.get(sha, 0) + 1
+        if previous:
+            deltas[previous] = deltas.get(previous, 0) - 1
+    if deltas:
+        adjust_refcounts(db.connection(), deltas)
+
+    links = [
+        {'product_id': product_id, 'tag_id': tag_id}
+        for product_id, store_id in created
+        for tag_id in (tag_ids_for or {}).get(store_id, ())
+    ]
+    if links:
+        db.execute(product_tags.insert(), links)
+
+    if written:
+        mark_changed(db, 'products')
+    db.commit()
+    return {
+        'created': [product_id for product_id, _ in created],
+        'updated': [product_id for product_id, _ in updated],
+        'unchanged': len(rows) - len(written),
+    }
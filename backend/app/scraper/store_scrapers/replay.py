@@ -0,0 +1,254 @@
+"""
+Offline replay of saved pages through spider callbacks.
+
+Each fixture (an HTML file, or every HTML response of a HAR capture) is
+wrapped in an HtmlResponse and handed to the spider callback that would
+have parsed it, with no network and no browser: callbacks that drive a
+Playwright page get a FixturePage answering locators from the saved HTML.
+`replay` returns what each callback produced and how long it took, so
+scripts/benchmarks/bench_spider_parse.py and the parse regression tests
+can report items/sec, CPU time per page, memory and field completeness.
+"""
+
+import asyncio
+import base64
+import inspect
+import json
+import re
+import time
+import tracemalloc
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from parsel import Selector
+from scrapy import Request
+from scrapy.http import HtmlResponse
+from scrapy.settings import Settings
+from scrapy.spiderloader import SpiderLoader
+
+COMPLETENESS_FIELDS = ('name', 'price', 'url', 'description', 'image_url', 'store_id')
+
+
+class FixtureLocator:
+    """The subset of Playwright's Locator the spiders use, over static HTML."""
+
+    def __init__(self, elements):
+        self.elements = elements
+
+    @property
+    def first(self):
+        return FixtureLocator(self.elements[:1])
+
+    def nth(self, index):
+        return FixtureLocator(self.elements[index:index + 1])
+
+    async def count(self):
+        return len(self.elements)
+
+    async def all(self):
+        return [FixtureLocator([element]) for element in self.elements]
+
+    async def text_content(self, timeout=None):
+        return self.elements[0].xpath('string()').get() if self.elements else None
+
+    inner_text = text_content
+
+    async def get_attribute(self, name, timeout=None):
+        return self.elements[0].attrib.get(name) if self.elements else None
+
+    async def is_visible(self, timeout=None):
+        # A saved page has nothing more to load: "load more" buttons are inert
+        return False
+
+    async def click(self, *args, **kwargs):
+        pass
+
+    async def wait_for(self, *args, **kwargs):
+        pass
+
+
+class FixturePage:
+    """Stands in for `response.meta['playwright_page']` during replay."""
+
+    def __init__(self, html, url):
+        self.html = html
+        self.url = url
+        self.selector = Selector(text=html)
+        self.closed = False
+
+    def locator(self, selector):
+        if selector.startswith('xpath='):
+            return FixtureLocator(self.selector.xpath(selector[6:]))
+        # Playwright's :has-text() is cssselect's :contains()
+        css = re.sub(r':has-text\(', ':contains(', selector)
+        try:
+            return FixtureLocator(self.selector.css(css))
+        except Exception:
+            return FixtureLocator([])  # Playwright-only syntax matches nothing offline
+
+    async def content(self):
+        return self.html
+
+    async def evaluate(self, expression, *args):
+        return None
+
+    async def wait_for_timeout(self, timeout):
+        pass
+
+    async def wait_for_selector(self, selector, **kwargs):
+        return None
+
+    async def wait_for_load_state(self, *args, **kwargs):
+        pass
+
+    def set_default_timeout(self, timeout):
+        pass
+
+    async def close(self):
+        self.closed = True
+
+    def is_closed(self):
+        return self.closed
+
+
+@dataclass
+class Fixture:
+    spider: str
+    callback: str
+    url: str
+    html: str
+    name: str
+
+
+@dataclass
+class ReplayResult:
+    fixture: Fixture
+    items: list = field(default_factory=list)
+    requests: list = field(default_factory=list)
+    wall_seconds: float = 0.0
+    cpu_seconds: float = 0.0
+    error: str = None
+
+
+def load_fixtures(entry, base_dir):
+    """Fixtures of one manifest entry: {spider, callback, fixture, url?}. HAR files yield one per HTML page."""
+    path = Path(base_dir) / entry['fixture']
+    if path.suffix != '.har':
+        html = path.read_text(encoding='utf-8', errors='replace')
+        return [Fixture(entry['spider'], entry['callback'], entry['url'], html, path.name)]
+
+    fixtures = []
+    for har_entry in json.loads(path.read_text())['log']['entries']:
+        content = har_entry['response'].get('content', {})
+        if 'html' not in content.get('mimeType', '') or not content.get('text'):
+            continue
+        text = content['text']
+        if content.get('encoding') == 'base64':
+            text = base64.b64decode(text).decode('utf-8', errors='replace')
+        url = har_entry['request']['url']
+        fixtures.append(Fixture(entry['spider'], entry['callback'], url, text, f'{path.name}#{url}'))
+    return fixtures
+
+
+def spider_loader():
+    return SpiderLoader.from_settings(Settings({'SPIDER_MODULES': [f'{__package__}.spiders']}))
+
+
+async def _collect(output, result):
+    if inspect.iscoroutine(output):
+        output = await output
+    if output is None:
+        return
+    if isinstance(output, (Request, dict)) or hasattr(output, 'fields'):
+        output = [output]
+    if inspect.isasyncgen(output):
+        async for value in output:
+            (result.requests if isinstance(value, Request) else result.items).append(value)
+    else:
+        for value in output:
+            (result.requests if isinstance(value, Request) else result.items).append(value)
+
+
+async def _replay_one(spider, fixture):
+    result = ReplayResult(fixture)
+    page = FixturePage(fixture.html, fixture.url)
+    request = Request(fixture.url, meta={'playwright_page': page})
+    response = HtmlResponse(fixture.url, body=fixture.html, encoding='utf-8', request=request)
+    wall, cpu = time.perf_counter(), time.process_time()
+    try:
+        await _collect(getattr(spider, fixture.callback)(response), result)
+    except Exception as e:
+        result.error = f'{type(e).__name__}: {e}'
+    result.wall_seconds = time.perf_counter() - wall
+    result.cpu_seconds = time.process_time() - cpu
+    return result
+
+
+def replay(fixtures, repeat=1):
+    """Run every fixture through its spider callback `repeat` times; results of the last run."""
+    loader = spider_loader()
+    spiders = {}
+
+    async def run():
+        results = []
+        for fixture in fixtures:
+            if fixture.spider not in spiders:
+                spiders[fixture.spider] = loader.load(fixture.spider)()
+            spider = spiders[fixture.spider]
+            wall = cpu = 0.0
+            for _ in range(repeat):
+                result = await _replay_one(spider, fixture)
+                wall += result.wall_seconds
+                cpu += result.cpu_seconds
+            result.wall_seconds, result.cpu_seconds = wall / repeat, cpu / repeat
+            results.append(result)
+        return results
+
+    return asyncio.run(run())
+
+
+def peak_memory(fixtures):
+    """Peak Python allocation (bytes) while replaying `fixtures` once, per fixture name."""
+    peaks = {}
+    for fixture in fixtures:
+        tracemalloc.start()
+        replay([fixture])
+        peaks[fixture.name] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return peaks
+
+
+def completeness(items):
+    """Share of COMPLETENESS_FIELDS filled, averaged over `items` (None without items)."""
+    if not items:
+        return None
+    filled = sum(
+        1 for item in items for name in COMPLETENESS_FIELDS
+        if item.get(name) not in (None, '', [])
+    )
+    return filled / (len(items) * len(COMPLETENESS_FIELDS))
+
+
+def summarize(results):
+    """Yield of one manifest entry's replay: the numbers its `expect` block pins."""
+    items = [item for result in results for item in result.items]
+    score = completeness(items)
+    return {
+        'items': len(items),
+        'requests': sum(len(result.requests) for result in results),
+        'completeness': round(score, 3) if score is not None else None,
+        'errors': [result.error for result in results if result.error],
+    }
+
+
+def regressions(entry, summary):
+    """Ways `summary` falls short of the entry's recorded expectations."""
+    expect = entry.get('expect', {})
+    found = [f"{entry['spider']}.{entry['callback']} on {entry['fixture']}: {error}" for error in summary['errors']]
+    for key in ('items', 'requests', 'completeness'):
+        if expect.get(key) is not None and (summary[key] or 0) < expect[key]:
+            found.append(
+                f"{entry['spider']}.{entry['callback']} on {entry['fixture']}: "
+                f"{key} {summary[key]} < expected {expect[key]}"
+            )
+    return found
@@ -31,7 +31,7 @@ AUTOTHROTTLE_START_DELAY = 1  # Start faster
 AUTOTHROTTLE_MAX_DELAY = 10   # Reduced max delay
 AUTOTHROTTLE_TARGET_CONCURRENCY = 1.5  # Allow slight burst
 
-JOBDIR = 'crawls/bricodepot_crawl_state'
+# JOBDIR is per spider (crawls/<spider>_crawl_state), set by run_spider.py
 
 # Disable cookies (enabled by default)
 #COOKIES_ENABLED = False
@@ -61,11 +61,16 @@ DEFAULT_REQUEST_HEADERS = {
 #    "store_scrapers.middlewares.StoreScrapersDownloaderMiddleware": 543,
 #}
 
-# Re-enable Playwright with stable configuration
+# Playwright requests are fetched over plain HTTP first and only rendered in
+# the browser when the page needs JavaScript (see hybrid_handler.py)
 DOWNLOAD_HANDLERS = {
-    "http": "scrapy_playwright.handler.ScrapyPlaywrightDownloadHandler",
-    "https": "scrapy_playwright.handler.ScrapyPlaywrightDownloadHandler",
+    "http": "store_scrapers.hybrid_handler.HybridDownloadHandler",
+    "https": "store_scrapers.hybrid_handler.HybridDownloadHandler",
 }
+HYBRID_RENDER_MODE = "auto"  # auto / always / never; spiders override with `render_mode`
+HYBRID_MIN_TEXT_LENGTH = 200  # Less visible text than this (and no JSON-LD) means an app shell
+HYBRID_LEARN_AFTER = 5  # Callbacks whose pages nearly always escalate skip the HTTP probe
+HYBRID_LEARN_RATIO = 0.9
 
 # Enable or disable extensions
 # See https://docs.scrapy.org/en/latest/topics/extensions.html
@@ -81,6 +86,19 @@ ITEM_PIPELINES = {
     "store_scrapers.pipelines.DatabasePipeline": 300,
 }
 
+# ImageDownloadPipeline fetches on the asyncio reactor, outside the page downloader
+# (and its DOWNLOAD_DELAY), so images never queue behind or hold up page requests
+TWISTED_REACTOR = "twisted.internet.asyncioreactor.AsyncioSelectorReactor"
+IMAGE_DOWNLOAD_CONCURRENCY = 16
+IMAGE_DOWNLOAD_CONCURRENCY_PER_HOST = 4
+IMAGE_DOWNLOAD_RETRIES = 3
+IMAGE_DOWNLOAD_BACKOFF = 1.0  # Seconds; doubles per retry, with jitter
+IMAGE_DOWNLOAD_TIMEOUT = 30
+
+# DatabasePipeline writes products in batches: one upsert and one commit per batch
+DB_PIPELINE_BATCH_SIZE = 500
+DB_PIPELINE_FLUSH_INTERVAL = 5.0  # Seconds; a partial batch is written at least this often
+
 # AutoThrottle is now enabled above for stability
 
 # Enable and configure HTTP caching (disabled by default)
@@ -96,6 +114,19 @@ FEED_EXPORT_ENCODING = "utf-8"
 
 # Use database-based duplicate filter to avoid re-scraping existing products
 DUPEFILTER_CLASS = 'store_scrapers.url_filter.DatabaseUrlFilter'
+# Known URLs are preloaded into a Bloom filter (~1.8 MB per 1M URLs at 0.1%);
+# possible positives are confirmed against the database in batches
+URL_FILTER_FALSE_POSITIVE_RATE = 0.001
+URL_FILTER_CONFIRM_BATCH = 200
+
+# Spiders with sitemap_urls crawl incrementally (see incremental.py): only the
+# sitemap's new or changed product URLs, per the crawl_ledger table, with a full
+# category crawl every INCREMENTAL_FULL_SWEEP_DAYS.
+# INCREMENTAL_CRAWL_MODE: 'auto', or 'full' / 'incremental' to force one kind of run
+INCREMENTAL_CRAWL_MODE = 'auto'
+INCREMENTAL_FULL_SWEEP_DAYS = 7
+INCREMENTAL_REVALIDATE_DAYS = 3  # Pages without a sitemap lastmod are rechecked this often
+INCREMENTAL_LEDGER_BATCH = 200
 # Minimal Playwright settings for maximum stability
 PLAYWRIGHT_DEFAULT_NAVIGATION_TIMEOUT = 20000
 PLAYWRIGHT_BROWSER_TYPE = 'chromium'
@@ -105,25 +136,37 @@ PLAYWRIGHT_LAUNCH_OPTIONS = {
         '--no-sandbox',
         '--disable-dev-shm-usage',
         '--disable-gpu',
-        '--single-process',
         '--disable-extensions',
         '--disable-plugins',
-        # '--disable-images',  # Images enabled for download
         # JavaScript re-enabled - needed for product listings
         '--memory-pressure-off'
     ]
 }
-PLAYWRIGHT_MAX_CONTEXTS = 1
-PLAYWRIGHT_MAX_PAGES_PER_CONTEXT = 1
+# Rendered pages share a pool of contexts, each recycled after a number of
+# pages to cap browser memory; images, media, fonts, CSS and trackers are
+# aborted inside the page (see browser_pool.py)
+PLAYWRIGHT_CONTEXT_POOL_SIZE = 2
+PLAYWRIGHT_MAX_PAGES_PER_CONTEXT = 2
+PLAYWRIGHT_CONTEXT_RECYCLE_PAGES = 100
+PLAYWRIGHT_BLOCKED_RESOURCE_TYPES = ['image', 'media', 'font', 'stylesheet']
+PLAYWRIGHT_BLOCK_THIRD_PARTY = False  # Spiders opt in with `block_third_party = True`
 
 # Close pages immediately after use
 PLAYWRIGHT_CLOSE_PAGES_ON_FINISH = True
 
-# Enhanced retry settings with exponential backoff (tenacity-style)
+# Enhanced retry settings: throttled responses back off per domain without
+# blocking the reactor (see EnhancedRetryMiddleware in middleware.py)
+DOWNLOADER_MIDDLEWARES = {
+    "scrapy.downloadermiddlewares.retry.RetryMiddleware": None,
+    "store_scrapers.middleware.EnhancedRetryMiddleware": 550,
+}
 RETRY_ENABLED = True
 RETRY_TIMES = 5  # More retries
 RETRY_HTTP_CODES = [500, 502, 503, 504, 408, 429, 520, 521, 522, 523, 524]
-RETRY_BACKOFF = True  # Enable exponential backoff
+RETRY_BACKOFF_HTTP_CODES = [403, 429, 503]  # Retried after a backoff instead of immediately
+RETRY_BACKOFF_BASE = 1.0  # Seconds; decorrelated jitter between this and 3x the previous wait
+RETRY_BACKOFF_MAX = 60.0
+RETRY_AFTER_MAX = 300.0  # A longer Retry-After gives the request up instead of waiting
 
 # Memory and resource management
 MEMUSAGE_ENABLED = True
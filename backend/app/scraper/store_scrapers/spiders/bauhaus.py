@@ -9,6 +9,7 @@ using Scrapy pipelines.
 
 import scrapy
 from ..items import ProductItem
+from ..structured_data import structured_item
 from ..config import config
 
 
@@ -30,7 +31,7 @@ class BauhausSpider(scrapy.Spider):
             callback=self.parse,
             meta=dict(
                 playwright=True,
-                playwright_include_page=True,
+                render_selectors=['nav a[href]'],
                 playwright_page_goto_kwargs={
                     'wait_until': 'domcontentloaded',
                     'timeout': 60000,
@@ -50,15 +51,6 @@ class BauhausSpider(scrapy.Spider):
         Args:
             response (scrapy.http.Response): The response object from the homepage.
         """
-        try:
-            page = response.meta["playwright_page"]
-            html_content = await page.content()
-            await page.close()
-            response = response.replace(body=html_content, encoding='utf-8')
-        except Exception as e:
-            self.logger.error(f"Error processing homepage: {e}")
-            return
-
         # Extract category links from the homepage navigation
         category_selectors = [
             'nav a[href*="/"]::attr(href)',
@@ -106,7 +98,7 @@ class BauhausSpider(scrapy.Spider):
                 callback=self.parse_category,
                 meta=dict(
                     playwright=True,
-                    playwright_include_page=True,
+                    render_selectors=['.product-item', '.product-tile', 'a[href*="/producto/"]'],
                     playwright_page_goto_kwargs={
                         'wait_until': 'domcontentloaded',
                         'timeout': 60000,
@@ -126,15 +118,6 @@ class BauhausSpider(scrapy.Spider):
         Args:
             response (scrapy.http.Response): The response object from a category page.
         """
-        try:
-            page = response.meta["playwright_page"]
-            html_content = await page.content()
-            await page.close()
-            response = response.replace(body=html_content, encoding='utf-8')
-        except Exception as e:
-            self.logger.error(f"Error processing category page {response.url}: {e}")
-            return
-
         # Extract product links - Look for various product link patterns
         product_selectors = [
             '.product-item a::attr(href)',
@@ -178,7 +161,7 @@ class BauhausSpider(scrapy.Spider):
                 callback=self.parse_product,
                 meta=dict(
                     playwright=True,
-                    playwright_include_page=True,
+                    render_selectors=['h1', 'script[type="application/ld+json"]'],
                     playwright_page_goto_kwargs={
                         'wait_until': 'domcontentloaded',
                         'timeout': 60000,
@@ -198,13 +181,10 @@ class BauhausSpider(scrapy.Spider):
         Args:
             response (scrapy.http.Response): The response object from a product page.
         """
-        try:
-            page = response.meta["playwright_page"]
-            html_content = await page.content()
-            await page.close()
-            response = response.replace(body=html_content, encoding='utf-8')
-        except Exception as e:
-            self.logger.error(f"Error processing product page {response.url}: {e}")
+        # Fast path: the page's schema.org data, before any selector cascade
+        item = structured_item(response, self.store_id)
+        if item:
+            yield item
             return
 
         # Extract product name - try multiple selectors
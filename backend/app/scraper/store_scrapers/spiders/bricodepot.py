@@ -9,18 +9,42 @@ using Scrapy pipelines.
 
 import scrapy
 from ..items import ProductItem
+from ..structured_data import structured_item
 from ..config import config
+from ..incremental import IncrementalSitemapMixin
 
 
-class BricodepotSpider(scrapy.Spider):
+class BricodepotSpider(IncrementalSitemapMixin, scrapy.Spider):
     """
     Spider for Brico Depot website.
+
+    Normally crawls incrementally from the sitemaps listed in robots.txt;
+    every few days (see INCREMENTAL_FULL_SWEEP_DAYS) it walks the categories
+    from the homepage instead.
     """
     name = "bricodepot"
     allowed_domains = ["bricodepot.es"]
     store_id = config.STORE_IDS["bricodepot"]
+    sitemap_urls = ["https://www.bricodepot.es/robots.txt"]
+    # Product URLs end with the EAN, e.g. /espejo-clic-68-x-80-cm-8431949256265
+    sitemap_product_patterns = [r"-\d{8,}$"]
+
+    def product_meta(self):
+        """Meta of product page requests."""
+        return dict(
+            playwright=True,
+            playwright_include_page=True,
+            playwright_page_goto_kwargs={
+                'wait_until': 'domcontentloaded',
+                'timeout': 30000,
+            },
+            playwright_page_methods=[
+                {'method': 'wait_for_selector', 'args': ['body']},
+                {'method': 'wait_for_timeout', 'args': [2000]},
+            ],
+        )
 
-    def start_requests(self):
+    def full_crawl_requests(self):
         """
         Initiates the scraping process by sending a request to the Brico Depot homepage.
         Uses Playwright for rendering the page.
@@ -30,7 +54,7 @@ class BricodepotSpider(scrapy.Spider):
             callback=self.parse,
             meta=dict(
                 playwright=True,
-                playwright_include_page=True,
+                render_selectors=['a.hm-link', '.nav-sections a'],
                 playwright_page_goto_kwargs={
                     'wait_until': 'domcontentloaded',
                     'timeout': 60000,
@@ -49,15 +73,6 @@ class BricodepotSpider(scrapy.Spider):
         Args:
             response (scrapy.http.Response): The response object from the homepage.
         """
-        try:
-            page = response.meta["playwright_page"]
-            html_content = await page.content()
-            await page.close()
-            response = response.replace(body=html_content, encoding='utf-8')
-        except Exception as e:
-            self.logger.error(f"Error processing homepage: {e}")
-            return
-
         # Extract category links from the homepage navigation
         # Updated selectors based on current website structure
         category_selectors = [
@@ -321,18 +336,7 @@ class BricodepotSpider(scrapy.Spider):
             yield scrapy.Request(
                 url=response.urljoin(link),
                 callback=self.parse_product,
-                meta=dict(
-                    playwright=True,
-                    playwright_include_page=True,
-                    playwright_page_goto_kwargs={
-                        'wait_until': 'domcontentloaded',
-                        'timeout': 30000,
-                    },
-                    playwright_page_methods=[
-                        {'method': 'wait_for_selector', 'args': ['body']},
-                        {'method': 'wait_for_timeout', 'args': [2000]},
-                    ],
-                ),
+                meta=self.product_meta(),
             )
 
     async def parse_product(self, response):
@@ -342,6 +346,15 @@ class BricodepotSpider(scrapy.Spider):
         Args:
             response (scrapy.http.Response): The response object from a product page.
         """
+        # Fast path: the page's schema.org data, before driving the page
+        item = structured_item(response, self.store_id)
+        if item:
+            page = response.meta.get("playwright_page")
+            if page:
+                await page.close()
+            yield item
+            return
+
         product_name = None
         price = None
         description = None
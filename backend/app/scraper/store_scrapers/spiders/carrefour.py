@@ -6,6 +6,7 @@ import scrapy
 import json
 import re
 from urllib.parse import urljoin
+from ..structured_data import extract_product
 
 class CarrefourSpider(scrapy.Spider):
     name = 'carrefour'
@@ -87,16 +88,20 @@ class CarrefourSpider(scrapy.Spider):
     def parse_product(self, response):
         """Parse individual product page"""
         
-        # Try to get JSON-LD data first
-        scripts = response.xpath('//script[@type="application/ld+json"]/text()').getall()
-        
-        for script in scripts:
-            try:
-                data = json.loads(script)
-                if isinstance(data, dict) and data.get('@type') == 'Product':
-                    return self.parse_product_data(data, response.url)
-            except json.JSONDecodeError:
-                continue
+        # Fast path: the page's schema.org data (JSON-LD, microdata, OpenGraph)
+        product = extract_product(response)
+        if product:
+            yield {
+                'name': product['name'],
+                'price': product['price'],
+                'description': product.get('description') or '',
+                'url': response.url,
+                'image_url': product.get('image_url'),
+                'store_id': self.store_id,
+                'in_stock': product.get('availability', 'InStock') == 'InStock',
+                'category': 'Tools & Hardware'
+            }
+            return
         
         # Fallback to HTML extraction
         name = response.css('h1.product-name::text').get()
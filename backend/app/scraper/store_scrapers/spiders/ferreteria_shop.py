@@ -8,6 +8,7 @@ platform with ~200 products focused on cabinet/kitchen hardware.
 
 import scrapy
 from ..items import ProductItem
+from ..structured_data import structured_item
 from ..config import config
 
 
@@ -155,6 +156,12 @@ class FerreteriaShopSpider(scrapy.Spider):
         """
         Parses a product page to extract product details.
         """
+        # Fast path: the page's schema.org data, before any selector cascade
+        item = structured_item(response, self.store_id)
+        if item:
+            yield item
+            return
+
         self.logger.info(f"Parsing product: {response.url}")
 
         # Extract product name - PrestaShop selectors
@@ -10,6 +10,7 @@ so this spider uses Playwright for rendering.
 import scrapy
 import re
 from ..items import ProductItem
+from ..structured_data import structured_item
 from ..config import config
 
 
@@ -205,6 +206,15 @@ class MengualSpider(scrapy.Spider):
         Parses a product page to extract product details.
         Handles lazy-loaded images and JavaScript content.
         """
+        # Fast path: the page's schema.org data, before driving the page
+        item = structured_item(response, self.store_id)
+        if item:
+            page = response.meta.get("playwright_page")
+            if page:
+                await page.close()
+            yield item
+            return
+
         product_name = None
         price = None
         description = None
@@ -6,56 +6,82 @@ import scrapy
 import re
 from ..items import ProductItem
 from ..config import config
+from ..incremental import IncrementalSitemapMixin
 
 
-class MengualBulkSpider(scrapy.Spider):
+class MengualBulkSpider(IncrementalSitemapMixin, scrapy.Spider):
     """
     Bulk spider for Mengual.com - scrapes all major categories for maximum products.
+
+    Normally crawls incrementally from the sitemap; every few days (see
+    INCREMENTAL_FULL_SWEEP_DAYS) it walks all the category pages instead.
     """
     name = "mengual_bulk"
     allowed_domains = ["mengual.com"]
     store_id = config.STORE_IDS.get("mengual", 4070)
-
-    def start_requests(self):
+    sitemap_urls = ["https://www.mengual.com/sitemap.xml"]
+
+    # Main category pages, for the full crawl
+    category_urls = [
+        # Hardware categories
+        "https://www.mengual.com/tiradores-y-pomos",
+        "https://www.mengual.com/bisagras",
+        "https://www.mengual.com/guias-de-cajones",
+        "https://www.mengual.com/herrajes-para-armarios",
+        "https://www.mengual.com/cerraduras-y-seguridad",
+        "https://www.mengual.com/manetas-y-rosetas",
+
+        # Kitchen & bath
+        "https://www.mengual.com/accesorios-de-cocina",
+        "https://www.mengual.com/accesorios-de-bano",
+        "https://www.mengual.com/equipamiento-de-cocina-y-bano",
+
+        # Tools & lighting
+        "https://www.mengual.com/herramientas-electricas",
+        "https://www.mengual.com/herramientas-manuales",
+        "https://www.mengual.com/iluminacion",
+        "https://www.mengual.com/accesorios-para-iluminacion",
+
+        # Construction & furniture
+        "https://www.mengual.com/herrajes-para-construccion",
+        "https://www.mengual.com/herrajes-para-muebles",
+        "https://www.mengual.com/sistemas-de-apertura",
+
+        # Additional categories
+        "https://www.mengual.com/perfiles-y-tubos",
+        "https://www.mengual.com/tornilleria",
+        "https://www.mengual.com/adhesivos-y-selladores",
+    ]
+
+    # Patterns that indicate non-product pages (legal, guides, info pages)
+    excluded_patterns = [
+        'terminos', 'legal', 'privacidad', 'cookies', 'envio', 'pago',
+        'procedimiento', 'calendario', 'delegaciones', 'showrooms',
+        'incidencias', 'compliance', 'catalogos', 'historia', 'empresa',
+        'cobertura', 'expediciones', 'instalacion', 'fotovoltaica',
+        'guias-', 'catalogo', 'contacto', 'nosotros', 'blog', 'noticias'
+    ]
+
+    def full_crawl_requests(self):
         """Start with main category pages to find more product URLs."""
-        category_urls = [
-            # Hardware categories
-            "https://www.mengual.com/tiradores-y-pomos",
-            "https://www.mengual.com/bisagras",
-            "https://www.mengual.com/guias-de-cajones", 
-            "https://www.mengual.com/herrajes-para-armarios",
-            "https://www.mengual.com/cerraduras-y-seguridad",
-            "https://www.mengual.com/manetas-y-rosetas",
-            
-            # Kitchen & bath
-            "https://www.mengual.com/accesorios-de-cocina",
-            "https://www.mengual.com/accesorios-de-bano",
-            "https://www.mengual.com/equipamiento-de-cocina-y-bano",
-            
-            # Tools & lighting
-            "https://www.mengual.com/herramientas-electricas",
-            "https://www.mengual.com/herramientas-manuales",
-            "https://www.mengual.com/iluminacion",
-            "https://www.mengual.com/accesorios-para-iluminacion",
-            
-            # Construction & furniture
-            "https://www.mengual.com/herrajes-para-construccion",
-            "https://www.mengual.com/herrajes-para-muebles",
-            "https://www.mengual.com/sistemas-de-apertura",
-            
-            # Additional categories
-            "https://www.mengual.com/perfiles-y-tubos",
-            "https://www.mengual.com/tornilleria",
-            "https://www.mengual.com/adhesivos-y-selladores",
-        ]
-        
-        for url in category_urls:
+        for url in self.category_urls:
             yield scrapy.Request(
                 url=url,
                 callback=self.parse_category,
                 dont_filter=True
             )
 
+    def is_product_url(self, url):
+        """Sitemap entries that look like products: /<slug-with-dashes>, not a category or info page."""
+        path = url.replace('https://www.mengual.com/', '')
+        return (
+            url.startswith('https://www.mengual.com/')
+            and '/' not in path.strip('/')
+            and '-' in path and 10 < len(path) < 100
+            and not any(pattern in path.lower() for pattern in self.excluded_patterns)
+            and url.rstrip('/') not in self.category_urls
+        )
+
     def parse_category(self, response):
         """Parse category page to extract product links."""
         self.logger.info(f"Parsing category: {response.url}")
@@ -63,15 +89,6 @@ class MengualBulkSpider(scrapy.Spider):
         # Extract product links using multiple patterns
         product_links = set()
 
-        # Patterns that indicate non-product pages (legal, guides, info pages)
-        excluded_patterns = [
-            'terminos', 'legal', 'privacidad', 'cookies', 'envio', 'pago',
-            'procedimiento', 'calendario', 'delegaciones', 'showrooms',
-            'incidencias', 'compliance', 'catalogos', 'historia', 'empresa',
-            'cobertura', 'expediciones', 'instalacion', 'fotovoltaica',
-            'guias-', 'catalogo', 'contacto', 'nosotros', 'blog', 'noticias'
-        ]
-
         # Look for product URLs in href attributes
         for link in response.css('a::attr(href)').getall():
             if not link:
@@ -79,7 +96,7 @@ class MengualBulkSpider(scrapy.Spider):
 
             # Skip if link contains excluded patterns
             link_lower = link.lower()
-            if any(pattern in link_lower for pattern in excluded_patterns):
+            if any(pattern in link_lower for pattern in self.excluded_patterns):
                 continue
 
             # Skip category/listing pages
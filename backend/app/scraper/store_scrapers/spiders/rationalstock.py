@@ -8,6 +8,7 @@ supplier with 32,000+ products and uses Apache server (no Cloudflare protection)
 
 import scrapy
 from ..items import ProductItem
+from ..structured_data import structured_item
 from ..config import config
 
 
@@ -150,6 +151,12 @@ class RationalstockSpider(scrapy.Spider):
         Args:
             response (scrapy.http.Response): The response object from a product page.
         """
+        # Fast path: the page's schema.org data, before any selector cascade
+        item = structured_item(response, self.store_id)
+        if item:
+            yield item
+            return
+
         self.logger.info(f"Parsing product: {response.url}")
 
         # Extract product name
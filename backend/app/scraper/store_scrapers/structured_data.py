@@ -0,0 +1,232 @@
+"""
+Shared schema.org product extraction for all spiders.
+
+Most retailers embed their product data in the raw HTML for search engines:
+JSON-LD (`<script type="application/ld+json">` with a Product and its
+Offer), microdata (`itemscope itemtype=".../Product"`) or OpenGraph /
+`product:` meta tags. `extract_product` reads all three in one pass over
+the response's lxml tree (decoded with its HTTP charset) and merges them in
+that order of preference, so spiders can skip their selector cascades (and
+often the browser render) and fall back to them only when it returns None.
+
+Each syntax contributes a single Product: the page's main one, the first
+with a name and an offer. Related products, carousels and `ItemList`s on
+the same page never lend it their fields.
+"""
+
+import json
+import logging
+import re
+from typing import Optional
+from urllib.parse import urljoin
+
+import lxml.html
+from lxml import etree
+
+from .items import ProductItem
+
+logger = logging.getLogger(__name__)
+
+FIELDS = ('name', 'price', 'currency', 'sku', 'image_url', 'availability', 'description')
+PRODUCT_TYPES = {'Product', 'ProductGroup', 'IndividualProduct', 'ProductModel'}
+OFFER_KEYS = {'price': 'price', 'lowPrice': 'price', 'priceCurrency': 'currency', 'availability': 'availability'}
+META_KEYS = {
+    'og:title': 'name',
+    'og:description': 'description',
+    'og:image': 'image_url',
+    'product:price:amount': 'price',
+    'og:price:amount': 'price',
+    'product:price:currency': 'currency',
+    'og:price:currency': 'currency',
+    'product:availability': 'availability',
+    'product:retailer_item_id': 'sku',
+}
+PRICE_NUMBER = re.compile(r'\d[\d.,\s]*')
+
+
+def parse_price(value) -> Optional[float]:
+    """12.99, '12,99 €', '1.299,00', '1,299.00' -> float; None if there is no number."""
+    if isinstance(value, (int, float)):
+        return float(value)
+    match = PRICE_NUMBER.search(str(value or ''))
+    if not match:
+        return None
+    number = re.sub(r'\s', '', match.group()).rstrip('.,')
+    last = max(number.rfind('.'), number.rfind(','))
+    if last >= 0:
+        whole, fraction = number[:last], number[last + 1:]
+        # A lone separator before three digits groups thousands ('1.299'), as does a repeated one
+        thousands_only = number.count(number[last]) > 1 or (
+            whole == re.sub('[.,]', '', whole) and len(fraction) == 3 and whole != '0'
+        )
+        number = re.sub('[.,]', '', number) if thousands_only else re.sub('[.,]', '', whole) + '.' + fraction
+    try:
+        return float(number)
+    except ValueError:
+        return None
+
+
+def _text(value):
+    """First string of a JSON-LD value (str, list, or an object with url/name/@id)."""
+    if isinstance(value, list):
+        value = value[0] if value else None
+    if isinstance(value, dict):
+        value = value.get('url') or value.get('contentUrl') or value.get('name') or value.get('@id')
+    if value is None:
+        return None
+    return str(value).strip() or None
+
+
+def _types(node):
+    types = node.get('@type', ())
+    return {t.rsplit('/', 1)[-1] for t in ([types] if isinstance(types, str) else types)}
+
+
+def _json_ld_products(data):
+    """Product objects of a JSON-LD document (top level, lists, @graph, mainEntity), not of its ItemLists."""
+    if isinstance(data, list):
+        for entry in data:
+            yield from _json_ld_products(entry)
+    elif isinstance(data, dict):
+        if _types(data) & PRODUCT_TYPES:
+            yield data
+        for key in ('@graph', 'mainEntity'):
+            if key in data:
+                yield from _json_ld_products(data[key])
+
+
+def _main_product(candidates):
+    """Fields of the page's product: the first candidate with a name and a price, else with a name."""
+    candidates = [found for found in candidates if found]
+    for wanted in (('name', 'price'), ('name',), ()):
+        for found in candidates:
+            if all(found.get(field) not in (None, '') for field in wanted):
+                return found
+    return {}
+
+
+def _from_json_ld(product):
+    found = {
+        'name': _text(product.get('name')),
+        'description': _text(product.get('description')),
+        'image_url': _text(product.get('image')),
+        'sku': _text(product.get('sku') or product.get('mpn') or product.get('gtin13') or product.get('productID')),
+    }
+    offers = product.get('offers') or {}
+    if isinstance(offers, list):
+        offers = offers[0] if offers else {}
+    if isinstance(offers, dict):
+        if 'priceSpecification' in offers and 'price' not in offers:
+            spec = offers['priceSpecification']
+            offers = {**offers, **(spec[0] if isinstance(spec, list) and spec else spec or {})}
+        for key, field in OFFER_KEYS.items():
+            if offers.get(key) not in (None, '') and not found.get(field):
+                found[field] = offers[key] if field == 'price' else _text(offers[key])
+    variants = product.get('hasVariant')
+    if not found.get('price') and isinstance(variants, list) and variants:
+        variant = _from_json_ld(variants[0])
+        found.update({k: v for k, v in variant.items() if v and not found.get(k)})
+    return found
+
+
+def _is_product_scope(element):
+    return element.get('itemscope') is not None and 'schema.org/Product' in (element.get('itemtype') or '')
+
+
+def _from_microdata(scope):
+    found = {}
+    for element in scope.iter(etree.Element):
+        prop = element.get('itemprop')
+        if not prop:
+            continue
+        # Properties of a product nested in this one (isRelatedTo, isSimilarTo) aren't its own
+        owner = element.getparent() if _is_product_scope(element) else element
+        while owner is not None and owner is not scope and not _is_product_scope(owner):
+            owner = owner.getparent()
+        if owner is not scope:
+            continue
+        field = {'name': 'name', 'description': 'description', 'image': 'image_url', 'sku': 'sku',
+                 'price': 'price', 'lowPrice': 'price', 'priceCurrency': 'currency',
+                 'availability': 'availability'}.get(prop)
+        if not field or found.get(field):
+            continue
+        value = (element.get('content') or element.get('href') or element.get('src')
+                 or element.get('value') or element.text_content())
+        if value and value.strip():
+            found[field] = value.strip()
+    return found
+
+
+def extract_structured(html, base_url=None) -> dict:
+    """All product fields found in `html`, plus `source` naming the syntaxes that provided them.
+
+    `html` is markup or an already parsed lxml tree, such as `response.selector.root`.
+    """
+    if isinstance(html, (str, bytes)):
+        try:
+            tree = lxml.html.fromstring(html)
+        except (etree.ParserError, ValueError):
+            return {}
+    else:
+        tree = html
+
+    json_ld_products, microdata_products, meta = [], [], {}
+    for element in tree.iter(etree.Element):
+        tag = element.tag
+        if tag == 'script' and 'ld+json' in (element.get('type') or ''):
+            try:
+                data = json.loads(element.text or '', strict=False)
+            except ValueError:
+                continue
+            json_ld_products.extend(_from_json_ld(product) for product in _json_ld_products(data))
+        elif tag == 'meta':
+            field = META_KEYS.get(element.get('property') or element.get('name') or '')
+            if field and element.get('content') and not meta.get(field):
+                meta[field] = element.get('content').strip()
+        if _is_product_scope(element):
+            parent = element.getparent()
+            while parent is not None and not _is_product_scope(parent):
+                parent = parent.getparent()
+            if parent is None:  # Not a related product inside another one
+                microdata_products.append(_from_microdata(element))
+
+    json_ld, microdata = _main_product(json_ld_products), _main_product(microdata_products)
+    found, sources = {}, []
+    for source, fields in (('json-ld', json_ld), ('microdata', microdata), ('opengraph', meta)):
+        added = {field: fields[field] for field in FIELDS if fields.get(field) and not found.get(field)}
+        if added:
+            found.update(added)
+            sources.append(source)
+    if 'price' in found:
+        found['price'] = parse_price(found['price'])
+    if found.get('availability'):
+        found['availability'] = found['availability'].rsplit('/', 1)[-1]
+    if found.get('image_url') and base_url:
+        found['image_url'] = urljoin(base_url, found['image_url'])
+    if found:
+        found['source'] = '+'.join(sources)
+    return found
+
+
+def extract_product(response) -> Optional[dict]:
+    """Structured product data of a product page, or None without both a name and a price."""
+    found = extract_structured(response.selector.root, base_url=response.url)
+    if not found.get('name') or found.get('price') is None:
+        return None
+    return found
+
+
+def structured_item(response, store_id) -> Optional[ProductItem]:
+    """A ProductItem straight from the page's structured data (the spiders' fast path)."""
+    found = extract_product(response)
+    if found is None:
+        return None
+    logger.debug(f"Structured data ({found['source']}) for {response.url}")
+    return ProductItem(
+        name=found['name'],
+        price=found['price'],
+        url=response.url,
+        description=found.get('description') or '',
+        image_url=found.get('image_url'),
+        store_id=store_id,
+    )
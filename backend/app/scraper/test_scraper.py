@@ -21,7 +21,8 @@ sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 from store_scrapers.config import config
 from store_scrapers.items import ProductItem
 from store_scrapers.pipelines import DatabasePipeline
-from sqlalchemy import create_engine, text
+from app.db.engines import get_engine  # importable once the pipelines module set up sys.path
+from sqlalchemy import text
 from sqlalchemy.orm import sessionmaker
 
 
@@ -58,7 +59,7 @@ def test_database_connection():
     """Test database connection."""
     print("🔍 Testing database connection...")
     try:
-        engine = create_engine(config.DATABASE_URL, echo=False)
+        engine = get_engine("scraper")
         with engine.connect() as conn:
             result = conn.execute(text("SELECT 1"))
             assert result.scalar() == 1
@@ -73,7 +74,7 @@ def test_store_exists():
     """Test if the Bricodepot store exists in database."""
     print("🔍 Testing if Bricodepot store exists...")
     try:
-        engine = create_engine(config.DATABASE_URL, echo=False)
+        engine = get_engine("scraper")
         with engine.connect() as conn:
             result = conn.execute(
                 text("SELECT name FROM stores WHERE id = :store_id"),
@@ -203,7 +204,7 @@ def cleanup_test_data():
     """Clean up test data."""
     print("🧹 Cleaning up test data...")
     try:
-        engine = create_engine(config.DATABASE_URL, echo=False)
+        engine = get_engine("scraper")
         with engine.connect() as conn:
             result = conn.execute(
                 text("DELETE FROM products WHERE name LIKE 'TEST PRODUCT%'")
@@ -0,0 +1,61 @@
+import os
+import subprocess
+import sys
+from types import SimpleNamespace
+
+import pytest
+from scrapy.settings import Settings
+
+from app.scraper.store_scrapers.browser_pool import ContextPool, ResourceBlocker
+
+BENCH = os.path.join(os.path.dirname(__file__), "..", "..", "..", "scripts", "benchmarks", "bench_playwright_pool.py")
+
+
+def _request(url, resource_type="script", navigation=False):
+    return SimpleNamespace(url=url, resource_type=resource_type, is_navigation_request=lambda: navigation)
+
+
+def test_blocker_aborts_heavy_resources_and_trackers():
+    spider = SimpleNamespace(allowed_domains=["brico.example"])
+    blocker = ResourceBlocker.from_spider(spider, Settings())
+    assert blocker(_request("https://brico.example/a.png", "image"))
+    assert blocker(_request("https://brico.example/f.woff2", "font"))
+    assert blocker(_request("https://www.google-analytics.com/analytics.js"))
+    assert not blocker(_request("https://brico.example/app.js"))
+    assert not blocker(_request("https://search.algolia.net/query", "xhr"))  # Third parties allowed by default
+    assert not blocker(_request("https://brico.example/", "document", navigation=True))
+
+    spider.block_third_party = True
+    spider.blocked_resource_types = ["media"]
+    blocker = ResourceBlocker.from_spider(spider, Settings())
+    assert blocker(_request("https://search.algolia.net/query", "xhr"))
+    assert not blocker(_request("https://cdn.brico.example/a.png", "image"))
+
+
+def test_contexts_are_recycled_once_idle():
+    pool = ContextPool(size=2, recycle_after=3)
+    first = [pool.acquire() for _ in range(4)]
+    assert first == ["pool-0-0", "pool-1-0", "pool-0-0", "pool-1-0"]
+    # Its third page retires pool-0-0; the next page goes to a fresh context in that slot
+    assert pool.acquire() == "pool-0-0" and pool.recycled == 1
+    assert pool.acquire() == "pool-0-1"
+    assert [pool.release("pool-0-0") for _ in range(3)] == [False, False, True]
+    assert pool.release("pool-0-1") is False
+
+
+def _chromium_installed():
+    try:
+        from playwright.sync_api import sync_playwright
+        with sync_playwright() as playwright:
+            return os.path.exists(playwright.chromium.executable_path)
+    except Exception:
+        return False
+
+
+@pytest.mark.skipif(not _chromium_installed(), reason="Playwright Chromium not installed")
+def test_pool_renders_fixture_pages_with_blocking():
+    output = subprocess.run(
+        [sys.executable, BENCH, "--pages", "8", "--latency-ms", "10", "--recycle", "3"],
+        capture_output=True, text=True, check=True, timeout=300,
+    ).stdout
+    assert "✅ context pool" in output
@@ -0,0 +1,68 @@
+import asyncio
+import logging
+from collections import Counter
+from types import SimpleNamespace
+
+from scrapy.settings import Settings
+from scrapy.signalmanager import SignalManager
+
+from app.db.blob_refs import Blob
+from app.db.models import Product, Store, StoreType, Tag
+from app.scraper.store_scrapers import pipelines
+from app.scraper.store_scrapers.items import ProductItem
+
+
+class Stats(Counter):
+    def inc_value(self, key, count=1):
+        self[key] += count
+
+    def set_value(self, key, value):
+        self[key] = value
+
+
+async def _crawl(items, batch_size=2):
+    """One crawl: every item through a fresh DatabasePipeline."""
+    spider = SimpleNamespace(
+        crawler=SimpleNamespace(settings=Settings({"DB_PIPELINE_BATCH_SIZE": batch_size}), stats=Stats(),
+                                signals=SignalManager()),
+        logger=logging.getLogger("test"),
+    )
+    pipeline = pipelines.DatabasePipeline()
+    await pipeline.open_spider(spider)
+    for item in items:
+        await pipeline.process_item(item, spider)
+    await pipeline.close_spider(spider)
+    return spider.crawler.stats
+
+
+def test_items_are_upserted_in_batches(db, monkeypatch):
+    monkeypatch.setattr(pipelines, "get_engine", lambda role: db.get_bind())
+    store = Store(name="Brico", type=StoreType.physical)
+    db.add_all([store, Tag(name="in-store")])
+    db.commit()
+
+    def item(n, **fields):
+        return ProductItem(**{"name": f"P{n}", "price": "9.99", "url": f"https://shop/p/{n}", "store_id": store.id,
+                              **fields})
+
+    stats = asyncio.run(_crawl([item(n, image_sha256="a" * 64 if n < 2 else None) for n in range(5)]
+                               + [ProductItem(name="Ghost", url="https://shop/g", store_id=999)]))
+    assert stats["pipeline/items_created"] == 5 and stats["pipeline/batches"] == 3
+    assert stats["pipeline/items_dropped"] == 1
+    products = db.query(Product).order_by(Product.id).all()
+    assert [p.name for p in products] == ["P0", "P1", "P2", "P3", "P4"]
+    assert all([t.name for t in p.tags] == ["in-store"] for p in products)
+    assert db.get(Blob, "a" * 64).refcount == 2
+
+    # Re-crawl: one renamed, one new image, one page seen twice, the rest unchanged
+    stats = asyncio.run(_crawl([
+        item(0, image_sha256="b" * 64), item(1, name="Renamed"), item(2), item(2), item(3), item(4), item(5),
+    ], batch_size=100))
+    counts = (stats["pipeline/items_created"], stats["pipeline/items_updated"], stats["pipeline/items_unchanged"])
+    assert counts == (1, 2, 3)
+    assert stats["pipeline/items_duplicate"] == 1
+    db.expire_all()
+    renamed = db.query(Product).filter(Product.url == "https://shop/p/1").one()
+    assert renamed.name == "Renamed" and renamed.image_sha256 == "a" * 64  # No image in the item keeps the old one
+    assert db.get(Blob, "a" * 64).refcount == 1 and db.get(Blob, "b" * 64).refcount == 1
+    assert db.query(Product).count() == 6
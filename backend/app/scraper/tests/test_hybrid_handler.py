@@ -0,0 +1,81 @@
+import asyncio
+from collections import Counter
+from types import SimpleNamespace
+
+from scrapy import Request
+from scrapy.http import HtmlResponse, TextResponse
+from scrapy.settings import Settings
+
+from app.scraper.store_scrapers.hybrid_handler import HybridDownloadHandler, needs_js
+
+SHELL = b'<html><body><div id="app"></div><script src="/app.js"></script></body></html>'
+LISTING = b'<html><body><div class="product-item"><a href="/p/1">Drill</a></div></body></html>'
+JSON_LD = b'<html><head><script type="application/ld+json">{"@type": "Product"}</script></head><body></body></html>'
+
+
+class Stats(Counter):
+    def inc_value(self, key, count=1):
+        self[key] += count
+
+    def set_value(self, key, value):
+        self[key] = value
+
+
+class FakeHandler(HybridDownloadHandler):
+    """The routing of HybridDownloadHandler, with canned HTTP pages and a fake browser."""
+
+    def __init__(self, pages, settings=None, spider=None):
+        self._init_hybrid(SimpleNamespace(settings=Settings(settings or {}), stats=Stats(), spider=spider))
+        self.pages = pages
+        self.rendered = []
+
+    async def _http(self, request, spider):
+        return HtmlResponse(request.url, body=self.pages[request.url], request=request)
+
+    async def _browser(self, request, spider):
+        self.rendered.append(request.url)
+        return HtmlResponse(request.url, body=LISTING, request=request)
+
+
+def _html(body, status=200):
+    return HtmlResponse("https://shop.example/", body=body, status=status)
+
+
+def test_needs_js():
+    assert needs_js(_html(SHELL)) == "shell"
+    assert needs_js(_html(JSON_LD)) is None
+    assert needs_js(_html(LISTING), selectors=[".product-item"]) is None
+    assert needs_js(_html(SHELL), selectors=[".product-item"]) == "selectors"
+    assert needs_js(_html(LISTING, status=403)) == "status"
+    sitemap = TextResponse("https://shop.example/sitemap.xml", body=b"<urlset/>",
+                           headers={"Content-Type": "application/xml"})
+    assert needs_js(sitemap) is None
+
+
+def test_only_pages_that_need_js_are_rendered():
+    pages = {"https://shop.example/c/1": LISTING, "https://shop.example/c/2": SHELL,
+             "https://shop.example/plain": SHELL}
+    handler = FakeHandler(pages, {"HYBRID_MIN_TEXT_LENGTH": 1})
+
+    def fetch(url, **meta):
+        return asyncio.run(handler.download_request(Request(url, meta=meta)))
+
+    assert b"Drill" in fetch("https://shop.example/c/1", playwright=True).body
+    assert b"Drill" in fetch("https://shop.example/c/2", playwright=True).body
+    fetch("https://shop.example/plain")  # Not a Playwright request: never rendered
+    fetch("https://shop.example/c/2", playwright=True, playwright_include_page=True)
+    assert handler.rendered == ["https://shop.example/c/2", "https://shop.example/c/2"]
+    assert handler.stats["hybrid/http"] == 1 and handler.stats["hybrid/escalated/shell"] == 1
+    assert handler.stats["hybrid/browser"] == 1 and handler.stats["hybrid/escalated_ratio"] == 0.5
+
+
+def test_callbacks_that_always_escalate_skip_the_http_probe():
+    spider = SimpleNamespace(render_selectors=[".product-item"])
+    handler = FakeHandler({"https://shop.example/app": SHELL}, {"HYBRID_LEARN_AFTER": 3}, spider=spider)
+    for _ in range(5):
+        asyncio.run(handler.download_request(Request("https://shop.example/app", meta={"playwright": True})))
+    assert handler.stats["hybrid/escalated/selectors"] == 3 and handler.stats["hybrid/browser"] == 2
+
+    spider.render_mode = "never"
+    asyncio.run(handler.download_request(Request("https://shop.example/app", meta={"playwright": True})))
+    assert len(handler.rendered) == 5
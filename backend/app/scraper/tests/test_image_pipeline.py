@@ -0,0 +1,101 @@
+import asyncio
+import logging
+import threading
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+
+import pytest
+from scrapy.settings import Settings
+
+from app.scraper.store_scrapers import pipelines
+from app.scraper.store_scrapers.items import ProductItem
+from app.storage.blobs import blob_key
+
+IMAGE = b"\x89PNG shared placeholder"
+
+
+class FixtureImageServer(BaseHTTPRequestHandler):
+    """Serves IMAGE with an ETag; /flaky fails once with a 503 first."""
+    requests = []
+    failures = Counter()
+
+    def do_GET(self):
+        type(self).requests.append((self.path, self.headers.get("If-None-Match")))
+        if self.path == "/flaky.png" and not type(self).failures[self.path]:
+            type(self).failures[self.path] += 1
+            self.send_response(503)
+            self.send_header("Retry-After", "0")
+            self.end_headers()
+            return
+        if self.headers.get("If-None-Match") == '"v1"':
+            self.send_response(304)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "image/png")
+        self.send_header("ETag", '"v1"')
+        self.end_headers()
+        self.wfile.write(IMAGE)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def image_server():
+    FixtureImageServer.requests = []
+    FixtureImageServer.failures = Counter()
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FixtureImageServer)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+
+
+class Stats(Counter):
+    def inc_value(self, key, count=1):
+        self[key] += count
+
+    def set_value(self, key, value):
+        self[key] = value
+
+
+def _spider():
+    settings = Settings({"IMAGE_DOWNLOAD_BACKOFF": 0})
+    return SimpleNamespace(crawler=SimpleNamespace(settings=settings, stats=Stats()), logger=logging.getLogger("test"))
+
+
+async def _crawl(urls):
+    """One crawl: every item through a fresh ImageDownloadPipeline, concurrently."""
+    spider = _spider()
+    pipeline = pipelines.ImageDownloadPipeline()
+    await pipeline.open_spider(spider)
+    items = await asyncio.gather(
+        *(pipeline.process_item(ProductItem(name=f"P{i}", image_url=url), spider) for i, url in enumerate(urls))
+    )
+    await pipeline.close_spider(spider)
+    return items, spider.crawler.stats
+
+
+def test_images_download_once_per_url_and_revalidate_next_crawl(db, image_server, monkeypatch):
+    monkeypatch.setattr(pipelines, "get_engine", lambda role: db.get_bind())
+    url = f"{image_server}/placeholder.png"
+
+    items, stats = asyncio.run(_crawl([url] * 5 + [f"{image_server}/flaky.png"]))
+    assert {item["image_sha256"] for item in items} == {blob_key(IMAGE)}
+    assert FixtureImageServer.requests.count(("/placeholder.png", None)) == 1
+    assert stats["images_deduplicated"] >= 4 and stats["images_download_retries"] == 1
+
+    # The next crawl asks "changed since?" and reuses the stored blob on a 304
+    items, stats = asyncio.run(_crawl([url]))
+    assert FixtureImageServer.requests[-1] == ("/placeholder.png", '"v1"')
+    assert items[0]["image_sha256"] == blob_key(IMAGE)
+    assert items[0]["image_filename"] == "placeholder.png"
+    assert stats["images_not_modified"] == 1 and not stats["images_downloaded"]
+
+
+def test_failed_downloads_keep_the_item(db, monkeypatch):
+    monkeypatch.setattr(pipelines, "get_engine", lambda role: db.get_bind())
+    items, stats = asyncio.run(_crawl(["http://127.0.0.1:9/missing.png"]))
+    assert items[0]["name"] == "P0" and "image_sha256" not in items[0]
+    assert stats["images_download_failed"] == 1
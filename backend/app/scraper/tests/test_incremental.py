@@ -0,0 +1,188 @@
+import asyncio
+import gzip
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from scrapy.http import HtmlResponse, Request, Response, TextResponse, XmlResponse
+from scrapy.utils.test import get_crawler
+
+from app.db.models import CrawlSweep, Product, Store, StoreType
+from app.scraper.store_scrapers import incremental, pipelines
+from app.scraper.store_scrapers.spiders.mengual_bulk import MengualBulkSpider
+
+PRODUCT = """<html><head>
+<meta property="og:title" content="{name}">
+<meta property="product:price:amount" content="{price}">
+<script type="application/ld+json">{{"@type": "Product", "name": "{name}",
+  "offers": {{"price": "{price}", "priceCurrency": "EUR"}}}}</script>
+</head><body><h1>{name}</h1><p>Visitas: {visits}</p></body></html>"""
+
+
+def _urlset(entries):
+    urls = "".join(f"<url><loc>{loc}</loc><lastmod>{lastmod}</lastmod></url>" for loc, lastmod in entries)
+    return f'<?xml version="1.0"?><urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">{urls}</urlset>'
+
+
+INDEX = """<?xml version="1.0"?><sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
+<sitemap><loc>https://www.mengual.com/sitemap-products.xml.gz</loc></sitemap></sitemapindex>"""
+
+
+@pytest.fixture
+def spider_for(db, monkeypatch):
+    """Build a mengual_bulk spider over the test database, like a new run of it."""
+    monkeypatch.setattr(incremental, "get_engine", lambda role: db.get_bind())
+    monkeypatch.setattr(pipelines, "get_engine", lambda role: db.get_bind())
+    db.add(Store(id=MengualBulkSpider.store_id, name="Mengual", type=StoreType.online))
+    db.commit()
+
+    def build(**settings):
+        crawler = get_crawler(MengualBulkSpider, {"INCREMENTAL_LEDGER_BATCH": 1000, **settings})
+        crawler.spider = MengualBulkSpider.from_crawler(crawler)
+        return crawler.spider
+
+    return build
+
+
+def _sitemap(spider, url, body):
+    """parse_sitemap on a gzipped (binary) sitemap."""
+    return list(spider.parse_sitemap(Response(url, body=gzip.compress(body.encode()))))
+
+
+def _product(request, name="Tirador Kimera", price="4.95", visits=1, status=200, headers=None):
+    response = HtmlResponse(request.url, status=status, headers=headers, request=request, encoding="utf-8",
+                            body=PRODUCT.format(name=name, price=price, visits=visits).encode())
+
+    async def collect():
+        return [item async for item in request.callback(response)]
+
+    return asyncio.run(collect())
+
+
+def _items(requests, **page):
+    return [item for request in requests for item in _product(request, **page)]
+
+
+def _save(spider, items):
+    """The items through the crawl's DatabasePipeline."""
+    async def run():
+        pipeline = pipelines.DatabasePipeline()
+        await pipeline.open_spider(spider)
+        for item in items:
+            await pipeline.process_item(item, spider)
+        await pipeline.close_spider(spider)
+
+    asyncio.run(run())
+    return items
+
+
+def _stats(spider):
+    return {key: value for key, value in spider.crawler.stats.get_stats().items() if key.startswith("incremental/")}
+
+
+def test_sitemap_index_gzip_and_skipped_vs_fetched(spider_for):
+    entries = [
+        ("https://www.mengual.com/tirador-kimera", "2026-10-01"),
+        ("https://www.mengual.com/cazoleta-rectangular", "2026-10-01"),
+        ("https://www.mengual.com/bisagras", "2026-10-01"),  # A category
+        ("https://www.mengual.com/terminos-y-condiciones", "2026-10-01"),
+    ]
+    spider = spider_for()
+    follow = spider.parse_sitemap(XmlResponse("https://www.mengual.com/sitemap.xml", body=INDEX.encode()))
+    assert [request.url for request in follow] == ["https://www.mengual.com/sitemap-products.xml.gz"]
+
+    requests = _sitemap(spider, "https://www.mengual.com/sitemap-products.xml.gz", _urlset(entries))
+    assert [request.url for request in requests] == [url for url, _ in entries[:2]]
+    items = _save(spider, _items(requests))
+    assert [item["name"] for item in items] == ["Tirador Kimera", "Tirador Kimera"]
+    spider.close_ledger(spider, "finished")
+    assert _stats(spider)["incremental/fetched/new"] == 2 and _stats(spider)["incremental/parsed"] == 2
+
+    # Next run: one product's lastmod moved, the other is skipped without a request
+    entries[1] = ("https://www.mengual.com/cazoleta-rectangular", "2026-10-15")
+    spider = spider_for()
+    requests = _sitemap(spider, "https://www.mengual.com/sitemap-products.xml.gz", _urlset(entries))
+    assert [request.url for request in requests] == ["https://www.mengual.com/cazoleta-rectangular"]
+    assert _save(spider, _items(requests, price="3.50"))[0]["price"] == 3.5
+    spider.close_ledger(spider, "finished")
+    assert _stats(spider) == {
+        "incremental/sitemaps": 1, "incremental/sitemap_urls": 2,
+        "incremental/skipped": 1, "incremental/skipped/lastmod": 1,
+        "incremental/fetched": 1, "incremental/fetched/changed": 1,
+        "incremental/parsed": 1, "incremental/skipped_ratio": 0.5,
+    }
+
+
+def test_pages_without_lastmod_revalidate_and_unchanged_pages_skip_parsing(spider_for):
+    url = "https://www.mengual.com/tirador-kimera"
+    urlset = f'<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9"><url><loc>{url}</loc></url></urlset>'
+    spider = spider_for()
+    [request] = _sitemap(spider, "https://www.mengual.com/sitemap.xml.gz", urlset)
+    _save(spider, _product(request, visits=1, headers={"ETag": '"v1"'}))
+    spider.ledger.flush()
+
+    # Fetched recently: skipped; once due, revalidated with the stored validators
+    assert _sitemap(spider_for(), "https://www.mengual.com/sitemap.xml.gz", urlset) == []
+    spider = spider_for(INCREMENTAL_REVALIDATE_DAYS=0)
+    [request] = _sitemap(spider, "https://www.mengual.com/sitemap.xml.gz", urlset)
+    assert request.headers["If-None-Match"] == b'"v1"' and request.meta["handle_httpstatus_list"] == [304]
+
+    assert _product(request, status=304) == []
+    # Same product data, other page noise: recorded but not parsed again
+    assert _product(request, visits=2) == []
+    stats = _stats(spider)
+    assert stats["incremental/fetched/revalidate"] == 1
+    assert stats["incremental/not_modified"] == 1 and stats["incremental/unchanged"] == 1
+    assert "incremental/parsed" not in stats
+
+
+def test_pages_are_ledgered_only_once_their_products_are_saved(spider_for, db):
+    entries = [("https://www.mengual.com/tirador-kimera", "2026-10-01"),
+               ("https://www.mengual.com/cazoleta-rectangular", "2026-10-01")]
+    spider = spider_for()
+    kimera, cazoleta = _sitemap(spider, "https://www.mengual.com/sitemap.xml.gz", _urlset(entries))
+
+    # The crawl dies before the pipeline writes the first page's product
+    _product(kimera)
+    spider.parse_product = lambda response: 1 / 0
+    with pytest.raises(ZeroDivisionError):
+        _product(cazoleta)
+    spider.close_ledger(spider, "shutdown")
+    assert db.query(Product).count() == 0 and _stats(spider)["incremental/unsaved"] == 1
+
+    spider = spider_for()
+    kimera, cazoleta = _sitemap(spider, "https://www.mengual.com/sitemap.xml.gz", _urlset(entries))
+    assert _stats(spider)["incremental/fetched/new"] == 2  # Neither was ledgered
+    _save(spider, _product(kimera) + _product(cazoleta, name="Cazoleta"))
+    spider.close_ledger(spider, "finished")
+    assert _sitemap(spider_for(), "https://www.mengual.com/sitemap.xml.gz", _urlset(entries)) == []
+
+
+def test_full_sweep_runs_when_due(spider_for, db):
+    def first_request(spider):
+        async def first():
+            async for request in spider.start():
+                return request
+
+        return asyncio.run(first())
+
+    spider = spider_for()
+    assert first_request(spider).url == MengualBulkSpider.category_urls[0]  # Never swept
+    spider.close_ledger(spider, "shutdown")
+    assert db.get(CrawlSweep, "mengual_bulk") is None  # An interrupted sweep doesn't count
+
+    spider = spider_for()
+    first_request(spider)
+    spider.close_ledger(spider, "finished")
+    assert first_request(spider_for()).url == "https://www.mengual.com/sitemap.xml"
+    assert first_request(spider_for(INCREMENTAL_CRAWL_MODE="full")).url == MengualBulkSpider.category_urls[0]
+
+    db.get(CrawlSweep, "mengual_bulk").swept_at = datetime.now(timezone.utc) - timedelta(days=8)
+    db.commit()
+    assert first_request(spider_for()).url == MengualBulkSpider.category_urls[0]
+
+
+def test_robots_txt_lists_the_sitemaps(spider_for):
+    robots = TextResponse("https://www.bricodepot.es/robots.txt", encoding="utf-8",
+                          body=b"User-agent: *\nSitemap: https://www.bricodepot.es/sitemap.xml\n")
+    [request] = spider_for().parse_sitemap(robots)
+    assert request.url == "https://www.bricodepot.es/sitemap.xml" and isinstance(request, Request)
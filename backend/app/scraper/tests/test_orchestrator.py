@@ -0,0 +1,181 @@
+import asyncio
+import json
+import os
+import signal
+import sys
+
+import psutil
+import pytest
+
+from app.scraper.run_spider import parse_settings
+from app.scraper.store_scrapers.orchestrator import Job, Limits, Orchestrator, SpiderRun, load_schedule, report
+
+
+def _schedule(tmp_path, spiders, **extra):
+    path = tmp_path / "schedule.json"
+    path.write_text(json.dumps({"spiders": spiders, **extra}))
+    return path
+
+
+def test_schedule_applies_domain_budgets_and_history(tmp_path):
+    path = _schedule(
+        tmp_path,
+        ["mengual_bulk", {"name": "bricodepot", "browser": True, "memory_mb": 1536}],
+        limits={"processes": 3},
+        domains={"mengual.com": {"concurrency": 4, "delay": 0.5}},
+    )
+    domains = {"mengual_bulk": "mengual.com", "bricodepot": "bricodepot.es"}
+    limits, jobs = load_schedule(path, history={"bricodepot": 3600}, domains=domains)
+
+    assert limits == Limits(processes=3)
+    mengual, brico = jobs
+    assert (mengual.domain, mengual.concurrency, mengual.delay) == ("mengual.com", 4, 0.5)
+    assert (brico.browser, brico.memory_mb, brico.delay, brico.expected_seconds) == (True, 1536, 2.0, 3600)
+    # The domain budget beats the spider's own custom_settings in its process
+    assert brico.scrapy_settings()["CONCURRENT_REQUESTS_PER_DOMAIN"] == 2
+    assert brico.scrapy_settings()["MEMUSAGE_LIMIT_MB"] == 1536
+
+    _, jobs = load_schedule(path, spiders=["bricodepot"], domains=domains)
+    assert [job.spider for job in jobs] == ["bricodepot"]
+
+
+def test_run_spider_set_values_are_json_decoded():
+    assert parse_settings(["DOWNLOAD_DELAY=0.5", "ITEM_PIPELINES={}", "LOG_LEVEL=INFO"]) == {
+        "DOWNLOAD_DELAY": 0.5, "ITEM_PIPELINES": {}, "LOG_LEVEL": "INFO",
+    }
+
+
+def _run(jobs, limits, memory_mb=64_000):
+    """Run `jobs` with fake spiders lasting expected_seconds / 100; record what ran concurrently."""
+    running, overlaps = set(), []
+
+    async def launch(job):
+        running.add(job.spider)
+        overlaps.append(set(running))
+        await asyncio.sleep(job.expected_seconds / 100)
+        running.discard(job.spider)
+        return SpiderRun(job, 0, job.expected_seconds, {"finish_reason": "finished", "item_scraped_count": 10})
+
+    orchestrator = Orchestrator(jobs, limits, "unused", launch=launch, memory_available=lambda: memory_mb)
+    runs, wall = asyncio.run(orchestrator.run())
+    return runs, wall, overlaps
+
+
+def test_global_limits_are_never_exceeded():
+    jobs = [
+        Job("brico", "bricodepot.es", browser=True, expected_seconds=3),
+        Job("bauhaus", "bauhaus.es", browser=True, expected_seconds=3),
+        Job("leroy", "leroymerlin.es", browser=True, expected_seconds=3),
+        Job("mengual", "mengual.com", expected_seconds=2),
+        Job("mengual_bulk", "mengual.com", expected_seconds=2),
+        Job("rational", "rationalstock.es", memory_mb=4096, expected_seconds=1),
+    ]
+    limits = Limits(processes=3, browsers=2, db_connections=15, memory_mb=5120)
+    runs, _, overlaps = _run(jobs, limits)
+
+    assert len(runs) == len(jobs)
+    by_name = {job.spider: job for job in jobs}
+    for together in overlaps:
+        concurrent = [by_name[name] for name in together]
+        assert len(concurrent) <= 3
+        assert sum(job.browser for job in concurrent) <= 2
+        assert sum(job.db_connections for job in concurrent) <= 15
+        assert sum(job.memory_mb for job in concurrent) <= 5120 or len(concurrent) == 1
+        assert len({job.domain for job in concurrent}) == len(concurrent)
+
+
+def test_longest_spiders_start_first_and_short_ones_backfill():
+    jobs = [Job(f"short{n}", f"s{n}.es", expected_seconds=1) for n in range(4)]
+    jobs.append(Job("long", "long.es", expected_seconds=4))
+    runs, wall, overlaps = _run(jobs, Limits(processes=2))
+
+    assert overlaps[0] == {"long"}
+    # The short spiders run beside the long one instead of after it
+    assert all("long" in together for together in overlaps[1:4])
+    summary = report(runs, wall)
+    assert summary["spider_seconds"] == 8
+    assert summary["stats"]["item_scraped_count"] == 50
+    assert summary["spiders"][0]["spider"] == "long" and summary["failed"] == []
+
+
+def test_host_memory_holds_back_new_spiders_and_failures_are_reported():
+    jobs = [Job("a", "a.es", expected_seconds=2), Job("b", "b.es", expected_seconds=1)]
+    _, _, overlaps = _run(jobs, Limits(), memory_mb=512)
+    assert all(len(together) == 1 for together in overlaps)
+
+    summary = report([SpiderRun(jobs[0], 0, 1.0, {}), SpiderRun(jobs[1], 1, 1.0, {})], 2.0)
+    assert summary["failed"] == ["a", "b"]
+    assert summary["spiders"][0]["status"] == "failed (exit 0)"
+
+
+def test_a_spider_that_cant_be_launched_is_a_failed_run():
+    async def launch(job):
+        if job.spider == "broken":
+            raise FileNotFoundError("run_spider.py")
+        await asyncio.sleep(0.01)
+        return SpiderRun(job, 0, 0.01, {"finish_reason": "finished"})
+
+    jobs = [Job("broken", "a.es"), Job("fine", "b.es")]
+    runs, _ = asyncio.run(Orchestrator(jobs, Limits(), "unused", launch=launch).run())
+    summary = report(runs, 1.0)
+    assert summary["failed"] == ["broken"]
+    assert {row["spider"]: row["status"] for row in summary["spiders"]} == {
+        "broken": "failed (run_spider.py)", "fine": "finished",
+    }
+
+
+# A fake spider process: crawls until SIGTERM, then closes like Scrapy's graceful shutdown
+FAKE_SPIDER = """
+import json, signal, sys, time
+def shutdown(*args):
+    open(sys.argv[1], "w").write(json.dumps({"finish_reason": "shutdown"}))
+    sys.exit(0)
+signal.signal(signal.SIGTERM, shutdown)
+print("ready", flush=True)
+time.sleep(60)
+"""
+
+
+class FakeSpiderOrchestrator(Orchestrator):
+    def spider_command(self, job, stats_file):
+        return [sys.executable, "-c", FAKE_SPIDER, str(stats_file)]
+
+
+def _children_alive(orchestrator, pids):
+    pids.update(process.pid for process in orchestrator.processes.values())
+    return [pid for pid in pids if psutil.pid_exists(pid) and psutil.Process(pid).status() != psutil.STATUS_ZOMBIE]
+
+
+def test_sigterm_stops_the_running_spiders_and_starts_no_more(tmp_path):
+    jobs = [Job("a", "a.es", expected_seconds=3), Job("b", "b.es", expected_seconds=2), Job("c", "c.es")]
+    orchestrator = FakeSpiderOrchestrator(jobs, Limits(processes=2), tmp_path)
+    pids = set()
+
+    async def run():
+        loop = asyncio.get_running_loop()
+        loop.call_later(1.0, lambda: _children_alive(orchestrator, pids) and os.kill(os.getpid(), signal.SIGTERM))
+        return await orchestrator.run()
+
+    runs, wall = asyncio.run(run())
+    assert wall < 10 and len(pids) == 2
+    # Both closed gracefully on the orchestrator's SIGTERM
+    finished = sorted((run.job.spider, run.stats["finish_reason"]) for run in runs)
+    assert finished == [("a", "shutdown"), ("b", "shutdown")]
+    assert [job.spider for job in orchestrator.pending] == ["c"]
+    assert _children_alive(orchestrator, pids) == []
+
+
+def test_cancelling_the_schedule_reaps_its_spider_processes(tmp_path):
+    orchestrator = FakeSpiderOrchestrator([Job("a", "a.es"), Job("b", "b.es")], Limits(), tmp_path)
+    pids = set()
+
+    async def run():
+        task = asyncio.ensure_future(orchestrator.run())
+        await asyncio.sleep(1.0)
+        assert len(_children_alive(orchestrator, pids)) == 2
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(run())
+    assert _children_alive(orchestrator, pids) == [] and orchestrator.processes == {}
@@ -0,0 +1,38 @@
+import json
+import os
+
+from app.scraper.store_scrapers.replay import load_fixtures, regressions, replay, summarize
+
+SCRAPER_DIR = os.path.dirname(os.path.dirname(__file__))
+MANIFEST = os.path.join(SCRAPER_DIR, "tests", "fixtures", "parse_fixtures.json")
+
+
+def test_saved_pages_still_parse_to_recorded_yield():
+    with open(MANIFEST) as f:
+        entries = json.load(f)["fixtures"]
+    failures = []
+    for entry in entries:
+        failures += regressions(entry, summarize(replay(load_fixtures(entry, SCRAPER_DIR))))
+    assert failures == []
+
+
+def test_har_captures_replay_each_html_page(tmp_path):
+    with open(os.path.join(SCRAPER_DIR, "tests", "fixtures", "product_jsonld.html")) as f:
+        html = f.read()
+    har = {"log": {"entries": [
+        {"request": {"url": "https://www.tienda.example/p/1"},
+         "response": {"content": {"mimeType": "text/html; charset=utf-8", "text": html}}},
+        {"request": {"url": "https://www.tienda.example/app.js"},
+         "response": {"content": {"mimeType": "application/javascript", "text": "void 0"}}},
+    ]}}
+    (tmp_path / "crawl.har").write_text(json.dumps(har))
+
+    entry = {"spider": "bauhaus", "callback": "parse_product", "fixture": "crawl.har",
+             "expect": {"items": 1, "completeness": 1.0}}
+    fixtures = load_fixtures(entry, tmp_path)
+    assert [fixture.url for fixture in fixtures] == ["https://www.tienda.example/p/1"]
+    summary = summarize(replay(fixtures))
+    assert regressions(entry, summary) == []
+
+    entry["expect"]["items"] = 2
+    assert regressions(entry, summary) == ["bauhaus.parse_product on crawl.har: items 1 < expected 2"]
@@ -0,0 +1,130 @@
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+
+import pytest
+from scrapy import Request
+from scrapy.http import Response
+from scrapy.settings import Settings
+
+from app.scraper.store_scrapers.middleware import DomainBackoff, EnhancedRetryMiddleware, retry_after_seconds
+
+BENCH = os.path.join(os.path.dirname(__file__), "..", "..", "..", "scripts", "benchmarks", "bench_retry_backoff.py")
+
+
+class Stats(Counter):
+    def inc_value(self, key, count=1, start=0):
+        self[key] += count
+
+    def set_value(self, key, value):
+        self[key] = value
+
+
+def _middleware(**settings):
+    crawler = SimpleNamespace(settings=Settings({"RETRY_BACKOFF_BASE": 0.05, **settings}), stats=Stats())
+    crawler.spider = SimpleNamespace(crawler=crawler)
+    return EnhancedRetryMiddleware.from_crawler(crawler)
+
+
+def test_retry_after_and_decorrelated_jitter():
+    now = datetime.now(timezone.utc)
+    assert retry_after_seconds(Response("https://a.example", headers={"Retry-After": "7"})) == 7
+    date = format_datetime(now + timedelta(seconds=30), usegmt=True)
+    assert 28 <= retry_after_seconds(Response("https://a.example", headers={"Retry-After": date})) <= 30
+    assert retry_after_seconds(Response("https://a.example", headers={"Retry-After": "soon"})) is None
+
+    backoff = DomainBackoff(base=1.0, cap=10.0)
+    delays = [backoff.throttled() for _ in range(20)]
+    assert all(1.0 <= delay <= 10.0 for delay in delays)
+    assert backoff.throttled(retry_after=30) == 30  # Retry-After beats the jitter
+    assert 29 < backoff.remaining() <= 30
+
+
+def test_throttled_domain_waits_without_holding_up_others():
+    middleware = _middleware()
+    throttled = Request("https://slow.example/p/1")
+    response = Response(throttled.url, status=429, headers={"Retry-After": "1"}, request=throttled)
+
+    async def timed(coro):
+        started = time.monotonic()
+        result = await coro
+        return result, time.monotonic() - started
+
+    async def run():
+        retry_task = asyncio.ensure_future(timed(middleware.process_response(throttled, response)))
+        await asyncio.sleep(0)
+        other = await timed(middleware.process_request(Request("https://fast.example/p/1")))
+        same = await timed(middleware.process_request(Request("https://slow.example/p/2")))
+        return await retry_task, other, same
+
+    (retry, retry_wait), (_, other_wait), (_, same_wait) = asyncio.run(run())
+    assert isinstance(retry, Request) and retry.meta["retry_times"] == 1
+    assert retry_wait >= 1.0  # Retry-After honored
+    assert other_wait < 0.1  # Another domain goes straight through
+    assert same_wait >= 0.8  # The throttled domain is backed off as a whole
+    assert middleware.crawler.stats["retry/throttled/429"] == 1
+
+
+def test_too_long_retry_after_gives_up():
+    middleware = _middleware(RETRY_AFTER_MAX=5)
+    request = Request("https://slow.example/p/1")
+    response = Response(request.url, status=503, headers={"Retry-After": "3600"}, request=request)
+    assert asyncio.run(middleware.process_response(request, response)) is response
+
+
+class ThrottlingServer(BaseHTTPRequestHandler):
+    """/throttled/<n> answers 429 (Retry-After: 1) twice, then 200; /ok/<n> always 200."""
+    hits = defaultdict(list)
+
+    def do_GET(self):
+        type(self).hits[self.path].append(time.monotonic())
+        if self.path.startswith("/throttled/") and len(type(self).hits[self.path]) <= 2:
+            self.send_response(429)
+            self.send_header("Retry-After", "1")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        body = b"<html><body>ok</body></html>"
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def throttling_server():
+    ThrottlingServer.hits = defaultdict(list)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), ThrottlingServer)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server.server_port
+    server.shutdown()
+
+
+def test_crawl_against_429s_keeps_other_hosts_flowing(throttling_server):
+    output = subprocess.run(
+        [sys.executable, BENCH, "--mode", "async", "--port", str(throttling_server),
+         "--throttled", "2", "--healthy", "20"],
+        capture_output=True, text=True, check=True, timeout=120,
+    ).stdout
+    result = json.loads(output.strip().splitlines()[-1])
+
+    assert result["items"] == 22 and result["retries"] == 4
+    # Healthy pages don't wait for the throttled host's backoff
+    assert result["healthy_done_s"] < 1.0 <= result["throttled_done_s"]
+    for path, times in ThrottlingServer.hits.items():
+        if path.startswith("/throttled/"):
+            assert len(times) == 3
+            assert all(later - earlier >= 0.95 for earlier, later in zip(times, times[1:]))
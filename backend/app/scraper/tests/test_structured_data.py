@@ -0,0 +1,94 @@
+import os
+
+from scrapy.http import HtmlResponse
+
+from app.scraper.store_scrapers.structured_data import extract_product, extract_structured, parse_price, structured_item
+
+SCRAPER_DIR = os.path.dirname(os.path.dirname(__file__))
+
+JSON_LD = """<html><head>
+<meta property="og:title" content="OG title">
+<script type="application/ld+json">{"@context": "https://schema.org", "@graph": [
+  {"@type": "BreadcrumbList", "name": "Herramientas"},
+  {"@type": "Product", "name": "Taladro 18V", "sku": "TD-18", "image": ["/img/td18.jpg"],
+   "offers": [{"@type": "Offer", "priceSpecification": {"price": "89,95", "priceCurrency": "EUR"},
+               "availability": "https://schema.org/InStock"}]}
+]}</script>
+</head><body><h1>Taladro 18V</h1></body></html>"""
+
+MICRODATA = """<html><body>
+<div itemscope itemtype="https://schema.org/Product">
+  <h1 itemprop="name">Martillo carpintero</h1>
+  <img itemprop="image" src="https://cdn.example/martillo.jpg">
+  <div itemprop="offers" itemscope itemtype="https://schema.org/Offer">
+    <span itemprop="price" content="1299.00">1.299,00 €</span>
+    <meta itemprop="priceCurrency" content="EUR">
+    <link itemprop="availability" href="https://schema.org/OutOfStock">
+  </div>
+</div></body></html>"""
+
+
+def _response(body, url="https://brico.example/p/1"):
+    return HtmlResponse(url, body=body.encode(), encoding="utf-8")
+
+
+def test_parse_price():
+    assert [parse_price(v) for v in ("12,99 €", "1.299,00", "1,299.00", "1.299", 5, "gratis")] == [
+        12.99, 1299.0, 1299.0, 1299.0, 5.0, None
+    ]
+
+
+def test_json_ld_wins_and_other_syntaxes_fill_gaps():
+    product = extract_product(_response(JSON_LD))
+    assert product == {
+        "name": "Taladro 18V", "price": 89.95, "currency": "EUR", "sku": "TD-18",
+        "image_url": "https://brico.example/img/td18.jpg", "availability": "InStock", "source": "json-ld",
+    }
+
+    product = extract_product(_response(MICRODATA))
+    assert (product["name"], product["price"], product["availability"]) == ("Martillo carpintero", 1299.0, "OutOfStock")
+    assert product["source"] == "microdata"
+
+
+def test_pages_without_a_price_fall_back_to_the_spiders_selectors():
+    with open(os.path.join(SCRAPER_DIR, "debug_muebles.html"), "rb") as f:
+        body = f.read()
+    found = extract_structured(body, base_url="https://www.bricodepot.es/muebles")
+    assert found["source"] == "opengraph" and found["name"].startswith("Muebles de jardín")
+    assert extract_product(HtmlResponse("https://www.bricodepot.es/muebles", body=body)) is None
+    assert structured_item(_response("<html><body><h1>No data</h1></body></html>"), store_id=1) is None
+
+    item = structured_item(_response(JSON_LD), store_id=7)
+    assert (item["name"], item["price"], item["store_id"]) == ("Taladro 18V", 89.95, 7)
+
+
+def test_charset_from_the_content_type_header():
+    body = """<html><head><script type="application/ld+json">{"@type": "Product",
+      "name": "Taladro percutor Bricodépôt", "description": "Llave inglesa ñ",
+      "offers": {"price": "49.90"}}</script></head><body></body></html>""".encode()
+    response = HtmlResponse("https://brico.example/p/2", body=body,
+                            headers={"Content-Type": "text/html; charset=utf-8"})
+    product = extract_product(response)
+    assert (product["name"], product["description"]) == ("Taladro percutor Bricodépôt", "Llave inglesa ñ")
+
+
+def test_related_products_dont_lend_their_fields():
+    page = """<html><head>
+    <script type="application/ld+json">{"@type": "ItemList", "itemListElement": [
+      {"@type": "ListItem", "item": {"@type": "Product", "name": "Other thing", "offers": {"price": "999"}}}]}</script>
+    <script type="application/ld+json">{"@type": "Product", "name": "Main thing", "sku": "M-1"}</script>
+    </head><body>
+    <div itemscope itemtype="https://schema.org/Product"><span itemprop="name">Main thing</span>
+      <div itemprop="isRelatedTo" itemscope itemtype="https://schema.org/Product">
+        <span itemprop="name">Other thing</span><meta itemprop="price" content="999">
+      </div>
+    </div></body></html>"""
+    found = extract_structured(_response(page).selector.root)
+    assert (found["name"], found["sku"], found.get("price")) == ("Main thing", "M-1", None)
+    assert extract_product(_response(page)) is None
+
+    # Of several Product nodes, the one with an offer is the page's product
+    graph = """<script type="application/ld+json">{"@graph": [
+      {"@type": "Product", "name": "Accessory"},
+      {"@type": "Product", "name": "Main thing", "offers": {"price": "12,50"}}]}</script>"""
+    assert extract_product(_response(graph))["name"] == "Main thing"
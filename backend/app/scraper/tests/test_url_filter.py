@@ -0,0 +1,66 @@
+from collections import Counter
+from types import SimpleNamespace
+
+from scrapy import Request
+from scrapy.settings import Settings
+
+from app.db.models import Product, Store, StoreType
+from app.scraper.store_scrapers import url_filter
+from app.scraper.store_scrapers.url_filter import DatabaseUrlFilter, UrlBloomFilter
+
+
+class Stats(Counter):
+    def inc_value(self, key, count=1):
+        self[key] += count
+
+
+def test_bloom_filter_is_sized_for_its_capacity():
+    bloom = UrlBloomFilter(1_000_000, 0.001)
+    assert 1.7e6 < bloom.nbytes < 1.9e6
+
+    bloom = UrlBloomFilter(2000, 0.01)
+    for n in range(2000):
+        bloom.add(f"https://brico.example/p/{n}")
+    assert all(f"https://brico.example/p/{n}" in bloom for n in range(2000))
+    false_positives = sum(f"https://brico.example/new/{n}" in bloom for n in range(10000))
+    assert false_positives < 300
+
+
+def test_known_urls_are_filtered_locally_and_positives_confirmed_in_batches(db, monkeypatch):
+    monkeypatch.setattr(url_filter, "get_engine", lambda role: db.get_bind())
+    shop, other = Store(name="Brico", type=StoreType.online), Store(name="Other", type=StoreType.online)
+    db.add_all([shop, other])
+    db.commit()
+    db.add_all([Product(name=f"P{n}", url=f"https://brico.example/p/{n}", store_id=shop.id) for n in range(50)])
+    db.add(Product(name="Elsewhere", url="https://brico.example/p/other", store_id=other.id))
+    db.commit()
+
+    crawled = []
+    crawler = SimpleNamespace(
+        settings=Settings({"URL_FILTER_CONFIRM_BATCH": 10}),
+        stats=Stats(),
+        spider=SimpleNamespace(store_id=shop.id),
+        engine=SimpleNamespace(crawl=crawled.append),
+        signals=SimpleNamespace(connect=lambda *args, **kwargs: None),
+    )
+    dupefilter = DatabaseUrlFilter.from_crawler(crawler)
+    dupefilter.open()
+    assert crawler.stats["urlfilter/preloaded"] == 50  # Only the spider's store
+
+    assert not dupefilter.request_seen(Request("https://brico.example/category/tools"))
+    assert not dupefilter.request_seen(Request("https://brico.example/p/other"))
+    # Force a Bloom false positive for a URL the database doesn't have
+    dupefilter.known.add("https://brico.example/p/new")
+    seen = [dupefilter.request_seen(Request(f"https://brico.example/p/{n}")) for n in range(9)]
+    seen.append(dupefilter.request_seen(Request("https://brico.example/p/new")))
+    assert all(seen)  # Held back until confirmed
+
+    # The 10th possible positive triggers one lookup; the false positive is scheduled again
+    assert dupefilter.stats["confirm_queries"] == 1
+    assert [request.url for request in crawled] == ["https://brico.example/p/new"] and crawled[0].dont_filter
+    assert dupefilter.stats["existing_products"] == 9 and not dupefilter.pending
+
+    # Idle releases what's held back; nothing new was pending, so the spider may close
+    assert dupefilter.request_seen(Request("https://brico.example/p/20"))
+    dupefilter.spider_idle(crawler.spider)
+    assert dupefilter.stats["confirm_queries"] == 2 and len(crawled) == 1
@@ -1,7 +1,7 @@
 import os
 import logging
 from typing import Optional
-from elasticsearch import Elasticsearch
+from elasticsearch import AsyncElasticsearch, Elasticsearch
 from elasticsearch.exceptions import ConnectionError, NotFoundError
 
 logger = logging.getLogger(__name__)
@@ -9,6 +9,7 @@ logger = logging.getLogger(__name__)
 class SearchClient:
     def __init__(self):
         self._client: Optional[Elasticsearch] = None
+        self._async_client: Optional[AsyncElasticsearch] = None
         self.host = os.getenv('ELASTICSEARCH_HOST', 'localhost')
         self.port = int(os.getenv('ELASTICSEARCH_PORT', 9200))
         self.index_name = os.getenv('ELASTICSEARCH_INDEX', 'products')
@@ -24,6 +25,18 @@ class SearchClient:
             )
         return self._client
     
+    @property
+    def async_client(self) -> AsyncElasticsearch:
+        """Client for async endpoints; searches await the response instead of holding a worker thread."""
+        if self._async_client is None:
+            self._async_client = AsyncElasticsearch(
+                [{'host': self.host, 'port': self.port, 'scheme': 'http'}],
+                request_timeout=30,
+                max_retries=3,
+                retry_on_timeout=True
+            )
+        return self._async_client
+
     def is_available(self) -> bool:
         try:
             info = self.client.info()
@@ -112,6 +125,35 @@ class SearchClient:
             logger.error(f"Error searching: {e}")
             return {'hits': {'hits': [], 'total': {'value': 0}}}
     
+    async def async_is_available(self) -> bool:
+        try:
+            await self.async_client.info()
+            return True
+        except ConnectionError as e:
+            logger.warning(f"Elasticsearch not available: {e}")
+            return False
+        except Exception as e:
+            logger.error(f"Error checking Elasticsearch availability: {e}")
+            return False
+
+    async def async_search(self, query: dict) -> dict:
+        try:
+            return await self.async_client.search(
+                index=self.index_name,
+                body=query
+            )
+        except NotFoundError:
+            logger.warning(f"Index {self.index_name} not found")
+            return {'hits': {'hits': [], 'total': {'value': 0}}}
+        except Exception as e:
+            logger.error(f"Error searching: {e}")
+            return {'hits': {'hits': [], 'total': {'value': 0}}}
+
+    async def close(self) -> None:
+        if self._async_client is not None:
+            await self._async_client.close()
+            self._async_client = None
+
     def delete_document(self, doc_id: str) -> bool:
         try:
             response = self.client.delete(
@@ -104,6 +104,9 @@ PRODUCT_INDEX_MAPPING = {
             'creator_id': {
                 'type': 'integer'
             },
+            'is_test_data': {
+                'type': 'boolean'
+            },
             'created_at': {
                 'type': 'date'
             },
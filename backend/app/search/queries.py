@@ -9,6 +9,7 @@ def build_product_search_query(
     max_price: Optional[float] = None,
     tags: Optional[List[str]] = None,
     excluded_tags: Optional[List[str]] = None,
+    exclude_test_data: bool = False,
     store_id: Optional[int] = None,
     location: Optional[Dict[str, float]] = None,
     distance_km: Optional[float] = None,
@@ -96,6 +97,10 @@ def build_product_search_query(
     # Excluded tags filter (for filtering out test/mock data)
     if excluded_tags:
         must_not_filters.append({'terms': {'tags': excluded_tags}})
+
+    # Precomputed flag; documents indexed before it existed need a reindex
+    if exclude_test_data:
+        must_not_filters.append({'term': {'is_test_data': True}})
     
     # Store filter
     if store_id is not None:
@@ -0,0 +1,99 @@
+# backend/app/services/geo.py
+"""Nearest-first queries over indexed lat/lon columns.
+
+Instead of computing the distance for every row and sorting the whole table,
+`fetch_nearest` searches a bounding box around the user (served by the
+`(lat, lon)` index), computes the exact haversine distance only for the rows
+inside it, and widens the box ring by ring until the page is full.
+"""
+import math
+from typing import Any, Optional
+
+from sqlalchemy import func
+from sqlalchemy.orm import Query
+
+from app.services.pagination import SortKey
+
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+# Half the circumference: no point is further away than this
+MAX_DISTANCE_KM = math.pi * EARTH_RADIUS_KM
+INITIAL_RADIUS_KM = 5.0
+RING_GROWTH = 4
+
+
+def haversine_km(lat: float, lon: float, lat_column: Any, lon_column: Any):
+    """SQL expression for the great-circle distance in km from (lat, lon) to the columns."""
+    dlat = func.radians(lat_column - lat) / 2
+    dlon = func.radians(lon_column - lon) / 2
+    a = (
+        func.sin(dlat) * func.sin(dlat)
+        + math.cos(math.radians(lat)) * func.cos(func.radians(lat_column)) * func.sin(dlon) * func.sin(dlon)
+    )
+    return 2 * EARTH_RADIUS_KM * func.asin(func.sqrt(a))
+
+
+def bounding_box(lat: float, lon: float, radius_km: float) -> tuple[float, float, Optional[tuple[float, float]]]:
+    """(min_lat, max_lat, (min_lon, max_lon)) enclosing the circle; lon range is None when it wraps."""
+    dlat = radius_km / KM_PER_DEGREE
+    min_lat, max_lat = lat - dlat, lat + dlat
+    if min_lat <= -90 or max_lat >= 90:
+        # The circle covers a pole: every longitude qualifies
+        return max(min_lat, -90.0), min(max_lat, 90.0), None
+    dlon = radius_km / (KM_PER_DEGREE * math.cos(math.radians(lat)))
+    if dlon >= 180 or lon - dlon < -180 or lon + dlon > 180:
+        # Crossing the antimeridian; a latitude band is still a useful prefilter
+        return min_lat, max_lat, None
+    return min_lat, max_lat, (lon - dlon, lon + dlon)
+
+
+def distance_sort_key(lat: float, lon: float, lat_column: Any, lon_column: Any, id_column: Any) -> SortKey:
+    return SortKey(
+        haversine_km(lat, lon, lat_column, lon_column),
+        id_column,
+        "distance_km",
+        descending=False,
+        parse=float,
+    )
+
+
+def fetch_nearest(
+    query: Query,
+    sort_key: SortKey,
+    lat: float,
+    lon: float,
+    lat_column: Any,
+    lon_column: Any,
+    limit: int,
+    offset: int = 0,
+    after: Optional[tuple[float, int]] = None,
+    initial_radius_km: float = INITIAL_RADIUS_KM,
+) -> list:
+    """One page of `query` rows ordered by distance, each carrying `distance_km`.
+
+    `query` must already select from (or join) the table holding the
+    coordinates. Pass `after=(distance_km, id)` from a cursor to continue
+    after that row; `offset` is only used without a cursor.
+    """
+    distance = sort_key.column
+    query = query.filter(lat_column.isnot(None), lon_column.isnot(None)).add_columns(distance.label("distance_km"))
+    if after:
+        last_distance, last_id = after
+        query = query.filter(sort_key.seek(last_distance, last_id))
+        radius = last_distance + initial_radius_km
+    else:
+        radius = initial_radius_km
+    query = query.order_by(*sort_key.order_by())
+
+    while radius < MAX_DISTANCE_KM:
+        min_lat, max_lat, lon_range = bounding_box(lat, lon, radius)
+        candidates = query.filter(lat_column.between(min_lat, max_lat))
+        if lon_range:
+            candidates = candidates.filter(lon_column.between(*lon_range))
+        # Only rows inside the circle are guaranteed to be in final order
+        rows = candidates.filter(distance <= radius).offset(offset).limit(limit).all()
+        if len(rows) == limit:
+            return rows
+        radius *= RING_GROWTH
+
+    return query.offset(offset).limit(limit).all()
@@ -0,0 +1,75 @@
+# backend/app/services/http_cache.py
+"""Strong ETags and conditional GETs for the catalog read endpoints.
+
+A response's ETag hashes what determines its body: the path, the query
+string, the caller's credentials and the generation counters of the resources
+it reads (`app.db.cache_generations`). Checking `If-None-Match` therefore
+costs one primary-key lookup instead of the listing query, and any committed
+write to those resources changes the tag.
+
+The `conditional_get` dependencies (`app.api.deps`) answer a match with a bare
+304; otherwise they leave the headers in the ASGI scope, where
+`HTTPCacheMiddleware` adds them to the 200 the endpoint produces.
+"""
+import hashlib
+import os
+from typing import Mapping, Optional
+
+from fastapi import HTTPException, Request
+
+# Bump when the response shape changes, so clients don't keep pre-deploy bodies
+CACHE_FORMAT_VERSION = "1"
+SCOPE_KEY = "partle.http_cache"
+
+# Products list their store, tags and creator
+PRODUCT_RESOURCES = ("products", "stores", "tags", "users")
+STORE_RESOURCES = ("stores", "tags")
+TAG_RESOURCES = ("tags",)
+
+
+def max_age() -> int:
+    """Seconds clients may reuse a response without revalidating (HTTP_CACHE_MAX_AGE, default 0)."""
+    return int(os.getenv("HTTP_CACHE_MAX_AGE", "0"))
+
+
+def compute_etag(request: Request, generations: Mapping[str, int]) -> str:
+    parts = [
+        CACHE_FORMAT_VERSION,
+        request.url.path,
+        "&".join(f"{key}={value}" for key, value in sorted(request.query_params.multi_items())),
+        request.headers.get("authorization", ""),
+        ",".join(f"{name}:{generations[name]}" for name in sorted(generations)),
+    ]
+    digest = hashlib.sha256("\n".join(parts).encode()).hexdigest()[:32]
+    return f'"{digest}"'
+
+
+def cache_headers(request: Request, etag: str) -> dict[str, str]:
+    # Per-credential responses must not be served from shared caches
+    visibility = "private" if request.headers.get("authorization") else "public"
+    return {
+        "ETag": etag,
+        "Cache-Control": f"{visibility}, max-age={max_age()}, must-revalidate",
+        "Vary": "Authorization",
+    }
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison, as RFC 9110 prescribes for If-None-Match."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = (tag.strip() for tag in if_none_match.split(","))
+    return etag in (tag[2:] if tag.startswith("W/") else tag for tag in candidates)
+
+
+def check_conditional(request: Request, generations: Mapping[str, int]) -> None:
+    """Raise a 304 if the client's copy is current; else stash the headers for the 200."""
+    if request.method not in ("GET", "HEAD"):
+        return
+    etag = compute_etag(request, generations)
+    headers = cache_headers(request, etag)
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        raise HTTPException(status_code=304, headers=headers)
+    request.scope[SCOPE_KEY] = headers
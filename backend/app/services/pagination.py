@@ -0,0 +1,140 @@
+# backend/app/services/pagination.py
+"""Keyset (cursor) pagination helpers.
+
+A cursor is an opaque url-safe token holding the sort mode, the sort key of the
+last row of a page and that row's id. The next page continues strictly after
+that (key, id) pair, so Postgres seeks straight to it through a composite index
+instead of walking and discarding `offset` rows - page 500 costs the same as
+page 1.
+"""
+import base64
+import json
+import operator
+from dataclasses import dataclass
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+from typing import Any, Callable, Optional
+
+from fastapi import HTTPException
+from sqlalchemy import and_, literal, tuple_
+from sqlalchemy.orm import Query
+
+# Listings keep returning a plain JSON array; the next page token travels in this header
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def _identity(value: Any) -> Any:
+    return value
+
+
+@dataclass(frozen=True)
+class SortKey:
+    """One sort mode: a key column (or expression) plus the id tie-breaker."""
+    column: Any
+    id_column: Any
+    row_attr: str                   # attribute holding the key on a result row
+    descending: bool = True
+    nullable: bool = False          # NULL keys sort last in both directions
+    parse: Callable[[Any], Any] = _identity  # cursor JSON value -> bind value
+
+    def order_by(self) -> list:
+        key = self.column.desc() if self.descending else self.column.asc()
+        if self.nullable:
+            key = key.nulls_last()
+        tie = self.id_column.desc() if self.descending else self.id_column.asc()
+        return [key, tie]
+
+    def seek(self, value: Any, last_id: int):
+        """Row-value comparison selecting non-NULL keys strictly after (value, last_id).
+
+        A single `(key, id) < (:key, :id)` condition is what lets Postgres start
+        the index range scan at the cursor; never OR anything into it.
+        """
+        op = operator.lt if self.descending else operator.gt
+        return op(
+            tuple_(self.column, self.id_column),
+            tuple_(literal(value, self.column.type), literal(last_id, self.id_column.type)),
+        )
+
+    def null_tail(self, last_id: Optional[int] = None):
+        """The NULL-key rows, which sort last and are ordered by id alone."""
+        condition = self.column.is_(None)
+        if last_id is not None:
+            op = operator.lt if self.descending else operator.gt
+            condition = and_(condition, op(self.id_column, last_id))
+        return condition
+
+
+def encode_cursor(sort: str, value: Any, last_id: int) -> str:
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    elif isinstance(value, Decimal):
+        value = str(value)
+    raw = json.dumps([sort, value, last_id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def _unpack_cursor(cursor: str) -> tuple[Any, Any, int]:
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        issued_sort, value, last_id = json.loads(base64.urlsafe_b64decode(padded))
+        return issued_sort, value, int(last_id)
+    except (ValueError, TypeError):
+        raise HTTPException(400, "Invalid cursor")
+
+
+def cursor_sort(cursor: str) -> str:
+    """The sort mode a cursor was issued for."""
+    sort = _unpack_cursor(cursor)[0]
+    if not isinstance(sort, str):
+        raise HTTPException(400, "Invalid cursor")
+    return sort
+
+
+def decode_cursor(cursor: str, sort: str, sort_key: SortKey) -> tuple[Any, int]:
+    """Return the (parsed key, id) stored in `cursor`; anything malformed is a 400."""
+    issued_sort, value, last_id = _unpack_cursor(cursor)
+    if issued_sort != sort:
+        raise HTTPException(400, "Cursor does not match sort_by")
+    if value is not None:
+        try:
+            value = sort_key.parse(value)
+        except (ValueError, TypeError, InvalidOperation):
+            raise HTTPException(400, "Invalid cursor")
+    return value, last_id
+
+
+def fetch_page(
+    query: Query,
+    sort_key: SortKey,
+    sort: str,
+    cursor: Optional[str],
+    offset: int,
+    limit: int,
+) -> list:
+    """Order `query` by `sort_key` and fetch one page, by cursor when given, by offset otherwise."""
+    ordered = query.order_by(*sort_key.order_by())
+    if not cursor:
+        return ordered.offset(offset).limit(limit).all() if offset else ordered.limit(limit).all()
+
+    value, last_id = decode_cursor(cursor, sort, sort_key)
+    if value is None:
+        return ordered.filter(sort_key.null_tail(last_id)).limit(limit).all()
+
+    rows = ordered.filter(sort_key.seek(value, last_id)).limit(limit).all()
+    if sort_key.nullable and len(rows) < limit:
+        # Non-NULL keys ran out on this page: top up from the start of the NULL tail
+        rows += ordered.filter(sort_key.null_tail()).limit(limit - len(rows)).all()
+    return rows
+
+
+def next_cursor(rows: list, sort_key: SortKey, sort: str, limit: int) -> Optional[str]:
+    """Cursor for the page after `rows`, or None when this was the last page."""
+    if not rows or len(rows) < limit:
+        return None
+    last = rows[-1]
+    return encode_cursor(sort, getattr(last, sort_key.row_attr), last.id)
+
+
+def cursor_headers(cursor: Optional[str]) -> dict[str, str]:
+    return {NEXT_CURSOR_HEADER: cursor} if cursor else {}
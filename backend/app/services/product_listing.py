@@ -0,0 +1,165 @@
+# backend/app/services/product_listing.py
+"""Lean read path for product listings.
+
+Listing endpoints select only the columns `ProductOut` serializes and turn the
+rows straight into JSON: no ORM objects are built, no `from_attributes`
+validation runs and the image/logo BLOBs are never read from Postgres.
+"""
+import json
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Iterable
+
+from fastapi.responses import Response
+from sqlalchemy import select
+from sqlalchemy.orm import Query, Session
+
+from app.db.models import Product, ProductRatingStats, Tag, User, product_tags
+from app.storage.blobs import versioned_url
+from app.storage.variants import image_srcset
+
+# Everything ProductOut needs - and nothing else
+PRODUCT_LISTING_COLUMNS = (
+    Product.id,
+    Product.store_id,
+    Product.name,
+    Product.sku,
+    Product.spec,
+    Product.price,
+    Product.currency,
+    Product.url,
+    Product.lat,
+    Product.lon,
+    Product.description,
+    Product.image_filename,
+    Product.image_content_type,
+    Product.image_sha256,
+    Product.has_image,
+    Product.created_at,
+    Product.updated_at,
+    Product.updated_by_id,
+    Product.creator_id,
+)
+
+
+def product_listing_query(db: Session) -> Query:
+    """Column-only query over products; filters and ordering work as on `db.query(Product)`."""
+    creator_username = (
+        select(User.username)
+        .where(User.id == Product.creator_id)
+        .correlate(Product)
+        .scalar_subquery()
+        .label("creator_username")
+    )
+    return db.query(*PRODUCT_LISTING_COLUMNS, creator_username)
+
+
+def load_rating_stats(db: Session, product_ids: Iterable[int]) -> dict[int, dict[str, Any]]:
+    """Average ratings and review count per product, read from `product_rating_stats`."""
+    product_ids = list(product_ids)
+    if not product_ids:
+        return {}
+
+    rating_stats = db.query(
+        ProductRatingStats.product_id,
+        ProductRatingStats.average_product_rating,
+        ProductRatingStats.average_info_rating,
+        ProductRatingStats.review_count,
+    ).filter(
+        ProductRatingStats.product_id.in_(product_ids)
+    ).all()
+
+    return {
+        stat.product_id: {
+            'average_product_rating': round(stat.average_product_rating, 1) if stat.average_product_rating else None,
+            'average_info_rating': round(stat.average_info_rating, 1) if stat.average_info_rating else None,
+            'review_count': stat.review_count
+        }
+        for stat in rating_stats
+    }
+
+
+def load_tags(db: Session, product_ids: Iterable[int]) -> dict[int, list[dict[str, Any]]]:
+    """Tags per product as plain dicts, in one query."""
+    product_ids = list(product_ids)
+    if not product_ids:
+        return {}
+
+    rows = (
+        db.query(product_tags.c.product_id, Tag.id, Tag.name, Tag.description)
+        .select_from(product_tags)
+        .join(Tag, Tag.id == product_tags.c.tag_id)
+        .filter(product_tags.c.product_id.in_(product_ids))
+        .order_by(Tag.id)
+        .all()
+    )
+
+    tags_by_product: dict[int, list[dict[str, Any]]] = {}
+    for product_id, tag_id, name, description in rows:
+        tags_by_product.setdefault(product_id, []).append(
+            {'id': tag_id, 'name': name, 'description': description}
+        )
+    return tags_by_product
+
+
+def serialize_product_rows(db: Session, rows: list) -> list[dict[str, Any]]:
+    """Turn listing rows into `ProductOut`-shaped dicts (tags and ratings batched)."""
+    product_ids = [row.id for row in rows]
+    tags_by_product = load_tags(db, product_ids)
+    stats_by_product = load_rating_stats(db, product_ids)
+
+    items = []
+    for row in rows:
+        stats = stats_by_product.get(row.id, {})
+        items.append({
+            'id': row.id,
+            'store_id': row.store_id,
+            'name': row.name,
+            'sku': row.sku,
+            'spec': row.spec,
+            'price': row.price,
+            'currency': row.currency,
+            'url': row.url,
+            'lat': row.lat,
+            'lon': row.lon,
+            'description': row.description,
+            'image_filename': row.image_filename,
+            'image_content_type': row.image_content_type,
+            'has_image': bool(row.has_image),
+            'image_url': versioned_url(f"/v1/products/{row.id}/image", row.image_sha256) if row.has_image else None,
+            'image_srcset': image_srcset(f"/v1/products/{row.id}/image", row.image_sha256) if row.has_image else None,
+            'created_at': row.created_at,
+            'updated_at': row.updated_at,
+            'updated_by_id': row.updated_by_id,
+            'creator_id': row.creator_id,
+            'creator': {'id': row.creator_id, 'username': row.creator_username} if row.creator_id else None,
+            'tags': tags_by_product.get(row.id, []),
+            'average_product_rating': stats.get('average_product_rating'),
+            'average_info_rating': stats.get('average_info_rating'),
+            'review_count': stats.get('review_count', 0),
+            'distance_km': getattr(row, 'distance_km', None),
+        })
+    return items
+
+
+def _json_default(value: Any) -> Any:
+    # Same wire format Pydantic uses for these types
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, datetime):
+        return value.isoformat().replace('+00:00', 'Z')
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def json_response(payload: Any, headers: dict[str, str] | None = None) -> Response:
+    """Encode an already-shaped payload without going through response_model validation."""
+    return Response(
+        content=json.dumps(payload, default=_json_default, separators=(',', ':')),
+        media_type="application/json",
+        headers=headers,
+    )
+
+
+def products_response(db: Session, query: Query, headers: dict[str, str] | None = None) -> Response:
+    """Run a listing query and return the JSON response."""
+    return json_response(serialize_product_rows(db, query.all()), headers=headers)
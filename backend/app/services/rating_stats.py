@@ -0,0 +1,92 @@
+# backend/app/services/rating_stats.py
+"""Maintenance of the `product_rating_stats` table.
+
+Review writes call `refresh_rating_stats` inside their own transaction, so the
+aggregates commit (or roll back) together with the review. Listings and the
+rating summary then read one row per product instead of aggregating
+`product_reviews` on every request.
+"""
+from typing import Optional
+
+from sqlalchemy import case, delete, func, insert, select
+from sqlalchemy.orm import Session
+
+from app.db.cache_generations import mark_changed
+from app.db.models import Product, ProductRatingStats, ProductReview
+from app.logging_config import get_logger
+
+logger = get_logger("services.rating_stats")
+
+DISTRIBUTION_COLUMNS = {
+    rating: f"rating_{rating}_count" for rating in range(1, 6)
+}
+
+
+def _aggregate_columns() -> list:
+    return [
+        func.count(ProductReview.id).label('review_count'),
+        func.avg(ProductReview.product_rating).label('average_product_rating'),
+        func.avg(ProductReview.info_rating).label('average_info_rating'),
+        *(
+            func.coalesce(func.sum(case((ProductReview.product_rating == rating, 1), else_=0)), 0).label(column)
+            for rating, column in DISTRIBUTION_COLUMNS.items()
+        ),
+    ]
+
+
+def refresh_rating_stats(db: Session, product_id: int) -> Optional[ProductRatingStats]:
+    """Recompute the stats row of one product from its reviews, without committing.
+
+    The product row is locked first so concurrent review writes on the same
+    product recompute one after the other and none of them is lost.
+    """
+    db.flush()
+    db.query(Product.id).filter(Product.id == product_id).with_for_update().first()
+
+    aggregate = (
+        db.query(*_aggregate_columns())
+        .filter(ProductReview.product_id == product_id)
+        .one()
+    )
+
+    stats = db.get(ProductRatingStats, product_id)
+    if not aggregate.review_count:
+        if stats:
+            db.delete(stats)
+        return None
+
+    if not stats:
+        stats = ProductRatingStats(product_id=product_id)
+        db.add(stats)
+    stats.review_count = aggregate.review_count
+    stats.average_product_rating = float(aggregate.average_product_rating)
+    stats.average_info_rating = float(aggregate.average_info_rating)
+    for column in DISTRIBUTION_COLUMNS.values():
+        setattr(stats, column, getattr(aggregate, column))
+    return stats
+
+
+def rebuild_all_rating_stats(db: Session) -> int:
+    """Rebuild the whole table from `product_reviews` in one statement. Returns rows written."""
+    db.execute(delete(ProductRatingStats))
+    aggregate = (
+        select(ProductReview.product_id, *_aggregate_columns())
+        .group_by(ProductReview.product_id)
+    )
+    columns = ['product_id', 'review_count', 'average_product_rating', 'average_info_rating',
+               *DISTRIBUTION_COLUMNS.values()]
+    db.execute(insert(ProductRatingStats).from_select(columns, aggregate))
+    mark_changed(db, "products")
+    db.commit()
+
+    total = db.query(func.count(ProductRatingStats.product_id)).scalar()
+    logger.info("Rebuilt product rating stats", products=total)
+    return total
+
+
+def rating_distribution(stats: Optional[ProductRatingStats]) -> dict[int, int]:
+    """{rating: count} for the ratings that have at least one review."""
+    if not stats:
+        return {}
+    counts = {rating: getattr(stats, column) for rating, column in DISTRIBUTION_COLUMNS.items()}
+    return {rating: count for rating, count in counts.items() if count}
@@ -0,0 +1,104 @@
+# backend/app/services/shuffle.py
+"""Seeded, index-backed shuffle for "random" product feeds.
+
+Every product carries a `random_key` in [0, 1), rerolled periodically by
+`rotate_random_keys`. A seed picks a start point on that circle: the feed is
+the rows with key >= start in ascending order, then wraps around to the rows
+below it. Both laps are range scans over a `(random_key, id)` index, the order
+is stable for a given seed, and pages continue by keyset cursor instead of
+materializing and sorting `ORDER BY random()`.
+"""
+import random
+from typing import Optional
+
+from fastapi import HTTPException
+from sqlalchemy import func, update
+from sqlalchemy.orm import Query, Session
+
+from app.db.cache_generations import mark_changed
+from app.db.models import Product
+from app.logging_config import get_logger
+from app.services.pagination import SortKey, cursor_sort, decode_cursor
+
+logger = get_logger("services.shuffle")
+
+# Spreads consecutive seeds evenly around the circle
+GOLDEN_RATIO_CONJUGATE = 0.6180339887498949
+SHUFFLE_SORT_KEY = SortKey(Product.random_key, Product.id, "random_key", descending=False, parse=float)
+
+
+def shuffle_sort(seed: int) -> str:
+    """Sort name stored in cursors, so a cursor only continues the feed it came from."""
+    return f"random:{seed}"
+
+
+def seed_start(seed: int) -> float:
+    return (seed * GOLDEN_RATIO_CONJUGATE) % 1.0
+
+
+def resolve_seed(seed: Optional[int], cursor: Optional[str]) -> int:
+    """The explicit seed, else the one the cursor was issued for, else a fresh one."""
+    if seed is not None:
+        return seed
+    if cursor:
+        sort = cursor_sort(cursor)
+        if not sort.startswith("random:"):
+            raise HTTPException(400, "Cursor does not match sort_by")
+        try:
+            return int(sort.split(":", 1)[1])
+        except ValueError:
+            raise HTTPException(400, "Invalid cursor")
+    return random.randrange(1 << 31)
+
+
+def fetch_shuffled(
+    query: Query,
+    seed: int,
+    cursor: Optional[str],
+    offset: int,
+    limit: int,
+    sort_key: SortKey = SHUFFLE_SORT_KEY,
+) -> list:
+    """One page of the shuffle for `seed`; rows must carry the `random_key` column."""
+    start = seed_start(seed)
+    ordered = query.order_by(*sort_key.order_by())
+    first_lap = ordered.filter(sort_key.column >= start)
+    wrapped = ordered.filter(sort_key.column < start)
+
+    if cursor:
+        value, last_id = decode_cursor(cursor, shuffle_sort(seed), sort_key)
+        if value is None:
+            raise HTTPException(400, "Invalid cursor")
+        if value < start:
+            return wrapped.filter(sort_key.seek(value, last_id)).limit(limit).all()
+        rows = first_lap.filter(sort_key.seek(value, last_id)).limit(limit).all()
+        if len(rows) < limit:
+            rows += wrapped.limit(limit - len(rows)).all()
+        return rows
+
+    rows = first_lap.offset(offset).limit(limit).all()
+    if len(rows) < limit:
+        # Only count the first lap when an offset may reach past it
+        skip = max(0, offset - first_lap.order_by(None).count()) if offset else 0
+        rows += wrapped.offset(skip).limit(limit - len(rows)).all()
+    return rows
+
+
+def _random_expression(db: Session):
+    if db.get_bind().dialect.name == "sqlite":
+        # SQLite's random() is a signed 64-bit integer
+        return func.random() / 18446744073709551616.0 + 0.5
+    return func.random()
+
+
+def rotate_random_keys(db: Session) -> int:
+    """Reroll every product's shuffle position. Returns rows updated."""
+    result = db.execute(
+        update(Product.__table__)
+        # Keep updated_at: a reshuffle is not a product edit
+        .values(random_key=_random_expression(db), updated_at=Product.__table__.c.updated_at)
+    )
+    mark_changed(db, "products")
+    db.commit()
+    logger.info("Rotated product random keys", products=result.rowcount)
+    return result.rowcount
@@ -0,0 +1,42 @@
+# backend/app/services/test_data_flags.py
+"""Repair of the denormalized `Product.is_test_data` flag.
+
+ORM tag changes keep the flag current through the collection events in
+`app.db.models`; this covers writes that bypass the ORM (raw SQL scripts,
+renamed tags, restores).
+"""
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from app.db.cache_generations import mark_changed
+from app.db.models import Product, Tag, product_tags
+from app.logging_config import get_logger
+from app.utils.test_data import TEST_DATA_TAGS
+
+logger = get_logger("services.test_data_flags")
+
+
+def sync_test_data_flags(db: Session) -> int:
+    """Recompute `is_test_data` for every product whose flag is wrong. Returns rows changed."""
+    tagged = (
+        select(product_tags.c.product_id)
+        .join(Tag, Tag.id == product_tags.c.tag_id)
+        .where(Tag.name.in_(TEST_DATA_TAGS))
+    )
+    changed = 0
+    for should_be_flagged, mismatch in (
+        (True, Product.id.in_(tagged) & Product.is_test_data.is_(False)),
+        (False, Product.id.not_in(tagged) & Product.is_test_data.is_(True)),
+    ):
+        result = db.execute(
+            update(Product.__table__)
+            .where(mismatch)
+            # Keep updated_at: a flag repair is not a product edit
+            .values(is_test_data=should_be_flagged, updated_at=Product.__table__.c.updated_at)
+        )
+        changed += result.rowcount
+    mark_changed(db, "products")
+    db.commit()
+
+    logger.info("Synced test-data flags", products_changed=changed)
+    return changed
@@ -0,0 +1,97 @@
+# backend/app/storage/backends.py
+"""Pluggable byte stores behind the content-addressed blob store.
+
+A backend only maps a key (the blob's SHA-256) to bytes. `LocalBlobBackend`
+keeps one file per blob under `BLOB_STORAGE_DIR`, sharded two levels deep so
+no directory grows past a few thousand entries; nginx can serve those files
+directly. Other stores (S3, GCS, ...) register a subclass in `BACKENDS` and
+are picked with `BLOB_STORAGE_BACKEND`.
+"""
+import os
+import tempfile
+from abc import ABC, abstractmethod
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional
+
+DEFAULT_STORAGE_DIR = Path(__file__).resolve().parents[2] / "blob_storage"
+
+
+class BlobBackend(ABC):
+    """Where blob bytes live. Writes are idempotent: a key always names the same bytes."""
+
+    @abstractmethod
+    def write(self, key: str, data: bytes) -> None: ...
+
+    @abstractmethod
+    def read(self, key: str) -> bytes: ...
+
+    @abstractmethod
+    def exists(self, key: str) -> bool: ...
+
+    @abstractmethod
+    def delete(self, key: str) -> None: ...
+
+    @abstractmethod
+    def size(self, key: str) -> int: ...
+
+    def local_path(self, key: str) -> Optional[Path]:
+        """Filesystem path of the blob, for backends that can hand files to the web server."""
+        return None
+
+
+def shard_path(key: str) -> str:
+    """`ab/cd/abcd…`: the relative location of a blob in sharded storage."""
+    return f"{key[:2]}/{key[2:4]}/{key}"
+
+
+class LocalBlobBackend(BlobBackend):
+    def __init__(self, root: os.PathLike | str):
+        self.root = Path(root)
+
+    def local_path(self, key: str) -> Path:
+        return self.root / shard_path(key)
+
+    def write(self, key: str, data: bytes) -> None:
+        path = self.local_path(key)
+        if path.exists():
+            return
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Write-then-rename: readers never see a partial file
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.chmod(tmp, 0o644)
+            os.replace(tmp, path)
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+
+    def read(self, key: str) -> bytes:
+        return self.local_path(key).read_bytes()
+
+    def exists(self, key: str) -> bool:
+        return self.local_path(key).exists()
+
+    def delete(self, key: str) -> None:
+        self.local_path(key).unlink(missing_ok=True)
+
+    def size(self, key: str) -> int:
+        return self.local_path(key).stat().st_size
+
+
+BACKENDS: dict[str, type[BlobBackend]] = {
+    "local": LocalBlobBackend,
+}
+
+
+@lru_cache(maxsize=1)
+def get_blob_backend() -> BlobBackend:
+    """The configured backend (BLOB_STORAGE_BACKEND, default `local` in BLOB_STORAGE_DIR)."""
+    name = os.getenv("BLOB_STORAGE_BACKEND", "local")
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown blob storage backend: {name}")
+    if name == "local":
+        return LocalBlobBackend(os.getenv("BLOB_STORAGE_DIR", str(DEFAULT_STORAGE_DIR)))
+    return BACKENDS[name]()
@@ -0,0 +1,186 @@
+# backend/app/storage/blobs.py
+"""Content-addressed blob store for product images, store logos and profile pictures.
+
+Bytes are written once under their SHA-256 (`app.storage.backends`) and rows
+keep only the digest in `<field>_sha256`, next to the existing
+`<field>_filename` / `<field>_content_type` columns. The legacy
+`<field>_data` BLOB columns are still read for rows that
+`scripts/utils/migrate_images_to_blob_store.py` hasn't moved yet.
+
+Image endpoints never stream bytes through Python in production: with
+`BLOB_ACCEL_REDIRECT_PREFIX` set (e.g. `/_blobs/`), they answer with an
+`X-Accel-Redirect` to the file and nginx serves it. Without it (dev), the
+file goes out as a `FileResponse`.
+
+The digest doubles as the ETag, and API payloads link images through
+`versioned_url` (`?v=<digest prefix>`): a request naming the current version
+is cacheable for a year as immutable, and any other is revalidated, which
+costs a 304 that never reads the image.
+"""
+import hashlib
+import os
+from typing import Any, Optional
+
+from fastapi import Request
+from fastapi.responses import FileResponse, Response
+
+from app.logging_config import get_logger
+from app.services.http_cache import etag_matches
+from app.storage.backends import get_blob_backend, shard_path
+
+logger = get_logger("storage.blobs")
+
+# Characters of the digest in `?v=`; enough to never collide between versions of one image
+VERSION_LENGTH = 16
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "public, no-cache"
+
+
+def blob_key(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def put_blob(data: bytes) -> str:
+    """Store `data` (no-op if already present). Returns its key."""
+    key = blob_key(data)
+    get_blob_backend().write(key, data)
+    return key
+
+
+def read_blob(key: str) -> bytes:
+    return get_blob_backend().read(key)
+
+
+def store_image(obj: Any, field: str, data: bytes, filename: Optional[str], content_type: Optional[str]) -> str:
+    """Write `data` through the blob store and point `obj.<field>_*` at it. Returns the key."""
+    key = put_blob(data)
+    setattr(obj, f"{field}_sha256", key)
+    setattr(obj, f"{field}_filename", filename)
+    setattr(obj, f"{field}_content_type", content_type)
+    setattr(obj, f"{field}_data", None)
+    return key
+
+
+def clear_image(obj: Any, field: str) -> None:
+    """Unlink the image of `obj`; the blob itself stays (other rows may share it)."""
+    for suffix in ("sha256", "data", "filename", "content_type"):
+        setattr(obj, f"{field}_{suffix}", None)
+
+
+def versioned_url(url: str, key: Optional[str]) -> str:
+    """`url` pinned to one version of its content, so it can be cached forever."""
+    return f"{url}?v={key[:VERSION_LENGTH]}" if key else url
+
+
+def cache_control(key: Optional[str], version: Optional[str]) -> str:
+    # Only a URL naming the current content may be cached without revalidation
+    if key and version and key.startswith(version):
+        return IMMUTABLE_CACHE_CONTROL
+    return REVALIDATE_CACHE_CONTROL
+
+
+def image_response(
+    obj: Any,
+    field: str,
+    default_filename: str,
+    request: Optional[Request] = None,
+    version: Optional[str] = None,
+) -> Optional[Response]:
+    """Response serving `obj`'s image, or None if it has none.
+
+    `version` is the `v` query parameter of a `versioned_url`.
+    """
+    key = getattr(obj, f"{field}_sha256")
+    media_type = getattr(obj, f"{field}_content_type") or "image/jpeg"
+    headers = {
+        "Content-Disposition": f'inline; filename="{getattr(obj, f"{field}_filename") or default_filename}"',
+        "Cache-Control": cache_control(key, version),
+    }
+
+    if key is None:
+        # Not migrated yet: the bytes are still in the row (a deferred column).
+        # Their digest is the ETag the blob store will give them, so caches
+        # keep validating across the migration.
+        data = getattr(obj, f"{field}_data")
+        if not data:
+            return None
+        headers["ETag"] = f'"{blob_key(data)}"'
+        return _not_modified(headers, request) or bytes_response(data, media_type, headers, request)
+    return blob_response(key, media_type, headers, request)
+
+
+def blob_response(
+    key: str,
+    media_type: str,
+    headers: dict[str, str],
+    request: Optional[Request] = None,
+) -> Optional[Response]:
+    """Serve the blob `key`: 304, X-Accel-Redirect, a file, or the bytes. None if it's missing.
+
+    The key is the ETag, so revalidation never reads the blob. Files honour
+    Range/If-Range (FileResponse, or nginx after an X-Accel-Redirect).
+    """
+    headers = {**headers, "ETag": f'"{key}"'}
+    not_modified = _not_modified(headers, request)
+    if not_modified is not None:
+        return not_modified
+
+    backend = get_blob_backend()
+    path = backend.local_path(key)
+    accel_prefix = os.getenv("BLOB_ACCEL_REDIRECT_PREFIX")
+    if accel_prefix and path is not None:
+        # nginx serves the file; it keeps our Content-Type/Disposition/Cache-Control/ETag
+        headers["X-Accel-Redirect"] = f"{accel_prefix.rstrip('/')}/{shard_path(key)}"
+        return Response(media_type=media_type, headers=headers)
+    if path is not None:
+        if not path.exists():
+            logger.error("Blob missing from storage", key=key)
+            return None
+        return FileResponse(path, media_type=media_type, headers=headers)
+    return bytes_response(backend.read(key), media_type, headers, request)
+
+
+def _not_modified(headers: dict[str, str], request: Optional[Request]) -> Optional[Response]:
+    """A 304 if the request's If-None-Match matches `headers`' ETag."""
+    if request is not None and etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    return None
+
+
+def bytes_response(
+    data: bytes,
+    media_type: str,
+    headers: dict[str, str],
+    request: Optional[Request] = None,
+) -> Response:
+    """In-memory bytes with single-range support (`bytes=a-b`, `a-`, `-n`)."""
+    headers = {**headers, "Accept-Ranges": "bytes"}
+    requested = _single_range(request, headers.get("ETag"), len(data)) if request is not None else None
+    if requested is None:
+        return Response(content=data, media_type=media_type, headers=headers)
+    if requested == "unsatisfiable":
+        return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{len(data)}"})
+    start, end = requested
+    headers["Content-Range"] = f"bytes {start}-{end}/{len(data)}"
+    return Response(content=data[start:end + 1], status_code=206, media_type=media_type, headers=headers)
+
+
+def _single_range(request: Request, etag: Optional[str], size: int):
+    """(start, end) inclusive, "unsatisfiable", or None to send everything."""
+    header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if not header or not header.startswith("bytes=") or "," in header:
+        return None
+    if if_range is not None and if_range != etag:
+        return None
+    first, _, last = header[len("bytes="):].strip().partition("-")
+    try:
+        if first:
+            start, end = int(first), int(last) if last else size - 1
+        else:
+            start, end = max(size - int(last), 0), size - 1
+    except ValueError:
+        return None
+    if start >= size or start > end:
+        return "unsatisfiable"
+    return start, min(end, size - 1)
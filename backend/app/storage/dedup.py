@@ -0,0 +1,139 @@
+# backend/app/storage/dedup.py
+"""Storage savings of image deduplication, and upkeep of the blob refcounts.
+
+`dedup_report` compares what the image columns reference (every product
+holding its own copy, as before the blob store) with what is stored (one
+copy per digest). `recount_blobs` rebuilds `blobs.refcount` from the
+`*_sha256` columns after bulk SQL or a backfill, and `collect_orphan_blobs`
+deletes blobs nothing has referenced for a grace period, with their
+thumbnail variants.
+"""
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.orm import Session
+
+from app.db.blob_refs import BLOB_REFERENCES, Blob, blob_size
+from app.db.base_class import Base
+from app.logging_config import get_logger
+from app.storage.backends import get_blob_backend
+from app.storage.variants import VARIANT_FORMATS, VARIANT_WIDTHS, variant_key
+
+logger = get_logger("storage.dedup")
+
+
+def referenced_counts(db: Session) -> Counter:
+    """Digest -> number of rows pointing at it, straight from the image columns."""
+    counts: Counter = Counter()
+    for table_name, columns in BLOB_REFERENCES.items():
+        table = Base.metadata.tables[table_name]
+        for column in columns:
+            rows = db.execute(
+                select(table.c[column], func.count()).where(table.c[column].is_not(None)).group_by(table.c[column])
+            )
+            counts.update(dict(rows.all()))
+    return counts
+
+
+def recount_blobs(db: Session, check_only: bool = False) -> dict[str, int]:
+    """Make `blobs` agree with the image columns (and fill in unknown sizes)."""
+    actual = referenced_counts(db)
+    stored = {row.key: row for row in db.scalars(select(Blob))}
+
+    corrected = sized = 0
+    for key in sorted(set(actual) | set(stored)):
+        blob = stored.get(key)
+        if blob is None:
+            corrected += 1
+            if not check_only:
+                db.add(Blob(key=key, size=blob_size(key), refcount=actual[key]))
+            continue
+        if blob.refcount != actual.get(key, 0):
+            corrected += 1
+            if not check_only:
+                blob.refcount = actual.get(key, 0)
+        if blob.size is None and not check_only:
+            blob.size = blob_size(key)
+            sized += blob.size is not None
+    if not check_only:
+        db.commit()
+    return {"blobs": len(set(actual) | set(stored)), "corrected": corrected, "sized": sized}
+
+
+def dedup_report(db: Session, top: int = 10) -> dict:
+    """Bytes stored vs bytes the image columns reference, and the most shared blobs."""
+    referenced = Blob.refcount > 0
+    blobs, references, stored_bytes, referenced_bytes, unsized = db.execute(
+        select(
+            func.count(),
+            func.coalesce(func.sum(Blob.refcount), 0),
+            func.coalesce(func.sum(Blob.size), 0),
+            func.coalesce(func.sum(Blob.size * Blob.refcount), 0),
+            func.count() - func.count(Blob.size),
+        ).where(referenced)
+    ).one()
+    orphans, orphan_bytes = db.execute(
+        select(func.count(), func.coalesce(func.sum(Blob.size), 0)).where(~referenced)
+    ).one()
+    most_shared = db.execute(
+        select(Blob.key, Blob.refcount, Blob.size)
+        .where(Blob.refcount > 1)
+        .order_by(Blob.refcount.desc(), Blob.key)
+        .limit(top)
+    ).all()
+
+    saved_bytes = referenced_bytes - stored_bytes
+    return {
+        "blobs": blobs,
+        "references": references,
+        "stored_bytes": stored_bytes,
+        "referenced_bytes": referenced_bytes,
+        "saved_bytes": saved_bytes,
+        "saved_ratio": round(saved_bytes / referenced_bytes, 4) if referenced_bytes else 0.0,
+        # Sizes still unknown after a SQL backfill: run recount_blobs
+        "unsized_blobs": unsized,
+        "orphans": {"blobs": orphans, "bytes": orphan_bytes},
+        "most_shared": [{"key": key, "references": count, "size": size} for key, count, size in most_shared],
+    }
+
+
+def collect_orphan_blobs(db: Session, grace: timedelta = timedelta(hours=24), dry_run: bool = False) -> dict[str, int]:
+    """Delete blobs unreferenced for longer than `grace`, and their variants.
+
+    The grace period covers writers that stored a blob but haven't committed
+    the row naming it yet; such a blob has no row here, or a fresh one. Each
+    blob is collected in its own transaction under a row lock
+    (`FOR UPDATE SKIP LOCKED`): a blob whose count a writer is changing is
+    skipped, and the refcount is re-read under the lock before anything is
+    unlinked.
+    """
+    cutoff = datetime.now(timezone.utc) - grace
+    backend = get_blob_backend()
+    candidates = db.execute(
+        select(Blob.key, Blob.size).where(Blob.refcount <= 0, Blob.updated_at < cutoff).order_by(Blob.key)
+    ).all()
+
+    deleted = freed = 0
+    for key, size in candidates:
+        if dry_run:
+            deleted += 1
+            freed += size or 0
+            continue
+        refcount = db.execute(
+            select(Blob.refcount).where(Blob.key == key).with_for_update(skip_locked=True)
+        ).scalar_one_or_none()
+        if refcount is None or refcount > 0:
+            # Gone, locked by a writer, or referenced again since the scan
+            db.rollback()
+            continue
+        for width in VARIANT_WIDTHS:
+            for fmt in VARIANT_FORMATS:
+                backend.delete(variant_key(key, width, fmt))
+        backend.delete(key)
+        db.execute(delete(Blob).where(Blob.key == key))
+        db.commit()
+        deleted += 1
+        freed += size or 0
+    logger.info("Collected orphan blobs", blobs=deleted, bytes=freed, dry_run=dry_run)
+    return {"blobs": deleted, "bytes": freed}
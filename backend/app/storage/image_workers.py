@@ -0,0 +1,78 @@
+# backend/app/storage/image_workers.py
+"""Bounded process pool for CPU-heavy Pillow work (upload normalization, variants).
+
+Decoding and encoding images holds the GIL for tens of milliseconds per
+megapixel; doing it in a request thread or the Scrapy reactor stalls
+everything else in the process. Tasks here run in up to `IMAGE_WORKERS`
+separate processes (default: min(4, CPUs)); `IMAGE_WORKERS=0` runs them
+inline, which tests and single-shot scripts use.
+"""
+import asyncio
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from multiprocessing import get_context
+from typing import Any, Callable, Optional
+
+from app.logging_config import get_logger
+
+logger = get_logger("storage.image_workers")
+
+_lock = threading.Lock()
+_pool: Optional[ProcessPoolExecutor] = None
+
+
+def worker_count() -> int:
+    return int(os.getenv("IMAGE_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+
+def image_pool() -> Optional[ProcessPoolExecutor]:
+    """The shared pool, or None when tasks run inline."""
+    global _pool
+    if worker_count() <= 0:
+        return None
+    with _lock:
+        if _pool is None:
+            # spawn: forking a process that already runs threads (uvicorn, Scrapy) can deadlock
+            _pool = ProcessPoolExecutor(max_workers=worker_count(), mp_context=get_context("spawn"))
+        return _pool
+
+
+def shutdown_image_pool(wait: bool = False) -> None:
+    """Stop the pool; `wait=True` lets queued tasks finish first (end of a crawl)."""
+    global _pool
+    with _lock:
+        if _pool is not None:
+            _pool.shutdown(wait=wait, cancel_futures=not wait)
+            _pool = None
+
+
+def run_image_task(fn: Callable[..., Any], *args: Any) -> Any:
+    """Run `fn(*args)` in the pool and wait for it (call from threads, not the event loop)."""
+    pool = image_pool()
+    return fn(*args) if pool is None else pool.submit(fn, *args).result()
+
+
+async def run_image_task_async(fn: Callable[..., Any], *args: Any) -> Any:
+    """`run_image_task` for coroutines: awaits the pool (or a thread when inline), never blocking the loop."""
+    return await asyncio.get_running_loop().run_in_executor(image_pool(), fn, *args)
+
+
+def submit_image_task(fn: Callable[..., Any], *args: Any) -> Optional[Future]:
+    """Fire-and-forget `fn(*args)`; failures are logged, not raised."""
+    pool = image_pool()
+    if pool is None:
+        try:
+            fn(*args)
+        except Exception as e:
+            logger.warning("Image task failed", task=fn.__name__, error=str(e))
+        return None
+
+    future = pool.submit(fn, *args)
+
+    def _log_failure(done: Future) -> None:
+        if not done.cancelled() and done.exception() is not None:
+            logger.warning("Image task failed", task=fn.__name__, error=str(done.exception()))
+
+    future.add_done_callback(_log_failure)
+    return future
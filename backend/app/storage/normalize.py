@@ -0,0 +1,118 @@
+# backend/app/storage/normalize.py
+"""Upload-time normalization of product images, store logos and profile pictures.
+
+Clients send whatever their camera or CMS produced: 10 MB PNGs, JPEGs that
+rely on an EXIF orientation tag, animated GIFs. Before anything is stored,
+the image is decoded (which also validates it), turned upright, reduced to
+its first frame, capped at `IMAGE_UPLOAD_MAX_DIMENSION` px per side and
+re-encoded without metadata as `IMAGE_UPLOAD_FORMAT` (WebP, or AVIF) at
+`IMAGE_UPLOAD_QUALITY`. An upload that already meets all of that is kept as
+sent when the re-encode would be larger.
+
+The work runs in the image worker pool (`app.storage.image_workers`):
+decoding a large upload takes long enough to stall every other request on
+the event loop.
+"""
+import io
+import os
+from dataclasses import dataclass
+from typing import Optional
+
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from app.logging_config import get_logger
+from app.storage.image_workers import run_image_task, run_image_task_async
+
+logger = get_logger("storage.normalize")
+
+UPLOAD_FORMATS = {"webp": "image/webp", "avif": "image/avif"}
+METADATA_KEYS = ("exif", "xmp", "icc_profile")
+DEFAULT_QUALITY = {"webp": 80, "avif": 60}
+
+
+class ImageNormalizationError(ValueError):
+    """The upload is not an image Pillow can decode."""
+
+
+@dataclass
+class NormalizedImage:
+    data: bytes
+    content_type: str
+    filename: str
+    width: int
+    height: int
+    original_size: int
+
+    @property
+    def bytes_saved(self) -> int:
+        # A re-encode can outgrow a small, already compressed upload
+        return max(self.original_size - len(self.data), 0)
+
+
+def upload_format() -> str:
+    fmt = os.getenv("IMAGE_UPLOAD_FORMAT", "webp").lower()
+    if fmt not in UPLOAD_FORMATS:
+        raise ValueError(f"Unsupported IMAGE_UPLOAD_FORMAT: {fmt}")
+    return fmt
+
+
+def normalize_image(data: bytes, filename: Optional[str] = None) -> NormalizedImage:
+    """Re-encode `data` upright, capped and stripped of metadata (runs in the image pool)."""
+    fmt = upload_format()
+    quality = int(os.getenv("IMAGE_UPLOAD_QUALITY", DEFAULT_QUALITY[fmt]))
+    max_dimension = int(os.getenv("IMAGE_UPLOAD_MAX_DIMENSION", "2048"))
+    try:
+        with Image.open(io.BytesIO(data)) as img:
+            compliant = (
+                (img.format or "").lower() == fmt
+                and getattr(img, "n_frames", 1) == 1
+                and max(img.size) <= max_dimension
+                and not any(img.info.get(key) for key in METADATA_KEYS)
+            )
+            img.seek(0)  # First frame of animations
+            img = ImageOps.exif_transpose(img)
+            img.thumbnail((max_dimension, max_dimension), Image.Resampling.LANCZOS)
+            has_alpha = img.mode in ("RGBA", "LA") or (img.mode == "P" and "transparency" in img.info)
+            img = img.convert("RGBA" if has_alpha else "RGB")
+            out = io.BytesIO()
+            # A fresh save writes no EXIF, XMP or ICC data unless asked to
+            img.save(out, format=fmt.upper(), quality=quality)
+    except (UnidentifiedImageError, OSError, ValueError, Image.DecompressionBombError) as e:
+        raise ImageNormalizationError(f"Not a valid image: {e}") from e
+
+    encoded = out.getvalue()
+    if compliant and len(data) <= len(encoded):
+        # Nothing to fix and the upload is the smaller file
+        encoded = data
+    stem = os.path.splitext(os.path.basename(filename or ""))[0] or "image"
+    return NormalizedImage(
+        data=encoded,
+        content_type=UPLOAD_FORMATS[fmt],
+        filename=f"{stem}.{fmt}",
+        width=img.width,
+        height=img.height,
+        original_size=len(data),
+    )
+
+
+def _log(image: NormalizedImage, filename: Optional[str]) -> NormalizedImage:
+    logger.info(
+        "Image normalized",
+        filename=filename,
+        original_bytes=image.original_size,
+        stored_bytes=len(image.data),
+        bytes_saved=image.bytes_saved,
+        width=image.width,
+        height=image.height,
+    )
+    return image
+
+
+async def normalize_upload(data: bytes, filename: Optional[str] = None) -> NormalizedImage:
+    """`normalize_image` from async endpoints, off the event loop."""
+    return _log(await run_image_task_async(normalize_image, data, filename), filename)
+
+
+def normalize_upload_sync(data: bytes, filename: Optional[str] = None) -> NormalizedImage:
+    """`normalize_image` from sync endpoints (already on a worker thread)."""
+    return _log(run_image_task(normalize_image, data, filename), filename)
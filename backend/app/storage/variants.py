@@ -0,0 +1,117 @@
+# backend/app/storage/variants.py
+"""Resized product-image variants for listing cards and `srcset`.
+
+Each original blob gets 200/400/800 px wide renditions in WebP and JPEG,
+stored next to it in the blob store under `<sha256>-w<width>.<format>`.
+The key derives from the source, so variants need no table: they are
+generated once - eagerly when an image is uploaded, imported or scraped,
+and lazily on the first request for one that is missing - and then served
+like any other blob.
+"""
+import io
+from typing import Optional
+
+from fastapi import Request
+from fastapi.responses import Response
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from app.logging_config import get_logger
+from app.storage.backends import get_blob_backend
+from app.storage.blobs import blob_response, cache_control, versioned_url
+from app.storage.image_workers import run_image_task, submit_image_task
+
+logger = get_logger("storage.variants")
+
+VARIANT_WIDTHS = (200, 400, 800)
+VARIANT_FORMATS = {"webp": "image/webp", "jpeg": "image/jpeg"}
+VARIANT_QUALITY = {"webp": 80, "jpeg": 82}
+
+
+def variant_key(key: str, width: int, fmt: str) -> str:
+    return f"{key}-w{width}.{fmt}"
+
+
+def pick_width(requested: int) -> int:
+    """Smallest variant at least `requested` px wide (the largest one past that)."""
+    return next((width for width in VARIANT_WIDTHS if width >= requested), VARIANT_WIDTHS[-1])
+
+
+def negotiate_format(accept: Optional[str]) -> str:
+    return "webp" if accept and "image/webp" in accept else "jpeg"
+
+
+def render_variant(data: bytes, width: int, fmt: str) -> bytes:
+    """Re-encode `data` at most `width` px wide, upright and without metadata."""
+    with Image.open(io.BytesIO(data)) as img:
+        img.seek(0)  # First frame of animations
+        img = ImageOps.exif_transpose(img)
+        img.thumbnail((width, width * 10), Image.Resampling.LANCZOS)
+        has_alpha = img.mode in ("RGBA", "LA") or (img.mode == "P" and "transparency" in img.info)
+        if fmt == "jpeg" or not has_alpha:
+            if has_alpha:
+                background = Image.new("RGB", img.size, "white")
+                background.paste(img.convert("RGBA"), mask=img.convert("RGBA").getchannel("A"))
+                img = background
+            else:
+                img = img.convert("RGB")
+        else:
+            img = img.convert("RGBA")
+        out = io.BytesIO()
+        img.save(out, format=fmt.upper(), quality=VARIANT_QUALITY[fmt], optimize=True)
+        return out.getvalue()
+
+
+def build_variants(key: str, data: Optional[bytes] = None) -> list[str]:
+    """Create the missing variants of blob `key` (runs in the image pool). Returns keys written."""
+    backend = get_blob_backend()
+    written = []
+    for width in VARIANT_WIDTHS:
+        for fmt in VARIANT_FORMATS:
+            derived = variant_key(key, width, fmt)
+            if backend.exists(derived):
+                continue
+            if data is None:
+                data = backend.read(key)
+            try:
+                backend.write(derived, render_variant(data, width, fmt))
+            except (UnidentifiedImageError, OSError, ValueError) as e:
+                # Not something Pillow can decode: callers fall back to the original
+                logger.warning("Cannot render image variants", key=key, error=str(e))
+                return written
+            written.append(derived)
+    return written
+
+
+def schedule_variants(key: str, data: Optional[bytes] = None) -> None:
+    """Generate `key`'s variants in the background (uploads, imports, scrapes)."""
+    submit_image_task(build_variants, key, data)
+
+
+def ensure_variant(key: str, width: int, fmt: str) -> Optional[str]:
+    """Key of the variant, rendering all of them first if it doesn't exist yet; None if it can't be made."""
+    derived = variant_key(key, width, fmt)
+    backend = get_blob_backend()
+    if not backend.exists(derived):
+        run_image_task(build_variants, key, None)
+    return derived if backend.exists(derived) else None
+
+
+def variant_response(
+    key: str,
+    width: int,
+    accept: Optional[str],
+    request: Optional[Request] = None,
+    version: Optional[str] = None,
+) -> Optional[Response]:
+    """The variant of blob `key` closest to `width`, in WebP if the client takes it."""
+    fmt = negotiate_format(accept)
+    derived = ensure_variant(key, pick_width(width), fmt)
+    if derived is None:
+        return None
+    headers = {"Vary": "Accept", "Cache-Control": cache_control(key, version)}
+    return blob_response(derived, VARIANT_FORMATS[fmt], headers, request)
+
+
+def image_srcset(base_url: str, key: Optional[str] = None) -> str:
+    """`srcset` of an image served at `base_url` (e.g. /v1/products/1/image), pinned to version `key`."""
+    return ", ".join(f"{versioned_url(f'{base_url}/{width}', key)} {width}w" for width in VARIANT_WIDTHS)
@@ -0,0 +1,74 @@
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import QueuePool
+
+from app.db import engines
+
+
+def test_pool_settings_env_overrides(monkeypatch):
+    monkeypatch.setenv("DB_SCRAPER_POOL_SIZE", "7")
+    monkeypatch.setenv("DB_SCRAPER_POOL_PRE_PING", "false")
+    settings = engines.pool_settings("scraper")
+    assert settings.pool_size == 7
+    assert settings.pool_pre_ping is False
+    assert settings.max_overflow == engines.DEFAULT_POOL_SETTINGS["scraper"].max_overflow
+    assert engines.pool_settings("api").pool_size == engines.DEFAULT_POOL_SETTINGS["api"].pool_size
+
+
+def test_unknown_role_is_rejected():
+    with pytest.raises(ValueError):
+        engines.get_engine("cron")
+
+
+def test_postgres_connections_are_tagged_per_role(monkeypatch):
+    monkeypatch.setenv("DB_MCP_STATEMENT_TIMEOUT_MS", "2500")
+    url = make_url("postgresql+psycopg2://u:p@localhost/partle")
+    kwargs, metrics = engines._engine_kwargs("mcp", url, is_async=False)
+    assert kwargs["connect_args"] == {"application_name": "partle-mcp", "options": "-c statement_timeout=2500"}
+    assert kwargs["pool_size"] == engines.DEFAULT_POOL_SETTINGS["mcp"].pool_size
+    assert issubclass(kwargs["poolclass"], QueuePool)
+    assert kwargs["poolclass"].metrics is metrics
+
+    async_url = engines.async_database_url("postgresql://u:p@localhost/partle?sslmode=require")
+    assert async_url.drivername == "postgresql+asyncpg"
+    assert dict(async_url.query) == {"ssl": "require"}
+    kwargs, _ = engines._engine_kwargs("scripts", async_url, is_async=True)
+    # Scripts run without a statement timeout
+    assert kwargs["connect_args"] == {"server_settings": {"application_name": "partle-scripts"}}
+
+
+def test_checkout_wait_times_are_recorded(tmp_path):
+    poolclass, metrics = engines._instrumented_pool(QueuePool, "TestPool")
+    engine = create_engine(f"sqlite:///{tmp_path / 'pool.db'}", poolclass=poolclass, pool_size=1)
+    for _ in range(3):
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+    engine.dispose()
+    # Still counted on the pool that dispose() recreated
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+
+    snapshot = metrics.snapshot()
+    assert snapshot["checkouts"] == 4
+    assert 0 <= snapshot["wait_ms_avg"] <= snapshot["wait_ms_max"]
+
+
+def test_app_shutdown_closes_search_client_and_async_pools(monkeypatch):
+    from fastapi.testclient import TestClient
+
+    from app import main
+
+    closed = []
+
+    async def close_search():
+        closed.append("search")
+
+    async def dispose_engines():
+        closed.append("engines")
+
+    monkeypatch.setattr(main.search_client, "close", close_search)
+    monkeypatch.setattr(main, "dispose_async_engines", dispose_engines)
+    with TestClient(main.app):
+        assert closed == []
+    assert closed == ["search", "engines"]
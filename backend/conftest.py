@@ -8,6 +8,7 @@ from app.main import app
 from app.api.v1 import parts, stores, auth, tags, products, external
 from app.auth import security
 from app.db.models import Base
+from app.storage.backends import get_blob_backend
 
 SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"
 engine = create_engine(
@@ -17,6 +18,16 @@ engine = create_engine(
 )
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+@pytest.fixture(autouse=True)
+def blob_storage(tmp_path, monkeypatch):
+    """Keep blob-store writes in a per-test directory; image work runs inline."""
+    root = tmp_path / "blobs"
+    monkeypatch.setenv("BLOB_STORAGE_DIR", str(root))
+    monkeypatch.setenv("IMAGE_WORKERS", "0")
+    get_blob_backend.cache_clear()
+    yield root
+    get_blob_backend.cache_clear()
+
 @pytest.fixture(name="db")
 def db_fixture():
     Base.metadata.create_all(bind=engine)
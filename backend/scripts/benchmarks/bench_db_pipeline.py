@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Benchmark scraped-item persistence: the per-item DatabasePipeline vs the batched upsert.
+
+Replays --items synthetic products twice through each mode, into a dedicated
+store: a first crawl (all inserts) and a re-crawl (mostly unchanged, 10%
+with a new price). Reports items/sec per pass.
+
+- per-item: the old pipeline (a session, store/product/tag lookups and a commit per item)
+- batched: store_scrapers.pipelines.DatabasePipeline
+
+Usage (from /backend):
+    uv run python scripts/benchmarks/bench_db_pipeline.py --items 50000
+    uv run python scripts/benchmarks/bench_db_pipeline.py --items 5000 --batch-size 1000
+    uv run python scripts/benchmarks/bench_db_pipeline.py --cleanup
+"""
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import time
+from collections import Counter
+from types import SimpleNamespace
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(BACKEND_DIR)
+sys.path.append(os.path.join(BACKEND_DIR, "app", "scraper"))
+
+from scrapy.settings import Settings  # noqa: E402
+from scrapy.signalmanager import SignalManager  # noqa: E402
+from tabulate import tabulate  # noqa: E402
+
+from app.db.models import Product, Store, StoreType, Tag  # noqa: E402
+from app.db.session import SessionLocal  # noqa: E402
+from store_scrapers.items import ProductItem  # noqa: E402
+from store_scrapers.pipelines import DatabasePipeline  # noqa: E402
+
+BENCH_STORE_NAME = "bench-db-pipeline"
+
+
+class Stats(Counter):
+    def inc_value(self, key, count=1):
+        self[key] += count
+
+    def set_value(self, key, value):
+        self[key] = value
+
+
+def bench_store(db) -> Store:
+    store = db.query(Store).filter_by(name=BENCH_STORE_NAME).first()
+    if not store:
+        store = Store(name=BENCH_STORE_NAME, type=StoreType.physical)
+        db.add(store)
+        db.commit()
+    return store
+
+
+def cleanup(db, store: Store) -> None:
+    db.query(Product).filter(Product.store_id == store.id).delete(synchronize_session=False)
+    db.commit()
+
+
+def items_for(store_id: int, count: int, mode: str, recrawl: bool) -> list[ProductItem]:
+    return [
+        ProductItem(
+            name=f"Bench product {n}",
+            price=str(10 + n % 100 + (1 if recrawl and n % 10 == 0 else 0)),
+            url=f"https://bench.example/{mode}/p/{n}",
+            description="Synthetic product for the pipeline benchmark",
+            store_id=store_id,
+        )
+        for n in range(count)
+    ]
+
+
+def per_item(items: list[ProductItem]) -> None:
+    """The pre-batching DatabasePipeline.process_item, item by item."""
+    for item in items:
+        with SessionLocal() as db:
+            store = db.query(Store).filter(Store.id == item["store_id"]).first()
+            existing = db.query(Product).filter(Product.url == item["url"], Product.store_id == store.id).first()
+            price = float(item["price"])
+            if existing:
+                if existing.price != price or existing.name != item["name"]:
+                    existing.price, existing.name = price, item["name"]
+            else:
+                product = Product(name=item["name"], price=price, url=item["url"],
+                                  description=item["description"], store_id=store.id)
+                tag = db.query(Tag).filter(Tag.name == "in-store").first()
+                if tag:
+                    product.tags.append(tag)
+                db.add(product)
+            db.commit()
+
+
+def batched(items: list[ProductItem], batch_size: int) -> None:
+    spider = SimpleNamespace(
+        crawler=SimpleNamespace(settings=Settings({"DB_PIPELINE_BATCH_SIZE": batch_size}), stats=Stats(),
+                                signals=SignalManager()),
+        logger=logging.getLogger("bench"),
+    )
+
+    async def crawl():
+        pipeline = DatabasePipeline()
+        await pipeline.open_spider(spider)
+        for item in items:
+            await pipeline.process_item(item, spider)
+        await pipeline.close_spider(spider)
+
+    asyncio.run(crawl())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=50000)
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--cleanup", action="store_true", help="Delete the benchmark products and exit")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+
+    db = SessionLocal()
+    try:
+        store = bench_store(db)
+        cleanup(db, store)
+        if args.cleanup:
+            print("✅ Benchmark products removed")
+            return
+
+        results = []
+        for mode in ("per-item", "batched"):
+            row = {"mode": mode}
+            for label, recrawl in (("first crawl", False), ("re-crawl", True)):
+                items = items_for(store.id, args.items, mode, recrawl)
+                started = time.perf_counter()
+                per_item(items) if mode == "per-item" else batched(items, args.batch_size)
+                row[f"{label} items/s"] = round(args.items / (time.perf_counter() - started), 1)
+            results.append(row)
+        cleanup(db, store)
+    finally:
+        db.close()
+
+    print(f"{args.items} items, batch size {args.batch_size}")
+    print(tabulate(results, headers="keys"))
+    speedup = results[1]["first crawl items/s"] / results[0]["first crawl items/s"]
+    print(f"✅ batched pipeline: {speedup:.1f}x items/sec on the first crawl")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Benchmark crawl throughput with the blocking vs the asynchronous image pipeline.
+
+A local fixture server serves one listing page of N products and their
+images, each image answered after --latency-ms. A minimal spider turns the
+listing into ProductItems, and each mode runs the crawl in its own process:
+
+- blocking: the old ImageDownloadPipeline (requests.get inside process_item,
+  which stalls the reactor for every image)
+- async: store_scrapers.pipelines.ImageDownloadPipeline
+
+Reports items/sec and wall time per mode. Images go to a temporary blob store;
+image validators are written to the local database (run migrations first).
+
+Usage (from /backend):
+    uv run python scripts/benchmarks/bench_image_pipeline.py --items 500 --latency-ms 100
+    uv run python scripts/benchmarks/bench_image_pipeline.py --mode async --items 2000
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(BACKEND_DIR)
+sys.path.append(os.path.join(BACKEND_DIR, "app", "scraper"))
+
+import requests  # noqa: E402
+import scrapy  # noqa: E402
+from itemadapter import ItemAdapter  # noqa: E402
+from scrapy.crawler import CrawlerProcess  # noqa: E402
+from tabulate import tabulate  # noqa: E402
+
+from store_scrapers.items import ProductItem  # noqa: E402
+
+MODES = ("blocking", "async")
+
+
+def fixture_server(items: int, latency: float) -> ThreadingHTTPServer:
+    """Listing at /listing, images at /img/<n>.png (distinct bytes per image)."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.startswith("/listing"):
+                body = "".join(
+                    f'<div class="product"><a href="/p/{i}">Product {i}</a><img src="/img/{i}.png"></div>'
+                    for i in range(items)
+                ).encode()
+                content_type = "text/html"
+            else:
+                time.sleep(latency)
+                body = b"\x89PNG fixture " + self.path.encode() * 64
+                content_type = "image/png"
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+class BlockingImagePipeline:
+    """The pipeline as it was: a synchronous GET per item, on the reactor thread."""
+
+    def open_spider(self, spider):
+        self.session = requests.Session()
+
+    def close_spider(self, spider):
+        self.session.close()
+
+    def process_item(self, item, spider):
+        from app.storage.blobs import put_blob
+
+        adapter = ItemAdapter(item)
+        response = self.session.get(adapter["image_url"], timeout=30)
+        adapter["image_sha256"] = put_blob(response.content)
+        return item
+
+
+class FixtureSpider(scrapy.Spider):
+    name = "bench_images"
+
+    def __init__(self, listing_url, run_id, **kwargs):
+        super().__init__(**kwargs)
+        self.start_urls = [listing_url]
+        self.run_id = run_id
+
+    def parse(self, response):
+        for product in response.css("div.product"):
+            yield ProductItem(
+                name=product.css("a::text").get(),
+                url=response.urljoin(product.css("a::attr(href)").get()),
+                # Unique per run, so neither mode revalidates the other's downloads
+                image_url=response.urljoin(product.css("img::attr(src)").get()) + f"?run={self.run_id}",
+            )
+
+
+def run_crawl(mode: str, listing_url: str) -> dict:
+    pipeline = (
+        f"{__name__}.BlockingImagePipeline" if mode == "blocking" else "store_scrapers.pipelines.ImageDownloadPipeline"
+    )
+    process = CrawlerProcess({
+        "ITEM_PIPELINES": {pipeline: 250},
+        "TWISTED_REACTOR": "twisted.internet.asyncioreactor.AsyncioSelectorReactor",
+        "LOG_LEVEL": "WARNING",
+        "IMAGE_DOWNLOAD_CONCURRENCY": 16,
+        "IMAGE_DOWNLOAD_CONCURRENCY_PER_HOST": 16,
+        "TELNETCONSOLE_ENABLED": False,
+    })
+    crawler = process.create_crawler(FixtureSpider)
+    process.crawl(crawler, listing_url=listing_url, run_id=uuid.uuid4().hex)
+    started = time.perf_counter()
+    process.start()
+    elapsed = time.perf_counter() - started
+    scraped = crawler.stats.get_value("item_scraped_count", 0)
+    return {"mode": mode, "items": scraped, "seconds": round(elapsed, 2), "items_per_sec": round(scraped / elapsed, 1)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=500)
+    parser.add_argument("--latency-ms", type=float, default=100)
+    parser.add_argument("--mode", choices=MODES, help="Run one mode in this process (used internally)")
+    parser.add_argument("--listing-url", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode and args.listing_url:
+        print(json.dumps(run_crawl(args.mode, args.listing_url)))
+        return
+
+    server = fixture_server(args.items, args.latency_ms / 1000)
+    listing_url = f"http://127.0.0.1:{server.server_port}/listing"
+    results = []
+    with tempfile.TemporaryDirectory() as blob_dir:
+        env = {**os.environ, "BLOB_STORAGE_DIR": blob_dir, "IMAGE_WORKERS": "0"}
+        for mode in [args.mode] if args.mode else MODES:
+            output = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--mode", mode, "--listing-url", listing_url],
+                env=env, capture_output=True, text=True, check=True,
+            ).stdout
+            results.append(json.loads(output.strip().splitlines()[-1]))
+    server.shutdown()
+
+    print(f"{args.items} items, {args.latency_ms:.0f} ms per image")
+    print(tabulate(results, headers="keys"))
+    if len(results) == 2:
+        print(f"✅ async pipeline: {results[1]['items_per_sec'] / results[0]['items_per_sec']:.1f}x items/sec")
+
+
+if __name__ == "__main__":
+    main()
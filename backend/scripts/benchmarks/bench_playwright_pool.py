@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Benchmark Playwright rendering: one context with every resource loaded vs the
+recycled context pool with resource blocking.
+
+A local fixture server serves --pages product pages, each pulling a
+stylesheet, a web font, two images and a "tracking" script from a second
+host (localhost instead of 127.0.0.1), every asset answered after
+--latency-ms. Each mode renders all pages through HybridDownloadHandler in
+its own process:
+
+- single: 1 context, 1 page at a time, nothing blocked (the old settings)
+- pool: PLAYWRIGHT_CONTEXT_POOL_SIZE contexts, blocking on, recycled every
+  --recycle pages
+
+Reports pages/sec, assets the server had to serve, aborted requests, mean
+page time and peak RSS of the crawler and browser processes. Needs a
+Playwright Chromium (`uv run playwright install chromium`).
+
+Usage (from /backend):
+    uv run python scripts/benchmarks/bench_playwright_pool.py --pages 60
+    uv run python scripts/benchmarks/bench_playwright_pool.py --pages 200 --contexts 4 --recycle 25
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(BACKEND_DIR)
+sys.path.append(os.path.join(BACKEND_DIR, "app", "scraper"))
+
+import scrapy  # noqa: E402
+from scrapy.crawler import CrawlerProcess  # noqa: E402
+from tabulate import tabulate  # noqa: E402
+
+MODES = ("single", "pool")
+PNG = bytes.fromhex(
+    "89504e470d0a1a0a0000000d4948445200000001000000010806000000"
+    "1f15c4890000000d49444154789c6360000002000154a24f5d0000000049454e44ae426082"
+)
+
+
+def fixture_server(latency: float) -> tuple[ThreadingHTTPServer, Counter]:
+    """Pages at /page/<n>; assets under /static and /img; the tracker on the other host."""
+    served = Counter()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            port = self.server.server_port
+            if self.path.startswith("/page/"):
+                n = self.path.rsplit("/", 1)[1]
+                body = (
+                    f'<html><head><link rel="stylesheet" href="/static/site.css">'
+                    f'<script src="http://localhost:{port}/t.js"></script></head>'
+                    f'<body><h1 class="product-title">Product {n}</h1>'
+                    f'<img src="/img/{n}-a.png"><img src="/img/{n}-b.png">'
+                    f'<span class="price">{n}.99</span></body></html>'
+                ).encode()
+                content_type = "text/html"
+            else:
+                served[self.path.split("/")[1].split(".")[0]] += 1
+                time.sleep(latency)
+                if self.path.endswith(".css"):
+                    body = b'@font-face{font-family:F;src:url(/static/font.woff2)} body{font-family:F}'
+                    content_type = "text/css"
+                elif self.path.endswith(".js"):
+                    body, content_type = b"window.tracked = true;", "application/javascript"
+                elif self.path.endswith(".woff2"):
+                    body, content_type = b"\0" * 2048, "font/woff2"
+                else:
+                    body, content_type = PNG, "image/png"
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            # Every page pays for its assets, as for distinct product pages
+            self.send_header("Cache-Control", "no-store")
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, served
+
+
+class FixtureSpider(scrapy.Spider):
+    name = "bench_playwright"
+    render_mode = "always"
+
+    def __init__(self, base_url, pages, **kwargs):
+        super().__init__(**kwargs)
+        self.base_url = base_url
+        self.pages = int(pages)
+
+    async def start(self):
+        for n in range(self.pages):
+            yield scrapy.Request(f"{self.base_url}/page/{n}", meta={"playwright": True})
+
+    def parse(self, response):
+        yield {"name": response.css("h1::text").get(), "price": response.css(".price::text").get()}
+
+
+def run_crawl(mode: str, base_url: str, pages: int, contexts: int, recycle: int) -> dict:
+    settings = {
+        "DOWNLOAD_HANDLERS": {"http": "store_scrapers.hybrid_handler.HybridDownloadHandler"},
+        "TWISTED_REACTOR": "twisted.internet.asyncioreactor.AsyncioSelectorReactor",
+        "LOG_LEVEL": "WARNING",
+        "TELNETCONSOLE_ENABLED": False,
+        "CONCURRENT_REQUESTS": 16,
+        "PLAYWRIGHT_LAUNCH_OPTIONS": {"headless": True, "args": ["--no-sandbox", "--disable-dev-shm-usage"]},
+    }
+    if mode == "single":
+        settings.update({
+            "PLAYWRIGHT_CONTEXT_POOL_SIZE": 1, "PLAYWRIGHT_MAX_PAGES_PER_CONTEXT": 1,
+            "PLAYWRIGHT_CONTEXT_RECYCLE_PAGES": 0,
+            "PLAYWRIGHT_BLOCKED_RESOURCE_TYPES": [], "PLAYWRIGHT_BLOCKED_DOMAINS": [],
+        })
+    else:
+        settings.update({
+            "PLAYWRIGHT_CONTEXT_POOL_SIZE": contexts, "PLAYWRIGHT_MAX_PAGES_PER_CONTEXT": 2,
+            "PLAYWRIGHT_CONTEXT_RECYCLE_PAGES": recycle,
+            # Stands in for the analytics domains of a real site
+            "PLAYWRIGHT_BLOCKED_DOMAINS": ["localhost"],
+        })
+    process = CrawlerProcess(settings)
+    crawler = process.create_crawler(FixtureSpider)
+    process.crawl(crawler, base_url=base_url, pages=pages)
+    started = time.perf_counter()
+    process.start()
+    elapsed = time.perf_counter() - started
+    stats = crawler.stats.get_stats()
+    rendered = stats.get("playwright_pool/pages", 0)
+    return {
+        "mode": mode,
+        "items": stats.get("item_scraped_count", 0),
+        "seconds": round(elapsed, 2),
+        "pages_per_sec": round(rendered / elapsed, 1),
+        "aborted": stats.get("playwright/request_count/aborted", 0),
+        "mean_page_ms": stats.get("playwright_pool/page_time_ms/total", 0) // max(rendered, 1),
+        "peak_rss_mb": stats.get("playwright_pool/rss_mb/max"),
+        "recycled": stats.get("playwright_pool/contexts_recycled", 0),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=60)
+    parser.add_argument("--latency-ms", type=float, default=50)
+    parser.add_argument("--contexts", type=int, default=2)
+    parser.add_argument("--recycle", type=int, default=20, help="Pages per context before it is recycled")
+    parser.add_argument("--mode", choices=MODES, help="Run one mode in this process (used internally)")
+    parser.add_argument("--base-url", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode and args.base_url:
+        print(json.dumps(run_crawl(args.mode, args.base_url, args.pages, args.contexts, args.recycle)))
+        return
+
+    server, served = fixture_server(args.latency_ms / 1000)
+    base_url = f"http://127.0.0.1:{server.server_port}"
+    results = []
+    for mode in [args.mode] if args.mode else MODES:
+        served.clear()
+        output = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--mode", mode, "--base-url", base_url,
+             "--pages", str(args.pages), "--contexts", str(args.contexts), "--recycle", str(args.recycle)],
+            capture_output=True, text=True, check=True,
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        result["assets_served"] = sum(served.values())
+        results.append(result)
+    server.shutdown()
+
+    print(f"{args.pages} pages, {args.latency_ms:.0f} ms per asset")
+    print(tabulate(results, headers="keys"))
+    if len(results) == 2:
+        print(f"✅ context pool: {results[1]['pages_per_sec'] / results[0]['pages_per_sec']:.1f}x pages/sec")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Benchmark the product listing read path: legacy ORM listing vs the lean column path.
+
+Reports bytes pulled from Postgres by the main listing query and p50/p95 latency
+of the full request handler (query + serialization) for both paths.
+
+Usage (from /backend):
+    uv run python scripts/benchmarks/bench_product_listing.py --seed 500 --image-kb 200
+    uv run python scripts/benchmarks/bench_product_listing.py --limit 100 --iterations 100
+    uv run python scripts/benchmarks/bench_product_listing.py --cleanup
+
+Seeded products live in a dedicated store and carry the `test-data` tag, so they
+never show up in default listings.
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from sqlalchemy.orm import joinedload, undefer
+from tabulate import tabulate
+
+from app.api.v1.products import enrich_products_with_ratings, list_products
+from app.db.models import Product, Store, Tag
+from app.db.session import SessionLocal
+from app.schemas import product as schema
+from app.services.product_listing import product_listing_query
+
+BENCH_STORE_NAME = "bench-listing"
+BENCH_TAG = "test-data"
+
+
+def seed(db, count: int, image_kb: int) -> Store:
+    """Create a store with `count` products, each carrying an image of `image_kb` KB."""
+    store = db.query(Store).filter_by(name=BENCH_STORE_NAME).first()
+    if not store:
+        store = Store(name=BENCH_STORE_NAME, lat=40.4, lon=-3.7)
+        db.add(store)
+        db.flush()
+    tag = db.query(Tag).filter_by(name=BENCH_TAG).first() or Tag(name=BENCH_TAG)
+
+    existing = db.query(Product).filter(Product.store_id == store.id).count()
+    for i in range(existing, existing + count):
+        product = Product(
+            name=f"Bench product {i}",
+            price=i % 500 + 0.99,
+            store_id=store.id,
+            description="Benchmark product " * 20,
+            image_data=os.urandom(image_kb * 1024),
+            image_filename=f"bench-{i}.jpg",
+            image_content_type="image/jpeg",
+        )
+        product.tags.append(tag)
+        db.add(product)
+    db.commit()
+    print(f"Seeded {count} products ({image_kb} KB images) into store #{store.id}")
+    return store
+
+
+def cleanup(db) -> None:
+    store = db.query(Store).filter_by(name=BENCH_STORE_NAME).first()
+    if not store:
+        print("Nothing to clean up")
+        return
+    products = db.query(Product).filter(Product.store_id == store.id).all()
+    for product in products:
+        product.tags.clear()
+        db.delete(product)
+    db.delete(store)
+    db.commit()
+    print(f"Removed {len(products)} benchmark products")
+
+
+def legacy_query(db, store_id: int):
+    """The listing query as it was before the lean path: full rows, BLOBs included."""
+    return (
+        db.query(Product)
+        .options(
+            undefer(Product.image_data),
+            joinedload(Product.store).undefer(Store.logo_data),
+            joinedload(Product.creator),
+            joinedload(Product.tags),
+        )
+        .filter(Product.store_id == store_id)
+        .order_by(Product.updated_at.desc())
+    )
+
+
+def legacy_list(db, store_id: int, limit: int) -> bytes:
+    products = legacy_query(db, store_id).limit(limit).all()
+    products = enrich_products_with_ratings(products, db)
+    payload = [schema.ProductOut.model_validate(p) for p in products]
+    return b"[" + b",".join(p.model_dump_json().encode() for p in payload) + b"]"
+
+
+def lean_list(db, store_id: int, limit: int) -> bytes:
+    return list_products(store_id=store_id, include_test_data=True, limit=limit, db=db).body
+
+
+def payload_bytes(db, statement) -> int:
+    """Bytes of column data the driver receives for `statement`."""
+    total = 0
+    for row in db.connection().execute(statement):
+        for value in row:
+            if value is None:
+                continue
+            if isinstance(value, (bytes, bytearray, memoryview)):
+                total += len(value)
+            else:
+                total += len(str(value).encode())
+    return total
+
+
+def time_handler(handler, db, store_id: int, limit: int, iterations: int) -> list[float]:
+    handler(db, store_id, limit)  # warm-up
+    timings = []
+    for _ in range(iterations):
+        db.expunge_all()
+        start = time.perf_counter()
+        handler(db, store_id, limit)
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def percentile(values: list[float], pct: float) -> float:
+    return statistics.quantiles(values, n=100)[int(pct) - 1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seed", type=int, default=0, help="Seed N products with images before benchmarking")
+    parser.add_argument("--image-kb", type=int, default=200, help="Size of each seeded image")
+    parser.add_argument("--limit", type=int, default=20, help="Page size")
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--cleanup", action="store_true", help="Remove benchmark data and exit")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        if args.cleanup:
+            cleanup(db)
+            return
+        if args.seed:
+            store = seed(db, args.seed, args.image_kb)
+        else:
+            store = db.query(Store).filter_by(name=BENCH_STORE_NAME).first()
+        if not store:
+            sys.exit("No benchmark data - run with --seed N first")
+
+        legacy_stmt = legacy_query(db, store.id).limit(args.limit).statement
+        lean_stmt = (
+            product_listing_query(db)
+            .filter(Product.store_id == store.id)
+            .order_by(Product.updated_at.desc())
+            .limit(args.limit)
+            .statement
+        )
+
+        rows = []
+        for label, handler, stmt in (
+            ("legacy ORM", legacy_list, legacy_stmt),
+            ("lean columns", lean_list, lean_stmt),
+        ):
+            timings = time_handler(handler, db, store.id, args.limit, args.iterations)
+            rows.append([
+                label,
+                f"{payload_bytes(db, stmt) / 1024:,.1f}",
+                f"{statistics.median(timings):.1f}",
+                f"{percentile(timings, 95):.1f}",
+            ])
+
+        print(f"\nPage size {args.limit}, {args.iterations} iterations")
+        print(tabulate(rows, headers=["path", "KB from Postgres", "p50 ms", "p95 ms"]))
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
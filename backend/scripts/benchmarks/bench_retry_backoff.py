@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Benchmark retrying throttled responses: the old blocking backoff vs
+EnhancedRetryMiddleware.
+
+A local fixture server answers --throttled product pages on one host
+(localhost) with 429 and `Retry-After: --retry-after` for the first
+--throttle-hits requests of each page, and --healthy pages on another host
+(127.0.0.1) after --latency-ms. One crawl fetches all of them. Each mode
+runs in its own process:
+
+- blocking: `time.sleep(min(2 ** retry_times, 60))` in process_response, as
+  the middleware did before. It freezes the reactor and every download.
+- async: EnhancedRetryMiddleware. Only the throttled request sleeps, and
+  only the throttled host waits out its backoff.
+
+Reports when the last healthy and the last throttled page arrived, the
+total time, retries and the shortest gap the server saw between hits of a
+throttled page, which must not be below Retry-After.
+
+Usage (from /backend):
+    uv run python scripts/benchmarks/bench_retry_backoff.py
+    uv run python scripts/benchmarks/bench_retry_backoff.py --throttled 5 --healthy 100 --retry-after 2
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(BACKEND_DIR)
+sys.path.append(os.path.join(BACKEND_DIR, "app", "scraper"))
+
+import scrapy  # noqa: E402
+from scrapy.crawler import CrawlerProcess  # noqa: E402
+from scrapy.downloadermiddlewares.retry import RetryMiddleware  # noqa: E402
+from scrapy.utils.response import response_status_message  # noqa: E402
+from tabulate import tabulate  # noqa: E402
+
+MODES = ("blocking", "async")
+
+
+class BlockingRetryMiddleware(RetryMiddleware):
+    """The previous EnhancedRetryMiddleware, for comparison."""
+
+    def process_response(self, request, response, spider=None):
+        if response.status in [403, 429, 503]:
+            retry_times = request.meta.get("retry_times", 0) + 1
+            time.sleep(min(2 ** retry_times, 60))
+            return self._retry(request, response_status_message(response.status)) or response
+        return super().process_response(request, response)
+
+
+def fixture_server(throttle_hits: int, retry_after: int, latency: float) -> tuple[ThreadingHTTPServer, dict]:
+    """Throttled pages at /throttled/<n>, healthy ones at /ok/<n>; hit times per path."""
+    hits = defaultdict(list)
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            hits[self.path].append(time.monotonic())
+            if self.path.startswith("/throttled/") and len(hits[self.path]) <= throttle_hits:
+                self.send_response(429)
+                self.send_header("Retry-After", str(retry_after))
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            time.sleep(latency)
+            body = f"<html><body><h1>{self.path}</h1></body></html>".encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, hits
+
+
+def min_throttled_gap(hits: dict) -> float | None:
+    """Shortest time between two hits of the same throttled page."""
+    gaps = [
+        later - earlier
+        for path, times in hits.items() if path.startswith("/throttled/")
+        for earlier, later in zip(times, times[1:])
+    ]
+    return round(min(gaps), 2) if gaps else None
+
+
+class FixtureSpider(scrapy.Spider):
+    name = "bench_retry"
+
+    def __init__(self, port, throttled, healthy, **kwargs):
+        super().__init__(**kwargs)
+        self.port = int(port)
+        self.throttled = int(throttled)
+        self.healthy = int(healthy)
+        self.started = time.perf_counter()
+
+    async def start(self):
+        for n in range(self.throttled):
+            yield scrapy.Request(f"http://localhost:{self.port}/throttled/{n}")
+        for n in range(self.healthy):
+            yield scrapy.Request(f"http://127.0.0.1:{self.port}/ok/{n}")
+
+    def parse(self, response):
+        yield {"url": response.url, "at": time.perf_counter() - self.started}
+
+
+def run_crawl(mode: str, port: int, throttled: int, healthy: int) -> dict:
+    middleware = "__main__.BlockingRetryMiddleware" if mode == "blocking" else \
+        "store_scrapers.middleware.EnhancedRetryMiddleware"
+    items = []
+    process = CrawlerProcess({
+        "TWISTED_REACTOR": "twisted.internet.asyncioreactor.AsyncioSelectorReactor",
+        "DOWNLOADER_MIDDLEWARES": {"scrapy.downloadermiddlewares.retry.RetryMiddleware": None, middleware: 550},
+        "RETRY_TIMES": 5,
+        "RETRY_BACKOFF_BASE": 0.2,
+        "RETRY_BACKOFF_MAX": 2.0,
+        "CONCURRENT_REQUESTS": 8,
+        "CONCURRENT_REQUESTS_PER_DOMAIN": 4,
+        "LOG_LEVEL": "WARNING",
+        "TELNETCONSOLE_ENABLED": False,
+    })
+    crawler = process.create_crawler(FixtureSpider)
+
+    def collect(item):
+        items.append(item)
+
+    crawler.signals.connect(collect, signal=scrapy.signals.item_scraped)
+    process.crawl(crawler, port=port, throttled=throttled, healthy=healthy)
+    started = time.perf_counter()
+    process.start()
+    stats = crawler.stats.get_stats()
+    healthy_at = [item["at"] for item in items if "/ok/" in item["url"]]
+    throttled_at = [item["at"] for item in items if "/throttled/" in item["url"]]
+    return {
+        "mode": mode,
+        "items": len(items),
+        "healthy_done_s": round(max(healthy_at, default=0), 2),
+        "throttled_done_s": round(max(throttled_at, default=0), 2),
+        "seconds": round(time.perf_counter() - started, 2),
+        "retries": stats.get("retry/count", 0),
+        "backoff_waits": stats.get("retry/backoff_waits", 0),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--throttled", type=int, default=3)
+    parser.add_argument("--healthy", type=int, default=40)
+    parser.add_argument("--throttle-hits", type=int, default=2, help="429s per throttled page before it succeeds")
+    parser.add_argument("--retry-after", type=int, default=1)
+    parser.add_argument("--latency-ms", type=float, default=50)
+    parser.add_argument("--mode", choices=MODES, help="Run one mode only")
+    parser.add_argument("--port", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode and args.port:
+        print(json.dumps(run_crawl(args.mode, args.port, args.throttled, args.healthy)))
+        return
+
+    server, hits = fixture_server(args.throttle_hits, args.retry_after, args.latency_ms / 1000)
+    results = []
+    for mode in [args.mode] if args.mode else MODES:
+        hits.clear()
+        output = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--mode", mode, "--port", str(server.server_port),
+             "--throttled", str(args.throttled), "--healthy", str(args.healthy)],
+            capture_output=True, text=True, check=True,
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        result["min_retry_gap_s"] = min_throttled_gap(hits)
+        results.append(result)
+    server.shutdown()
+
+    print(f"{args.throttled} throttled pages ({args.throttle_hits} x 429, Retry-After {args.retry_after}s), "
+          f"{args.healthy} healthy pages")
+    print(tabulate(results, headers="keys"))
+    if len(results) == 2:
+        print(f"✅ non-blocking retries: healthy host done "
+              f"{results[0]['healthy_done_s'] / max(results[1]['healthy_done_s'], 0.01):.1f}x sooner")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Offline spider parse benchmark and extraction regression check.
+
+Replays the saved pages listed in app/scraper/tests/fixtures/parse_fixtures.json
+(HTML files or HAR captures) through each spider's parse callback, without
+network or browser (see store_scrapers/replay.py). Reports per spider:
+pages/sec, items/sec, CPU ms per page, peak Python memory and field
+completeness of the items.
+
+Exits 1 when a fixture yields fewer items, requests or complete fields than
+its recorded `expect` block, when a callback raises, or (with --baseline)
+when a spider parses more than --max-slowdown slower than the saved baseline.
+
+Usage (from /backend):
+    uv run python scripts/benchmarks/bench_spider_parse.py
+    uv run python scripts/benchmarks/bench_spider_parse.py --spider bricodepot --repeat 50
+    uv run python scripts/benchmarks/bench_spider_parse.py --save-baseline /tmp/parse_baseline.json
+    uv run python scripts/benchmarks/bench_spider_parse.py --baseline /tmp/parse_baseline.json
+    uv run python scripts/benchmarks/bench_spider_parse.py --update-expectations
+"""
+import argparse
+import json
+import os
+import sys
+from collections import defaultdict
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+SCRAPER_DIR = os.path.join(BACKEND_DIR, "app", "scraper")
+sys.path.append(BACKEND_DIR)
+sys.path.append(SCRAPER_DIR)
+
+from tabulate import tabulate  # noqa: E402
+
+from store_scrapers.replay import completeness, load_fixtures, peak_memory, regressions, replay, summarize  # noqa: E402
+
+MANIFEST = os.path.join(SCRAPER_DIR, "tests", "fixtures", "parse_fixtures.json")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--manifest", default=MANIFEST)
+    parser.add_argument("--spider", help="Only this spider's fixtures")
+    parser.add_argument("--repeat", type=int, default=20, help="Replays per fixture for timing")
+    parser.add_argument("--baseline", help="Fail if a spider is slower than this saved baseline")
+    parser.add_argument("--save-baseline", help="Write this run's pages/sec per spider to a file")
+    parser.add_argument("--max-slowdown", type=float, default=0.25, help="Tolerated pages/sec drop vs baseline")
+    parser.add_argument("--update-expectations", action="store_true",
+                        help="Record this run's yield as the manifest's expectations")
+    args = parser.parse_args()
+
+    with open(args.manifest) as f:
+        manifest = json.load(f)
+    entries = [e for e in manifest["fixtures"] if not args.spider or e["spider"] == args.spider]
+
+    failures = []
+    per_spider = defaultdict(lambda: {"pages": 0, "items": [], "requests": 0, "wall": 0.0, "cpu": 0.0, "peak": 0})
+    for entry in entries:
+        fixtures = load_fixtures(entry, SCRAPER_DIR)
+        results = replay(fixtures, repeat=args.repeat)
+        peaks = peak_memory(fixtures)
+        summary = summarize(results)
+        if args.update_expectations:
+            entry["expect"] = {k: summary[k] for k in ("items", "requests", "completeness")}
+        failures += regressions(entry, summary)
+
+        stats = per_spider[entry["spider"]]
+        stats["pages"] += len(results)
+        stats["items"] += [item for result in results for item in result.items]
+        stats["requests"] += summary["requests"]
+        stats["wall"] += sum(result.wall_seconds for result in results)
+        stats["cpu"] += sum(result.cpu_seconds for result in results)
+        stats["peak"] = max(stats["peak"], *peaks.values())
+
+    rows = []
+    for spider, stats in sorted(per_spider.items()):
+        score = completeness(stats["items"])
+        rows.append({
+            "spider": spider,
+            "pages": stats["pages"],
+            "items": len(stats["items"]),
+            "requests": stats["requests"],
+            "pages_per_sec": round(stats["pages"] / stats["wall"], 1),
+            "items_per_sec": round(len(stats["items"]) / stats["wall"], 1),
+            "cpu_ms_per_page": round(stats["cpu"] * 1000 / stats["pages"], 2),
+            "peak_kib": stats["peak"] // 1024,
+            "completeness": f"{score:.0%}" if score is not None else "-",
+        })
+    print(f"{len(entries)} fixtures, {args.repeat} replays each")
+    print(tabulate(rows, headers="keys"))
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        for row in rows:
+            floor = baseline.get(row["spider"], 0) * (1 - args.max_slowdown)
+            if row["pages_per_sec"] < floor:
+                failures.append(f"{row['spider']}: {row['pages_per_sec']} pages/sec < {floor:.1f} (baseline)")
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump({row["spider"]: row["pages_per_sec"] for row in rows}, f, indent=2)
+        print(f"Baseline written to {args.save_baseline}")
+    if args.update_expectations:
+        with open(args.manifest, "w") as f:
+            json.dump(manifest, f, indent=2, ensure_ascii=False)
+            f.write("\n")
+        print(f"Expectations recorded in {args.manifest}")
+
+    if failures:
+        print("\n".join(f"❌ {failure}" for failure in failures))
+        sys.exit(1)
+    print("✅ No parse regressions")
+
+
+if __name__ == "__main__":
+    main()
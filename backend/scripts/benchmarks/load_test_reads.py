@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Load test the hot read endpoints: requests/sec and tail latency under concurrency.
+
+Run it twice against a local server, once per database stack, and compare:
+
+    # sync routers (default)
+    uv run uvicorn app.main:app --workers 1 --port 8000
+    uv run python scripts/benchmarks/load_test_reads.py --label sync
+
+    # async routers
+    ASYNC_DB_READS=true uv run uvicorn app.main:app --workers 1 --port 8000
+    uv run python scripts/benchmarks/load_test_reads.py --label async
+
+Options (from /backend):
+    --base-url http://localhost:8000  --concurrency 200  --duration 30
+    --path /v1/products/?limit=20 --path /v1/stores/   (repeatable; defaults below)
+
+Every client loops over the paths for `duration` seconds; non-2xx responses and
+transport errors are counted separately and excluded from the latency stats.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+from tabulate import tabulate
+
+DEFAULT_PATHS = [
+    "/v1/products/?limit=20",
+    "/v1/products/?limit=20&sort_by=price_asc",
+    "/v1/stores/?limit=20",
+    "/v1/products/1",
+    "/v1/products/1/reviews",
+]
+
+
+async def client_loop(client: httpx.AsyncClient, paths: list[str], deadline: float, stats: dict) -> None:
+    i = 0
+    while time.perf_counter() < deadline:
+        path = paths[i % len(paths)]
+        i += 1
+        start = time.perf_counter()
+        try:
+            response = await client.get(path)
+        except httpx.HTTPError:
+            stats["errors"] += 1
+            continue
+        elapsed = (time.perf_counter() - start) * 1000
+        if response.is_success:
+            stats["latencies"].append(elapsed)
+        else:
+            stats["failures"] += 1
+
+
+async def run(base_url: str, paths: list[str], concurrency: int, duration: float) -> dict:
+    stats = {"latencies": [], "failures": 0, "errors": 0}
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as client:
+        # Warm up connections and caches before measuring
+        await asyncio.gather(*(client.get(path) for path in paths))
+        started = time.perf_counter()
+        deadline = started + duration
+        await asyncio.gather(*(client_loop(client, paths, deadline, stats) for _ in range(concurrency)))
+        stats["elapsed"] = time.perf_counter() - started
+    return stats
+
+
+def percentile(values: list[float], pct: float) -> float:
+    return statistics.quantiles(values, n=100)[int(pct) - 1] if len(values) > 1 else (values or [0])[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--path", action="append", dest="paths", help="Path to request (repeatable)")
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds of measured load")
+    parser.add_argument("--label", default="run", help="Name of this run in the report (e.g. sync/async)")
+    args = parser.parse_args()
+
+    stats = asyncio.run(run(args.base_url, args.paths or DEFAULT_PATHS, args.concurrency, args.duration))
+    latencies = stats["latencies"]
+    print(tabulate(
+        [[
+            args.label,
+            args.concurrency,
+            len(latencies),
+            f"{len(latencies) / stats['elapsed']:.1f}",
+            f"{percentile(latencies, 50):.1f}",
+            f"{percentile(latencies, 95):.1f}",
+            f"{percentile(latencies, 99):.1f}",
+            f"{max(latencies, default=0):.1f}",
+            stats["failures"],
+            stats["errors"],
+        ]],
+        headers=["stack", "clients", "ok", "req/s", "p50 ms", "p95 ms", "p99 ms", "max ms", "non-2xx", "errors"],
+    ))
+
+
+if __name__ == "__main__":
+    main()
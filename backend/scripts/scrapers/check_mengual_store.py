@@ -4,7 +4,6 @@ Check if Mengual store exists and create it if needed
 """
 
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy import create_engine
 import sys
 import os
 from pathlib import Path
@@ -18,6 +17,7 @@ load_dotenv(root_env)
 sys.path.insert(0, '/home/rubenayla/repos/partle/backend')
 
 try:
+    from app.db.engines import get_engine
     from app.db.models import Store
 except ImportError:
     print("Could not import models")
@@ -29,7 +29,7 @@ def main():
     if not DATABASE_URL:
         print("Error: DATABASE_URL environment variable is required")
         sys.exit(1)
-    engine = create_engine(DATABASE_URL)
+    engine = get_engine("scripts")
     SessionLocal = sessionmaker(bind=engine, autocommit=False, autoflush=False)
     db = SessionLocal()
     
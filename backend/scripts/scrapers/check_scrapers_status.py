@@ -4,7 +4,7 @@ Check all scrapers and database status
 """
 
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy import create_engine, func
+from sqlalchemy import func
 import sys
 import os
 from pathlib import Path
@@ -18,6 +18,7 @@ load_dotenv(root_env)
 sys.path.insert(0, '/home/rubenayla/repos/partle/backend')
 
 try:
+    from app.db.engines import get_engine
     from app.db.models import Store, Product
 except ImportError:
     print("Could not import models")
@@ -29,7 +30,7 @@ def main():
     if not DATABASE_URL:
         print("Error: DATABASE_URL environment variable is required")
         sys.exit(1)
-    engine = create_engine(DATABASE_URL)
+    engine = get_engine("scripts")
     SessionLocal = sessionmaker(bind=engine, autocommit=False, autoflush=False)
     db = SessionLocal()
     
@@ -61,7 +62,7 @@ def main():
         print(f"  - Total products: {total_products}")
 
         # Check products with images
-        products_with_images = db.query(Product).filter(Product.image_data.isnot(None)).count()
+        products_with_images = db.query(Product).filter(Product.has_image).count()
         print(f"  - Products with images: {products_with_images}")
         
         # Show latest 5 products added
@@ -70,7 +71,7 @@ def main():
         for product in latest_products:
             store = db.query(Store).filter(Store.id == product.store_id).first()
             store_name = store.name if store else "Unknown"
-            image_status = "✓ Image" if product.image_data else "✗ No image"
+            image_status = "✓ Image" if product.has_image else "✗ No image"
             print(f"  - {product.name} ({store_name}) - €{product.price} - {image_status}")
             
     except Exception as e:
@@ -10,17 +10,21 @@ import subprocess
 import psutil
 import time
 import os
+import sys
 from datetime import datetime
 from pathlib import Path
 from typing import Dict, List, Optional, Any
 from dataclasses import dataclass, asdict
-from sqlalchemy import create_engine, text
+from sqlalchemy import text
 import mcp.types as types
 from mcp.server.models import InitializationOptions
 from mcp.server import NotificationOptions, Server
 from mcp.server.stdio import stdio_server
 from dotenv import load_dotenv
 
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+from app.db.engines import get_engine  # noqa: E402
+
 # Load environment variables from root .env
 root_env = Path(__file__).parent.parent / '.env'
 load_dotenv(root_env)
@@ -61,7 +65,7 @@ class ScraperMonitor:
         self.db_url = os.getenv("DATABASE_URL")
         if not self.db_url:
             raise ValueError("DATABASE_URL environment variable is required")
-        self.engine = create_engine(self.db_url)
+        self.engine = get_engine("mcp")
         self.scraper_processes: Dict[str, subprocess.Popen] = {}
         
     async def get_scraper_status(self, scraper_name: str) -> ScraperStatus:
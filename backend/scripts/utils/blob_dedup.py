@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Report how much storage image deduplication saves, and keep the blob
+reference counts honest.
+
+--recount rebuilds blobs.refcount from the image columns (after raw SQL,
+or once after the add_blob_refcounts migration to fill in sizes). --gc
+deletes blobs no row has referenced for --grace-hours, with their
+thumbnails; add --dry-run to only list what would go.
+
+Usage (from /backend):
+    uv run python scripts/utils/blob_dedup.py                # savings report
+    uv run python scripts/utils/blob_dedup.py --recount [--check]
+    uv run python scripts/utils/blob_dedup.py --gc [--grace-hours 24] [--dry-run]
+"""
+import argparse
+import os
+import sys
+from datetime import timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from app.db.session import SessionLocal
+from app.storage.dedup import collect_orphan_blobs, dedup_report, recount_blobs
+
+
+def mb(size: int) -> str:
+    return f"{size / 1024 / 1024:.1f} MB"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--recount", action="store_true", help="Rebuild refcounts from the image columns")
+    parser.add_argument("--check", action="store_true", help="With --recount: report drift, write nothing")
+    parser.add_argument("--gc", action="store_true", help="Delete unreferenced blobs")
+    parser.add_argument("--grace-hours", type=float, default=24)
+    parser.add_argument("--dry-run", action="store_true", help="With --gc: list, delete nothing")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        if args.recount:
+            result = recount_blobs(db, check_only=args.check)
+            print(f"{'⚠️ ' if args.check and result['corrected'] else '✅ '}{result['blobs']} blobs, "
+                  f"{result['corrected']} counts {'out of sync' if args.check else 'corrected'}, "
+                  f"{result['sized']} sizes filled in")
+            if args.check:
+                sys.exit(1 if result["corrected"] else 0)
+        if args.gc:
+            result = collect_orphan_blobs(db, timedelta(hours=args.grace_hours), dry_run=args.dry_run)
+            verb = 'Would delete' if args.dry_run else 'Deleted'
+            print(f"✅ {verb} {result['blobs']} orphan blobs ({mb(result['bytes'])})")
+
+        report = dedup_report(db)
+        print(f"✅ {report['references']} image references -> {report['blobs']} stored blobs")
+        print(f"   referenced {mb(report['referenced_bytes'])}, stored {mb(report['stored_bytes'])}, "
+              f"saved {mb(report['saved_bytes'])} ({report['saved_ratio']:.0%})")
+        if report["unsized_blobs"]:
+            print(f"   {report['unsized_blobs']} blobs have no size yet: run with --recount")
+        for blob in report["most_shared"]:
+            print(f"   {blob['key'][:16]}  x{blob['references']}  {mb(blob['size'] or 0)}")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
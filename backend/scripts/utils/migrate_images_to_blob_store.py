@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+Move product images, store logos and profile pictures out of Postgres bytea
+columns into the content-addressed blob store (BLOB_STORAGE_DIR).
+
+Safe to run on a live database and to re-run: only rows without a digest are
+processed, a batch at a time. Use --keep-bytea for a dry first pass that
+leaves the original bytes in place, and --restore to copy everything back
+before downgrading past the blob-store migration.
+
+Usage (from /backend):
+    uv run python scripts/utils/migrate_images_to_blob_store.py [--batch-size 100] [--keep-bytea]
+    uv run python scripts/utils/migrate_images_to_blob_store.py --restore
+"""
+import argparse
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from app.db.session import SessionLocal
+from app.storage.migration import move_images_to_blob_store, restore_images_from_blob_store
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Move bytea images into the blob store")
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument("--keep-bytea", action="store_true", help="Copy without clearing the bytea columns")
+    parser.add_argument("--restore", action="store_true", help="Copy blob-store images back into bytea")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        if args.restore:
+            for table, rows in restore_images_from_blob_store(db, args.batch_size).items():
+                print(f"✅ {table}: restored {rows} images into bytea")
+        else:
+            report = move_images_to_blob_store(db, args.batch_size, keep_bytea=args.keep_bytea)
+            for table, counts in report.items():
+                print(f"✅ {table}: moved {counts['rows']} images ({counts['bytes'] / 1024 / 1024:.1f} MB)")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Backfill or repair the product_rating_stats table from product_reviews.
+
+Usage (from /backend):
+    uv run python scripts/utils/rebuild_rating_stats.py          # rebuild everything
+    uv run python scripts/utils/rebuild_rating_stats.py --check  # report drift, write nothing
+"""
+import argparse
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from sqlalchemy import func
+
+from app.db.models import ProductRatingStats, ProductReview
+from app.db.session import SessionLocal
+from app.services.rating_stats import rebuild_all_rating_stats
+
+
+def check(db) -> int:
+    """Print products whose stored review count disagrees with product_reviews."""
+    actual = dict(
+        db.query(ProductReview.product_id, func.count(ProductReview.id))
+        .group_by(ProductReview.product_id)
+        .all()
+    )
+    stored = dict(db.query(ProductRatingStats.product_id, ProductRatingStats.review_count).all())
+
+    drift = 0
+    for product_id in sorted(set(actual) | set(stored)):
+        if actual.get(product_id, 0) != stored.get(product_id, 0):
+            drift += 1
+            print(f"product {product_id}: stored {stored.get(product_id, 0)} reviews, "
+                  f"actual {actual.get(product_id, 0)}")
+    print(f"{drift} products out of sync")
+    return drift
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--check", action="store_true", help="Only report products out of sync")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        if args.check:
+            sys.exit(1 if check(db) else 0)
+        total = rebuild_all_rating_stats(db)
+        print(f"✅ Rebuilt rating stats for {total} products")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -2,10 +2,13 @@
 """Remove all products with example.com URLs from the database."""
 
 import os
+import sys
 from pathlib import Path
-from sqlalchemy import create_engine, text
+from sqlalchemy import text
 from dotenv import load_dotenv
 
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
 # Load environment variables from root .env
 root_env = Path(__file__).parent.parent / '.env'
 load_dotenv(root_env)
@@ -17,7 +20,8 @@ if not DATABASE_URL:
 
 def main():
     """Main function to check and remove example.com products."""
-    engine = create_engine(DATABASE_URL)
+    from app.db.engines import get_engine
+    engine = get_engine("scripts")
     
     with engine.connect() as conn:
         # First, check how many products have example.com URLs
@@ -0,0 +1,30 @@
+#!/usr/bin/env python3
+"""
+Reroll products.random_key so sort_by=random and store pages show a new shuffle.
+
+Seeds keep a feed stable between rotations; run this periodically (e.g. a
+nightly cron job) to change what every seed returns.
+
+Usage (from /backend):
+    uv run python scripts/utils/rotate_random_keys.py
+"""
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from app.db.session import SessionLocal
+from app.services.shuffle import rotate_random_keys
+
+
+def main():
+    db = SessionLocal()
+    try:
+        total = rotate_random_keys(db)
+        print(f"✅ Rotated random keys of {total} products")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
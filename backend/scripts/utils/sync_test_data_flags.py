@@ -0,0 +1,30 @@
+#!/usr/bin/env python3
+"""
+Recompute products.is_test_data from the TEST_DATA_TAGS tags.
+
+ORM tag writes keep the flag in sync on their own; run this after raw SQL
+tag changes, tag renames or a database restore.
+
+Usage (from /backend):
+    uv run python scripts/utils/sync_test_data_flags.py
+"""
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from app.db.session import SessionLocal
+from app.services.test_data_flags import sync_test_data_flags
+
+
+def main():
+    db = SessionLocal()
+    try:
+        changed = sync_test_data_flags(db)
+        print(f"✅ Updated is_test_data on {changed} products")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
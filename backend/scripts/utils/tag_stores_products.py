@@ -3,12 +3,12 @@ import os
 import sys
 from pathlib import Path
 from dotenv import load_dotenv
-from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 from urllib.parse import quote_plus
 
 sys.path.append(str(Path(__file__).parent.parent.parent))
 
+from app.db.engines import create_engine_for
 from app.db.models import Store, Product, Tag
 
 # Try loading from backend/.env first, then root .env
@@ -43,7 +43,7 @@ if '@' in DATABASE_URL:
             DATABASE_URL = f"{scheme_user}:{encoded_password}@{host_and_db}"
 
 print(f"Connecting to database...")
-engine = create_engine(DATABASE_URL)
+engine = create_engine_for("scripts", DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 
@@ -1,14 +1,16 @@
 import time
 import os
 from dotenv import load_dotenv
-from sqlalchemy import create_engine, text
+from sqlalchemy import text
 from app.db.models import Product, User
 from sqlalchemy.orm import sessionmaker
 
 load_dotenv()
 
 # Connect to database
-engine = create_engine(os.getenv("DATABASE_URL"))
+from app.db.engines import get_engine  # noqa: E402  (after load_dotenv)
+
+engine = get_engine("scripts")
 Session = sessionmaker(bind=engine)
 session = Session()
 
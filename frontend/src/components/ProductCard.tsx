@@ -11,6 +11,7 @@ interface Product {
   currency: string | null;
   description: string | null;
   image_url: string | null;
+  image_srcset?: string | null;
   store_id: number | null;
   store?: {
     id: number;
@@ -41,6 +42,9 @@ export default function ProductCard({ product }: ProductCardProps) {
         {imageSrc ? (
           <img
             src={imageSrc}
+            srcSet={product.image_srcset || undefined}
+            sizes="(min-width: 1024px) 25vw, (min-width: 640px) 50vw, 100vw"
+            loading="lazy"
             alt={product.name}
             className="w-full h-48 object-cover"
             referrerPolicy="no-referrer"
@@ -54,14 +54,27 @@ export default function Products(): JSX.Element {
     description: '',
   });
 
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+
   useEffect(() => {
     if (id) {
       api.get(`/v1/products/store/${id}`).then((res) => {
         setProducts(res.data as Product[]);
+        setNextCursor(res.headers['x-next-cursor'] ?? null);
       });
     }
   }, [id]);
 
+  /**
+   * Fetch the next page of the store's (shuffled) product list
+   */
+  const loadMore = async (): Promise<void> => {
+    if (!id || !nextCursor) return;
+    const res = await api.get(`/v1/products/store/${id}`, { params: { cursor: nextCursor } });
+    setProducts(prev => [...prev, ...(res.data as Product[])]);
+    setNextCursor(res.headers['x-next-cursor'] ?? null);
+  };
+
   /**
    * Handle form input changes
    */
@@ -143,6 +156,15 @@ export default function Products(): JSX.Element {
         ))}
       </ul>
 
+      {nextCursor && (
+        <button
+          onClick={loadMore}
+          className="bg-transparent text-foreground hover:bg-background border border-gray-300 dark:border-gray-600 px-3 py-1 rounded mt-4"
+        >
+          Load more
+        </button>
+      )}
+
       {/* Product Creation Modal */}
       {open && (
         <form
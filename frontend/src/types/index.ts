@@ -65,6 +65,8 @@ export interface Store {
   logo_filename?: string;
   /** Store logo content type (when stored in database) */
   logo_content_type?: string;
+  /** Versioned logo endpoint path (immutable, cache-friendly) */
+  logo_url?: string | null;
   /** When the store was created */
   created_at?: string;
   /** When the store was last updated */
@@ -93,6 +95,8 @@ export interface Product {
   image_filename?: string;
   /** Product image content type (when stored in database) */
   image_content_type?: string;
+  /** Resized variants of the product image, for <img srcset> */
+  image_srcset?: string | null;
   /** URL to the product page on the store's website */
   url?: string;
   /** Store where this product is sold */
@@ -43,7 +43,8 @@ export function getStoreLogoSrc(store: Store): string | null {
   // If store has logo data stored in database, use API endpoint
   if (store.logo_filename && store.logo_content_type) {
     const apiBase = import.meta.env.VITE_API_BASE || 'http://localhost:8001';
-    return `${apiBase}/v1/stores/${store.id}/logo`;
+    // Prefer the versioned URL: browsers cache it without revalidating
+    return `${apiBase}${store.logo_url || `/v1/stores/${store.id}/logo`}`;
   }
 
   return null;